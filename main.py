@@ -5,11 +5,11 @@ import os
 from dotenv import load_dotenv
 
 from steward.bot.bot import Bot
-from steward.data.repository import JsonFileStorage, Repository
+from steward.data.repository import JournalFileStorage, Repository
 from steward.features._special.ai_router import AiRouterHandler
 from steward.features._special.help import HelpFeature
 from steward.features.logs import LogsFeature
-from steward.features.registry import all_features
+from steward.features.registry import lazy_features
 from steward.handlers.handler import Handler
 from steward.logging.configure import configure_logging
 from steward.metrics import MetricsEngine, NoopMetricsEngine, PrometheusMetricsEngine
@@ -18,7 +18,7 @@ logger: logging.Logger
 
 
 def get_handlers(log_file: str | None) -> list[Handler]:
-    handlers: list[Handler] = all_features()
+    handlers: list[Handler] = lazy_features()
     if log_file is not None:
         handlers.append(LogsFeature(log_file))
     handlers.append(AiRouterHandler(handlers))
@@ -41,7 +41,12 @@ def main():
 
     configure_logging(token, args.log_file, args.debug, args.prod)
 
-    repository = Repository(JsonFileStorage("db.json"))
+    # db.json в контейнере примонтирован отдельным файлом, журнал кладём в
+    # смонтированный каталог data/, чтобы он переживал пересоздание контейнера.
+    repository = Repository(
+        JournalFileStorage("db.json", journal_path="data/db.json.journal"),
+        save_window=float(os.environ.get("DB_SAVE_WINDOW_SECONDS", "1.0")),
+    )
     handlers = get_handlers(args.log_file)
 
     metrics_engine: MetricsEngine
@@ -41,6 +41,7 @@ from steward.api.auth import (
     validate_webapp_init_data,
 )
 from steward.data.repository import Repository
+from steward.helpers import http_clients
 from steward.helpers.avatars import (
     cached_avatar_path,
     has_cached_avatar,
@@ -331,19 +332,19 @@ async def handle_fetch_url(request: web.Request):
 
     timeout = aiohttp.ClientTimeout(total=30)
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, allow_redirects=True) as resp:
-                if resp.status != 200:
-                    return web.json_response({"error": f"HTTP {resp.status}"}, status=400)
-                if resp.content_length is not None and resp.content_length > MAX_FILE_BYTES:
+        session = http_clients.session("fuck-fetch")
+        async with session.get(url, allow_redirects=True, timeout=timeout) as resp:
+            if resp.status != 200:
+                return web.json_response({"error": f"HTTP {resp.status}"}, status=400)
+            if resp.content_length is not None and resp.content_length > MAX_FILE_BYTES:
+                return web.json_response({"error": "file too large"}, status=413)
+            buf = bytearray()
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                buf.extend(chunk)
+                if len(buf) > MAX_FILE_BYTES:
                     return web.json_response({"error": "file too large"}, status=413)
-                buf = bytearray()
-                async for chunk in resp.content.iter_chunked(64 * 1024):
-                    buf.extend(chunk)
-                    if len(buf) > MAX_FILE_BYTES:
-                        return web.json_response({"error": "file too large"}, status=413)
-                content_type = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
-                final_url = str(resp.url)
+            content_type = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+            final_url = str(resp.url)
     except aiohttp.ClientError as e:
         return web.json_response({"error": f"fetch failed: {e}"}, status=400)
     except asyncio.TimeoutError:
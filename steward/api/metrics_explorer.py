@@ -19,6 +19,7 @@ from aiohttp import web
 
 from steward.api.auth import session_user_id
 from steward.data.repository import Repository
+from steward.helpers import http_clients
 from steward.metrics.base import MetricsEngine
 
 logger = logging.getLogger(__name__)
@@ -551,18 +552,18 @@ async def handle_metrics_vm_proxy(request: web.Request):
 
     vm_url = environ.get("VICTORIAMETRICS_URL", "http://victoriametrics:8428")
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{vm_url}/api/v1/{vm_path}",
-                params=request.query,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as resp:
-                body = await resp.read()
-                return web.Response(
-                    body=body,
-                    status=resp.status,
-                    content_type="application/json",
-                )
+        session = http_clients.session("victoriametrics")
+        async with session.get(
+            f"{vm_url}/api/v1/{vm_path}",
+            params=request.query,
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
+            body = await resp.read()
+            return web.Response(
+                body=body,
+                status=resp.status,
+                content_type="application/json",
+            )
     except (aiohttp.ClientError, asyncio.TimeoutError):
         logger.exception("VM proxy request failed: %s", vm_path)
         return web.json_response({"error": "victoriametrics unreachable"}, status=503)
@@ -13,7 +13,9 @@ from steward.data.models.feature_request import (
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 from steward.data.repository import Repository
+from steward.helpers import http_clients
 from steward.helpers.webapp import get_webapp_deep_link
+from steward.api import ws_fanout
 from steward.api.metrics_explorer import (
     handle_metrics_catalog,
     handle_metrics_range,
@@ -410,11 +412,11 @@ def _casino_achievements(total_games: int, total_wins: int, chess_games: int, ch
 
 
 async def _query_stats(metrics: MetricsEngine, user_id: str, range_str: str) -> dict:
-    msgs, reacts, vids = (
-        await metrics.query(_user_promql("bot_messages_total", user_id, range_str, action_type="chat")),
-        await metrics.query(_user_promql("bot_messages_total", user_id, range_str, action_type="reaction")),
-        await metrics.query(_user_promql("bot_downloads_total", user_id, range_str)),
-    )
+    msgs, reacts, vids = await metrics.query_many([
+        _user_promql("bot_messages_total", user_id, range_str, action_type="chat"),
+        _user_promql("bot_messages_total", user_id, range_str, action_type="reaction"),
+        _user_promql("bot_downloads_total", user_id, range_str),
+    ])
     return {
         "messages": _extract_val(msgs),
         "reactions": _extract_val(reacts),
@@ -487,7 +489,8 @@ async def handle_profile_history(request: web.Request):
 
     now = datetime.datetime.now(MSK)
     days_count = 30 if period == "month" else 7
-    history = []
+    labels = []
+    queries = []
 
     for days_ago in range(days_count - 1, -1, -1):
         day = now - timedelta(days=days_ago)
@@ -505,18 +508,24 @@ async def handle_profile_history(request: web.Request):
             off = f" offset {offset}" if offset else ""
             return f"sum(increase({metric}{{{lf}}}[{r}]{off}))"
 
-        msgs = await metrics.query(build("bot_messages_total", offset_str, action_type="chat"))
-        reacts = await metrics.query(build("bot_messages_total", offset_str, action_type="reaction"))
-        vids = await metrics.query(build("bot_downloads_total", offset_str))
-
-        label = day_start.strftime("%d.%m") if period == "month" else WEEKDAYS[day_start.weekday()]
+        queries += [
+            build("bot_messages_total", offset_str, action_type="chat"),
+            build("bot_messages_total", offset_str, action_type="reaction"),
+            build("bot_downloads_total", offset_str),
+        ]
+        labels.append(day_start.strftime("%d.%m") if period == "month" else WEEKDAYS[day_start.weekday()])
 
-        history.append({
+    # Все дни — одним пакетом, а не по три последовательных запроса на день
+    results = await metrics.query_many(queries)
+    history = [
+        {
             "label": label,
             "messages": _extract_val(msgs),
             "reactions": _extract_val(reacts),
             "videos": _extract_val(vids),
-        })
+        }
+        for label, (msgs, reacts, vids) in zip(labels, zip(*[iter(results)] * 3))
+    ]
 
     return web.json_response(history)
 
@@ -533,23 +542,35 @@ async def handle_poker_stats(request: web.Request):
             lf = ", ".join(f'{k}="{v}"' for k, v in flt.items())
             return f"sum(increase({metric}{{{lf}}}[365d]))"
 
-        hands_s = await metrics.query(pq("poker_hands_total"))
-        hands_won_s = await metrics.query(pq("poker_hands_total", result="win"))
-        hands_fold_s = await metrics.query(pq("poker_hands_total", result="fold"))
-        hands_lost_s = await metrics.query(pq("poker_hands_total", result="loss"))
-        games_s = await metrics.query(pq("poker_games_total"))
-        games_won_s = await metrics.query(pq("poker_games_won_total"))
-        chips_won_s = await metrics.query(pq("poker_chips_won_total"))
-        chips_lost_s = await metrics.query(pq("poker_chips_lost_total"))
-
         combo_names = [
             "High Card", "Pair", "Two Pair", "Three of a Kind",
             "Straight", "Flush", "Full House", "Four of a Kind", "Straight Flush",
         ]
+        (
+            hands_s, hands_won_s, hands_fold_s, hands_lost_s,
+            games_s, games_won_s, chips_won_s, chips_lost_s,
+            *combo_results,
+        ) = await metrics.query_many([
+            pq("poker_hands_total"),
+            pq("poker_hands_total", result="win"),
+            pq("poker_hands_total", result="fold"),
+            pq("poker_hands_total", result="loss"),
+            pq("poker_games_total"),
+            pq("poker_games_won_total"),
+            pq("poker_chips_won_total"),
+            pq("poker_chips_lost_total"),
+            *(
+                q
+                for cn in combo_names
+                for q in (
+                    pq("poker_combinations_total", combination=cn),
+                    pq("poker_combinations_won_total", combination=cn),
+                )
+            ),
+        ])
+
         combos = []
-        for cn in combo_names:
-            collected_s = await metrics.query(pq("poker_combinations_total", combination=cn))
-            won_s = await metrics.query(pq("poker_combinations_won_total", combination=cn))
+        for cn, collected_s, won_s in zip(combo_names, combo_results[::2], combo_results[1::2]):
             collected = _extract_val(collected_s)
             won = _extract_val(won_s)
             if collected > 0:
@@ -694,8 +715,6 @@ import re
 from os import environ
 from urllib.parse import parse_qsl
 
-from aiohttp import ClientSession
-
 from steward.delayed_action.reminder import ReminderDelayedAction, ReminderGenerator, CompletedReminder
 from steward.data.models.birthday import Birthday
 from steward.features.timezone import (
@@ -767,7 +786,7 @@ def _casino_session_from_cookie(request: web.Request) -> dict | None:
 
 
 def _find_user(repository: Repository, uid: int):
-    return next((u for u in repository.db.users if u.id == uid), None)
+    return repository.get_user(uid)
 
 
 def _get_or_create_user(repository: Repository, uid: int, username: str = ""):
@@ -870,7 +889,7 @@ async def handle_casino_event(request: web.Request):
         delta = win - bet
         user.monkeys = max(0, user.monkeys + delta)
         _casino_last_spin[user_id] = now
-        await repository.save()
+        await repository.flush("users")
 
         labels = {"user_id": user_id, "user_name": user_name, "game": game}
         result = "win" if win > 0 else "loss"
@@ -918,7 +937,7 @@ async def handle_casino_bonus(request: web.Request):
                     CASINO_BIRTHDAY_BONUS,
                 )
 
-        await repository.save()
+        await repository.flush("users")
         return web.json_response({
             "ok": True,
             "monkeys": user.monkeys,
@@ -943,18 +962,28 @@ async def handle_casino_stats(request: web.Request):
             lf = ", ".join(f'{k}="{v}"' for k, v in flt.items())
             return f"sum(increase({metric}{{{lf}}}[365d]))"
 
-        games_won_s = await metrics.query(pq("casino_games_total", result="win"))
-        games_lost_s = await metrics.query(pq("casino_games_total", result="loss"))
-        won_s = await metrics.query(pq("casino_monkeys_won_total"))
-        bet_s = await metrics.query(pq("casino_monkeys_bet_total"))
-        bonus_s = await metrics.query(pq("casino_bonus_total"))
+        game_ids = sorted(_CASINO_STATS_GAME_IDS)
+        games_won_s, games_lost_s, won_s, bet_s, bonus_s, *per_game_results = await metrics.query_many([
+            pq("casino_games_total", result="win"),
+            pq("casino_games_total", result="loss"),
+            pq("casino_monkeys_won_total"),
+            pq("casino_monkeys_bet_total"),
+            pq("casino_bonus_total"),
+            *(
+                q
+                for gid in game_ids
+                for q in (
+                    pq("casino_games_total", game=gid, result="win"),
+                    pq("casino_games_total", game=gid, result="loss"),
+                    pq("casino_monkeys_won_total", game=gid),
+                    pq("casino_monkeys_bet_total", game=gid),
+                )
+            ),
+        ])
 
         per_game = []
-        for gid in sorted(_CASINO_STATS_GAME_IDS):
-            gw = _extract_val(await metrics.query(pq("casino_games_total", game=gid, result="win")))
-            gl = _extract_val(await metrics.query(pq("casino_games_total", game=gid, result="loss")))
-            gmon = _extract_val(await metrics.query(pq("casino_monkeys_won_total", game=gid)))
-            gbet = _extract_val(await metrics.query(pq("casino_monkeys_bet_total", game=gid)))
+        for i, gid in enumerate(game_ids):
+            gw, gl, gmon, gbet = (_extract_val(r) for r in per_game_results[4 * i:4 * i + 4])
             if gw + gl > 0:
                 per_game.append({"game": gid, "gamesWon": gw, "gamesLost": gl, "won": gmon, "bet": gbet})
 
@@ -1145,7 +1174,7 @@ async def handle_race_init(request: web.Request):
     metrics: MetricsEngine = request.app["metrics"]
     uid = int(sess["user_id"])
     if _settle_past_races(repository, metrics):
-        await repository.save()
+        await repository.flush("users")
     user = _find_user(repository, uid)
     now_s = _time.time()
     _, seed, _, _, _ = _race_info(now_s)
@@ -1194,7 +1223,7 @@ async def handle_race_bet(request: web.Request):
         if key not in _race_bets:
             _race_bets[key] = []
         _race_bets[key].append(bet_entry)
-        await repository.save()
+        await repository.flush("users")
         return web.json_response({
             "ok": True,
             "monkeys": user.monkeys,
@@ -1214,7 +1243,7 @@ async def handle_race_bets(request: web.Request):
     metrics: MetricsEngine = request.app["metrics"]
     uid = int(sess["user_id"])
     if _settle_past_races(repository, metrics):
-        await repository.save()
+        await repository.flush("users")
     now_s = _time.time()
     period, _, round_num, phase, offset = _race_info(now_s)
     key = (period, round_num)
@@ -1385,21 +1414,21 @@ async def handle_exchange(request: web.Request):
         },
     ]
 
-    async with ClientSession() as session:
-        for api in apis:
-            try:
-                async with session.get(api["url"], params=api["params"]) as resp:
-                    data = await resp.json()
-                    rate = api["extract"](data)
-                    return web.json_response({
-                        "result": round(rate * amount, 6),
-                        "rate": round(rate, 6),
-                        "from": from_currency,
-                        "to": to_currency,
-                        "amount": amount,
-                    })
-            except Exception:
-                continue
+    session = http_clients.session("exchange-rates")
+    for api in apis:
+        try:
+            async with session.get(api["url"], params=api["params"]) as resp:
+                data = await resp.json()
+                rate = api["extract"](data)
+                return web.json_response({
+                    "result": round(rate * amount, 6),
+                    "rate": round(rate, 6),
+                    "from": from_currency,
+                    "to": to_currency,
+                    "amount": amount,
+                })
+        except Exception:
+            continue
 
     return web.json_response({"error": f"Конвертация {from_currency} → {to_currency} невозможна"}, status=404)
 
@@ -1419,28 +1448,28 @@ async def handle_translate(request: web.Request):
     if not translate_key:
         return web.json_response({"error": "translation service not configured"}, status=503)
 
-    async with ClientSession() as session:
-        async with session.post(
-            "https://translate.api.cloud.yandex.net/translate/v2/translate",
-            json={
-                "texts": [text],
-                "targetLanguageCode": to_lang,
-                "sourceLanguageCode": from_lang,
-            },
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Api-Key {translate_key}",
-            },
-        ) as resp:
-            data = await resp.json()
-            if "message" in data and "unsupported" in data.get("message", ""):
-                return web.json_response({"error": f"Язык «{to_lang}» не поддерживается"}, status=400)
-            try:
-                translated = data["translations"][0]["text"]
-                detected = data["translations"][0].get("detectedLanguageCode", from_lang)
-                return web.json_response({"text": translated, "detectedLanguage": detected})
-            except (KeyError, IndexError):
-                return web.json_response({"error": "translation failed"}, status=500)
+    session = http_clients.session("yandex-translate")
+    async with session.post(
+        "https://translate.api.cloud.yandex.net/translate/v2/translate",
+        json={
+            "texts": [text],
+            "targetLanguageCode": to_lang,
+            "sourceLanguageCode": from_lang,
+        },
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Api-Key {translate_key}",
+        },
+    ) as resp:
+        data = await resp.json()
+        if "message" in data and "unsupported" in data.get("message", ""):
+            return web.json_response({"error": f"Язык «{to_lang}» не поддерживается"}, status=400)
+        try:
+            translated = data["translations"][0]["text"]
+            detected = data["translations"][0].get("detectedLanguageCode", from_lang)
+            return web.json_response({"text": translated, "detectedLanguage": detected})
+        except (KeyError, IndexError):
+            return web.json_response({"error": "translation failed"}, status=500)
 
 
 async def handle_timezone(request: web.Request):
@@ -1789,6 +1818,15 @@ async def handle_chat_stats(request: web.Request):
     except ValueError:
         period_enum = StatsPeriod.DAY
 
+    metric_stats = [stat for stat in STATS if not stat.is_db]
+    try:
+        results = await metrics.query_many(
+            _promql(stat, scope_enum, period_enum, chat_id, top_n=top_n) for stat in metric_stats
+        )
+    except Exception:
+        results = [[] for _ in metric_stats]
+    metric_results = iter(results)
+
     sections = []
     for stat in STATS:
         if stat.is_db:
@@ -1797,7 +1835,7 @@ async def handle_chat_stats(request: web.Request):
             sections.append({"label": stat.label, "items": items})
         else:
             try:
-                result = await metrics.query(_promql(stat, scope_enum, period_enum, chat_id, top_n=top_n))
+                result = next(metric_results)
                 items = [
                     {"name": s.labels.get("user_name", s.labels.get("user_id", "?")), "value": int(s.value) if s.value == int(s.value) else round(s.value, 1)}
                     for s in result
@@ -2076,9 +2114,9 @@ async def handle_bills_list(request: web.Request):
     scope = request.query.get("scope", "")
     bills = _bills_visible_for_user(repository, int(tg_user["id"]), scope == "all")
     payments = repository.db.bill_payments_v2
-    from steward.helpers.bills_money import compute_bill_balances
+    from steward.helpers.bills_ledger import ledger_for
 
-    balances, credits = compute_bill_balances(bills, payments)
+    balances, credits = ledger_for(repository).balances(bills)
     person = repository.get_bill_person_by_telegram_id(int(tg_user["id"]))
     person_id = person.id if person else None
     return web.json_response({
@@ -2111,10 +2149,10 @@ async def handle_bills_get(request: web.Request):
     ok, err = _check_bill_access(bill, int(tg_user["id"]), repository, "view")
     if not ok:
         return web.json_response({"error": err}, status=403)
-    from steward.helpers.bills_money import compute_bill_balances
+    from steward.helpers.bills_ledger import ledger_for
 
     payments = repository.db.bill_payments_v2
-    balances, _ = compute_bill_balances(repository.db.bills_v2, payments)
+    balances, _ = ledger_for(repository).balances([bill])
     debts = None if bill.closed else balances.get(bill.id, {})
     return web.json_response(_serialize_bill_v2(bill, payments, debts))
 
@@ -3179,7 +3217,7 @@ async def handle_bills_payment_create(request: web.Request):
 
     from steward.delayed_action.bill_payment_reminder import schedule_payment_reminder
     schedule_payment_reminder(repository, payment.id)
-    await repository.save()
+    await repository.flush()
     return web.json_response(_serialize_payment_v2(payment))
 
 
@@ -3213,7 +3251,7 @@ async def handle_bills_payment_received(request: web.Request):
         initiated_chat_id=data.get("initiated_chat_id"),
     )
     repository.db.bill_payments_v2.append(payment)
-    await repository.save()
+    await repository.flush()
     return web.json_response(_serialize_payment_v2(payment))
 
 
@@ -3270,7 +3308,7 @@ async def handle_bills_credit_write_off(request: web.Request):
         is_refund=True,
     )
     repository.db.bill_payments_v2.append(payment)
-    await repository.save()
+    await repository.flush()
     return web.json_response({
         "payment": _serialize_payment_v2(payment),
         "written_off_minor": amount_minor,
@@ -3295,7 +3333,7 @@ async def handle_bills_payment_confirm(request: web.Request):
         return web.json_response({"error": "only creditor can confirm"}, status=403)
 
     payment.status = PaymentStatus.CONFIRMED
-    await repository.save()
+    await repository.flush()
     return web.json_response(_serialize_payment_v2(payment))
 
 
@@ -3316,7 +3354,7 @@ async def handle_bills_payment_reject(request: web.Request):
         return web.json_response({"error": "only creditor can reject"}, status=403)
 
     payment.status = PaymentStatus.REJECTED
-    await repository.save()
+    await repository.flush()
     return web.json_response(_serialize_payment_v2(payment))
 
 
@@ -3350,6 +3388,7 @@ async def start_api_server(repository: Repository, metrics: MetricsEngine, port:
     app["metrics"] = metrics
     app["bot"] = bot
     app["handlers"] = handlers or []
+    ws_fanout.set_metrics(metrics)
 
     if bot:
         async def _on_room_cleanup(room_id):
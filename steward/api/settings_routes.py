@@ -292,17 +292,14 @@ async def handle_permissions(request: web.Request):
     handlers = request.app.get("handlers") or []
     seen: dict[str, list[dict]] = {}
     for h in handlers:
-        feature_name = h.__class__.__name__
+        feature_name = h.feature_class.__name__
         cmd = getattr(h, "command", None)
-        for sub in getattr(h, "_subcommands", []) or []:
-            if not sub.permission:
-                continue
-            usage = sub.raw or ""
-            seen.setdefault(sub.permission, []).append({
+        for permission, usage, description in h.permission_uses():
+            seen.setdefault(permission, []).append({
                 "feature": feature_name,
                 "command": cmd,
                 "subcommand": usage,
-                "description": sub.description,
+                "description": description,
             })
     # include perms attached to roles but unknown
     for r in repo.db.roles:
@@ -0,0 +1,217 @@
+"""Дельта-протокол состояний игровых комнат (opt-in: `/ws/<game>?protocol=2`).
+
+Клиент, подключившийся с protocol=2, получает сначала полный снимок с номером
+версии, а дальше — только изменения:
+
+    {"type": "game_state", "seq": 7, "state": {...}}
+    {"type": "game_delta", "base": 7, "seq": 9, "ops": [
+        {"op": "replace", "path": "/players/3/chips", "value": 980}, ...]}
+
+ops — подмножество JSON Patch (RFC 6902: add/remove/replace), применяются к
+состоянию версии `base`. Если у клиента другая версия (потерял сообщение,
+переполнилась очередь сокета), он шлёт {"type": "resync"} и получает снимок.
+Старые клиенты по-прежнему получают полное состояние без seq.
+
+Общая часть состояния сравнивается один раз на версию, личные поля зрителя —
+для каждого сокета отдельно, они маленькие.
+"""
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+from weakref import WeakKeyDictionary, WeakSet
+
+from aiohttp import web
+
+from steward.api.ws_fanout import StateMessage, encode
+
+DELTA_PROTOCOL = "2"
+# Сколько последних версий можно догнать дельтой, не присылая снимок
+DEFAULT_HISTORY = 16
+
+_delta_sockets: WeakSet = WeakSet()
+
+
+def negotiate(request: web.Request, ws: web.WebSocketResponse) -> bool:
+    """Remember that `ws` speaks the delta protocol if the client asked for it."""
+    if request.query.get("protocol") == DELTA_PROTOCOL:
+        _delta_sockets.add(ws)
+        return True
+    return False
+
+
+def speaks_delta(ws: web.WebSocketResponse | None) -> bool:
+    return ws is not None and ws in _delta_sockets
+
+
+def _pointer(path: str, key: str | int) -> str:
+    key = str(key)
+    if "~" in key or "/" in key:
+        key = key.replace("~", "~0").replace("/", "~1")
+    return f"{path}/{key}"
+
+
+def diff(old: Any, new: Any, path: str = "") -> list[dict]:
+    """JSON Patch ops turning `old` into `new` (both plain JSON values)."""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            elif old[key] != value:
+                ops.extend(diff(old[key], value, _pointer(path, key)))
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": _pointer(path, key)})
+        return ops
+    if isinstance(new, list):
+        common = min(len(old), len(new))
+        ops = []
+        for i in range(common):
+            if old[i] != new[i]:
+                ops.extend(diff(old[i], new[i], _pointer(path, i)))
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": _pointer(path, i), "value": new[i]})
+        # С конца, чтобы индексы оставшихся элементов не съезжали
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(path, i)})
+        # Список переписан целиком — дешевле прислать его заново
+        if len(ops) > 1 and len(ops) >= len(new):
+            return [{"op": "replace", "path": path, "value": new}]
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply(state: Any, ops: list[dict]) -> Any:
+    """Reference client: apply `ops` to `state` in place (returns the new root)."""
+    for op in ops:
+        path = op["path"]
+        if not path:
+            state = _clone(op["value"])
+            continue
+        *parents, last = [
+            part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")
+        ]
+        target = state
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op["op"] == "add":
+                target.insert(index, _clone(op["value"]))
+            elif op["op"] == "remove":
+                del target[index]
+            else:
+                target[index] = _clone(op["value"])
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = _clone(op["value"])
+    return state
+
+
+def _clone(value: Any) -> Any:
+    # Состояния собираются из живых объектов движка (списки карт и т.п.) —
+    # храним свою копию, иначе следующий diff сравнит объект сам с собой
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
+@dataclass
+class _Viewer:
+    seq: int
+    private: dict
+
+
+class DeltaStream:
+    """Versioned public state of one room plus what each delta socket has seen."""
+
+    def __init__(self, snapshot_type: str, delta_type: str, history: int = DEFAULT_HISTORY):
+        self.snapshot_type = snapshot_type
+        self.delta_type = delta_type
+        self.seq = 0
+        self._public: dict | None = None
+        self._snapshot: StateMessage | None = None
+        # (seq, ops этой версии, уже закодированные без скобок списка)
+        self._history: deque[tuple[int, str]] = deque(maxlen=history)
+        self._viewers: WeakKeyDictionary[web.WebSocketResponse, _Viewer] = WeakKeyDictionary()
+
+    def publish(self, public: dict) -> int:
+        """Make `public` the current version; the seq is bumped only if it changed."""
+        if self._public is None:
+            self._public = _clone(public)
+        else:
+            ops = diff(self._public, public)
+            if not ops:
+                return self.seq
+            self._history.append((self.seq + 1, encode(ops)[1:-1]))
+            # Копируем только изменившееся, а не всё состояние заново
+            self._public = apply(self._public, ops)
+        self.seq += 1
+        self._snapshot = None
+        return self.seq
+
+    def snapshot(self, ws: web.WebSocketResponse, private: dict) -> str:
+        """Full state at the current version; deltas for `ws` continue from it."""
+        assert self._public is not None, "publish() first"
+        if self._snapshot is None:
+            self._snapshot = StateMessage(self.snapshot_type, self._public, seq=self.seq)
+        self._viewers[ws] = _Viewer(self.seq, _clone(private))
+        return self._snapshot.render(private)
+
+    def render(self, ws: web.WebSocketResponse, private: dict) -> str | None:
+        """Delta from what `ws` last got to the current version; None if nothing changed."""
+        viewer = self._viewers.get(ws)
+        if viewer is None or not self._reachable(viewer.seq):
+            return self.snapshot(ws, private)
+        chunks = [ops for seq, ops in self._history if seq > viewer.seq]
+        private_ops = diff(viewer.private, private)
+        if private_ops:
+            chunks.append(encode(private_ops)[1:-1])
+        if not chunks:
+            return None
+        base = viewer.seq
+        viewer.seq = self.seq
+        viewer.private = apply(viewer.private, private_ops)
+        return (
+            f'{{"type": {encode(self.delta_type)}, "base": {base}, "seq": {self.seq}, '
+            f'"ops": [{", ".join(chunks)}]}}'
+        )
+
+    def renderer(
+        self,
+        public: dict,
+        sockets: Mapping[int, web.WebSocketResponse],
+        private_of: Callable[[int], dict],
+    ) -> Callable[[int], str | None]:
+        """render(uid) for WsFanout.send_each: deltas where negotiated, full states elsewhere."""
+        if any(speaks_delta(ws) for ws in sockets.values()):
+            self.publish(public)
+        full: StateMessage | None = None
+
+        def render(uid: int) -> str | None:
+            nonlocal full
+            ws = sockets.get(uid)
+            private = private_of(uid)
+            if speaks_delta(ws):
+                return self.render(ws, private)
+            if full is None:
+                full = StateMessage(self.snapshot_type, public)
+            return full.render(private)
+
+        return render
+
+    def key_for(self, sockets: Mapping[int, web.WebSocketResponse]) -> Callable[[int], str | None]:
+        """Fan-out coalescing key: full states replace each other, deltas never do."""
+        return lambda uid: None if speaks_delta(sockets.get(uid)) else self.snapshot_type
+
+    def _reachable(self, seq: int) -> bool:
+        if seq == self.seq:
+            return True
+        return bool(self._history) and seq >= self._history[0][0] - 1
@@ -0,0 +1,187 @@
+"""Рассылка состояний игровых комнат по вебсокетам.
+
+Общий слой для покера, блэкджека, настолок и тенниса:
+
+- StateMessage сериализует общую часть состояния один раз, а личные поля
+  зрителя (карманные карты, доступные действия) дописывает в готовую строку;
+- WsFanout отправляет каждому сокету из его собственной очереди, так что
+  медленный клиент не задерживает остальных. Очередь ограничена: при
+  переполнении выбрасывается самое старое сообщение, а новое состояние с тем
+  же ключом заменяет ещё не отправленное.
+
+Очередь принадлежит сокету, а не рассылке: лобби, комната и прямые ответы
+обработчика (ошибки, rooms_list, reconnected) кладут в одну и ту же, поэтому
+сокет получает сообщения в порядке постановки, а пишет в него один насос.
+Прямого ws.send_str рядом с рассылкой быть не должно.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+from steward.metrics.base import MetricsEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_LIMIT = 32
+
+_metrics: MetricsEngine | None = None
+
+
+def set_metrics(metrics: MetricsEngine | None):
+    global _metrics
+    _metrics = metrics
+
+
+def encode(msg: dict) -> str:
+    return json.dumps(msg, ensure_ascii=False)
+
+
+class StateMessage:
+    """`{"type": ..., **extra, "state": {...}}` with the shared state encoded once."""
+
+    def __init__(self, type_: str, public: dict, **extra: Any):
+        body = encode({"type": type_, **extra, "state": public})
+        # Без закрывающих "}}": личные поля дописываются внутрь "state"
+        self._head = body[:-2]
+        self._separator = "," if public else ""
+
+    def render(self, private: dict | None = None) -> str:
+        if not private:
+            return self._head + "}}"
+        return f"{self._head}{self._separator}{encode(private)[1:-1]}}}}}"
+
+
+@dataclass
+class _Outbox:
+    ws: web.WebSocketResponse
+    # (ключ, данные, когда поставлено, чья рассылка)
+    queue: deque[tuple[str | None, str, float, "WsFanout"]] = field(default_factory=deque)
+    task: asyncio.Task | None = None
+    # Чьё сообщение сейчас в отправке — для drain() отдельной рассылки
+    sending: "WsFanout | None" = None
+
+
+# id(ws) → очередь сокета, общая для всех рассылок; живёт, пока есть что отправлять
+_outboxes: dict[int, _Outbox] = {}
+
+
+class WsFanout:
+    """Bounded send queues for one room (or a lobby), shared per socket with other fanouts."""
+
+    def __init__(self, game: str, room: str, queue_limit: int = DEFAULT_QUEUE_LIMIT):
+        self._labels = {"game": game, "room": room}
+        self._queue_limit = queue_limit
+
+    def send(self, ws: web.WebSocketResponse, data: str, key: str | None = None) -> bool:
+        """Queue `data` for `ws`; False if the socket is already closed.
+
+        A queued message with the same `key` (e.g. "game_state") is replaced:
+        only the latest state is worth sending to a client that lags behind.
+        """
+        if ws.closed:
+            return False
+        box = _outboxes.get(id(ws))
+        if box is None:
+            box = _outboxes[id(ws)] = _Outbox(ws)
+        queue = box.queue
+        if key is not None:
+            for i, (queued_key, *_) in enumerate(queue):
+                if queued_key == key:
+                    del queue[i]
+                    self._dropped("coalesced")
+                    break
+        if len(queue) >= self._queue_limit:
+            queue.popleft()
+            self._dropped("overflow")
+        queue.append((key, data, time.monotonic(), self))
+        if box.task is None:
+            box.task = asyncio.create_task(self._pump(box))
+        return True
+
+    def send_all(
+        self,
+        sockets: Mapping[int, web.WebSocketResponse],
+        data: str,
+        key: str | None = None,
+    ) -> set[int]:
+        """Queue the same `data` for every socket; returns uids of closed ones."""
+        return {uid for uid, ws in list(sockets.items()) if not self.send(ws, data, key)}
+
+    def send_each(
+        self,
+        sockets: Mapping[int, web.WebSocketResponse],
+        render: Callable[[int], str | None],
+        key: str | Callable[[int], str | None] | None = None,
+        group: Callable[[int], Hashable] | None = None,
+    ) -> set[int]:
+        """Queue `render(uid)` for every socket; returns uids of closed ones.
+
+        Viewers with the same `group(uid)` (e.g. chess role) share one render;
+        a None render means there is nothing new for that viewer. `key` may
+        depend on the viewer (see state_delta.DeltaStream.key_for).
+        """
+        dead: set[int] = set()
+        rendered: dict[Hashable, str | None] = {}
+        for uid, ws in list(sockets.items()):
+            if ws.closed:
+                dead.add(uid)
+                continue
+            try:
+                if group is None:
+                    data = render(uid)
+                else:
+                    g = group(uid)
+                    if g not in rendered:
+                        rendered[g] = render(uid)
+                    data = rendered[g]
+            except Exception:
+                logger.exception("ws render failed uid=%s %s", uid, self._labels)
+                continue
+            if data is None:
+                continue
+            if not self.send(ws, data, key(uid) if callable(key) else key):
+                dead.add(uid)
+        return dead
+
+    def pending(self) -> int:
+        return sum(1 for box in _outboxes.values() for item in box.queue if item[3] is self)
+
+    async def drain(self):
+        """Wait until everything this fanout queued so far has been sent (or dropped)."""
+        tasks = [
+            box.task
+            for box in _outboxes.values()
+            if box.task is not None
+            and (box.sending is self or any(item[3] is self for item in box.queue))
+        ]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _pump(self, box: _Outbox):
+        try:
+            while box.queue:
+                _, data, queued_at, fanout = box.queue.popleft()
+                box.sending = fanout
+                try:
+                    await box.ws.send_str(data)
+                except Exception:
+                    # Сокет умер — его обработчик сам уберёт соединение
+                    box.queue.clear()
+                    break
+                if _metrics is not None:
+                    _metrics.observe("ws_send_lag_seconds", fanout._labels, time.monotonic() - queued_at)
+        finally:
+            box.sending = None
+            if _outboxes.get(id(box.ws)) is box:
+                del _outboxes[id(box.ws)]
+
+    def _dropped(self, reason: str):
+        if _metrics is not None:
+            _metrics.inc("ws_messages_dropped_total", {**self._labels, "reason": reason})
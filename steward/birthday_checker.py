@@ -5,6 +5,7 @@ from zoneinfo import ZoneInfo
 
 from telegram.ext import ExtBot
 
+from steward.bot import outbound
 from steward.data.models.birthday import Birthday
 from steward.data.repository import Repository
 from steward.helpers.ai import (
@@ -74,7 +75,10 @@ class BirthdayChecker:
             if b.day == day and b.month == month:
                 try:
                     text = await self._make_greeting(b, now.year)
-                    await self._bot.send_message(b.chat_id, f"{SIREN_LINE}\n\n{text}\n\n{SIREN_LINE}")
+                    message = f"{SIREN_LINE}\n\n{text}\n\n{SIREN_LINE}"
+                    await outbound.send(
+                        b.chat_id, lambda: self._bot.send_message(b.chat_id, message)
+                    )
                 except Exception:
                     logger.exception(f"Failed to congratulate {b.name} in chat {b.chat_id}")
 
@@ -305,6 +305,34 @@ class BlackjackGame:
         }
 
     def state_for(self, user_id: int) -> dict:
+        return {**self.public_state(), **self.private_state(user_id)}
+
+    def public_state(self) -> dict:
+        """Часть состояния без карт игроков — одинаковая для всех зрителей."""
+        phase = self.phase
+        dealer_cards = self.dealer_cards
+        if phase != PHASE_SHOWDOWN and dealer_cards:
+            dealer_view = [dealer_cards[0], {"rank": "?", "suit": "?"}]
+            dealer_total = _card_value(dealer_cards[0]["rank"])
+        else:
+            dealer_view = dealer_cards
+            dealer_total, _ = hand_value(dealer_cards)
+
+        return {
+            "phase": phase,
+            "roundNum": self.round_num,
+            "currentIndex": self.current_idx if phase == PHASE_PLAYING else -1,
+            "dealer": {
+                "cards": dealer_view,
+                "total": dealer_total,
+            },
+            "results": self.results,
+            "lastAction": self.last_action,
+            "tableBet": self.bet_amount,
+        }
+
+    def private_state(self, user_id: int) -> dict:
+        """Игроки глазами зрителя (свои карты открыты) и его действия."""
         idx = next((i for i, p in enumerate(self.players) if p.user_id == user_id), -1)
         me = self.players[idx] if idx >= 0 else None
         phase = self.phase
@@ -334,26 +362,8 @@ class BlackjackGame:
             if len(me.cards) == 2 and me.chips >= me.bet and not me.doubled:
                 actions.append("double")
 
-        dealer_cards = self.dealer_cards
-        if phase != PHASE_SHOWDOWN and dealer_cards:
-            dealer_view = [dealer_cards[0], {"rank": "?", "suit": "?"}]
-            dealer_total = _card_value(dealer_cards[0]["rank"])
-        else:
-            dealer_view = dealer_cards
-            dealer_total, _ = hand_value(dealer_cards)
-
         return {
-            "phase": phase,
-            "roundNum": self.round_num,
-            "currentIndex": self.current_idx if phase == PHASE_PLAYING else -1,
             "myIndex": idx,
             "players": players,
-            "dealer": {
-                "cards": dealer_view,
-                "total": dealer_total,
-            },
             "actions": actions,
-            "results": self.results,
-            "lastAction": self.last_action,
-            "tableBet": self.bet_amount,
         }
@@ -11,6 +11,9 @@ from urllib.parse import parse_qsl
 
 from aiohttp import web
 
+from steward.api import state_delta
+from steward.api.state_delta import DeltaStream
+from steward.api.ws_fanout import WsFanout, encode
 from steward.blackjack.engine import BlackjackGame, Player, PHASE_PLAYING, PHASE_SHOWDOWN, PHASE_WAITING, hand_value
 from steward.data.models.user import User
 from steward.data.repository import Repository
@@ -48,7 +51,7 @@ def _validate_telegram_init_data(init_data_raw: str) -> dict | None:
 
 
 def _find_user(repository: Repository, user_id: int) -> User | None:
-    return next((u for u in repository.db.users if u.id == user_id), None)
+    return repository.get_user(user_id)
 
 
 def _get_or_create_user(repository: Repository, user_id: int, username: str = "") -> User:
@@ -137,6 +140,8 @@ class Room:
         self.name = name
         self.creator_id = creator_id
         self.connections: dict[int, web.WebSocketResponse] = {}
+        self.fanout = WsFanout("blackjack", room_id)
+        self.deltas = DeltaStream("game_state", "game_delta")
         self.start_chips = start_chips
         self.table_bet = table_bet
         self.bot_count = bot_count
@@ -191,21 +196,34 @@ class Room:
         self.game.players = [p for p in self.game.players if not p.is_bot]
 
     async def broadcast(self, msg: dict):
-        payload = json.dumps(msg, ensure_ascii=False)
-        for ws in list(self.connections.values()):
-            try:
-                await ws.send_str(payload)
-            except Exception:
-                pass
+        self.fanout.send_all(self.connections, encode(msg))
+
+    def _public_state(self) -> dict:
+        public = self.game.public_state()
+        public["readyPlayers"] = list(self.ready_players)
+        return public
+
+    def state_message(self, uid: int, ws: web.WebSocketResponse) -> str:
+        """Полное состояние для одного сокета: вход в комнату, реконнект, resync."""
+        public = self._public_state()
+        private = self.game.private_state(uid)
+        if state_delta.speaks_delta(ws):
+            self.deltas.publish(public)
+            return self.deltas.snapshot(ws, private)
+        return encode({"type": "game_state", "state": {**public, **private}})
 
     async def send_states(self):
-        for uid, ws in list(self.connections.items()):
-            try:
-                state = self.game.state_for(uid)
-                state["readyPlayers"] = list(self.ready_players)
-                await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
-            except Exception:
-                logger.exception("blackjack send_states failed room=%s uid=%s", self.id, uid)
+        # Кто не сидит за столом, видит одно и то же — рендерим для них один раз;
+        # дельты у каждого сокета свои
+        seated = {p.user_id for p in self.game.players}
+        self.fanout.send_each(
+            self.connections,
+            self.deltas.renderer(self._public_state(), self.connections, self.game.private_state),
+            key=self.deltas.key_for(self.connections),
+            group=lambda uid: (
+                uid if uid in seated or state_delta.speaks_delta(self.connections.get(uid)) else None
+            ),
+        )
 
     async def _schedule_next_round(self):
         await asyncio.sleep(_NEXT_ROUND_DELAY)
@@ -335,6 +353,7 @@ class RoomManager:
         self.rooms: dict[str, Room] = {}
         self.player_rooms: dict[int, str] = {}
         self.lobby_connections: dict[int, web.WebSocketResponse] = {}
+        self.lobby_fanout = WsFanout("blackjack", "lobby")
         self._disconnect_timers: dict[int, asyncio.Task] = {}
 
     def list_rooms(self) -> list[dict]:
@@ -358,12 +377,8 @@ class RoomManager:
         return self.rooms.get(room_id)
 
     async def broadcast_rooms(self):
-        payload = json.dumps({"type": "rooms_list", "rooms": self.list_rooms()}, ensure_ascii=False)
-        for ws in list(self.lobby_connections.values()):
-            try:
-                await ws.send_str(payload)
-            except Exception:
-                pass
+        payload = encode({"type": "rooms_list", "rooms": self.list_rooms()})
+        self.lobby_fanout.send_all(self.lobby_connections, payload, key="rooms_list")
 
     def cleanup_room(self, room_id: str):
         room = self.rooms.get(room_id)
@@ -380,6 +395,12 @@ class RoomManager:
 _manager = RoomManager()
 
 
+def _reply(ws: web.WebSocketResponse, msg: dict, key: str | None = None) -> None:
+    # Ответ одному сокету — через его очередь, а не ws.send_str: иначе он
+    # обгонит или отстанет от рассылок лобби и комнаты в тот же сокет
+    _manager.lobby_fanout.send(ws, encode(msg), key)
+
+
 async def _leave(user_id: int, room: Room, repository: Repository | None = None):
     player = next((p for p in room.game.players if p.user_id == user_id), None)
     monkeys_balance: int | None = None
@@ -419,7 +440,7 @@ async def _leave(user_id: int, room: Room, repository: Repository | None = None)
         _manager.cleanup_room(room.id)
 
     if room.play_for_monkeys and repository is not None:
-        await repository.save()
+        await repository.flush("users")
 
     await _manager.broadcast_rooms()
     return monkeys_balance
@@ -439,6 +460,7 @@ async def blackjack_ws_handler(request: web.Request):
     from steward.api.auth import ws_session_user
     ws = web.WebSocketResponse()
     await ws.prepare(request)
+    state_delta.negotiate(request, ws)
 
     repository: Repository = request.app["repository"]
     user_id: int | None = None
@@ -458,14 +480,12 @@ async def blackjack_ws_handler(request: web.Request):
                 pl = next((p for p in room.game.players if p.user_id == user_id), None)
                 if pl:
                     pl.sitting_out = False
-                await ws.send_str(json.dumps({"type": "reconnected", "room": room.to_dict()}, ensure_ascii=False))
+                _reply(ws, {"type": "reconnected", "room": room.to_dict()})
                 if room.started:
-                    state = room.game.state_for(user_id)
-                    state["readyPlayers"] = list(room.ready_players)
-                    await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                    room.fanout.send(ws, room.state_message(user_id, ws))
         if not current_room:
             _manager.lobby_connections[user_id] = ws
-            await ws.send_str(json.dumps({"type": "authed"}))
+            _reply(ws, {"type": "authed"})
 
     try:
         async for msg in ws:
@@ -479,12 +499,12 @@ async def blackjack_ws_handler(request: web.Request):
 
             if t == "auth":
                 if user_id is not None:
-                    await ws.send_str(json.dumps({"type": "authed"}))
+                    _reply(ws, {"type": "authed"})
                     continue
                 init_data_raw = str(data.get("initData", ""))
                 tg_user = _validate_telegram_init_data(init_data_raw)
                 if not tg_user or not tg_user.get("id"):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid Telegram auth"}))
+                    _reply(ws, {"type": "error", "message": "Invalid Telegram auth"})
                     continue
                 user_id = int(tg_user["id"])
                 user_name = str(tg_user.get("username") or tg_user.get("first_name") or "Player")[:30]
@@ -499,25 +519,28 @@ async def blackjack_ws_handler(request: web.Request):
                         pl = next((p for p in room.game.players if p.user_id == user_id), None)
                         if pl:
                             pl.sitting_out = False
-                        await ws.send_str(json.dumps({"type": "reconnected", "room": room.to_dict()}, ensure_ascii=False))
+                        _reply(ws, {"type": "reconnected", "room": room.to_dict()})
                         if room.started:
-                            state = room.game.state_for(user_id)
-                            state["readyPlayers"] = list(room.ready_players)
-                            await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                            room.fanout.send(ws, room.state_message(user_id, ws))
                         continue
 
                 _manager.lobby_connections[user_id] = ws
-                await ws.send_str(json.dumps({"type": "authed"}))
+                _reply(ws, {"type": "authed"})
+
+            elif t == "resync":
+                # Клиент дельта-протокола пропустил версию — шлём снимок
+                if current_room and user_id and current_room.started:
+                    current_room.fanout.send(ws, current_room.state_message(user_id, ws))
 
             elif t == "list_rooms":
-                await ws.send_str(json.dumps({"type": "rooms_list", "rooms": _manager.list_rooms()}, ensure_ascii=False))
+                _reply(ws, {"type": "rooms_list", "rooms": _manager.list_rooms()}, key="rooms_list")
 
             elif t == "create_room":
                 if not user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Not authed"}))
+                    _reply(ws, {"type": "error", "message": "Not authed"})
                     continue
                 if user_id in _manager.player_rooms:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Already in a room"}))
+                    _reply(ws, {"type": "error", "message": "Already in a room"})
                     continue
                 name = str(data.get("name", f"Room {len(_manager.rooms) + 1}"))[:40]
                 play_for_monkeys = bool(data.get("playForMonkeys", False))
@@ -530,10 +553,10 @@ async def blackjack_ws_handler(request: web.Request):
                     ok_buy_in, payload = _charge_buy_in_monkeys(repository, user_id, user_name, sc)
                     if not ok_buy_in:
                         need = payload
-                        await ws.send_str(json.dumps({"type": "error", "message": f"Need {need} monkeys to enter this room"}))
+                        _reply(ws, {"type": "error", "message": f"Need {need} monkeys to enter this room"})
                         continue
                     monkeys_balance = payload
-                    await repository.save()
+                    await repository.flush("users")
 
                 room = _manager.create_room(name, user_id, sc, tb, bc, play_for_monkeys)
                 room.connections[user_id] = ws
@@ -543,26 +566,26 @@ async def blackjack_ws_handler(request: web.Request):
                 _manager.player_rooms[user_id] = room.id
                 _manager.lobby_connections.pop(user_id, None)
                 current_room = room
-                await ws.send_str(json.dumps({
+                _reply(ws, {
                     "type": "room_joined",
                     "room": room.to_dict(),
                     "monkeysBalance": monkeys_balance,
-                }, ensure_ascii=False))
+                })
                 await _manager.broadcast_rooms()
 
             elif t == "join_room":
                 if not user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Not authed"}))
+                    _reply(ws, {"type": "error", "message": "Not authed"})
                     continue
                 if user_id in _manager.player_rooms:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Already in a room"}))
+                    _reply(ws, {"type": "error", "message": "Already in a room"})
                     continue
                 room = _manager.get_room(str(data.get("roomId", "")))
                 if not room:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Room not found"}))
+                    _reply(ws, {"type": "error", "message": "Room not found"})
                     continue
                 if room._total_players() >= 6:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Room full"}))
+                    _reply(ws, {"type": "error", "message": "Room full"})
                     continue
 
                 room.connections[user_id] = ws
@@ -571,10 +594,10 @@ async def blackjack_ws_handler(request: web.Request):
                     ok_buy_in, payload = _charge_buy_in_monkeys(repository, user_id, user_name, room.start_chips)
                     if not ok_buy_in:
                         room.connections.pop(user_id, None)
-                        await ws.send_str(json.dumps({"type": "error", "message": f"Need {payload} monkeys to enter this room"}))
+                        _reply(ws, {"type": "error", "message": f"Need {payload} monkeys to enter this room"})
                         continue
                     monkeys_balance = payload
-                    await repository.save()
+                    await repository.flush("users")
                     chips = room.start_chips
                 else:
                     saved = room.chip_bank.pop(user_id, None)
@@ -589,17 +612,15 @@ async def blackjack_ws_handler(request: web.Request):
                 _manager.player_rooms[user_id] = room.id
                 _manager.lobby_connections.pop(user_id, None)
                 current_room = room
-                await ws.send_str(json.dumps({
+                _reply(ws, {
                     "type": "room_joined",
                     "room": room.to_dict(),
                     "monkeysBalance": monkeys_balance,
-                }, ensure_ascii=False))
+                })
                 await room.broadcast({"type": "room_updated", "room": room.to_dict()})
                 await _manager.broadcast_rooms()
                 if room.started:
-                    state = room.game.state_for(user_id)
-                    state["readyPlayers"] = list(room.ready_players)
-                    await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                    room.fanout.send(ws, room.state_message(user_id, ws))
 
             elif t == "leave_room":
                 if current_room and user_id:
@@ -607,18 +628,18 @@ async def blackjack_ws_handler(request: web.Request):
                     monkeys_balance = await _leave(user_id, current_room, repository)
                     current_room = None
                     _manager.lobby_connections[user_id] = ws
-                    await ws.send_str(json.dumps({"type": "left_room", "monkeysBalance": monkeys_balance}))
+                    _reply(ws, {"type": "left_room", "monkeysBalance": monkeys_balance})
 
             elif t == "start_game":
                 if not current_room:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Not in room"}))
+                    _reply(ws, {"type": "error", "message": "Not in room"})
                     continue
                 if current_room.creator_id != user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Only creator can start"}))
+                    _reply(ws, {"type": "error", "message": "Only creator can start"})
                     continue
                 total = current_room._total_players()
                 if total < 1:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Need at least one player"}))
+                    _reply(ws, {"type": "error", "message": "Need at least one player"})
                     continue
 
                 current_room.game.players = [p for p in current_room.game.players if p.user_id in current_room.connections or p.is_bot]
@@ -632,7 +653,7 @@ async def blackjack_ws_handler(request: web.Request):
                 ok = current_room.game.start_round()
                 if not ok:
                     current_room.started = False
-                    await ws.send_str(json.dumps({"type": "error", "message": "Cannot start game"}))
+                    _reply(ws, {"type": "error", "message": "Cannot start game"})
                     continue
                 await current_room.send_states()
                 if current_room.game.phase == PHASE_SHOWDOWN:
@@ -644,12 +665,12 @@ async def blackjack_ws_handler(request: web.Request):
 
             elif t == "action":
                 if not current_room or not current_room.started:
-                    await ws.send_str(json.dumps({"type": "error", "message": "No active game"}))
+                    _reply(ws, {"type": "error", "message": "No active game"})
                     continue
                 act = str(data.get("action", ""))
                 ok, result = current_room.game.action(user_id, act)
                 if not ok:
-                    await ws.send_str(json.dumps({"type": "error", "message": result}))
+                    _reply(ws, {"type": "error", "message": result})
                     continue
                 await current_room.send_states()
                 if current_room.game.phase == PHASE_SHOWDOWN:
@@ -663,9 +684,7 @@ async def blackjack_ws_handler(request: web.Request):
                 if not current_room or not current_room.started:
                     continue
                 if current_room.game.phase != PHASE_SHOWDOWN:
-                    state = current_room.game.state_for(user_id)
-                    state["readyPlayers"] = list(current_room.ready_players)
-                    await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                    current_room.fanout.send(ws, current_room.state_message(user_id, ws))
                     continue
                 await current_room.handle_ready(user_id)
 
@@ -673,10 +692,10 @@ async def blackjack_ws_handler(request: web.Request):
                 if not current_room or not user_id:
                     continue
                 if current_room.creator_id != user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Only creator can change settings"}))
+                    _reply(ws, {"type": "error", "message": "Only creator can change settings"})
                     continue
                 if current_room.started:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Cannot change settings during game"}))
+                    _reply(ws, {"type": "error", "message": "Cannot change settings during game"})
                     continue
 
                 if "startChips" in data:
@@ -692,7 +711,7 @@ async def blackjack_ws_handler(request: web.Request):
                         max_bots = 6 - len(current_room.connections)
                         current_room.add_bots(min(new_bc, max_bots))
                 if "playForMonkeys" in data and bool(data.get("playForMonkeys")) != current_room.play_for_monkeys:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Currency mode cannot be changed after room creation"}))
+                    _reply(ws, {"type": "error", "message": "Currency mode cannot be changed after room creation"})
                     continue
 
                 current_room.game.start_chips = current_room.start_chips
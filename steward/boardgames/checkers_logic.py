@@ -199,36 +199,7 @@ def choose_bot_move(board: list[list[str]], side: str, forced_from: list[int] |
             return random.choice(promo)
         return random.choice(moves)
 
-    # BOT_HARD
-    best = -10**9
-    best_moves: list[dict] = []
-    opp = "black" if side == "white" else "white"
-    for mv in moves:
-        b2, p2 = apply_move(board, mv)
-        cur_forced = None
-        if mv["captures"]:
-            nxt = captures_from(b2, mv["to"][0], mv["to"][1], p2, side)
-            if nxt:
-                cur_forced = mv["to"]
-        if cur_forced is not None:
-            val = _eval_board(b2, side) + 40
-        else:
-            opp_moves = legal_moves(b2, opp, None)
-            if not opp_moves:
-                val = 10**7
-            else:
-                worst = 10**9
-                for om in opp_moves:
-                    b3, _ = apply_move(b2, om)
-                    sc = _eval_board(b3, side)
-                    if sc < worst:
-                        worst = sc
-                val = worst
-        if len(mv["captures"]) > 0:
-            val += 25 * len(mv["captures"])
-        if val > best:
-            best = val
-            best_moves = [mv]
-        elif val == best:
-            best_moves.append(mv)
-    return random.choice(best_moves) if best_moves else random.choice(moves)
+    # BOT_HARD: см. chess_logic.choose_bot_move
+    from steward.boardgames import search
+
+    return search.search_checkers(board, side, forced_from, search.SEARCH_BUDGET_SEC[BOT_HARD]).move
@@ -54,7 +54,6 @@ def choose_bot_move(board: chess.Board, difficulty: str) -> chess.Move | None:
     if difficulty == BOT_EASY:
         return random.choice(moves)
 
-    side = board.turn
     if difficulty == BOT_MEDIUM:
         scored = []
         for mv in moves:
@@ -68,72 +67,8 @@ def choose_bot_move(board: chess.Board, difficulty: str) -> chess.Move | None:
         top = [m for s, m in scored[: max(1, min(4, len(scored)))]]
         return random.choice(top)
 
-    # BOT_HARD: depth=2 alpha-beta negamax + mate constants
-    MATE_SCORE = 10**7
-    DRAW_SCORE = 0
-    SEARCH_DEPTH = 2
-
-    def _terminal_score(b: chess.Board, pov: chess.Color, ply_from_root: int) -> int | None:
-        if b.is_checkmate():
-            # Side to move is mated.
-            if b.turn == pov:
-                return -MATE_SCORE + ply_from_root
-            return MATE_SCORE - ply_from_root
-        if (
-            b.is_stalemate()
-            or b.is_insufficient_material()
-            or b.can_claim_draw()
-            or b.is_seventyfive_moves()
-            or b.is_fivefold_repetition()
-        ):
-            return DRAW_SCORE
-        return None
+    # BOT_HARD: итеративное углубление с бюджетом времени. На loop эту ветку
+    # не зовём — комнаты идут через search.choose_chess_move и пул процессов
+    from steward.boardgames import search
 
-    def _negamax(
-        b: chess.Board,
-        depth: int,
-        alpha: int,
-        beta: int,
-        pov: chess.Color,
-        ply_from_root: int,
-    ) -> int:
-        terminal = _terminal_score(b, pov, ply_from_root)
-        if terminal is not None:
-            return terminal
-        if depth == 0:
-            return evaluate_board(b, pov)
-
-        best = -10**9
-        ordered = list(b.legal_moves)
-        ordered.sort(
-            key=lambda m: (
-                1 if b.is_capture(m) else 0,
-                1 if m.promotion else 0,
-            ),
-            reverse=True,
-        )
-        for mv in ordered:
-            b.push(mv)
-            val = -_negamax(b, depth - 1, -beta, -alpha, pov, ply_from_root + 1)
-            b.pop()
-            if val > best:
-                best = val
-            if val > alpha:
-                alpha = val
-            if alpha >= beta:
-                break
-        return best
-
-    best_score = -10**9
-    best_moves: list[chess.Move] = []
-    for mv in moves:
-        board.push(mv)
-        val = -_negamax(board, SEARCH_DEPTH - 1, -10**9, 10**9, side, 1)
-        val += _move_tactical_bonus(board, mv)
-        board.pop()
-        if val > best_score:
-            best_score = val
-            best_moves = [mv]
-        elif val == best_score:
-            best_moves.append(mv)
-    return random.choice(best_moves) if best_moves else random.choice(moves)
+    return search.search_chess(board, search.SEARCH_BUDGET_SEC[BOT_HARD]).move
@@ -13,7 +13,10 @@ from urllib.parse import parse_qsl
 import chess
 from aiohttp import web
 
-from steward.boardgames import chess_logic, checkers_logic
+from steward.api import state_delta
+from steward.api.state_delta import DeltaStream
+from steward.api.ws_fanout import WsFanout, encode
+from steward.boardgames import chess_logic, checkers_logic, search
 from steward.data.models.user import User
 from steward.data.repository import Repository
 
@@ -123,7 +126,7 @@ def _validate_telegram_init_data(init_data_raw: str) -> dict | None:
 
 
 def _find_user(repository: Repository, user_id: int) -> User | None:
-    return next((u for u in repository.db.users if u.id == user_id), None)
+    return repository.get_user(user_id)
 
 
 def _get_or_create_user(repository: Repository, user_id: int, username: str = "") -> User:
@@ -230,6 +233,8 @@ class BoardRoom:
         )
 
         self.connections: dict[int, web.WebSocketResponse] = {}
+        self.fanout = WsFanout("boardgames", room_id)
+        self.deltas = DeltaStream("room_state", "room_delta")
         self.player_names: dict[int, str] = {}
         self.spectators: set[int] = set()
         self.players: dict[str, int | None] = {"white": None, "black": None}
@@ -326,7 +331,25 @@ class BoardRoom:
         return checkers_logic.legal_moves(self.checkers_board, self.turn, self.checkers_forced_from)
 
     def state_for(self, uid: int) -> dict:
-        role = self._viewer_role(uid)
+        return self._game_state(self._viewer_role(uid), self._legal_moves_for_uid(uid))
+
+    def public_state(self) -> dict:
+        """state_for() без полей зрителя (role, legalMoves) — общая часть для дельт."""
+        state = self._game_state("spectator", [])
+        del state["role"], state["legalMoves"]
+        return state
+
+    def private_state(self, uid: int) -> dict:
+        return {"role": self._viewer_role(uid), "legalMoves": self._legal_moves_for_uid(uid)}
+
+    def state_message(self, uid: int, ws: web.WebSocketResponse) -> str:
+        """Полное состояние для одного сокета (resync дельта-протокола)."""
+        if state_delta.speaks_delta(ws):
+            self.deltas.publish(self.public_state())
+            return self.deltas.snapshot(ws, self.private_state(uid))
+        return encode({"type": "room_state", "state": self.state_for(uid)})
+
+    def _game_state(self, role: str, legal_moves: list) -> dict:
         return GameState(
             room=self.to_dict(),
             role=role,
@@ -336,7 +359,7 @@ class BoardRoom:
             winner=self.winner,
             last_move=self.last_move,
             board=self._serialize_board(),
-            legal_moves=self._legal_moves_for_uid(uid),
+            legal_moves=legal_moves,
             bets=[
                 {
                     "userId": b.user_id,
@@ -349,24 +372,19 @@ class BoardRoom:
         ).to_dict()
 
     async def broadcast(self, msg: dict) -> set[int]:
-        payload = json.dumps(msg, ensure_ascii=False)
-        dead_uids: set[int] = set()
-        for uid, ws in list(self.connections.items()):
-            try:
-                await ws.send_str(payload)
-            except Exception:
-                dead_uids.add(uid)
-        return dead_uids
+        return self.fanout.send_all(self.connections, encode(msg))
 
     async def send_states(self) -> set[int]:
-        dead_uids: set[int] = set()
-        for uid, ws in list(self.connections.items()):
-            try:
-                st = self.state_for(uid)
-                await ws.send_str(json.dumps({"type": "room_state", "state": st}, ensure_ascii=False))
-            except Exception:
-                dead_uids.add(uid)
-        return dead_uids
+        # Полное состояние зависит от зрителя только через роль: белые, чёрные,
+        # зрители; дельты у каждого сокета свои
+        return self.fanout.send_each(
+            self.connections,
+            self.deltas.renderer(self.public_state(), self.connections, self.private_state),
+            key=self.deltas.key_for(self.connections),
+            group=lambda uid: (
+                uid if state_delta.speaks_delta(self.connections.get(uid)) else self._viewer_role(uid)
+            ),
+        )
 
     def _toggle_turn(self):
         self.turn = "black" if self.turn == "white" else "white"
@@ -500,6 +518,7 @@ class BoardRoomManager:
         self.rooms: dict[str, BoardRoom] = {}
         self.player_rooms: dict[int, str] = {}
         self.lobby_connections: dict[int, web.WebSocketResponse] = {}
+        self.lobby_fanout = WsFanout("boardgames", "lobby")
         # Проставляются при первом WS-соединении; нужны grace-таймерам и
         # обработчикам мёртвых сокетов, которые живут вне контекста хендлера.
         self.repository: Repository | None = None
@@ -512,13 +531,8 @@ class BoardRoomManager:
         return [r.to_dict() for r in self.rooms.values()]
 
     async def broadcast_rooms(self):
-        payload = json.dumps({"type": "rooms_list", "rooms": self.list_rooms()}, ensure_ascii=False)
-        dead_uids: set[int] = set()
-        for uid, ws in list(self.lobby_connections.items()):
-            try:
-                await ws.send_str(payload)
-            except Exception:
-                dead_uids.add(uid)
+        payload = encode({"type": "rooms_list", "rooms": self.list_rooms()})
+        dead_uids = self.lobby_fanout.send_all(self.lobby_connections, payload, key="rooms_list")
         for uid in dead_uids:
             self.lobby_connections.pop(uid, None)
 
@@ -559,6 +573,12 @@ class BoardRoomManager:
 _manager = BoardRoomManager()
 
 
+def _reply(ws: web.WebSocketResponse, msg: dict, key: str | None = None) -> None:
+    # Ответ одному сокету — через его очередь, а не ws.send_str: иначе он
+    # обгонит или отстанет от рассылок лобби и комнаты в тот же сокет
+    _manager.lobby_fanout.send(ws, encode(msg), key)
+
+
 def _remove_uid_from_room(room: BoardRoom, uid: int):
     room.connections.pop(uid, None)
     room.spectators.discard(uid)
@@ -658,7 +678,7 @@ async def _refund_room(repository: Repository, room: BoardRoom):
                 _credit_monkeys(repository, uid, room.stake)
     for bet in list(room.bets.values()):
         _credit_monkeys(repository, bet.user_id, bet.amount)
-    await repository.save()
+    await repository.flush("users")
 
 
 async def _on_connection_lost(room: BoardRoom, uid: int, ws: web.WebSocketResponse):
@@ -702,19 +722,16 @@ async def _resume_or_lobby(ws: web.WebSocketResponse, user_id: int, user_name: s
                 room.player_names[user_id] = user_name
                 room.connections[user_id] = ws
                 _manager.lobby_connections.pop(user_id, None)
-                await ws.send_str(json.dumps({"type": "authed"}))
-                await ws.send_str(json.dumps(
-                    {"type": "room_joined", "room": room.to_dict(), "role": room._viewer_role(user_id)},
-                    ensure_ascii=False,
-                ))
+                _reply(ws, {"type": "authed"})
+                _reply(ws, {"type": "room_joined", "room": room.to_dict(), "role": room._viewer_role(user_id)})
                 await _send_room_update(room)
                 await _manager.broadcast_rooms()
                 return room
     if rid and (room is None or room.finished):
         _manager.player_rooms.pop(user_id, None)
     _manager.lobby_connections[user_id] = ws
-    await ws.send_str(json.dumps({"type": "authed"}))
-    await ws.send_str(json.dumps({"type": "rooms_list", "rooms": _manager.list_rooms()}, ensure_ascii=False))
+    _reply(ws, {"type": "authed"})
+    _reply(ws, {"type": "rooms_list", "rooms": _manager.list_rooms()}, key="rooms_list")
     return None
 
 
@@ -830,7 +847,7 @@ async def _settle_room(repository: Repository, metrics, room: BoardRoom):
                 win,
             )
 
-    await repository.save()
+    await repository.flush("users")
 
 
 async def _maybe_bot_move(room: BoardRoom):
@@ -843,12 +860,15 @@ async def _maybe_bot_move(room: BoardRoom):
 
     async def _run():
         try:
-            await asyncio.sleep(random.uniform(*BOT_MOVE_DELAY))
-            if room.finished or not room.started or room.turn != room.bot_side:
-                return
+            # Пауза «на подумать» идёт одновременно с поиском, а не перед ним
+            delay = asyncio.sleep(random.uniform(*BOT_MOVE_DELAY))
             if room.game_type == GAME_CHESS:
                 assert room.chess_board is not None
-                mv = chess_logic.choose_bot_move(room.chess_board, room.bot_difficulty)
+                mv, _ = await asyncio.gather(
+                    search.choose_chess_move(room.chess_board, room.bot_difficulty), delay
+                )
+                if room.finished or not room.started or room.turn != room.bot_side:
+                    return
                 if mv is None:
                     # Нет ходов: мат (бот проиграл) либо пат (ничья).
                     room.finished = True
@@ -862,13 +882,21 @@ async def _maybe_bot_move(room: BoardRoom):
                 room._finalize_turn()
             else:
                 assert room.checkers_board is not None
-                while room.turn == room.bot_side and not room.finished:
-                    mv = checkers_logic.choose_bot_move(
+                pending_delay = delay
+                while room.turn == room.bot_side and not room.finished and room.started:
+                    pick = search.choose_checkers_move(
                         room.checkers_board,
                         room.bot_side,
                         room.checkers_forced_from,
                         room.bot_difficulty,
                     )
+                    if pending_delay is not None:
+                        mv, _ = await asyncio.gather(pick, pending_delay)
+                        pending_delay = None
+                    else:
+                        mv = await pick
+                    if room.finished or room.turn != room.bot_side:
+                        return
                     if mv is None:
                         room.finished = True
                         room.winner = "black" if room.turn == "white" else "white"
@@ -895,6 +923,7 @@ async def boardgames_ws_handler(request: web.Request):
     from steward.api.auth import ws_session_user
     ws = web.WebSocketResponse()
     await ws.prepare(request)
+    state_delta.negotiate(request, ws)
 
     repository: Repository = request.app["repository"]
     metrics = request.app["metrics"]
@@ -926,48 +955,54 @@ async def boardgames_ws_handler(request: web.Request):
                     # Повторный auth (клиент всегда шлёт его при открытии). Если уже
                     # сидим в партии (например, восстановлено по cookie) — отдаём
                     # её состояние, иначе лобби.
-                    await ws.send_str(json.dumps({"type": "authed"}))
+                    _reply(ws, {"type": "authed"})
                     if current_room is not None and not current_room.finished:
-                        await ws.send_str(json.dumps(
-                            {"type": "room_joined", "room": current_room.to_dict(), "role": current_room._viewer_role(user_id)},
-                            ensure_ascii=False,
-                        ))
+                        _reply(ws, {
+                            "type": "room_joined",
+                            "room": current_room.to_dict(),
+                            "role": current_room._viewer_role(user_id),
+                        })
                         await _send_room_update(current_room)
                     else:
-                        await ws.send_str(json.dumps({"type": "rooms_list", "rooms": _manager.list_rooms()}, ensure_ascii=False))
+                        _reply(ws, {"type": "rooms_list", "rooms": _manager.list_rooms()}, key="rooms_list")
                     continue
                 if not _is_auth_payload(data):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid auth payload"}))
+                    _reply(ws, {"type": "error", "message": "Invalid auth payload"})
                     continue
                 init_data_raw = data["initData"]
                 tg_user = _validate_telegram_init_data(init_data_raw)
                 if not tg_user or not tg_user.get("id"):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid Telegram auth"}))
+                    _reply(ws, {"type": "error", "message": "Invalid Telegram auth"})
                     continue
                 user_id = int(tg_user["id"])
                 user_name = str(tg_user.get("username") or tg_user.get("first_name") or "Player")[:30]
                 current_room = await _resume_or_lobby(ws, user_id, user_name)
 
+            elif t == "resync":
+                # Клиент дельта-протокола пропустил версию — шлём снимок
+                if current_room is not None and user_id:
+                    current_room.fanout.send(ws, current_room.state_message(user_id, ws))
+
             elif t == "list_rooms":
-                await ws.send_str(json.dumps({"type": "rooms_list", "rooms": _manager.list_rooms()}, ensure_ascii=False))
+                _reply(ws, {"type": "rooms_list", "rooms": _manager.list_rooms()}, key="rooms_list")
 
             elif t == "create_room":
                 if not user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Not authed"}))
+                    _reply(ws, {"type": "error", "message": "Not authed"})
                     continue
                 if user_id in _manager.player_rooms:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Already in room"}))
+                    _reply(ws, {"type": "error", "message": "Already in room"})
                     continue
                 if not _is_create_room_payload(data):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid create payload"}))
+                    _reply(ws, {"type": "error", "message": "Invalid create payload"})
                     continue
                 game_type = str(data.get("gameType", GAME_CHESS))
                 if game_type not in ALLOWED_GAMES:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Unknown game"}))
+                    _reply(ws, {"type": "error", "message": "Unknown game"})
                     continue
                 stake = _safe_int(data.get("stake", 0), 0)
                 if stake < 0 or stake > MAX_BET:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid stake"}))
+                    _reply(ws, {"type": "error", "message": "Invalid stake"})
                     continue
                 bot_enabled = bool(data.get("botEnabled", False))
                 bot_side = str(data.get("botSide", "black"))
@@ -998,23 +1033,23 @@ async def boardgames_ws_handler(request: web.Request):
                 _manager.player_rooms[user_id] = room.id
                 _manager.lobby_connections.pop(user_id, None)
                 current_room = room
-                await ws.send_str(json.dumps({"type": "room_joined", "room": room.to_dict()}, ensure_ascii=False))
+                _reply(ws, {"type": "room_joined", "room": room.to_dict()})
                 await _manager.broadcast_rooms()
 
             elif t == "join_room":
                 if not user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Not authed"}))
+                    _reply(ws, {"type": "error", "message": "Not authed"})
                     continue
                 if user_id in _manager.player_rooms:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Already in room"}))
+                    _reply(ws, {"type": "error", "message": "Already in room"})
                     continue
                 if not _is_join_room_payload(data):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid join payload"}))
+                    _reply(ws, {"type": "error", "message": "Invalid join payload"})
                     continue
                 room_id = str(data.get("roomId", "")).strip()
                 room = _manager.get_room(room_id)
                 if not room:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Room not found"}))
+                    _reply(ws, {"type": "error", "message": "Room not found"})
                     continue
                 requested_side = data.get("side")
                 side = _resolve_join_side(room, requested_side if isinstance(requested_side, str) else None)
@@ -1027,7 +1062,7 @@ async def boardgames_ws_handler(request: web.Request):
                 _manager.player_rooms[user_id] = room.id
                 _manager.lobby_connections.pop(user_id, None)
                 current_room = room
-                await ws.send_str(json.dumps({"type": "room_joined", "room": room.to_dict(), "role": side}, ensure_ascii=False))
+                _reply(ws, {"type": "room_joined", "room": room.to_dict(), "role": side})
                 await _send_room_update(room)
                 await _manager.broadcast_rooms()
 
@@ -1055,7 +1090,7 @@ async def boardgames_ws_handler(request: web.Request):
                         else:
                             _manager.cleanup_room(room.id)
                 _manager.lobby_connections[user_id] = ws
-                await ws.send_str(json.dumps({"type": "left_room"}))
+                _reply(ws, {"type": "left_room"})
                 current_room = None
                 await _manager.broadcast_rooms()
 
@@ -1063,20 +1098,20 @@ async def boardgames_ws_handler(request: web.Request):
                 if not current_room or not user_id:
                     continue
                 if current_room.creator_id != user_id:
-                    await ws.send_str(json.dumps({"type": "error", "message": "Only creator can start"}))
+                    _reply(ws, {"type": "error", "message": "Only creator can start"})
                     continue
 
                 async with current_room.lock:
                     if current_room.started:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Already started"}))
+                        _reply(ws, {"type": "error", "message": "Already started"})
                         continue
                     white_uid = current_room.players.get("white")
                     black_uid = current_room.players.get("black")
                     if white_uid is None and current_room.bot_side != "white":
-                        await ws.send_str(json.dumps({"type": "error", "message": "Need white player"}))
+                        _reply(ws, {"type": "error", "message": "Need white player"})
                         continue
                     if black_uid is None and current_room.bot_side != "black":
-                        await ws.send_str(json.dumps({"type": "error", "message": "Need black player"}))
+                        _reply(ws, {"type": "error", "message": "Need black player"})
                         continue
 
                     charge_error: str | None = None
@@ -1095,13 +1130,13 @@ async def boardgames_ws_handler(request: web.Request):
                                 break
                             charged.append(uid)
                             current_room.stake_locked.add(uid)
-                        await repository.save()
+                        await repository.flush("users")
 
                     if charge_error is not None:
-                        await ws.send_str(json.dumps({"type": "error", "message": charge_error}))
+                        _reply(ws, {"type": "error", "message": charge_error})
                         continue
                     if not current_room.start_game():
-                        await ws.send_str(json.dumps({"type": "error", "message": "Cannot start"}))
+                        _reply(ws, {"type": "error", "message": "Cannot start"})
                         continue
 
                     await _send_room_update(current_room)
@@ -1115,12 +1150,12 @@ async def boardgames_ws_handler(request: web.Request):
                 if not current_room or not user_id:
                     continue
                 if not _is_move_payload(data):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid move payload"}))
+                    _reply(ws, {"type": "error", "message": "Invalid move payload"})
                     continue
                 async with current_room.lock:
                     ok, reason = current_room.make_move(user_id, data)
                     if not ok:
-                        await ws.send_str(json.dumps({"type": "error", "message": reason}))
+                        _reply(ws, {"type": "error", "message": reason})
                         continue
                     await _send_room_update(current_room)
                     await _maybe_bot_move(current_room)
@@ -1132,34 +1167,34 @@ async def boardgames_ws_handler(request: web.Request):
                 if not current_room or not user_id:
                     continue
                 if not _is_bet_payload(data):
-                    await ws.send_str(json.dumps({"type": "error", "message": "Invalid bet payload"}))
+                    _reply(ws, {"type": "error", "message": "Invalid bet payload"})
                     continue
                 side = str(data.get("side", ""))
                 amount = _safe_int(data.get("amount", 0), 0)
                 async with current_room.lock:
                     if not current_room.started or current_room.finished:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Betting closed"}))
+                        _reply(ws, {"type": "error", "message": "Betting closed"})
                         continue
                     role = current_room._viewer_role(user_id)
                     if role in ALLOWED_SIDES:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Players cannot place spectator bets"}))
+                        _reply(ws, {"type": "error", "message": "Players cannot place spectator bets"})
                         continue
                     if user_id in current_room.bets:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Bet already placed"}))
+                        _reply(ws, {"type": "error", "message": "Bet already placed"})
                         continue
                     if side not in ALLOWED_SIDES:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Invalid side"}))
+                        _reply(ws, {"type": "error", "message": "Invalid side"})
                         continue
                     if amount not in ALLOWED_BETS or amount > MAX_BET:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Invalid amount"}))
+                        _reply(ws, {"type": "error", "message": "Invalid amount"})
                         continue
                     ok, balance = _charge_monkeys(repository, user_id, user_name, amount)
                     if not ok:
-                        await ws.send_str(json.dumps({"type": "error", "message": f"Not enough monkeys ({balance})"}))
+                        _reply(ws, {"type": "error", "message": f"Not enough monkeys ({balance})"})
                         continue
                     current_room.bets[user_id] = BoardBet(user_id, user_name, side, amount)
-                    await repository.save()
-                    await ws.send_str(json.dumps({"type": "bet_ok", "monkeys": balance}))
+                    await repository.flush("users")
+                    _reply(ws, {"type": "bet_ok", "monkeys": balance})
                     await _send_room_update(current_room)
 
     except Exception:
@@ -0,0 +1,592 @@
+"""Поиск хода для ботов шахмат и шашек вне event loop.
+
+Раньше «сложный» бот считал двухполуходовый перебор прямо в корутине комнаты:
+пока он думал, стоял весь бот — апдейты, вебсокеты, остальные комнаты. Теперь
+перебор идёт в пуле процессов (GIL не делится с loop), а комната только ждёт
+future.
+
+Сам перебор — negamax с альфа-бета отсечением и итеративным углублением:
+глубина растёт, пока не кончится бюджет времени сложности, и ход берётся с
+последней досчитанной глубины (или из недосчитанной, если она уже нашла лучше).
+Позиции ключуются хэшем Зобриста, таблица транспозиций живёт в процессе
+воркера между ходами. Порядок ходов: ход из таблицы, взятия (MVV-LVA),
+превращения, killer-ходы. В шахматах на листьях — форсированный перебор
+взятий, в шашках обязательные взятия продлевают поиск сами.
+
+Лёгкий и средний боты — эвристики на один полуход, они остаются на loop.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import get_all_start_methods, get_context
+from typing import Any
+
+import chess
+
+from steward.boardgames import checkers_logic, chess_logic
+from steward.boardgames.chess_logic import BOT_HARD
+
+logger = logging.getLogger(__name__)
+
+# Бюджет на ход, секунды; по истечении возвращается лучший найденный ход
+SEARCH_BUDGET_SEC = {BOT_HARD: 1.2}
+MAX_DEPTH = 64
+BOT_WORKERS = 2
+TT_MAX_ENTRIES = 1 << 18
+
+MATE_SCORE = 10**7
+_INF = 10**9
+# Счёт ближе к мату — форсированный мат, углубляться дальше незачем
+_MATE_BOUND = MATE_SCORE - 1000
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+@dataclass
+class SearchResult:
+    move: Any
+    score: int = 0
+    depth: int = 0
+    nodes: int = 0
+    elapsed: float = 0.0
+
+
+# --- Зобрист ---------------------------------------------------------------
+
+_rng = random.Random(0x5EED_B0A7D)
+
+
+def _table(n: int) -> list[int]:
+    return [_rng.getrandbits(64) for _ in range(n)]
+
+
+# Шахматы: фигура на клетке = тип x цвет, поэтому ключ складывается из
+# битбордов типов и цветов по отдельности
+_Z_TYPE = [_table(64) for _ in range(6)]
+_Z_COLOR = [_table(64) for _ in range(2)]
+_Z_CASTLE = _table(64)
+_Z_EP = _table(64)
+_Z_TURN = _rng.getrandbits(64)
+
+# Шашки: клетка x фигура "wbWB", очередь хода, клетка продолжения серии
+_CHECKERS_PIECES = "wbWB"
+_Z_CHECKERS = [_table(len(_CHECKERS_PIECES)) for _ in range(64)]
+_Z_CHECKERS_BLACK = _rng.getrandbits(64)
+_Z_CHECKERS_FORCED = _table(64)
+
+
+def _xor_bits(table: list[int], bits: int) -> int:
+    h = 0
+    while bits:
+        lsb = bits & -bits
+        h ^= table[lsb.bit_length() - 1]
+        bits ^= lsb
+    return h
+
+
+def _chess_state(board: chess.Board) -> tuple:
+    return (
+        board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+        board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK],
+        board.castling_rights, board.ep_square,
+    )
+
+
+def chess_key(board: chess.Board) -> int:
+    """Zobrist key of a chess position."""
+    state = _chess_state(board)
+    h = 0
+    for i in range(6):
+        h ^= _xor_bits(_Z_TYPE[i], state[i])
+    h ^= _xor_bits(_Z_COLOR[0], state[7]) ^ _xor_bits(_Z_COLOR[1], state[6])
+    h ^= _xor_bits(_Z_CASTLE, state[8])
+    if state[9] is not None:
+        h ^= _Z_EP[state[9]]
+    if board.turn == chess.BLACK:
+        h ^= _Z_TURN
+    return h
+
+
+def _chess_key_after(key: int, before: tuple, after: tuple) -> int:
+    # Инкрементально: меняются только биты затронутых ходом клеток
+    for i in range(6):
+        if before[i] != after[i]:
+            key ^= _xor_bits(_Z_TYPE[i], before[i] ^ after[i])
+    # occupied_co[BLACK] = индекс 7 -> таблица 0, как в chess_key (chess.BLACK == False)
+    if before[7] != after[7]:
+        key ^= _xor_bits(_Z_COLOR[0], before[7] ^ after[7])
+    if before[6] != after[6]:
+        key ^= _xor_bits(_Z_COLOR[1], before[6] ^ after[6])
+    if before[8] != after[8]:
+        key ^= _xor_bits(_Z_CASTLE, before[8] ^ after[8])
+    if before[9] is not None:
+        key ^= _Z_EP[before[9]]
+    if after[9] is not None:
+        key ^= _Z_EP[after[9]]
+    return key ^ _Z_TURN
+
+
+def checkers_key(board: list[list[str]], side: str, forced_from: list[int] | None) -> int:
+    """Zobrist key of a checkers position, including the square a capture series continues from."""
+    h = _Z_CHECKERS_BLACK if side == "black" else 0
+    for r in range(8):
+        row = board[r]
+        for c in range(8):
+            p = row[c]
+            if p != ".":
+                h ^= _Z_CHECKERS[r * 8 + c][_CHECKERS_PIECES.index(p)]
+    if forced_from is not None:
+        h ^= _Z_CHECKERS_FORCED[forced_from[0] * 8 + forced_from[1]]
+    return h
+
+
+# Таблица транспозиций процесса: ключ -> (глубина, счёт, тип оценки, лучший ход).
+# Матовые счета хранятся от самого узла, а не от корня: таблица живёт между
+# ходами, и одна позиция встречается на разном расстоянии от корня
+_tt: dict[int, tuple[int, int, int, Any]] = {}
+
+
+def _table_for_search() -> dict[int, tuple[int, int, int, Any]]:
+    if len(_tt) > TT_MAX_ENTRIES:
+        _tt.clear()
+    return _tt
+
+
+def _to_tt(score: int, ply: int) -> int:
+    if score >= _MATE_BOUND:
+        return score + ply
+    if score <= -_MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _from_tt(score: int, ply: int) -> int:
+    if score >= _MATE_BOUND:
+        return score - ply
+    if score <= -_MATE_BOUND:
+        return score + ply
+    return score
+
+
+class _Search(ABC):
+    def __init__(self, budget: float):
+        self.started = time.perf_counter()
+        self.deadline = self.started + budget
+        self.nodes = 0
+        self.tt = _table_for_search()
+        self.killers: dict[int, list[Any]] = {}
+        # Лучший ход недосчитанной глубины; первым в ней идёт прошлый лучший
+        self.partial: tuple[Any, int] | None = None
+
+    def _tick(self) -> None:
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+
+    def _probe(self, key: int, depth: int, alpha: int, beta: int, ply: int) -> tuple[int | None, Any]:
+        entry = self.tt.get(key)
+        if entry is None:
+            return None, None
+        e_depth, score, flag, move = entry
+        if e_depth >= depth:
+            score = _from_tt(score, ply)
+            if flag == _EXACT:
+                return score, move
+            if flag == _LOWER and score >= beta:
+                return score, move
+            if flag == _UPPER and score <= alpha:
+                return score, move
+        return None, move
+
+    def _store(
+        self, key: int, depth: int, score: int, alpha_orig: int, beta: int, move: Any, ply: int
+    ) -> None:
+        if score <= alpha_orig:
+            flag = _UPPER
+        elif score >= beta:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        self.tt[key] = (depth, _to_tt(score, ply), flag, move)
+
+    def _add_killer(self, ply: int, move: Any) -> None:
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+    @abstractmethod
+    def _root_moves(self, moves: list, key: int) -> list:
+        pass
+
+    @abstractmethod
+    def _root_child(self, key: int, move: Any, depth: int, alpha: int, beta: int) -> int:
+        pass
+
+    def run(self, moves: list, key: int, max_depth: int) -> SearchResult:
+        result = SearchResult(move=moves[0])
+        if len(moves) == 1:
+            return self._finish(result)
+        for depth in range(1, max_depth + 1):
+            self.partial = None
+            try:
+                move, score = self._root(moves, key, depth)
+            except _OutOfTime:
+                if self.partial is not None:
+                    result.move, result.score = self.partial
+                break
+            result.move, result.score, result.depth = move, score, depth
+            if abs(score) >= _MATE_BOUND or time.perf_counter() > self.deadline:
+                break
+        return self._finish(result)
+
+    def _root(self, moves: list, key: int, depth: int) -> tuple[Any, int]:
+        alpha, beta = -_INF, _INF
+        best_move, best = None, -_INF
+        for move in self._root_moves(moves, key):
+            score = self._root_child(key, move, depth, alpha, beta)
+            if score > best:
+                best, best_move = score, move
+                self.partial = (move, score)
+            alpha = max(alpha, score)
+        self._store(key, depth, best, -_INF, _INF, best_move, 0)
+        return best_move, best
+
+    def _finish(self, result: SearchResult) -> SearchResult:
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - self.started
+        return result
+
+
+# --- Шахматы ---------------------------------------------------------------
+
+_VALUE = chess_logic._PIECE_VALUE
+
+
+class _ChessSearch(_Search):
+    def __init__(self, board: chess.Board, budget: float):
+        super().__init__(budget)
+        self.board = board
+        # Ключи позиций партии и текущей ветки — для повторений
+        self.path: list[int] = []
+
+    def _order(self, moves: list[chess.Move], tt_move: Any, ply: int) -> list[chess.Move]:
+        board = self.board
+        killers = self.killers.get(ply, ())
+
+        def rank(mv: chess.Move) -> int:
+            if mv == tt_move:
+                return 10**8
+            if board.is_capture(mv):
+                victim = board.piece_type_at(mv.to_square) or chess.PAWN
+                attacker = board.piece_type_at(mv.from_square) or chess.PAWN
+                return 10**6 + _VALUE[victim] * 10 - _VALUE[attacker] // 10 + (mv.promotion or 0)
+            if mv.promotion:
+                return 10**6 + _VALUE[mv.promotion]
+            if mv in killers:
+                return 10**5
+            return 0
+
+        return sorted(moves, key=rank, reverse=True)
+
+    def _push(self, key: int, mv: chess.Move) -> int:
+        before = _chess_state(self.board)
+        self.board.push(mv)
+        self.path.append(key)
+        return _chess_key_after(key, before, _chess_state(self.board))
+
+    def _pop(self) -> None:
+        self.board.pop()
+        self.path.pop()
+
+    def _is_repetition(self, key: int) -> bool:
+        clock = self.board.halfmove_clock
+        if clock < 4:
+            return False
+        # Та же позиция с той же очередью хода — через чётное число полуходов назад
+        return key in self.path[-clock:][-2::-2]
+
+    def _root_moves(self, moves: list, key: int) -> list:
+        entry = self.tt.get(key)
+        return self._order(moves, entry[3] if entry else None, 0)
+
+    def _root_child(self, key: int, move: Any, depth: int, alpha: int, beta: int) -> int:
+        child = self._push(key, move)
+        try:
+            return -self._negamax(child, depth - 1, -beta, -alpha, 1)
+        finally:
+            self._pop()
+
+    def search(self, history_keys: list[int], max_depth: int) -> SearchResult:
+        moves = list(self.board.legal_moves)
+        if not moves:
+            return SearchResult(move=None)
+        self.path = history_keys
+        return self.run(moves, chess_key(self.board), max_depth)
+
+    def _negamax(self, key: int, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self._tick()
+        board = self.board
+        if board.halfmove_clock >= 100 or self._is_repetition(key) or board.is_insufficient_material():
+            return 0
+        if depth <= 0:
+            return self._quiesce(key, alpha, beta, ply)
+        alpha_orig = alpha
+        score, tt_move = self._probe(key, depth, alpha, beta, ply)
+        if score is not None:
+            return score
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE_SCORE + ply if board.is_check() else 0
+        best, best_move = -_INF, None
+        for mv in self._order(moves, tt_move, ply):
+            quiet = not board.is_capture(mv)
+            child = self._push(key, mv)
+            try:
+                val = -self._negamax(child, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self._pop()
+            if val > best:
+                best, best_move = val, mv
+            if val > alpha:
+                alpha = val
+            if alpha >= beta:
+                if quiet:
+                    self._add_killer(ply, mv)
+                break
+        self._store(key, depth, best, alpha_orig, beta, best_move, ply)
+        return best
+
+    def _quiesce(self, key: int, alpha: int, beta: int, ply: int) -> int:
+        self._tick()
+        board = self.board
+        if board.is_check() and board.is_checkmate():
+            return -MATE_SCORE + ply
+        stand_pat = chess_logic.evaluate_board(board, board.turn)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        for mv in self._order(list(board.generate_legal_captures()), None, ply):
+            child = self._push(key, mv)
+            try:
+                val = -self._quiesce(child, -beta, -alpha, ply + 1)
+            finally:
+                self._pop()
+            if val >= beta:
+                return val
+            alpha = max(alpha, val)
+        return alpha
+
+
+def search_chess(board: chess.Board, budget: float, max_depth: int = MAX_DEPTH) -> SearchResult:
+    """Iterative-deepening search for the side to move; stops at `budget` seconds."""
+    # Ключи уже сыгранных позиций — чтобы бот видел повторения от корня
+    replay = board.root()
+    history = []
+    for mv in board.move_stack:
+        history.append(chess_key(replay))
+        replay.push(mv)
+    return _ChessSearch(board.copy(), budget).search(history, max_depth)
+
+
+# --- Шашки -----------------------------------------------------------------
+
+
+def _checkers_move_id(mv: dict) -> tuple:
+    return (*mv["from"], *mv["to"])
+
+
+class _CheckersSearch(_Search):
+    def __init__(self, board: list[list[str]], side: str, forced_from: list[int] | None, budget: float):
+        super().__init__(budget)
+        self.board = board
+        self.side = side
+        self.forced_from = forced_from
+
+    def _order(self, moves: list[dict], side: str, tt_move: Any, ply: int) -> list[dict]:
+        killers = self.killers.get(ply, ())
+        last_row = 0 if side == "white" else 7
+
+        def rank(mv: dict) -> int:
+            move_id = _checkers_move_id(mv)
+            if move_id == tt_move:
+                return 10**8
+            score = len(mv["captures"]) * 10**6
+            if mv["to"][0] == last_row:
+                score += 10**5
+            if move_id in killers:
+                score += 10**4
+            return score
+
+        return sorted(moves, key=rank, reverse=True)
+
+    def _child(
+        self, board: list[list[str]], side: str, mv: dict, depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        nb, piece = checkers_logic.apply_move(board, mv)
+        if mv["captures"] and checkers_logic.captures_from(nb, mv["to"][0], mv["to"][1], piece, side):
+            # Серия взятий продолжается: ходит та же сторона, глубина не тратится
+            return self._negamax(nb, side, mv["to"], depth, alpha, beta, ply + 1)
+        opp = "black" if side == "white" else "white"
+        return -self._negamax(nb, opp, None, depth - 1, -beta, -alpha, ply + 1)
+
+    def _negamax(
+        self,
+        board: list[list[str]],
+        side: str,
+        forced_from: list[int] | None,
+        depth: int,
+        alpha: int,
+        beta: int,
+        ply: int,
+    ) -> int:
+        self._tick()
+        key = checkers_key(board, side, forced_from)
+        alpha_orig = alpha
+        score, tt_move = self._probe(key, depth, alpha, beta, ply)
+        if score is not None:
+            return score
+        moves = checkers_logic.legal_moves(board, side, forced_from)
+        if not moves:
+            return -MATE_SCORE + ply
+        # Взятия обязательны и конечны — на нулевой глубине досчитываем их
+        if depth <= 0 and not moves[0]["captures"]:
+            return checkers_logic._eval_board(board, side)
+        best, best_move = -_INF, None
+        for mv in self._order(moves, side, tt_move, ply):
+            val = self._child(board, side, mv, depth, alpha, beta, ply)
+            if val > best:
+                best, best_move = val, _checkers_move_id(mv)
+            if val > alpha:
+                alpha = val
+            if alpha >= beta:
+                if not mv["captures"]:
+                    self._add_killer(ply, best_move)
+                break
+        self._store(key, depth, best, alpha_orig, beta, best_move, ply)
+        return best
+
+    def _root_moves(self, moves: list, key: int) -> list:
+        entry = self.tt.get(key)
+        return self._order(moves, self.side, entry[3] if entry else None, 0)
+
+    def _root_child(self, key: int, move: Any, depth: int, alpha: int, beta: int) -> int:
+        return self._child(self.board, self.side, move, depth, alpha, beta, 0)
+
+    def _store(
+        self, key: int, depth: int, score: int, alpha_orig: int, beta: int, move: Any, ply: int
+    ) -> None:
+        if isinstance(move, dict):
+            move = _checkers_move_id(move)
+        super()._store(key, depth, score, alpha_orig, beta, move, ply)
+
+    def search(self, max_depth: int) -> SearchResult:
+        moves = checkers_logic.legal_moves(self.board, self.side, self.forced_from)
+        if not moves:
+            return SearchResult(move=None)
+        key = checkers_key(self.board, self.side, self.forced_from)
+        return self.run(moves, key, max_depth)
+
+
+def search_checkers(
+    board: list[list[str]],
+    side: str,
+    forced_from: list[int] | None,
+    budget: float,
+    max_depth: int = MAX_DEPTH,
+) -> SearchResult:
+    """Iterative-deepening search for `side`; stops at `budget` seconds."""
+    return _CheckersSearch(board, side, forced_from, budget).search(max_depth)
+
+
+# --- Пул процессов ---------------------------------------------------------
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _chess_worker(root_fen: str, moves: list[str], budget: float) -> str | None:
+    board = chess.Board(root_fen)
+    for uci in moves:
+        board.push_uci(uci)
+    move = search_chess(board, budget).move
+    return move.uci() if move is not None else None
+
+
+def _checkers_worker(board: list[list[str]], side: str, forced_from: list[int] | None, budget: float) -> dict | None:
+    return search_checkers(board, side, forced_from, budget).move
+
+
+def _preload() -> list[str]:
+    # Воркер всё равно исполняет скрипт родителя заново как __mp_main__ (preload
+    # "__main__" в 3.12 не срабатывает). Если скрипт уже импортирован в
+    # форксервере, это стоит лишь его верхнего уровня: импорты берутся из
+    # sys.modules, а не грузятся в каждом воркере
+    modules = [__name__]
+    path = getattr(sys.modules["__main__"], "__file__", None)
+    if path is not None and os.path.basename(path) != "__main__.py":
+        modules.append(os.path.splitext(os.path.basename(path))[0])
+    return modules
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Не fork: у бота к этому моменту есть потоки, fork их замков не переживает.
+        # Воркеры форкаются из чистого форксервера с уже загруженным поиском
+        if "forkserver" in get_all_start_methods():
+            context = get_context("forkserver")
+            context.set_forkserver_preload(_preload())
+        else:
+            context = get_context("spawn")
+        _pool = ProcessPoolExecutor(max_workers=BOT_WORKERS, mp_context=context)
+    return _pool
+
+
+async def _run_in_pool(fn, *args):
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    except BrokenProcessPool:
+        # Воркер умер (OOM, kill) — поднимаем пул заново и пробуем ещё раз
+        logger.warning("bot search pool is broken, restarting")
+        shutdown()
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def choose_chess_move(board: chess.Board, difficulty: str) -> chess.Move | None:
+    """Bot move for `board`; searched in the worker pool when the difficulty has a time budget."""
+    budget = SEARCH_BUDGET_SEC.get(difficulty)
+    if budget is None:
+        return chess_logic.choose_bot_move(board, difficulty)
+    uci = await _run_in_pool(
+        _chess_worker, board.root().fen(), [mv.uci() for mv in board.move_stack], budget
+    )
+    return chess.Move.from_uci(uci) if uci is not None else None
+
+
+async def choose_checkers_move(
+    board: list[list[str]], side: str, forced_from: list[int] | None, difficulty: str
+) -> dict | None:
+    """Checkers counterpart of choose_chess_move()."""
+    budget = SEARCH_BUDGET_SEC.get(difficulty)
+    if budget is None:
+        return checkers_logic.choose_bot_move(board, side, forced_from, difficulty)
+    return await _run_in_pool(_checkers_worker, board, side, forced_from, budget)
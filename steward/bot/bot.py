@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from contextlib import nullcontext
+from contextlib import nullcontext, suppress
 from os import environ
 from typing import Any, Awaitable, Callable
 from urllib.parse import parse_qs, unquote, urlparse
@@ -36,17 +36,27 @@ from steward.bot.context import (
 from steward.birthday_checker import BirthdayChecker
 from steward.joke_checker import JokeChecker
 from steward.api.server import start_api_server
+from steward.boardgames import search as board_search
+from steward.bot import outbound
 from steward.bot.delayed_action_handler import DelayedActionHandler
+from steward.bot.dispatch import DispatchTable
+from steward.framework import lazy
 from steward.dynamic_rewards import DynamicRewardChecker, ensure_dynamic_rewards_exist
+from steward.features.download import video_cache
 from steward.bot.inline_hints_updater import InlineHintsUpdater
 from steward.data.repository import Repository
 from steward.handlers.handler import Handler
+from steward.helpers.bills_ledger import ledger_for
 from steward.helpers.command_validation import ValidationArgumentsError
 from steward.helpers.curse_debt import initialize_curse_debts, today_msk
+from steward.helpers import curse_processing
+from steward.helpers.curse_processing import load_curse_forms_cache, save_curse_forms_cache
+from steward.helpers.http_clients import HttpClients, install as install_http_clients
+from steward.helpers.message_threads import get_thread_store
 from steward.helpers.tg_update_helpers import UnsupportedUpdateType, get_from_user
 from steward.metrics import ContextMetrics, MetricsEngine
+from steward.session import session_registry
 from steward.session.session_registry import (
-    cleanup_stale_sessions,
     deactivate_session,
     has_active_session_in_chat,
     try_get_session_handler,
@@ -138,8 +148,18 @@ class Bot:
         self.handlers = handlers
         self.repository = repository
         self.metrics = metrics
+        self.repository.set_metrics(metrics)
+        # Пулы соединений ко всем внешним API; закрываются в post_shutdown
+        self.http_clients = install_http_clients(HttpClients(metrics))
+        outbound.set_metrics(metrics)
+        lazy.set_metrics(metrics)
+        self._warm_up_task: asyncio.Task | None = None
+        self._sessions_task: asyncio.Task | None = None
+        video_cache.set_metrics(metrics)
+        curse_processing.set_metrics(metrics)
 
         self.hints_updater = InlineHintsUpdater(repository, handlers)
+        self.dispatch = DispatchTable(handlers)
         self.session_ttl_seconds = int(environ.get("SESSION_TTL_SECONDS", "14400"))
 
         self.bot: ExtBot[None] = None  # type: ignore
@@ -222,6 +242,8 @@ class Bot:
             await self.repository.migrate()
             await self.hints_updater.start(application.bot)
 
+            load_curse_forms_cache()
+            video_cache.load()
             if await initialize_curse_debts(self.repository, self.metrics, today_msk()):
                 await self.repository.save()
 
@@ -231,10 +253,25 @@ class Bot:
 
             if ensure_dynamic_rewards_exist(self.repository):
                 await self.repository.save()
+            # Реестр долгов строится с нуля один раз, дальше — по изменениям
+            ledger_for(self.repository)
 
             for handler in self.handlers:
                 if init_coro := handler.init():  # type: ignore
                     await init_coro
+            # Недопройденные визарды — с того же шага; после init, когда фичи готовы
+            if resumed := session_registry.load(self.handlers, self.session_ttl_seconds):
+                logger.info("Resumed %s session(s)", resumed)
+            self._sessions_task = asyncio.create_task(
+                session_registry.registry.run(
+                    self.session_ttl_seconds, session_registry.snapshot_path()
+                )
+            )
+            # Остальные фичи догружаются в фоне, когда бот уже отвечает
+            if environ.get("FEATURE_WARMUP", "1") != "0":
+                self._warm_up_task = asyncio.create_task(
+                    lazy.warm_up(self.handlers, delay=lazy.WARMUP_DELAY_SEC)
+                )
 
             from steward.features.db import DbFeature
             try:
@@ -247,6 +284,25 @@ class Bot:
 
         application.post_init = post_init
 
+        async def post_shutdown(*_):
+            # Сбрасываем всё, что ещё ждёт окна group commit.
+            await self.repository.flush()
+            save_curse_forms_cache()
+            video_cache.save()
+            board_search.shutdown()
+            if self._warm_up_task is not None:
+                self._warm_up_task.cancel()
+            if self._sessions_task is not None:
+                self._sessions_task.cancel()
+                # Снимок, который задача пишет прямо сейчас, должен лечь раньше финального
+                with suppress(asyncio.CancelledError):
+                    await self._sessions_task
+            session_registry.save()
+            outbound.close()
+            await self.http_clients.close()
+
+        application.post_shutdown = post_shutdown
+
         client_kwargs: dict[str, Any] = {}
         telethon_proxy = _telethon_proxy()
         if telethon_proxy is not None:
@@ -347,6 +403,8 @@ class Bot:
 
     async def _chat(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         logging.info("Got update")
+        # Всё, что бот видит в чатах, — в хранилище переписки для контекста ИИ
+        get_thread_store().record(update.message or update.edited_message)
         if update.message is not None:
             ctx = ChatBotContext(
                 self.repository,
@@ -423,10 +481,6 @@ class Bot:
         update = context.update
         user_id: int | None = None
 
-        stale_count = cleanup_stale_sessions(self.session_ttl_seconds)
-        if stale_count > 0:
-            logger.info("Cleaned %s stale session(s)", stale_count)
-
         try:
             user = get_from_user(update)
             chat = update.effective_chat
@@ -465,7 +519,9 @@ class Bot:
         except BaseException as e:
             logger.exception(e)
 
-        for handler in self.handlers:
+        if self.dispatch.is_stale(self.handlers):
+            self.dispatch = DispatchTable(self.handlers)
+        for handler in self.dispatch.route(update, action):
             logging.debug(f"Try handler {handler}")
             try:
                 if not self._validate_admin(handler, user_id, chat_id_int):
@@ -478,7 +534,7 @@ class Bot:
                     break
                 if hasattr(handler, action) and await getattr(handler, action)(context):
                     logging.debug(f"Used handler {handler}")
-                    self.metrics.inc("bot_handler_calls_total", {"handler": handler.__class__.__name__})
+                    self.metrics.inc("bot_handler_calls_total", {"handler": handler.feature_class.__name__})
                     if func is not None:
                         await _safe_post_action(func)
                     break
@@ -516,17 +572,13 @@ class Bot:
     ) -> str:
         """Return 'ok' if handler may run, 'skip' to silently bypass,
         or 'disabled_reply' to respond «функция выключена»."""
-        from steward.features.registry import is_always_on
-
-        if is_always_on(handler.__class__):
+        cap = self.dispatch.capabilities.get(id(handler))
+        if cap is None:
             return "ok"
         chat = context.update.effective_chat
         if chat is None:
             return "ok"
-        cap = handler.capability
-        if cap is None:
-            return "ok"
-        if self.repository.is_capability_enabled(chat.id, handler.__class__):
+        if self.repository.is_capability_enabled(chat.id, handler.feature_class):
             return "ok"
         # capability is disabled — figure out if this is a slash-command invocation
         if action == "chat":
@@ -569,10 +621,7 @@ class Bot:
         adder_id = adder.id if adder else None
         adder_username = adder.username if adder else None
 
-        existing = next(
-            (s for s in self.repository.db.chat_settings if s.chat_id == chat_id),
-            None,
-        )
+        existing = self.repository.indexes.first("chat_settings", "chat_id", chat_id)
         if existing is not None:
             return
 
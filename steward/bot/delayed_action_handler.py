@@ -1,13 +1,17 @@
 import asyncio
+import heapq
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from inspect import isawaitable
+from os import environ
+from typing import Any, Iterable
 
 from telegram.ext import ExtBot
 from telethon import TelegramClient
 
 from steward.data.repository import Repository
-from steward.delayed_action.base import DelayedAction
+from steward.delayed_action.base import CatchUp, DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.metrics.base import MetricsEngine
 
@@ -16,6 +20,107 @@ logger = logging.getLogger(__name__)
 
 default_actions: list[DelayedAction] = []
 
+# Опоздание, которое ещё считается штатным запуском, а не пропуском
+MISSED_GRACE = timedelta(minutes=5)
+# Сколько созревших действий выполняем одновременно
+DEFAULT_CONCURRENCY = 8
+
+
+def _generator_state(action: DelayedAction) -> dict[str, Any]:
+    # Неглубокая копия полей генератора: правка на месте (next_fire = ...)
+    # меняет снимок, и действие перепланируется без полного пересчёта
+    return dict(vars(action.generator))
+
+
+async def _next_time(action: DelayedAction, now: datetime) -> datetime | None:
+    nearest_time = action.generator.get_next(now)
+    if isawaitable(nearest_time):
+        nearest_time = await nearest_time
+    if nearest_time is not None and nearest_time.tzinfo is None:
+        nearest_time = nearest_time.replace(tzinfo=timezone.utc)
+    return nearest_time
+
+
+@dataclass
+class _Slot:
+    action: DelayedAction
+    at: datetime | None
+    state: dict[str, Any]
+    # Номер актуальной записи в куче; старые записи отбрасываются лениво
+    seq: int
+
+
+class ActionSchedule:
+    """Min-heap of (next fire time, action) over db.delayed_actions.
+
+    sync() diffs the list against the known actions by identity and calls
+    get_next() only for added actions and for those whose generator changed
+    since they were scheduled.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int, int]] = []
+        self._slots: dict[int, _Slot] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    async def sync(self, actions: Iterable[DelayedAction], now: datetime) -> list[DelayedAction]:
+        """Bring the heap in line with `actions`; returns finished ones (get_next is None)."""
+        finished = []
+        seen = set()
+        for action in actions:
+            key = id(action)
+            seen.add(key)
+            slot = self._slots.get(key)
+            if slot is not None and slot.state == _generator_state(action):
+                continue
+            if not await self.schedule(action, now):
+                finished.append(action)
+        for key in self._slots.keys() - seen:
+            del self._slots[key]
+        return finished
+
+    async def schedule(self, action: DelayedAction, now: datetime, after: datetime | None = None) -> bool:
+        """(Re)compute the next firing of `action`; False if it has none.
+
+        With `after` (the time it just fired at) a generator that still points
+        at or before it is parked until its state changes — otherwise an action
+        that failed before moving its own timer would fire in a loop.
+        """
+        at = await _next_time(action, now)
+        if at is not None and after is not None and at <= after:
+            at = None
+            parked = True
+        else:
+            parked = False
+        self._seq += 1
+        self._slots[id(action)] = _Slot(action, at, _generator_state(action), self._seq)
+        if at is not None:
+            heapq.heappush(self._heap, (at, self._seq, id(action)))
+        return at is not None or parked
+
+    def _top(self) -> _Slot | None:
+        while self._heap:
+            _, seq, key = self._heap[0]
+            slot = self._slots.get(key)
+            if slot is not None and slot.seq == seq:
+                return slot
+            heapq.heappop(self._heap)
+        return None
+
+    def nearest(self) -> datetime | None:
+        slot = self._top()
+        return slot.at if slot is not None else None
+
+    def pop_due(self, now: datetime) -> list[_Slot]:
+        due = []
+        while (slot := self._top()) is not None and slot.at <= now:
+            heapq.heappop(self._heap)
+            due.append(slot)
+        return due
+
 
 class DelayedActionHandler:
     def __init__(
@@ -24,6 +129,7 @@ class DelayedActionHandler:
         bot: ExtBot[None],
         client: TelegramClient,
         metrics: MetricsEngine,
+        concurrency: int | None = None,
     ):
         self._repository = repository
         self._bot = bot
@@ -31,6 +137,12 @@ class DelayedActionHandler:
         self._metrics = metrics
         self._update_future: asyncio.Future[None] = asyncio.Future()
         self._repository.subscribe_on_save(self._on_save)
+        self._schedule = ActionSchedule()
+        # Версия delayed_actions, с которой куча сверена последний раз
+        self._synced_version: int | None = None
+        if concurrency is None:
+            concurrency = int(environ.get("DELAYED_ACTIONS_CONCURRENCY", DEFAULT_CONCURRENCY))
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
 
     def _on_save(self) -> None:
         if not self._update_future.done():
@@ -38,72 +150,73 @@ class DelayedActionHandler:
 
     async def start(self):
         context = DelayedActionContext(self._repository, self._bot, self._client, self._metrics)
+        await self._sync(datetime.now(timezone.utc))
 
         while True:
-            logger.info("Checking delayed actions...")
-            nearest_time, actions = await self._get_nearest_actions()
-            logger.info(
-                f"Nearest actions count: {len(actions)}. Time to execute: {nearest_time.isoformat()}"
+            nearest_time = self._schedule.nearest()
+            logger.debug(
+                "Delayed actions: %d scheduled, nearest at %s",
+                len(self._schedule),
+                nearest_time.isoformat() if nearest_time else "never",
             )
-
-            done, _ = await asyncio.wait(
-                [
-                    asyncio.create_task(
-                        asyncio.sleep(
-                            (nearest_time - datetime.now(timezone.utc)).total_seconds()
-                        )
-                    ),
-                    self._update_future,
-                ],
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-
-            logger.info("Waiting ended")
+            waiters: list[asyncio.Future[Any]] = [self._update_future]
+            if nearest_time is not None:
+                delay = (nearest_time - datetime.now(timezone.utc)).total_seconds()
+                waiters.append(asyncio.ensure_future(asyncio.sleep(max(0.0, delay))))
+            done, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in pending:
+                if waiter is not self._update_future:
+                    waiter.cancel()
 
             if self._update_future in done:
-                logger.info("Waiting ended due to update")
                 self._update_future = asyncio.Future()
+                await self._sync(datetime.now(timezone.utc))
                 continue
 
-            lag = (datetime.now(timezone.utc) - nearest_time).total_seconds()
-            if lag >= 300:
-                logger.warning(f"Skipped action due to long waiting: {lag:.3f}s late")
-                continue
-
-            # waited -> execute actions
-            for action in actions:
-                logger.info(f"Executing action: {action}")
-                await action.execute(context)
-
-    async def _get_nearest_actions(self) -> tuple[datetime, list[DelayedAction]]:
-        nearest_delayed_actions: list[DelayedAction] = []
-        min_waiting_time = datetime.max.replace(tzinfo=timezone.utc) - timedelta(days=1)
-
+            await self._run_due(context)
+
+    async def _sync(self, now: datetime):
+        version = self._repository.field_version("delayed_actions")
+        if version == self._synced_version:
+            # save() других полей: в куче всё актуально
+            return
+        self._synced_version = version
+        actions = self._repository.db.delayed_actions
+        finished = await self._schedule.sync(actions, now)
+        if finished:
+            for action in finished:
+                logger.debug("Delayed action is removed %s", action)
+            gone = {id(a) for a in finished}
+            self._repository.db.delayed_actions = [a for a in actions if id(a) not in gone]
+            await self._repository.save("delayed_actions")
+            self._synced_version = self._repository.field_version("delayed_actions")
+
+    async def _run_due(self, context: DelayedActionContext):
         now = datetime.now(timezone.utc)
-
-        has_deleted = False
-
-        for action in self._repository.db.delayed_actions:
-            nearest_time = action.generator.get_next(now)
-            if isawaitable(nearest_time):
-                nearest_time = await nearest_time
-
-            if nearest_time is None:
-                logging.debug(f"Delayed action is removed {action}")
-                self._repository.db.delayed_actions.remove(action)
-                has_deleted = True
+        due = self._schedule.pop_due(now)
+        if not due:
+            return
+        to_run = []
+        for slot in due:
+            if now - slot.at < MISSED_GRACE or slot.action.catch_up is CatchUp.RUN:
+                to_run.append(slot)
                 continue
-
-            if nearest_time.tzinfo is None:
-                nearest_time = nearest_time.replace(tzinfo=timezone.utc)
-
-            if min_waiting_time == nearest_time:
-                nearest_delayed_actions.append(action)
-            elif min_waiting_time > nearest_time:
-                nearest_delayed_actions = [action]
-                min_waiting_time = nearest_time
-
-        if has_deleted:
-            await self._repository.save()
-
-        return min_waiting_time, nearest_delayed_actions
+            logger.warning(
+                "Skipped %s: %.0fs late", type(slot.action).__name__, (now - slot.at).total_seconds()
+            )
+            await self._schedule.schedule(slot.action, now, after=slot.at)
+        await asyncio.gather(*(self._execute(context, slot) for slot in to_run))
+        # Действия сами правят список и генераторы и зовут save() — сверяемся
+        # сразу, не дожидаясь колбэка (при save_window он придёт позже)
+        await self._sync(datetime.now(timezone.utc))
+
+    async def _execute(self, context: DelayedActionContext, slot: _Slot):
+        async with self._semaphore:
+            action = slot.action
+            logger.info(f"Executing action: {action}")
+            try:
+                await action.execute(context)
+            except Exception as e:
+                logger.exception(e)
+            # Удалившее себя действие выпадет из кучи на ближайшем sync()
+            await self._schedule.schedule(action, datetime.now(timezone.utc), after=slot.at)
@@ -0,0 +1,87 @@
+from telegram import Update
+
+from steward.framework.feature import Feature
+from steward.framework.lazy import LazyFeature
+from steward.handlers.handler import Handler
+from steward.helpers.command_validation import command_name
+
+
+def _overrides(handler: Handler, method: str) -> bool:
+    base = Feature if isinstance(handler, Feature) else Handler
+    return getattr(type(handler), method, None) is not getattr(base, method)
+
+
+def _handles(handler: Handler, action: str) -> bool:
+    """Whether handler.<action>() can ever return True for a non-command update."""
+    if isinstance(handler, LazyFeature):
+        # Не загружая фичу: манифест знает, на что она смотрит
+        return action in handler.spec.monitors
+    if _overrides(handler, action):
+        return True
+    if action == "chat":
+        return bool(getattr(handler, "_on_message_handlers", None))
+    if action == "reaction":
+        return bool(getattr(handler, "_on_reaction_handlers", None))
+    return False
+
+
+def _routes(handlers: list[Handler], monitors: list[Handler], keys_method: str) -> dict[str, list[Handler]]:
+    """key → its owners (handlers listing it in keys_method()) plus monitors, in handler order."""
+    owners: dict[str, set[int]] = {}
+    for handler in handlers:
+        get_keys = getattr(handler, keys_method, None)
+        for key in get_keys() if get_keys is not None else ():
+            owners.setdefault(key, set()).add(id(handler))
+    monitor_ids = {id(h) for h in monitors}
+    return {
+        key: [h for h in handlers if id(h) in monitor_ids or id(h) in ids]
+        for key, ids in owners.items()
+    }
+
+
+class DispatchTable:
+    """Handlers to try for an update, precompiled from their declarations.
+
+    A /command resolves through a dict to its owner plus the message
+    monitors (features with @on_message); plain text visits only the
+    monitors. Callback data resolves by its first '|' segment (the schema
+    name) to the features that declared it; unknown prefixes reach only
+    handlers with a hand-written callback(). Original handler order is
+    kept everywhere, so monitors registered before a command still see it
+    first.
+    """
+
+    def __init__(self, handlers: list[Handler]):
+        self._handlers = handlers
+        self._size = len(handlers)
+        self.monitors: dict[str, list[Handler]] = {
+            action: [h for h in handlers if _handles(h, action)]
+            for action in ("chat", "message_edited", "reaction", "callback")
+        }
+
+        self.commands = _routes(handlers, self.monitors["chat"], "get_command_with_aliases")
+        self.callbacks = _routes(handlers, self.monitors["callback"], "callback_prefixes")
+
+        from steward.features.registry import is_always_on
+
+        # None — фича не выключается настройками чата
+        self.capabilities: dict[int, str | None] = {
+            id(h): None if is_always_on(h.feature_class) else h.capability for h in handlers
+        }
+
+    def is_stale(self, handlers: list[Handler]) -> bool:
+        return handlers is not self._handlers or len(handlers) != self._size
+
+    def route(self, update: Update, action: str) -> list[Handler]:
+        if action == "chat":
+            name = command_name(update)
+            if name is not None and name in self.commands:
+                return self.commands[name]
+        elif action == "callback":
+            query = update.callback_query
+            data = query.data if query is not None else None
+            if data:
+                prefix = data.split("|", 1)[0]
+                if prefix in self.callbacks:
+                    return self.callbacks[prefix]
+        return self.monitors.get(action, self._handlers)
@@ -59,7 +59,7 @@ from steward.features.download.yt import (
 )
 from steward.features.voice_video.transcription import create_transcription_reply
 from steward.helpers.limiter import Duration, check_limit
-from steward.helpers.media import fetch_tg_file_to, is_video_file
+from steward.helpers.media import borrow_tg_file, is_video_file, release_tg_file
 from steward.metrics import ContextMetrics
 
 logger = logging.getLogger(__name__)
@@ -135,12 +135,15 @@ async def _upload_video(
         raise RuntimeError("служебная загрузка вернула не видео")
 
     await _delete_quietly(bot, msg)
-    return [CachedMedia(
+    medias = [CachedMedia(
         file_id=msg.video.file_id,
         caption=caption,
         kind="video",
         duration=float(duration) if duration else None,
     )]
+    # Id ролика из метаданных — чтобы короткие ссылки на него тоже попадали в кэш
+    video_cache.put(url, medias, info=info)
+    return medias
 
 
 async def _upload_images(url: str, bot: ExtBot) -> list[CachedMedia]:
@@ -276,17 +279,19 @@ async def _load_medias(url: str, key: str, bot: ExtBot) -> list[CachedMedia]:
 
 
 async def _get_medias(url: str, key: str, bot: ExtBot) -> list[CachedMedia]:
-    cached = video_cache.get(url)
+    cached = video_cache.get(url, source="inline")
     if cached is not None:
         return cached
 
     # Telegram шлёт inline query на каждое изменение текста — дедупим,
-    # чтобы одна ссылка не качалась параллельно несколько раз.
-    task = _inflight.get(url)
+    # чтобы одна ссылка (в любой из своих форм) не качалась параллельно
+    # несколько раз.
+    inflight_key = video_cache.media_key(url)
+    task = _inflight.get(inflight_key)
     if task is None:
         task = asyncio.create_task(_load_medias(url, key, bot))
-        _inflight[url] = task
-        task.add_done_callback(lambda _: _inflight.pop(url, None))
+        _inflight[inflight_key] = task
+        task.add_done_callback(lambda _: _inflight.pop(inflight_key, None))
 
     medias = await task
     video_cache.put(url, medias)
@@ -449,10 +454,8 @@ async def handle_chosen_inline_result(
         return False
 
     logger.info("inline транскрибация для %s", ctx.url)
-    with tempfile.TemporaryDirectory(prefix="inline_trans_") as dir:
-        video_path = Path(dir) / "video.mp4"
-        await fetch_tg_file_to(bot, ctx.file_id, video_path)
-
+    video_path = await borrow_tg_file(bot, ctx.file_id, prefix="inline_trans_", suffix=".mp4")
+    try:
         adapter = _InlineCaptionMessage(
             bot, chosen.inline_message_id, _source_markup(ctx.url)
         )
@@ -475,4 +478,6 @@ async def handle_chosen_inline_result(
             caption_message=adapter,
             existing_caption_html=existing,
         )
+    finally:
+        release_tg_file(video_path)
     return True
@@ -1,6 +1,14 @@
+"""ExtBot.send_message через общую очередь исходящих (outbound).
+
+Любой текст уходит заданием INTERACTIVE в полосе своего чата: обычные ответы
+обгоняют трансляции и не ловят 429, даже когда трансляция выбрала бакет
+группы. Длинный текст режется на куски, и они уходят одним заданием.
+"""
 from telegram.constants import MessageLimit
 from telegram.ext import ExtBot
 
+from steward.bot import outbound
+
 MAX_LEN = MessageLimit.MAX_TEXT_LENGTH
 
 
@@ -33,10 +41,16 @@ _original_send_message = ExtBot.send_message
 
 async def _splitting_send_message(self, *args, **kwargs):
     text = kwargs.get("text") or (args[1] if len(args) > 1 else None)
-    if not text or len(text) <= MAX_LEN:
+    chat_id = kwargs.get("chat_id") or (args[0] if args else None)
+    if chat_id is None:
         return await _original_send_message(self, *args, **kwargs)
+    if not text or len(text) <= MAX_LEN:
+        return await outbound.send(
+            chat_id,
+            lambda: _original_send_message(self, *args, **kwargs),
+            outbound.Priority.INTERACTIVE,
+        )
 
-    chat_id = kwargs.get("chat_id") or (args[0] if args else None)
     parts = split_message(text)
 
     if "text" in kwargs:
@@ -45,10 +59,16 @@ async def _splitting_send_message(self, *args, **kwargs):
     else:
         clean_args = (args[0],) + args[2:] if len(args) > 1 else args
 
-    last_message = None
-    for part in parts:
-        last_message = await _original_send_message(self, *clean_args, text=part, **kwargs)
-    return last_message
+    # Куски одного ответа — одно задание в полосе чата: чужое между ними не влезет
+    sent = await outbound.send_all(
+        chat_id,
+        [
+            lambda part=part: _original_send_message(self, *clean_args, text=part, **kwargs)
+            for part in parts
+        ],
+        outbound.Priority.INTERACTIVE,
+    )
+    return sent[-1]
 
 
 def patch_send_message():
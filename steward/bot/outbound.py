@@ -0,0 +1,358 @@
+"""Общая очередь исходящих сообщений с учётом лимитов Telegram.
+
+Трансляции, напоминания, поздравления и обычные ответы бота идут через одну
+очередь, а не стреляют в Bot API независимо: иначе, сработав разом, они
+упираются во flood control и ловят 429. Ответы попадают сюда через
+message_splitter, который оборачивает ExtBot.send_message для текста любой
+длины, с приоритетом INTERACTIVE.
+
+Вне очереди остаются правки сообщений (edit_*) и отправка медиа напрямую:
+правки стриминга ИИ-ответов и так прорежены в tg_streaming, а через бакет
+группы (15 в минуту) ответ обновлялся бы раз в несколько секунд.
+
+- Токен-бакеты: общий (до 30 в секунду) и на каждый чат — в личке
+  PRIVATE_RATE, в группах до 20 в минуту.
+- В пределах чата строгий FIFO: следующая отправка в чат начинается только
+  после завершения предыдущей.
+- Между чатами первым уходит более приоритетный запрос
+  (INTERACTIVE < NOTIFY < BULK), при равенстве — более ранний.
+- RetryAfter ставит чат на паузу на указанное время, после чего запрос
+  повторяется с головы очереди чата (до MAX_RETRIES раз).
+
+Отправка, сделанная изнутри уже выполняющейся отправки в тот же чат
+(message_splitter режет текст напоминания на куски), не встаёт в очередь —
+полоса чата уже занята внешним запросом. Первая такая отправка идёт на токен,
+взятый при старте внешнего запроса, следующие ждут свои. send_all() держит
+полосу на весь пакет: куски одного ответа не перемежаются чужими сообщениями.
+
+Метрики: outbound_queue_depth{priority}, outbound_wait_seconds{priority},
+outbound_retry_after_total{priority}.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from telegram.error import RetryAfter
+
+from steward.metrics.base import MetricsEngine
+
+logger = logging.getLogger(__name__)
+
+# Бакет пропускает за окно до burst + rate·окно: скорость чуть ниже
+# объявленной Telegram, чтобы с запасом укладываться в 30/с и 20/мин
+GLOBAL_RATE = 25.0
+GLOBAL_BURST = 5
+PRIVATE_RATE = 1.0
+PRIVATE_BURST = 3
+GROUP_RATE = 15 / 60
+GROUP_BURST = 5
+MAX_RETRIES = 3
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    NOTIFY = 1
+    BULK = 2
+
+
+type SendCall = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _Slot:
+    """The lane a running job holds; `prepaid` until its start token is used."""
+
+    chat_id: int | str
+    prepaid: bool = True
+
+
+# Полоса, в которой выполняется текущая отправка
+_current_slot: contextvars.ContextVar[_Slot | None] = contextvars.ContextVar(
+    "outbound_slot", default=None
+)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if it already is)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+@dataclass
+class _Job:
+    priority: Priority
+    seq: int
+    call: SendCall
+    future: asyncio.Future
+    enqueued_at: float
+    retries: int = 0
+
+
+@dataclass
+class _Lane:
+    bucket: TokenBucket
+    jobs: deque[_Job] = field(default_factory=deque)
+    busy: bool = False
+    paused_until: float = 0.0
+
+
+class OutboundQueue:
+    """Per-chat FIFO lanes drained by one pump under global and per-chat token buckets."""
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = GLOBAL_RATE,
+        global_burst: float = GLOBAL_BURST,
+        private_rate: float = PRIVATE_RATE,
+        private_burst: float = PRIVATE_BURST,
+        group_rate: float = GROUP_RATE,
+        group_burst: float = GROUP_BURST,
+        max_retries: int = MAX_RETRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._global_limit = (global_rate, global_burst)
+        self._private_limit = (private_rate, private_burst)
+        self._group_limit = (group_rate, group_burst)
+        self._max_retries = max_retries
+        self._clock = clock
+        self.metrics: MetricsEngine | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._lanes: dict[int | str, _Lane] = {}
+        self._global = TokenBucket(*self._global_limit, self._clock())
+        self._wake = asyncio.Event()
+        self._pump: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._depth = dict.fromkeys(Priority, 0)
+        self._seq = itertools.count()
+
+    def depth(self, priority: Priority | None = None) -> int:
+        if priority is None:
+            return sum(self._depth.values())
+        return self._depth[priority]
+
+    async def send(self, chat_id: int | str, call: SendCall, priority: Priority = Priority.NOTIFY) -> Any:
+        """Run `call` (one Bot API request to `chat_id`) when the limits allow; returns its result."""
+        slot = _current_slot.get()
+        if slot is not None and slot.chat_id == chat_id:
+            return await self._send_nested(slot, call)
+        self._ensure_pump()
+        job = _Job(
+            priority,
+            next(self._seq),
+            call,
+            asyncio.get_running_loop().create_future(),
+            self._clock(),
+        )
+        self._lane(chat_id).jobs.append(job)
+        self._track_depth(priority, 1)
+        self._wake.set()
+        return await job.future
+
+    async def send_all(
+        self, chat_id: int | str, calls: list[SendCall], priority: Priority = Priority.NOTIFY
+    ) -> list[Any]:
+        """Run several requests to `chat_id` back to back, holding the chat's lane between them."""
+
+        async def run_all() -> list[Any]:
+            return [await self.send(chat_id, call) for call in calls]
+
+        slot = _current_slot.get()
+        if slot is not None and slot.chat_id == chat_id:
+            return await run_all()
+        return await self.send(chat_id, run_all, priority)
+
+    def close(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+        for task in list(self._running):
+            task.cancel()
+        self._pump = None
+
+    def _ensure_pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Прежний цикл событий закрыт — его полосы и насос уже не оживут
+            self._loop = loop
+            self._reset()
+        if self._pump is None or self._pump.done():
+            self._pump = loop.create_task(self._run())
+
+    def _lane(self, chat_id: int | str) -> _Lane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            private = isinstance(chat_id, int) and chat_id > 0
+            rate, burst = self._private_limit if private else self._group_limit
+            lane = self._lanes[chat_id] = _Lane(TokenBucket(rate, burst, self._clock()))
+        return lane
+
+    def _track_depth(self, priority: Priority, delta: int) -> None:
+        self._depth[priority] += delta
+        if self.metrics is not None:
+            self.metrics.set(
+                "outbound_queue_depth", {"priority": priority.name.lower()}, self._depth[priority]
+            )
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            delay = self._dispatch()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except TimeoutError:
+                pass
+
+    def _dispatch(self) -> float | None:
+        """Start every job the limits allow now; returns how long until the next one may be ready."""
+        while True:
+            now = self._clock()
+            best: tuple[int | str, _Lane, _Job] | None = None
+            wait: float | None = None
+            for chat_id, lane in list(self._lanes.items()):
+                if lane.busy:
+                    continue
+                while lane.jobs and lane.jobs[0].future.done():
+                    # Вызывающий перестал ждать — отправлять уже некому
+                    self._track_depth(lane.jobs.popleft().priority, -1)
+                if not lane.jobs:
+                    if lane.paused_until <= now and lane.bucket.full(now):
+                        del self._lanes[chat_id]
+                    continue
+                job = lane.jobs[0]
+                delay = max(lane.paused_until - now, lane.bucket.wait_time(now))
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                elif best is None or (job.priority, job.seq) < (best[2].priority, best[2].seq):
+                    best = (chat_id, lane, job)
+            if best is None:
+                return wait
+            global_delay = self._global.wait_time(now)
+            if global_delay > 0:
+                return global_delay if wait is None else min(wait, global_delay)
+            self._start(*best, now)
+
+    def _start(self, chat_id: int | str, lane: _Lane, job: _Job, now: float) -> None:
+        lane.jobs.popleft()
+        lane.busy = True
+        lane.bucket.take(now)
+        self._global.take(now)
+        self._track_depth(job.priority, -1)
+        if self.metrics is not None and job.retries == 0:
+            self.metrics.observe(
+                "outbound_wait_seconds", {"priority": job.priority.name.lower()}, now - job.enqueued_at
+            )
+        task = asyncio.get_running_loop().create_task(self._execute(chat_id, lane, job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _execute(self, chat_id: int | str, lane: _Lane, job: _Job) -> None:
+        slot = _Slot(chat_id)
+        _current_slot.set(slot)
+        try:
+            result = await job.call()
+        except RetryAfter as e:
+            self._pause(lane, e, job.priority)
+            # Вложенные отправки уже повторялись сами; повтор всего задания
+            # отправил бы заново то, что до них уже ушло
+            if slot.prepaid and job.retries < self._max_retries and not job.future.done():
+                job.retries += 1
+                lane.jobs.appendleft(job)
+                self._track_depth(job.priority, 1)
+            elif not job.future.done():
+                job.future.set_exception(e)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            lane.busy = False
+            self._wake.set()
+
+    async def _send_nested(self, slot: _Slot, call: SendCall) -> Any:
+        lane = self._lane(slot.chat_id)
+        for attempt in range(self._max_retries + 1):
+            if slot.prepaid:
+                # Токен за этот запрос взят при старте внешнего задания
+                slot.prepaid = False
+            else:
+                while True:
+                    now = self._clock()
+                    delay = max(
+                        lane.paused_until - now, lane.bucket.wait_time(now), self._global.wait_time(now)
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                lane.bucket.take(now)
+                self._global.take(now)
+            try:
+                return await call()
+            except RetryAfter as e:
+                if attempt == self._max_retries:
+                    raise
+                self._pause(lane, e, Priority.INTERACTIVE)
+
+    def _pause(self, lane: _Lane, error: RetryAfter, priority: Priority) -> None:
+        retry_after = float(error.retry_after)
+        lane.paused_until = max(lane.paused_until, self._clock() + retry_after)
+        logger.warning("Flood control: chat paused for %.1fs", retry_after)
+        if self.metrics is not None:
+            self.metrics.inc("outbound_retry_after_total", {"priority": priority.name.lower()})
+
+
+_queue = OutboundQueue()
+
+
+def set_metrics(metrics: MetricsEngine | None):
+    _queue.metrics = metrics
+
+
+async def send(chat_id: int | str, call: SendCall, priority: Priority = Priority.NOTIFY) -> Any:
+    return await _queue.send(chat_id, call, priority)
+
+
+async def send_all(
+    chat_id: int | str, calls: list[SendCall], priority: Priority = Priority.NOTIFY
+) -> list[Any]:
+    return await _queue.send_all(chat_id, calls, priority)
+
+
+def close() -> None:
+    _queue.close()
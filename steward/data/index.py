@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Secondary index over one list field of Database.
+
+    `multi` indexes an iterable field (one entry per element, e.g.
+    BillV2.participants). `mutable` marks fields that code rewrites in place
+    (`person.telegram_id = ...`) or collections whose elements get replaced
+    by position: such indexes are rebuilt after any save() that touches the
+    collection, and a miss is checked against the list itself, so a key
+    changed before the save is still found. Appends/removals through
+    ListCollection and list reassignment are tracked for every index.
+    """
+
+    attr: str
+    field: str
+    multi: bool = False
+    mutable: bool = False
+
+
+class CollectionIndex:
+    def __init__(self, spec: IndexSpec):
+        self.spec = spec
+        self._buckets: dict[Any, list[Any]] = {}
+        # id(элемента) -> позиция в списке: так видно замену элемента на месте
+        self._positions: dict[int, int] = {}
+        # Список, по которому построен индекс, и его длина на тот момент:
+        # переприсвоение поля или append/remove мимо коллекции их меняют.
+        self._source: list[Any] | None = None
+        self._length = -1
+        self._stale = True
+        # Растёт при каждом изменении — по нему кэши поверх индекса понимают,
+        # что их пора пересобрать.
+        self.version = 0
+
+    def _keys(self, item: Any) -> Iterable[Any]:
+        value = getattr(item, self.spec.field, None)
+        if not self.spec.multi:
+            return (value,)
+        return dict.fromkeys(value or ())
+
+    def _matches(self, item: Any, value: Any) -> bool:
+        current = getattr(item, self.spec.field, None)
+        if self.spec.multi:
+            return current is not None and value in current
+        return current == value
+
+    def _in_list(self, items: list[Any], item: Any) -> bool:
+        position = self._positions.get(id(item))
+        return position is not None and position < len(items) and items[position] is item
+
+    def _is_fresh(self, items: list[Any]) -> bool:
+        return not self._stale and self._source is items and self._length == len(items)
+
+    def rebuild(self, items: list[Any]):
+        buckets: dict[Any, list[Any]] = {}
+        for item in items:
+            for key in self._keys(item):
+                buckets.setdefault(key, []).append(item)
+        self._buckets = buckets
+        self._positions = {id(item): i for i, item in enumerate(items)}
+        self._source = items
+        self._length = len(items)
+        self._stale = False
+        self.version += 1
+
+    def invalidate(self):
+        self._stale = True
+
+    def added(self, items: list[Any], item: Any):
+        if self._stale or self._source is not items or self._length != len(items) - 1:
+            self._stale = True
+            return
+        for key in self._keys(item):
+            self._buckets.setdefault(key, []).append(item)
+        self._positions[id(item)] = len(items) - 1
+        self._length = len(items)
+        self.version += 1
+
+    def removed(self, items: list[Any], item: Any):
+        if self._stale or self._source is not items or self._length != len(items) + 1:
+            self._stale = True
+            return
+        for key in self._keys(item):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket[:] = [x for x in bucket if x is not item]
+            if not bucket:
+                del self._buckets[key]
+        self._positions = {id(x): i for i, x in enumerate(items)}
+        self._length = len(items)
+        self.version += 1
+
+    def refresh(self, items: list[Any]):
+        if not self._is_fresh(items):
+            self.rebuild(items)
+
+    def lookup(self, items: list[Any], value: Any) -> list[Any]:
+        """Items whose field equals (for multi: contains) `value`, in list order."""
+        self.refresh(items)
+        bucket = self._buckets.get(value, ())
+        # Ключ поменяли на месте или элемент заменили, не сохранив, —
+        # перестраиваем и ищем заново
+        if any(
+            not self._matches(item, value) or not self._in_list(items, item)
+            for item in bucket
+        ):
+            self.rebuild(items)
+            bucket = self._buckets.get(value, ())
+        if not bucket and self.spec.mutable:
+            # Промах по изменяемому полю: новый ключ могли записать на месте
+            # (или заменить элемент) до save() — сверяемся со списком
+            found = [item for item in items if self._matches(item, value)]
+            if found:
+                self.rebuild(items)
+                return found
+        return list(bucket)
+
+    def first(self, items: list[Any], value: Any) -> Any | None:
+        found = self.lookup(items, value)
+        return found[0] if found else None
+
+
+class IndexRegistry:
+    """All secondary indexes of a Repository, keyed by (attr, field)."""
+
+    def __init__(self, source: Callable[[], Any], specs: Iterable[IndexSpec] = ()):
+        self._source = source
+        self._indexes: dict[tuple[str, str], CollectionIndex] = {}
+        self._by_attr: dict[str, list[CollectionIndex]] = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: IndexSpec) -> CollectionIndex:
+        key = (spec.attr, spec.field)
+        existing = self._indexes.get(key)
+        if existing is not None:
+            return existing
+        index = CollectionIndex(spec)
+        self._indexes[key] = index
+        self._by_attr.setdefault(spec.attr, []).append(index)
+        return index
+
+    def get(self, attr: str, field: str) -> CollectionIndex | None:
+        return self._indexes.get((attr, field))
+
+    def _items(self, attr: str) -> list[Any]:
+        return getattr(self._source(), attr)
+
+    def first(self, attr: str, field: str, value: Any) -> Any | None:
+        return self._indexes[(attr, field)].first(self._items(attr), value)
+
+    def lookup(self, attr: str, field: str, value: Any) -> list[Any]:
+        return self._indexes[(attr, field)].lookup(self._items(attr), value)
+
+    def added(self, attr: str, item: Any):
+        for index in self._by_attr.get(attr, ()):
+            index.added(self._items(attr), item)
+
+    def removed(self, attr: str, item: Any):
+        for index in self._by_attr.get(attr, ()):
+            index.removed(self._items(attr), item)
+
+    def replaced(self, attr: str):
+        for index in self._by_attr.get(attr, ()):
+            index.invalidate()
+
+    def touch(self, fields: Iterable[str] | None):
+        """Called on save(): drop mutable indexes of `fields` (None — all)."""
+        attrs = None if fields is None else set(fields)
+        for index in self._indexes.values():
+            if index.spec.mutable and (attrs is None or index.spec.attr in attrs):
+                index.invalidate()
+
+    def rebuild(self):
+        for (attr, _), index in self._indexes.items():
+            index.rebuild(self._items(attr))
@@ -1,8 +1,10 @@
+import copy
 import logging
+import pickle
 from dataclasses import asdict, dataclass, field, is_dataclass
 from datetime import datetime, time, timedelta, timezone
 from enum import Enum
-from typing import Any, Callable, Sized
+from typing import Any, Callable, Iterable, Sized
 
 from dacite import Config, from_dict
 
@@ -47,7 +49,7 @@ from .chat_settings import ChatSettings
 from .reward import Reward
 from .role import Role, UserRole
 from .rule import Rule
-from .tennis import TennisMatch, TennisSession
+from .tennis import TennisLivePoints, TennisMatch, TennisSession
 from .todo_item import TodoItem
 from .user import User
 from .user_fact import UserFact
@@ -93,6 +95,7 @@ class Database:
     user_facts: list[UserFact] = field(default_factory=list)
     fuck_assets: list[FuckAsset] = field(default_factory=list)
     tennis_sessions: list[TennisSession] = field(default_factory=list)
+    tennis_live_points: list[TennisLivePoints] = field(default_factory=list)
     incidents: list[Incident] = field(default_factory=list)
     user_languages: dict[str, str] = field(default_factory=dict)
     holiday_caches: list[HolidayCache] = field(default_factory=list)
@@ -197,3 +200,36 @@ def parse_from_dict(data: dict[str, Any]) -> Database:
 
 def serialize_to_dict(db: Database) -> dict[str, Any]:
     return asdict(db)
+
+
+def _serialize_value(value: Any) -> Any:
+    # То же, что делает asdict для поля датакласса.
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_serialize_value(v) for v in value)
+    if isinstance(value, dict):
+        return type(value)((_serialize_value(k), _serialize_value(v)) for k, v in value.items())
+    return copy.deepcopy(value)
+
+
+def serialize_fields_to_dict(db: Database, fields: Iterable[str]) -> dict[str, Any]:
+    return {name: _serialize_value(getattr(db, name)) for name in fields}
+
+
+def snapshot_fields(db: Database, fields: Iterable[str] | None = None) -> bytes:
+    """Изолированный снимок полей базы (всех, если fields не задан).
+
+    pickle проходит по объектам на C и на порядок дешевле asdict, поэтому
+    на event loop остаётся только он; дальнейшие правки базы снимок не видят.
+    """
+    names = fields if fields is not None else db.__dataclass_fields__
+    return pickle.dumps(
+        {name: getattr(db, name) for name in names},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def serialize_snapshot(snapshot: bytes) -> dict[str, Any]:
+    """snapshot_fields -> dict для Storage; безопасно звать из другого потока."""
+    return {name: _serialize_value(value) for name, value in pickle.loads(snapshot).items()}
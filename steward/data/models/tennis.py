@@ -54,3 +54,17 @@ class TennisSession:
     # поля остаются для совместимости со старыми записями в db.json.
     set_size: int = 0
     sets_announced: int = 0
+
+
+@dataclass
+class TennisLivePoints:
+    """Очки текущей партии, записанные тапом без перезаписи всей tennis_sessions.
+
+    При загрузке базы сворачиваются обратно в свою TennisSession
+    (см. Repository._migrate) и удаляются.
+    """
+    session_id: int
+    points_log: list[str] = field(default_factory=list)
+    current_score_a: int = 0
+    current_score_b: int = 0
+    updated_at: datetime = field(default_factory=datetime.now)
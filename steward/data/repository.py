@@ -2,19 +2,30 @@ import asyncio
 import datetime
 import json
 import logging
+import os
 from abc import abstractmethod
 from datetime import time, timedelta
 from inspect import isawaitable
-from typing import Any, Awaitable, Callable
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 from zoneinfo import ZoneInfo
 
 import aiofiles
 import aiofiles.os
 
+from steward.data.index import IndexRegistry, IndexSpec
+
+if TYPE_CHECKING:
+    from steward.metrics.base import MetricsEngine
+
 logger = logging.getLogger(__name__)
 
 
 class Storage:
+    # True if the storage can persist a subset of top-level keys via
+    # write_changes() without rewriting everything.
+    incremental = False
+
     @abstractmethod
     async def read_dict(self) -> dict[str, Any]:
         pass
@@ -23,6 +34,14 @@ class Storage:
     async def write_dict(self, data: dict[str, Any]):
         pass
 
+    @abstractmethod
+    async def write_changes(self, changes: dict[str, Any]):
+        # Вызывается только при incremental = True
+        pass
+
+    async def compact(self):
+        pass
+
 
 class JsonEncoder(json.JSONEncoder):
     def default(self, o: Any) -> Any:
@@ -65,7 +84,7 @@ class JsonFileStorage(Storage):
             if data.strip() == "":
                 self.cache = {}
             else:
-                self.cache = json.loads(data)
+                self.cache = await asyncio.to_thread(json.loads, data)
 
         return self.cache
 
@@ -73,7 +92,8 @@ class JsonFileStorage(Storage):
         self.written = True
 
         try:
-            data = json.dumps(
+            data = await asyncio.to_thread(
+                json.dumps,
                 data,
                 sort_keys=True,
                 indent=4,
@@ -88,16 +108,257 @@ class JsonFileStorage(Storage):
             await f.write(data)
 
 
+class JournalFileStorage(Storage):
+    """Snapshot + append-only journal of top-level key replacements.
+
+    Every write appends one line `{"set": {...}, "unset": [...]}` with only
+    the keys whose encoding changed, so the cost of a save follows the size of
+    the change. When the journal outgrows the snapshot it is folded back into
+    it (compaction). Replaying a journal line is idempotent, so a crash at any
+    point between "snapshot written" and "journal truncated" is harmless;
+    a torn last line is dropped on read.
+
+    The snapshot stays a regular JSON object (one key per line), so everything
+    that reads db.json directly keeps working once the journal is compacted.
+    """
+
+    incremental = True
+
+    def __init__(
+        self,
+        path: str,
+        journal_path: str | None = None,
+        min_compact_bytes: int = 1024 * 1024,
+    ):
+        self.path = path
+        self.journal_path = journal_path or path + ".journal"
+        self.min_compact_bytes = min_compact_bytes
+
+        self._encoded: dict[str, str] = {}
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+        self._needs_compaction = False
+
+    @staticmethod
+    def _encode_all(data: dict[str, Any]) -> dict[str, str]:
+        return {
+            k: json.dumps(v, sort_keys=True, ensure_ascii=False, cls=JsonEncoder)
+            for k, v in data.items()
+        }
+
+    async def read_dict(self) -> dict[str, Any]:
+        self._needs_compaction = False
+        data = await asyncio.to_thread(self._read_sync)
+        self._encoded = await asyncio.to_thread(self._encode_all, data)
+        return data
+
+    async def write_dict(self, data: dict[str, Any]):
+        try:
+            encoded = await asyncio.to_thread(self._encode_all, data)
+        except Exception as e:
+            logger.exception(e)
+            return
+        changed = {k: v for k, v in encoded.items() if self._encoded.get(k) != v}
+        removed = [k for k in self._encoded if k not in encoded]
+        await self._commit(changed, removed)
+
+    async def write_changes(self, changes: dict[str, Any]):
+        try:
+            encoded = await asyncio.to_thread(self._encode_all, changes)
+        except Exception as e:
+            logger.exception(e)
+            return
+        changed = {k: v for k, v in encoded.items() if self._encoded.get(k) != v}
+        await self._commit(changed, [])
+
+    async def compact(self):
+        await self._commit({}, [], force_compaction=True)
+
+    async def _commit(
+        self,
+        changed: dict[str, str],
+        removed: list[str],
+        force_compaction: bool = False,
+    ):
+        if changed or removed:
+            line = self._journal_line(changed, removed)
+            await asyncio.to_thread(self._append_sync, line)
+            self._journal_bytes += len(line.encode("utf-8"))
+            self._encoded.update(changed)
+            for k in removed:
+                self._encoded.pop(k, None)
+
+        journal_too_big = self._journal_bytes > max(self.min_compact_bytes, self._snapshot_bytes)
+        if force_compaction or self._needs_compaction or journal_too_big:
+            snapshot = self._render_snapshot(self._encoded)
+            await asyncio.to_thread(self._compact_sync, snapshot)
+            self._snapshot_bytes = len(snapshot.encode("utf-8"))
+            self._journal_bytes = 0
+            self._needs_compaction = False
+
+    @staticmethod
+    def _journal_line(changed: dict[str, str], removed: list[str]) -> str:
+        body = ", ".join(f"{json.dumps(k, ensure_ascii=False)}: {v}" for k, v in changed.items())
+        return f'{{"set": {{{body}}}, "unset": {json.dumps(removed, ensure_ascii=False)}}}\n'
+
+    @staticmethod
+    def _render_snapshot(encoded: dict[str, str]) -> str:
+        if not encoded:
+            return "{}\n"
+        body = ",\n".join(
+            f"    {json.dumps(k, ensure_ascii=False)}: {v}" for k, v in sorted(encoded.items())
+        )
+        return "{\n" + body + "\n}\n"
+
+    def _read_snapshot_sync(self) -> dict[str, Any]:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            self._needs_compaction = True
+            return {}
+        self._snapshot_bytes = len(raw.encode("utf-8"))
+        try:
+            if raw.strip():
+                return json.loads(raw)
+            error = None
+        except json.JSONDecodeError as e:
+            error = e
+        # Пустой или битый снапшот при живом .tmp — упали посреди перезаписи
+        # на месте, полная копия лежит в .tmp
+        if not os.path.exists(tmp_path):
+            if error is not None:
+                raise error
+            return {}
+        logger.warning("snapshot %s is damaged, recovering from %s", self.path, tmp_path)
+        with open(tmp_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._needs_compaction = True
+        return data
+
+    def _read_sync(self) -> dict[str, Any]:
+        data = self._read_snapshot_sync()
+
+        replayed = 0
+        good_offset = 0
+        self._journal_bytes = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for raw_line in f:
+                    try:
+                        entry = json.loads(raw_line.decode("utf-8"))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        logger.warning(
+                            "dropping torn journal tail at offset %s in %s",
+                            good_offset,
+                            self.journal_path,
+                        )
+                        break
+                    data.update(entry.get("set", {}))
+                    for k in entry.get("unset", []):
+                        data.pop(k, None)
+                    good_offset += len(raw_line)
+                    replayed += 1
+        except FileNotFoundError:
+            return data
+
+        if good_offset != os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+        self._journal_bytes = good_offset
+        # Всё, что пришло из журнала, сворачиваем в снапшот при первой же записи
+        # (то есть сразу после Repository.migrate()).
+        if replayed:
+            self._needs_compaction = True
+        return data
+
+    def _append_sync(self, line: str):
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact_sync(self, snapshot: str):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # db.json примонтирован в контейнер отдельным файлом — rename на него
+            # не работает. Пишем на месте без предварительного усечения: упав
+            # посередине, оставим битый, а не пустой файл. .tmp остаётся до конца
+            # записи и подхватывается при чтении.
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT)
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            os.remove(tmp_path)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+
 class Repository:
-    def __init__(self, storage: Storage):
+    # Вторичные индексы для горячих поисков (chat_settings_for на каждый
+    # апдейт, _find_user, счета). Коллекции могут объявить свои через
+    # collection(..., indexes=...).
+    INDEXES: tuple[IndexSpec, ...] = (
+        IndexSpec("users", "id"),
+        IndexSpec("chats", "id", mutable=True),  # broadcast переписывает id при миграции чата
+        IndexSpec("chat_settings", "chat_id"),
+        IndexSpec("user_roles", "user_id"),
+        IndexSpec("bill_persons", "id"),
+        IndexSpec("bill_persons", "telegram_id", mutable=True),
+        IndexSpec("bills_v2", "id"),
+        IndexSpec("bills_v2", "author_person_id", mutable=True),
+        IndexSpec("bills_v2", "participants", multi=True, mutable=True),
+        IndexSpec("rules", "chats", multi=True, mutable=True),
+    )
+
+    def __init__(self, storage: Storage, save_window: float = 0):
         self._storage = storage
         self._save_lock = asyncio.Lock()
         self._save_callbacks: set[Callable[[], None | Awaitable[Any]]] = set()
 
+        # Group commit: при save_window > 0 save() только помечает базу грязной,
+        # а фоновый флашер пишет не чаще раза в окно. flush() — барьер.
+        self.save_window = save_window
+        self._dirty = False
+        self._dirty_fields: set[str] | None = set()  # None — нужна полная запись
+        self._pending_saves = 0
+        self._flush_task: asyncio.Task | None = None
+        self._metrics: "MetricsEngine | None" = None
+
         # Add abstraction on database to prevent cyclic dependencies and remove this kostil
         from steward.data.models.db import Database
 
         self.db = Database()
+        self.indexes = IndexRegistry(lambda: self.db, self.INDEXES)
+        # chat_id → {класс фичи → включена ли}. Сбрасывается на save() настроек.
+        self._capability_cache: dict[int, dict[type, bool]] = {}
+        # Номер последнего save(), задевшего поле, — для кэшей поверх базы
+        self._save_seq = 0
+        self._full_save_seq = 0
+        self._field_save_seq: dict[str, int] = {}
+
+    def field_version(self, attr: str) -> int:
+        """Changes whenever a save() may have touched `attr`."""
+        return max(self._full_save_seq, self._field_save_seq.get(attr, 0))
+
+    def set_metrics(self, metrics: "MetricsEngine"):
+        self._metrics = metrics
 
     async def migrate(self):
         data = await self._storage.read_dict()
@@ -106,13 +367,81 @@ class Repository:
         from steward.data.models.db import parse_from_dict
 
         self.db = parse_from_dict(migrated_data)
-        await self.save()
+        self.indexes.rebuild()
+        await self.flush()
+
+    async def save(self, *fields: str):
+        """Persist the database.
+
+        `fields` names the Database attributes the caller changed. Incremental
+        storages then serialize and write only those; everything else (and any
+        storage without incremental support) gets a full write.
 
-    async def save(self):
+        With a save window the write is deferred and coalesced with other
+        saves; use flush() where the change must be on disk before replying.
+        """
+        if self.save_window <= 0:
+            await self.flush(*fields)
+            return
+        self._mark_dirty(fields)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def flush(self, *fields: str):
+        """Save right now and wait until it is stored.
+
+        Writes `fields` (the whole database when none are given) together with
+        everything other callers marked dirty since the last flush.
+        """
+        self._mark_dirty(fields)
+        await self._write_dirty()
+
+    async def _write_dirty(self):
         async with self._save_lock:
-            from steward.data.models.db import serialize_to_dict
+            if not self._dirty:
+                return
+            dirty_fields, saves = self._dirty_fields, self._pending_saves
+            self._dirty = False
+            self._dirty_fields = set()
+            self._pending_saves = 0
+
+            from steward.data.models.db import (
+                serialize_fields_to_dict,
+                serialize_snapshot,
+                serialize_to_dict,
+                snapshot_fields,
+            )
 
-            await self._storage.write_dict(serialize_to_dict(self.db))
+            incremental = bool(dirty_fields) and self._storage.incremental
+            started = perf_counter()
+            try:
+                # На loop'е только снимок; asdict и json — в пуле потоков.
+                try:
+                    snapshot = snapshot_fields(self.db, dirty_fields if incremental else None)
+                except Exception as e:
+                    logger.warning("db snapshot is not picklable, serializing on loop: %s", e)
+                    snapshot = None
+                snapshot_seconds = perf_counter() - started
+                if snapshot is not None:
+                    data = await asyncio.to_thread(serialize_snapshot, snapshot)
+                elif incremental:
+                    data = serialize_fields_to_dict(self.db, dirty_fields)
+                else:
+                    data = serialize_to_dict(self.db)
+                if incremental:
+                    await self._storage.write_changes(data)
+                else:
+                    await self._storage.write_dict(data)
+            except BaseException:
+                # Не записали — изменения снова ждут следующего флаша
+                self._restore_dirty(dirty_fields, saves)
+                raise
+            if self._metrics is not None:
+                self._metrics.inc("db_flushes_total", {})
+                self._metrics.observe("db_snapshot_seconds", {}, snapshot_seconds)
+                self._metrics.observe("db_flush_seconds", {}, perf_counter() - started)
+                if saves > 1:
+                    self._metrics.inc("db_coalesced_saves_total", {}, saves - 1)
         for callback in self._save_callbacks:
             try:
                 result = callback()
@@ -122,6 +451,47 @@ class Repository:
                 logging.exception(e)
                 pass
 
+    def _restore_dirty(self, fields: set[str] | None, saves: int):
+        self._dirty = True
+        self._pending_saves += saves
+        if fields is None or self._dirty_fields is None:
+            self._dirty_fields = None
+        else:
+            self._dirty_fields |= fields
+
+    def _mark_dirty(self, fields: tuple[str, ...]):
+        self.indexes.touch(fields or None)
+        if not fields or "chat_settings" in fields:
+            self._capability_cache.clear()
+        self._save_seq += 1
+        if not fields:
+            self._full_save_seq = self._save_seq
+        for field in fields:
+            self._field_save_seq[field] = self._save_seq
+        self._dirty = True
+        self._pending_saves += 1
+        if not fields:
+            self._dirty_fields = None
+        elif self._dirty_fields is not None:
+            self._dirty_fields.update(fields)
+
+    async def _delayed_flush(self):
+        while True:
+            await asyncio.sleep(self.save_window)
+            try:
+                await self._write_dirty()
+            except Exception as e:
+                logger.exception(e)
+            # save() во время записи новую задачу не создал — эта ещё не кончилась
+            if not self._dirty:
+                return
+
+    async def compact(self):
+        """Fold pending journal entries into the on-disk snapshot (db.json)."""
+        await self.flush()
+        async with self._save_lock:
+            await self._storage.compact()
+
     def subscribe_on_save(self, callback: Callable[[], Awaitable[Any] | None]):
         self._save_callbacks.add(callback)
 
@@ -140,9 +510,9 @@ class Repository:
     def chat_settings_for(self, chat_id: int):
         from steward.data.models.chat_settings import ChatSettings
         from steward.features.registry import ALL_CAPABILITIES
-        for s in self.db.chat_settings:
-            if s.chat_id == chat_id:
-                return s
+        s = self.indexes.first("chat_settings", "chat_id", chat_id)
+        if s is not None:
+            return s
         # Telegram: positive chat_id == private (DM with the user).
         # Negative chat_id == group/supergroup. Private chats default to
         # all-on so existing users aren't broken; groups default to all-off
@@ -154,9 +524,17 @@ class Repository:
             onboarded=is_private,
         )
         self.db.chat_settings.append(s)
+        self.indexes.added("chat_settings", s)
         return s
 
     def is_capability_enabled(self, chat_id: int, feature_cls: type) -> bool:
+        cached = self._capability_cache.setdefault(chat_id, {})
+        enabled = cached.get(feature_cls)
+        if enabled is None:
+            enabled = cached[feature_cls] = self._is_capability_enabled(chat_id, feature_cls)
+        return enabled
+
+    def _is_capability_enabled(self, chat_id: int, feature_cls: type) -> bool:
         from steward.features.registry import capability_of, feature_slug
         cap = capability_of(feature_cls)
         if cap is None:
@@ -166,6 +544,13 @@ class Repository:
             return False
         return feature_slug(feature_cls) not in s.disabled_features
 
+    def invalidate_capabilities(self, chat_id: int | None = None):
+        """Drop cached is_capability_enabled() answers (for one chat or all)."""
+        if chat_id is None:
+            self._capability_cache.clear()
+        else:
+            self._capability_cache.pop(chat_id, None)
+
     def is_chat_admin(self, user_id: int | None, chat_id: int) -> bool:
         if user_id is None:
             return False
@@ -180,7 +565,7 @@ class Repository:
     def permissions_of(self, user_id: int | None) -> set[str]:
         if user_id is None:
             return set()
-        role_ids = {ur.role_id for ur in self.db.user_roles if ur.user_id == user_id}
+        role_ids = {ur.role_id for ur in self.indexes.lookup("user_roles", "user_id", user_id)}
         out: set[str] = set()
         for r in self.db.roles:
             if r.id in role_ids:
@@ -760,6 +1145,23 @@ class Repository:
             ts.setdefault("serve_streak", 2)
             ts.setdefault("set_size", 0)
             ts.setdefault("sets_announced", 0)
+        # Тапы пишут очки текущей партии в tennis_live_points, не трогая
+        # tennis_sessions, — сворачиваем их обратно в сессии
+        live_points = {
+            lp.get("session_id"): lp
+            for lp in data.get("tennis_live_points", [])
+            if isinstance(lp, dict)
+        }
+        for ts in data.get("tennis_sessions", []):
+            lp = live_points.get(ts.get("id")) if isinstance(ts, dict) else None
+            if lp is None or ts.get("ended_at") is not None:
+                continue
+            ts["points_log"] = list(lp.get("points_log", []))
+            ts["current_score_a"] = lp.get("current_score_a", 0)
+            ts["current_score_b"] = lp.get("current_score_b", 0)
+            if lp.get("updated_at") is not None:
+                ts["last_activity_at"] = lp["updated_at"]
+        data["tennis_live_points"] = []
         data.setdefault("bill_persons", [])
         data.setdefault("bills_v2", [])
         data.setdefault("bill_payments_v2", [])
@@ -837,10 +1239,7 @@ class Repository:
     # ── BillPerson ────────────────────────────────────────────────────────────
 
     def get_bill_person_by_telegram_id(self, telegram_id: int):
-        for p in self.db.bill_persons:
-            if p.telegram_id == telegram_id:
-                return p
-        return None
+        return self.indexes.first("bill_persons", "telegram_id", telegram_id)
 
     def get_bill_person_by_username(self, username: str):
         username = username.lstrip("@").lower()
@@ -850,10 +1249,7 @@ class Repository:
         return None
 
     def get_bill_person(self, person_id: str):
-        for p in self.db.bill_persons:
-            if p.id == person_id:
-                return p
-        return None
+        return self.indexes.first("bill_persons", "id", person_id)
 
     def get_or_create_bill_person(
         self,
@@ -883,6 +1279,7 @@ class Repository:
             telegram_username=username,
         )
         self.db.bill_persons.append(person)
+        self.indexes.added("bill_persons", person)
         return person, True
 
     def get_or_create_anonymous_person(self, name: str):
@@ -895,6 +1292,7 @@ class Repository:
                 return p, False
         person = BillPerson(id=str(uuid.uuid4()), display_name=name)
         self.db.bill_persons.append(person)
+        self.indexes.added("bill_persons", person)
         return person, True
 
     def merge_person(self, src_id: str, dst_id: str) -> bool:
@@ -957,6 +1355,7 @@ class Repository:
                 dst.chat_last_seen[cid] = last
 
         self.db.bill_persons = [p for p in self.db.bill_persons if p.id != src_id]
+        self.indexes.replaced("bills_v2")
         return True
 
     def merge_duplicate_anonymous_persons(self) -> list[str]:
@@ -1010,6 +1409,7 @@ class Repository:
         self.db.bill_persons = [
             p for p in self.db.bill_persons if p.id not in merged_ids
         ]
+        self.indexes.replaced("bills_v2")
         return merged_ids
 
     # ── BillV2 ────────────────────────────────────────────────────────────────
@@ -1020,16 +1420,15 @@ class Repository:
         return max(b.id for b in self.db.bills_v2) + 1
 
     def get_bill_v2(self, bill_id: int):
-        for b in self.db.bills_v2:
-            if b.id == bill_id:
-                return b
-        return None
+        return self.indexes.first("bills_v2", "id", bill_id)
 
     def get_bills_v2_for_person(self, person_id: str):
-        return [
-            b for b in self.db.bills_v2
-            if person_id in b.participants or person_id == b.author_person_id
-        ]
+        found = {
+            b.id: b
+            for b in self.indexes.lookup("bills_v2", "participants", person_id)
+            + self.indexes.lookup("bills_v2", "author_person_id", person_id)
+        }
+        return [found[bill_id] for bill_id in sorted(found)]
 
     def get_bills_v2_for_telegram_id(self, telegram_id: int):
         person = self.get_bill_person_by_telegram_id(telegram_id)
@@ -1179,13 +1578,15 @@ class Repository:
             idx.setdefault(n.chat_id, {})[self._norm_nick(n.nick)] = n.person_id
         return idx
 
+    # ── User ──────────────────────────────────────────────────────────────────
+
+    def get_user(self, user_id: int):
+        return self.indexes.first("users", "id", user_id)
+
     # ── Chat ──────────────────────────────────────────────────────────────────
 
     def get_chat(self, chat_id: int):
-        for c in self.db.chats:
-            if c.id == chat_id:
-                return c
-        return None
+        return self.indexes.first("chats", "id", chat_id)
 
     def find_chat_by_alias(self, alias: str):
         """Match a chat by user-defined alias (exact, case-insensitive) or by title."""
@@ -1,6 +1,8 @@
 import logging
 from abc import abstractmethod
 from dataclasses import dataclass
+from enum import Enum
+from typing import ClassVar
 
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.base import Generator
@@ -8,10 +10,23 @@ from steward.delayed_action.generators.base import Generator
 logger = logging.getLogger(__name__)
 
 
+class CatchUp(Enum):
+    """What to do with a firing that was missed (bot was down or overloaded)."""
+
+    # Пропустить и ждать следующего срабатывания генератора
+    SKIP = "skip"
+    # Выполнить один раз с опозданием
+    RUN = "run"
+
+
 @dataclass
 class DelayedAction:
     generator: Generator
 
+    # Периодическим действиям (дайджесты, часы) опоздавший запуск не нужен;
+    # разовые (напоминания, сроки счетов) переопределяют на RUN.
+    catch_up: ClassVar[CatchUp] = CatchUp.SKIP
+
     @abstractmethod
     async def execute(self, context: DelayedActionContext):
         pass
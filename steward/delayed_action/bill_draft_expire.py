@@ -3,7 +3,7 @@ import datetime
 import logging
 from dataclasses import dataclass
 
-from steward.delayed_action.base import DelayedAction
+from steward.delayed_action.base import CatchUp, DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.base import Generator
 from steward.helpers.class_mark import class_mark
@@ -23,6 +23,8 @@ class BillDraftExpireGenerator(Generator):
 @dataclass
 @class_mark("delayed_action/bill_draft_expire")
 class BillDraftExpireAction(DelayedAction):
+    catch_up = CatchUp.RUN
+
     draft_id: str
     generator: BillDraftExpireGenerator
 
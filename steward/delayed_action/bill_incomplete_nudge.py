@@ -3,7 +3,7 @@ import datetime
 import logging
 from dataclasses import dataclass
 
-from steward.delayed_action.base import DelayedAction
+from steward.delayed_action.base import CatchUp, DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.base import Generator
 from steward.helpers.class_mark import class_mark
@@ -25,6 +25,8 @@ class BillIncompleteNudgeGenerator(Generator):
 @dataclass
 @class_mark("delayed_action/bill_incomplete_nudge")
 class BillIncompleteNudgeAction(DelayedAction):
+    catch_up = CatchUp.RUN
+
     bill_id: int
     generator: BillIncompleteNudgeGenerator
 
@@ -3,7 +3,7 @@ import datetime
 import logging
 from dataclasses import dataclass
 
-from steward.delayed_action.base import DelayedAction
+from steward.delayed_action.base import CatchUp, DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.base import Generator
 from steward.helpers.class_mark import class_mark
@@ -41,6 +41,8 @@ def _remove_self(context: DelayedActionContext, action):
 @dataclass
 @class_mark("delayed_action/bill_suggestion_admin_hint")
 class BillSuggestionAdminHintAction(DelayedAction):
+    catch_up = CatchUp.RUN
+
     suggestion_id: str
     generator: BillSuggestionAdminHintGenerator
 
@@ -84,6 +86,8 @@ class BillSuggestionAdminHintAction(DelayedAction):
 @dataclass
 @class_mark("delayed_action/bill_suggestion_expire")
 class BillSuggestionExpireAction(DelayedAction):
+    catch_up = CatchUp.RUN
+
     suggestion_id: str
     generator: BillSuggestionExpireGenerator
 
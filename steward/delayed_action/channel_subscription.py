@@ -2,13 +2,13 @@ import logging
 import os
 from dataclasses import dataclass
 
-from aiohttp import ClientSession, ClientTimeout
-from aiohttp_socks import ProxyConnector
+from aiohttp import ClientTimeout
 from bs4 import BeautifulSoup
 
 from steward.delayed_action.base import DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.constant_generator import ConstantGenerator
+from steward.helpers import http_clients
 from steward.helpers.class_mark import class_mark
 
 logger = logging.getLogger(__name__)
@@ -27,11 +27,6 @@ async def get_posts_from_html(channel_username: str) -> list[dict[str, int]]:
     posts = []
 
     try:
-        connector = None
-        proxy_url = os.environ.get("DOWNLOAD_PROXY")
-        if proxy_url:
-            connector = ProxyConnector.from_url(proxy_url)
-
         headers = {
             "User-Agent": USER_AGENT,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -40,34 +35,32 @@ async def get_posts_from_html(channel_username: str) -> list[dict[str, int]]:
 
         timeout = ClientTimeout(total=30, connect=10)
 
-        async with ClientSession(
-            connector=connector, timeout=timeout, headers=headers
-        ) as session:
-            async with session.get(channel_url) as response:
-                if response.status != 200:
-                    logger.warning(f"Failed to fetch HTML: {response.status}")
-                    return posts
-
-                content = await response.text()
-                soup = BeautifulSoup(content, "html.parser")
-
-                messages = soup.find_all("div", class_="tgme_widget_message")
-
-                for message in messages:
-                    data_post = message.get("data-post", "")
-                    if not data_post:
-                        continue
-
-                    try:
-                        parts = data_post.split("/")
-                        if len(parts) >= 2:
-                            message_id = int(parts[-1])
-                            link = f"https://t.me/{data_post}"
-                            posts.append({"id": message_id, "link": link})
-                    except (ValueError, IndexError):
-                        continue
-
-                posts.sort(key=lambda x: x["id"])
+        session = http_clients.session("telegram-web", proxy=os.environ.get("DOWNLOAD_PROXY"))
+        async with session.get(channel_url, headers=headers, timeout=timeout) as response:
+            if response.status != 200:
+                logger.warning(f"Failed to fetch HTML: {response.status}")
+                return posts
+
+            content = await response.text()
+            soup = BeautifulSoup(content, "html.parser")
+
+            messages = soup.find_all("div", class_="tgme_widget_message")
+
+            for message in messages:
+                data_post = message.get("data-post", "")
+                if not data_post:
+                    continue
+
+                try:
+                    parts = data_post.split("/")
+                    if len(parts) >= 2:
+                        message_id = int(parts[-1])
+                        link = f"https://t.me/{data_post}"
+                        posts.append({"id": message_id, "link": link})
+                except (ValueError, IndexError):
+                    continue
+
+            posts.sort(key=lambda x: x["id"])
     except Exception as e:
         logger.exception(f"Error fetching HTML page: {e}")
 
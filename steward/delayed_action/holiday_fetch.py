@@ -7,9 +7,10 @@ import aiohttp
 from bs4 import BeautifulSoup, Tag
 
 from steward.data.models.holiday_cache import HolidayCache
-from steward.delayed_action.base import DelayedAction
+from steward.delayed_action.base import CatchUp, DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.base import Generator
+from steward.helpers import http_clients
 from steward.helpers.class_mark import class_mark
 
 logger = logging.getLogger(__name__)
@@ -135,6 +136,8 @@ class HolidayFetchGenerator(Generator):
 @dataclass
 @class_mark("delayed_action/holiday_fetch")
 class HolidayFetchAction(DelayedAction):
+    catch_up = CatchUp.RUN
+
     generator: HolidayFetchGenerator
 
     async def execute(self, context: DelayedActionContext):
@@ -145,8 +148,7 @@ class HolidayFetchAction(DelayedAction):
 
         logger.info("Holiday fetch starting for %s (interval=%dd)", today, self.generator.interval_days)
 
-        async with aiohttp.ClientSession() as session:
-            html = await fetch_html(session, _SITE_URL)
+        html = await fetch_html(http_clients.session("holidays"), _SITE_URL)
 
         if not html:
             logger.warning("Holiday fetch: page unavailable, retrying in 1 day")
@@ -1,7 +1,8 @@
 import datetime
 from dataclasses import dataclass, field
 
-from steward.delayed_action.base import DelayedAction
+from steward.bot import outbound
+from steward.delayed_action.base import CatchUp, DelayedAction
 from steward.delayed_action.context import DelayedActionContext
 from steward.delayed_action.generators.base import Generator
 from steward.helpers.class_mark import class_mark
@@ -30,6 +31,8 @@ class ReminderGenerator(Generator):
 @dataclass
 @class_mark("delayed_action/reminder")
 class ReminderDelayedAction(DelayedAction):
+    catch_up = CatchUp.RUN
+
     id: int
     chat_id: int
     user_id: int
@@ -39,7 +42,9 @@ class ReminderDelayedAction(DelayedAction):
     fired_count: int = 0
 
     async def execute(self, context: DelayedActionContext):
-        await context.bot.send_message(self.chat_id, f"🔔 {self.text}")
+        await outbound.send(
+            self.chat_id, lambda: context.bot.send_message(self.chat_id, f"🔔 {self.text}")
+        )
         self.fired_count += 1
 
         gen = self.generator
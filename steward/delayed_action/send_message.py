@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 
+from steward.bot import outbound
 from steward.delayed_action.base import DelayedAction
 from steward.helpers.class_mark import class_mark
 
@@ -17,11 +18,13 @@ class SendMessageDelayedAction(DelayedAction):
     data: str | MessageData
 
     async def execute(self, context):
+        await outbound.send(self.to_chat_id, lambda: self._send(context))
+
+    def _send(self, context):
         if isinstance(self.data, str):
-            await context.bot.send_message(self.to_chat_id, self.data)
-        else:
-            await context.bot.copy_message(
-                self.to_chat_id,
-                self.data.chat_id,
-                self.data.msg_id,
-            )
+            return context.bot.send_message(self.to_chat_id, self.data)
+        return context.bot.copy_message(
+            self.to_chat_id,
+            self.data.chat_id,
+            self.data.msg_id,
+        )
@@ -91,8 +91,7 @@ async def _resolve_poker_winrate(
     r = PROMQL_RANGE
     wins_q = f'sum by (user_id) (increase(poker_hands_total{{result="win"}}[{r}]))'
     total_q = f"sum by (user_id) (increase(poker_hands_total[{r}]))"
-    wins_samples = await metrics.query(wins_q)
-    total_samples = await metrics.query(total_q)
+    wins_samples, total_samples = await metrics.query_many([wins_q, total_q])
 
     total_map: dict[str, float] = {}
     for s in total_samples:
@@ -204,15 +203,17 @@ class DynamicRewardChecker:
         db = self._repository.db
         changed = False
 
-        for reward in db.rewards:
-            if not reward.dynamic_key:
-                continue
-            resolver = RESOLVERS.get(reward.dynamic_key)
-            if not resolver:
-                continue
-
-            new_holder_id = await resolver(self._metrics, self._repository)
-
+        # Запросы всех наград уходят параллельно, применяем результаты по порядку
+        resolved = [
+            (reward, RESOLVERS[reward.dynamic_key])
+            for reward in db.rewards
+            if reward.dynamic_key and reward.dynamic_key in RESOLVERS
+        ]
+        new_holder_ids = await asyncio.gather(
+            *(resolver(self._metrics, self._repository) for _, resolver in resolved)
+        )
+
+        for (reward, _), new_holder_id in zip(resolved, new_holder_ids):
             current_holder = next(
                 (u for u in db.users if reward.id in u.reward_ids),
                 None,
@@ -11,13 +11,11 @@ AI handler, rate limiting, slash subcommands, chat trigger, greeting, and the
 optional per-chat allowlist with its admin-only `allow` subcommand.
 """
 
-from time import time
 from typing import Any, AsyncIterator, Awaitable, Callable, ClassVar
 
 from pyrate_limiter import BucketFullException
 from telegram import Message
 
-from steward.data.models.ai_message import AiMessage
 from steward.framework import (
     Feature,
     FeatureContext,
@@ -30,6 +28,7 @@ from steward.helpers.ai import Model, make_text_query
 from steward.helpers.ai_context import (
     execute_ai_request_streaming,
     register_ai_handler,
+    remember_ai_reply,
 )
 from steward.helpers.limiter import Duration, check_limit
 
@@ -98,10 +97,11 @@ class AiPersonaFeature(Feature):
 
     async def _post_process(
         self, bot_message: Message, full_text: str
-    ) -> None:
+    ) -> str | None:
         """Hook after the stream finishes. Default: no-op.
         Override to inspect or rewrite the final message (e.g. content-filter
-        substitution)."""
+        substitution); return the rewritten text so it is what the dialogue
+        remembers."""
 
     @on_init
     async def _persona_init(self):
@@ -161,7 +161,7 @@ class AiPersonaFeature(Feature):
 
     def _post_process_callable(
         self,
-    ) -> Callable[[Message, str], Awaitable[None] | None] | None:
+    ) -> Callable[[Message, str], Awaitable[str | None] | None] | None:
         # Skip the tap overhead when the subclass hasn't overridden the hook.
         if type(self)._post_process is AiPersonaFeature._post_process:
             return None
@@ -173,9 +173,7 @@ class AiPersonaFeature(Feature):
         sent = await ctx.reply(self.greeting)
         if sent is None or ctx.message is None:
             return
-        ctx.repository.db.ai_messages[f"{ctx.chat_id}_{sent.id}"] = AiMessage(
-            time(), ctx.message.id, self.persona_name
-        )
+        remember_ai_reply(ctx.repository, ctx.chat_id, sent, ctx.message.id, self.persona_name)
         await ctx.repository.save()
 
     @subcommand("", description="Начать разговор")
@@ -399,12 +399,12 @@ class AiRouterHandler(Feature):
         if chat_id is None:
             return True
         from steward.features.registry import is_always_on
-        if is_always_on(handler.__class__):
+        if is_always_on(handler.feature_class):
             return True
         cap = handler.capability
         if cap is None:
             return True
-        return self.repository.is_capability_enabled(chat_id, handler.__class__)
+        return self.repository.is_capability_enabled(chat_id, handler.feature_class)
 
     def _get_allowed_command_names(self, user_id: int, chat_id: int | None) -> set[str]:
         names: set[str] = set()
@@ -22,7 +22,7 @@ def _legacy_first_line(handler: Handler) -> str | None:
 def _is_capability_visible(handler: Handler, ctx: FeatureContext) -> bool:
     from steward.features.registry import is_always_on
 
-    if is_always_on(handler.__class__):
+    if is_always_on(handler.feature_class):
         return True
     chat = ctx.update.effective_chat
     if chat is None:
@@ -30,7 +30,7 @@ def _is_capability_visible(handler: Handler, ctx: FeatureContext) -> bool:
     cap = handler.capability
     if cap is None:
         return True
-    return ctx.repository.is_capability_enabled(chat.id, handler.__class__)
+    return ctx.repository.is_capability_enabled(chat.id, handler.feature_class)
 
 
 def _build_overview(
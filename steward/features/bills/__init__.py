@@ -36,7 +36,8 @@ from steward.framework import (
     subcommand,
     wizard,
 )
-from steward.helpers.bills_money import minor_from_float, minor_to_display
+from steward.helpers.bills_ledger import ledger_for
+from steward.helpers.bills_money import BillBalances, minor_from_float, minor_to_display
 from steward.helpers.bills_notifications import send_bill_notification
 from steward.helpers.bills_person_match import match_name, update_chat_last_seen
 
@@ -775,18 +776,20 @@ class BillsFeature(Feature):
             return
 
         by_id = self._persons()
+        ledger = ledger_for(self.repository).balances(bills)
         text = fmt.format_overview(
             bills,
             person.id if person else None,
             by_id,
             self.repository.db.bill_payments_v2,
             all_mode=all_mode,
+            ledger=ledger,
         )
 
         rows: list[list[Button]] = []
 
         has_owe, has_owed = self._person_balance_directions(
-            bills, person.id if person else None
+            bills, person.id if person else None, ledger
         )
         action_row: list[Button] = []
         if has_owe:
@@ -815,7 +818,7 @@ class BillsFeature(Feature):
         keyboard = Keyboard.grid(rows)
         rich = fmt.format_overview_rich(
             bills, person.id if person else None, by_id,
-            self.repository.db.bill_payments_v2, all_mode=all_mode,
+            self.repository.db.bill_payments_v2, all_mode=all_mode, ledger=ledger,
         )
         await self._send_view(ctx, rich, text, keyboard=keyboard, edit=edit)
 
@@ -827,7 +830,7 @@ class BillsFeature(Feature):
         return make
 
     def _person_balance_directions(
-        self, bills: list[BillV2], person_id: str | None
+        self, bills: list[BillV2], person_id: str | None, ledger: BillBalances | None = None
     ) -> tuple[bool, bool]:
         """Return (has_owe, has_owed): does `person_id` owe anyone, and does anyone owe them,
         across the given open bills (after applying payments)."""
@@ -837,6 +840,7 @@ class BillsFeature(Feature):
             bills,
             person_id,
             self.repository.db.bill_payments_v2,
+            ledger,
         )
         return bool(owe), bool(owed)
 
@@ -1628,7 +1632,7 @@ class BillsFeature(Feature):
         if not confirm:
             payment.status = PaymentStatus.REJECTED
             await ctx.edit("❌ Получение не подтверждено.")
-            await self.repository.save()
+            await self.repository.flush()
             return
 
         allocations, residual, auto_closed = self._confirm_and_split_payment(payment)
@@ -1666,7 +1670,7 @@ class BillsFeature(Feature):
                 prefer_dm=True,
             )
 
-        await self.repository.save()
+        await self.repository.flush()
 
     def _confirm_and_split_payment(
         self, payment: BillPaymentV2
@@ -1983,7 +1987,7 @@ class BillsFeature(Feature):
         if creditor.telegram_id is None:
             payment.status = PaymentStatus.AUTO_CONFIRMED
             allocations, residual, auto_closed = self._confirm_and_split_payment(payment)
-            await self.repository.save()
+            await self.repository.flush()
             logger.info(
                 "Payment %s auto-confirmed (creditor %s has no telegram_id): %s -> %s %s",
                 payment.id[:8], creditor.display_name, debtor.display_name,
@@ -2024,7 +2028,7 @@ class BillsFeature(Feature):
             "Payment %s created: %s -> %s %s, notified=%s",
             payment.id[:8], debtor.display_name, creditor.display_name, amount_str, bool(notif),
         )
-        await self.repository.save()
+        await self.repository.flush()
         return {"auto_confirmed": False}
 
     async def _creditor_initiated_payment(
@@ -2115,7 +2119,7 @@ class BillsFeature(Feature):
             initiated_chat_id=chat_id,
             prefer_dm=True,
         )
-        await self.repository.save()
+        await self.repository.flush()
         logger.info(
             "Creditor-initiated payment: %s ← %s %s (allocs=%d, residual=%d)",
             creditor.display_name, debtor.display_name, amount_str,
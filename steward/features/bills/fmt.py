@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING
 from steward.data.models.bill_v2 import BillPerson, BillV2, UNKNOWN_PERSON_ID
 from steward.framework import Button, Keyboard
 from steward.helpers.bills_money import (
+    BillBalances,
     apply_payments,
     compute_bill_balances,
     compute_bill_debts,
@@ -192,15 +193,23 @@ def _tx_table(txs: list, by_id: dict[str, BillPerson], currency: str = "BYN") ->
     return _mono_table(["Позиция", "Сумма", "Платил", "Должник"], _tx_rows(txs, by_id, currency))
 
 
-def _compute_balances(bills: list[BillV2], person_id: str | None, payments: list):
-    """Compute (owe, owed, pair_totals) across all open bills in `bills`."""
+def _compute_balances(
+    bills: list[BillV2],
+    person_id: str | None,
+    payments: list,
+    ledger: BillBalances | None = None,
+):
+    """Compute (owe, owed, pair_totals) across all open bills in `bills`.
+
+    `ledger` is a ready compute_bill_balances() result (BillLedger.balances()).
+    """
     from collections import defaultdict
 
     owe: dict[str, int] = defaultdict(int)
     owed: dict[str, int] = defaultdict(int)
     pair_totals: dict[tuple[str, str], int] = defaultdict(int)
 
-    balances, _ = compute_bill_balances(bills, payments)
+    balances, _ = ledger or compute_bill_balances(bills, payments)
     for bill in bills:
         after = balances.get(bill.id, {})
         for debtor, creds in after.items():
@@ -222,11 +231,12 @@ def _person_credits(
     bills: list[BillV2],
     person_id: str | None,
     payments: list,
+    ledger: BillBalances | None = None,
 ) -> tuple[dict[tuple[str, str], int], dict[tuple[str, str], int]]:
     if not person_id:
         return {}, {}
 
-    _, credits = compute_bill_balances(bills, payments)
+    _, credits = ledger or compute_bill_balances(bills, payments)
     mine: dict[tuple[str, str], int] = {}
     held: dict[tuple[str, str], int] = {}
     for (debtor, creditor, currency), amount in credits.items():
@@ -252,9 +262,10 @@ def format_overview(
     payments: list,
     *,
     all_mode: bool = False,
+    ledger: BillBalances | None = None,
 ) -> str:
-    owe, owed, _ = _compute_balances(bills, person_id, payments)
-    my_credits, held_credits = _person_credits(bills, person_id, payments)
+    owe, owed, _ = _compute_balances(bills, person_id, payments, ledger)
+    my_credits, held_credits = _person_credits(bills, person_id, payments, ledger)
 
     open_count = sum(1 for b in bills if not b.closed)
     closed_count = sum(1 for b in bills if b.closed)
@@ -464,10 +475,11 @@ def format_overview_rich(
     payments: list,
     *,
     all_mode: bool = False,
+    ledger: BillBalances | None = None,
 ) -> str:
     """Native-table (sendRichMessage) variant of format_overview."""
-    owe, owed, _ = _compute_balances(bills, person_id, payments)
-    my_credits, held_credits = _person_credits(bills, person_id, payments)
+    owe, owed, _ = _compute_balances(bills, person_id, payments, ledger)
+    my_credits, held_credits = _person_credits(bills, person_id, payments, ledger)
     open_count = sum(1 for b in bills if not b.closed)
     closed_count = sum(1 for b in bills if b.closed)
     title = "Все счета" if all_mode else "Мои счета"
@@ -1,7 +1,9 @@
+import asyncio
 import logging
 
 from telegram.error import ChatMigrated
 
+from steward.bot import outbound
 from steward.framework import (
     Button,
     Feature,
@@ -49,42 +51,56 @@ def _stop_keyboard():
     return Keyboard.row(Button("⏹ Завершить трансляцию", callback_data=_STOP_CB))
 
 
+async def _copy(context, chat_id):
+    return await outbound.send(
+        chat_id,
+        lambda: context.bot.copy_message(
+            chat_id=chat_id,
+            from_chat_id=context.message.chat.id,
+            message_id=context.message.message_id,
+        ),
+        outbound.Priority.BULK,
+    )
+
+
+async def _broadcast_to(context, target_chats, i):
+    """Copy the message to target_chats[i]; returns the chat name on failure."""
+    chat_id = target_chats[i]
+    try:
+        await _copy(context, chat_id)
+    except ChatMigrated as e:
+        new_id = e.new_chat_id
+        target_chats[i] = new_id
+        for c in context.repository.db.chats:
+            if c.id == chat_id:
+                c.id = new_id
+                break
+        await context.repository.save()
+        try:
+            await _copy(context, new_id)
+        except Exception:
+            logger.exception("Broadcast to migrated %s failed", new_id)
+            return str(new_id)
+    except Exception:
+        logger.exception("Broadcast to %s failed", chat_id)
+        chat = next(
+            (c for c in context.repository.db.chats if c.id == chat_id),
+            None,
+        )
+        return chat.name if chat else str(chat_id)
+    return None
+
+
 class _BroadcastStep(Step):
     async def chat(self, context):
         if context.session_context.get("broadcasting"):
-            errors = []
             target_chats = context.session_context["target_chats"]
-            for i, chat_id in enumerate(target_chats):
-                try:
-                    await context.bot.copy_message(
-                        chat_id=chat_id,
-                        from_chat_id=context.message.chat.id,
-                        message_id=context.message.message_id,
-                    )
-                except ChatMigrated as e:
-                    new_id = e.new_chat_id
-                    target_chats[i] = new_id
-                    for c in context.repository.db.chats:
-                        if c.id == chat_id:
-                            c.id = new_id
-                            break
-                    await context.repository.save()
-                    try:
-                        await context.bot.copy_message(
-                            chat_id=new_id,
-                            from_chat_id=context.message.chat.id,
-                            message_id=context.message.message_id,
-                        )
-                    except Exception:
-                        logger.exception("Broadcast to migrated %s failed", new_id)
-                        errors.append(str(new_id))
-                except Exception:
-                    logger.exception("Broadcast to %s failed", chat_id)
-                    chat = next(
-                        (c for c in context.repository.db.chats if c.id == chat_id),
-                        None,
-                    )
-                    errors.append(chat.name if chat else str(chat_id))
+            # Темп задаёт общая очередь исходящих: трансляция идёт с низшим
+            # приоритетом и пропускает вперёд напоминания и ответы
+            results = await asyncio.gather(
+                *(_broadcast_to(context, target_chats, i) for i in range(len(target_chats)))
+            )
+            errors = [name for name in results if name is not None]
             if errors:
                 await context.message.reply_text(f"Ошибка отправки в: {', '.join(errors)}")
             return False
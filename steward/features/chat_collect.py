@@ -94,7 +94,7 @@ class ChatCollectFeature(Feature):
         self.repository.db.last_message_at[chat_id] = datetime.now(timezone.utc)
 
         if changed:
-            await self.users.save()
+            await self.repository.save("chats", "users", "last_message_at")
             self._update_cache()
         if from_user is not None:
             self._kick_avatar_fetch(from_user.id)
@@ -15,6 +15,8 @@ class DbFeature(Feature):
         if ctx.chat_id != self.TARGET_CHAT_ID:
             return False
         try:
+            # Хвост журнала ещё не в db.json — сворачиваем перед отправкой.
+            await self.repository.compact()
             with open("db.json", "rb") as f:
                 await ctx.bot.send_document(
                     chat_id=self.TARGET_CHAT_ID,
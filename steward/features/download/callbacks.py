@@ -5,7 +5,6 @@ import tempfile
 from contextlib import ExitStack, asynccontextmanager
 
 import aiohttp
-from aiohttp_socks import ProxyConnector
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -15,7 +14,7 @@ from telegram import (
 )
 
 from steward.data.repository import Repository
-from steward.helpers import morphy
+from steward.helpers import http_clients, morphy
 from steward.helpers.media import is_video_file
 
 logger = logging.getLogger("download_controller")
@@ -27,22 +26,14 @@ async def download_file(url: str, use_proxy: bool = False):
     with tempfile.NamedTemporaryFile("r+b") as file:
         logger.info(f"Создан файл {file.name}")
 
-        connector = None
-        if use_proxy and os.environ.get("DOWNLOAD_PROXY"):
-            connector = ProxyConnector.from_url(
-                os.environ.get("DOWNLOAD_PROXY") or ""
-            )
-
-        async with aiohttp.ClientSession(
-            connector=connector,
-            timeout=aiohttp.ClientTimeout(connect=2),
-        ) as session:
-            async with session.get(url) as response:
-                while True:
-                    chunk = await response.content.readany()
-                    if not chunk:
-                        break
-                    file.write(chunk)
+        proxy = os.environ.get("DOWNLOAD_PROXY") if use_proxy else None
+        session = http_clients.session("downloads", proxy=proxy)
+        async with session.get(url, timeout=aiohttp.ClientTimeout(connect=2)) as response:
+            while True:
+                chunk = await response.content.readany()
+                if not chunk:
+                    break
+                file.write(chunk)
 
         logger.info("Файл был скачен")
         file.seek(0)
@@ -1,11 +1,41 @@
-"""Кэш url -> file_id скачанных медиа. Общий для чатового и inline-флоу:
-ссылка, уже скачанная в чате, отвечает на inline-запрос мгновенно
-(и наоборот)."""
+"""Кэш ссылка -> file_id скачанных медиа. Общий для чатового, inline- и
+туннельного флоу: ссылка, уже скачанная в чате, отвечает на inline-запрос
+мгновенно (и наоборот).
 
-from dataclasses import dataclass
-from typing import Literal
+Ключ — не сырой URL, а id ролика у экстрактора: `tiktok:7311...`,
+`youtube:dQw4w9WgXcQ`, `instagram:C1a2b3`. Трекинговые параметры, `m.`/`www.`
+и разные формы одной ссылки (youtu.be, /shorts/, /reel/ и /p/) сходятся в одну
+запись. Короткие ссылки (vm.tiktok.com, pin.it) без сетевого запроса не
+разворачиваются — после загрузки их ключ становится псевдонимом id из
+метаданных yt-dlp.
 
-_CACHE_MAX = 200
+Вытеснение LRU по числу записей и по возрасту. С MEDIA_CACHE_PATH кэш
+переживает перезапуск: грузится при старте, пишется на диск через
+FLUSH_DELAY_SEC после изменений и на остановке.
+
+Метрики: media_cache_lookups_total{source, result}, media_cache_entries.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Literal
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+
+from steward.metrics.base import MetricsEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 5000
+# file_id у Telegram живут долго, но не вечно
+DEFAULT_MAX_AGE_SEC = 30 * 24 * 3600
+FLUSH_DELAY_SEC = 30.0
+_CACHE_FORMAT = 1
 
 MediaKind = Literal["video", "photo", "audio"]
 
@@ -18,14 +48,221 @@ class CachedMedia:
     duration: float | None = None
 
 
-_cache: dict[str, list[CachedMedia]] = {}
+@dataclass
+class _Entry:
+    medias: list[CachedMedia]
+    stored_at: float
+
+
+# (домен, регэксп пути) -> префикс ключа; первая группа — id ролика
+_PATH_IDS: list[tuple[str, re.Pattern, str]] = [
+    ("tiktok.com", re.compile(r"/(?:@[^/]+/)?(?:video|photo|v)/(\d+)"), "tiktok"),
+    ("tiktok.com", re.compile(r"/(?:t/)?([A-Za-z0-9]+)/?$"), "tiktok-short"),
+    ("youtube.com", re.compile(r"/(?:shorts|embed|live|v)/([\w-]{11})"), "youtube"),
+    ("youtu.be", re.compile(r"/([\w-]{11})"), "youtube"),
+    ("instagram.com", re.compile(r"/(?:[^/]+/)?(?:p|reels?|tv)/([\w-]+)"), "instagram"),
+    ("pinterest.com", re.compile(r"/pin/(\d+)"), "pinterest"),
+    ("pin.it", re.compile(r"/([\w-]+)"), "pin.it"),
+    ("music.yandex", re.compile(r"/track/(\d+)"), "yandex-music"),
+]
+
+# Метки источника и шаринга — на то, какой ролик по ссылке, не влияют
+_TRACKING_PARAMS = re.compile(
+    r"utm_\w*|si|fbclid|gclid|igsh|igshid|feature|ref|ref_src|is_from_webapp|sender_device|t"
+)
+
+
+def media_key(url: str) -> str:
+    """Canonical cache key for `url`: the extractor's media id where it can be read off the URL."""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    for prefix in ("www.", "m."):
+        host = host.removeprefix(prefix)
+    path = parsed.path or "/"
+    dotted_host = f".{host}."
+    if ".youtube." in dotted_host:
+        video_id = parse_qs(parsed.query).get("v", [""])[0]
+        if re.fullmatch(r"[\w-]{11}", video_id):
+            return f"youtube:{video_id}"
+    for domain, pattern, prefix in _PATH_IDS:
+        if f".{domain}." in dotted_host:
+            match = pattern.search(path)
+            if match:
+                return f"{prefix}:{match.group(1)}"
+    # Незнакомая форма ссылки — без фрагмента, «www.» и меток. Остальной query
+    # оставляем: в нём бывает сам id (playlist?list=..., watch?list=...)
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.fullmatch(name)
+    )
+    key = f"{host}{path.rstrip('/')}"
+    return f"{key}?{urlencode(query)}" if query else key
+
+
+def info_key(info: Any) -> str | None:
+    """Cache key from yt-dlp metadata (`extractor_key` + `id`), matching media_key()."""
+    if not isinstance(info, dict) or not info.get("id") or not info.get("extractor_key"):
+        return None
+    return f"{str(info['extractor_key']).lower()}:{info['id']}"
+
+
+class MediaCache:
+    """LRU of canonical media key -> uploaded file_ids, bounded by size and age."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_age: float = DEFAULT_MAX_AGE_SEC):
+        self._max_entries = max_entries
+        self._max_age = max_age
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> list[CachedMedia] | None:
+        key = media_key(url)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at > self._max_age:
+            del self._entries[key]
+            self.dirty = True
+            return None
+        self._entries.move_to_end(key)
+        return entry.medias
+
+    def put(self, url: str, medias: list[CachedMedia], *, aliases: tuple[str | None, ...] = ()) -> None:
+        """Cache `medias` for `url`; `aliases` are extra keys (e.g. info_key()) for the same media."""
+        entry = _Entry(medias, time.time())
+        for key in dict.fromkeys((media_key(url), *aliases)):
+            if key is None:
+                continue
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        self.dirty = True
+
+    def snapshot(self) -> dict:
+        """JSON-ready copy of the cache; taken on the loop, written from a thread."""
+        self.dirty = False
+        return {
+            "format": _CACHE_FORMAT,
+            "entries": [
+                [key, entry.stored_at, [asdict(m) for m in entry.medias]]
+                for key, entry in self._entries.items()
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        try:
+            _write(path, self.snapshot())
+        except BaseException:
+            # Записи так и не легли на диск — следующий save() должен их записать
+            self.dirty = True
+            raise
+
+    def load(self, path: str) -> int:
+        """Warm the cache from save() output; returns the number of entries kept."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning("Media cache %s is unreadable: %s", path, e)
+            return 0
+        if data.get("format") != _CACHE_FORMAT:
+            return 0
+        now = time.time()
+        for key, stored_at, medias in data.get("entries", []):
+            if now - stored_at > self._max_age:
+                continue
+            self._entries[key] = _Entry([CachedMedia(**m) for m in medias], stored_at)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return len(self._entries)
+
+
+def _write(path: str, data: dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+_cache = MediaCache()
+_metrics: MetricsEngine | None = None
+_flush_task: asyncio.Task | None = None
+
+
+def set_metrics(metrics: MetricsEngine | None):
+    global _metrics
+    _metrics = metrics
+
+
+def _cache_path() -> str | None:
+    return os.environ.get("MEDIA_CACHE_PATH") or None
+
+
+def get(url: str, *, source: str = "chat") -> list[CachedMedia] | None:
+    medias = _cache.get(url)
+    if _metrics is not None:
+        _metrics.inc(
+            "media_cache_lookups_total",
+            {"source": source, "result": "hit" if medias is not None else "miss"},
+        )
+    return medias
+
+
+def put(url: str, medias: list[CachedMedia], *, info: Any = None) -> None:
+    _cache.put(url, medias, aliases=(info_key(info),))
+    if _metrics is not None:
+        _metrics.set("media_cache_entries", {}, len(_cache))
+    _schedule_flush()
+
+
+def load() -> int:
+    """Warm the cache from MEDIA_CACHE_PATH, if configured."""
+    path = _cache_path()
+    if path is None:
+        return 0
+    return _cache.load(path)
+
+
+def save() -> None:
+    path = _cache_path()
+    if path is None or not _cache.dirty:
+        return
+    try:
+        _cache.save(path)
+    except OSError:
+        logger.warning("failed to save media cache", exc_info=True)
 
 
-def get(url: str) -> list[CachedMedia] | None:
-    return _cache.get(url)
+def _schedule_flush() -> None:
+    # Пишем на диск не на каждую загрузку, а раз в FLUSH_DELAY_SEC, вне event loop
+    global _flush_task
+    if _cache_path() is None or (_flush_task is not None and not _flush_task.done()):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _flush_task = loop.create_task(_flush_later())
 
 
-def put(url: str, medias: list[CachedMedia]) -> None:
-    if url not in _cache and len(_cache) >= _CACHE_MAX:
-        _cache.pop(next(iter(_cache)))
-    _cache[url] = medias
+async def _flush_later() -> None:
+    await asyncio.sleep(FLUSH_DELAY_SEC)
+    path = _cache_path()
+    if path is None:
+        return
+    try:
+        await asyncio.to_thread(_write, path, _cache.snapshot())
+    except OSError:
+        # Иначе save() на остановке сочтёт кэш сохранённым
+        _cache.dirty = True
+        logger.warning("failed to save media cache", exc_info=True)
@@ -31,6 +31,7 @@ from steward.features.download.callbacks import (
 )
 from steward.features.transcribe import AutoVideoTranscriptionFeature
 from steward.features.voice_video.transcription import create_transcription_reply
+from steward.helpers import http_clients
 from steward.helpers.limiter import Duration, check_limit
 from steward.helpers.media import has_audio_stream, is_video_file, run_ffmpeg
 
@@ -204,13 +205,12 @@ async def resolve_instagram_medias(url: str) -> list[tuple[str, bool]]:
     """Список (media_url, is_video) поста инсты через igdl-прокси."""
     proxy_url = f"https://download.proxy.nigger.by/igdl?url={url}"
 
-    async with aiohttp.ClientSession(
-        timeout=aiohttp.ClientTimeout(connect=2)
-    ) as session:
-        async with session.get(proxy_url) as response:
-            if response.status != 200:
-                raise Exception(f"invalid response: {response}")
-            json_resp = await response.json()
+    async with http_clients.session("igdl").get(
+        proxy_url, timeout=aiohttp.ClientTimeout(connect=2)
+    ) as response:
+        if response.status != 200:
+            raise Exception(f"invalid response: {response}")
+        json_resp = await response.json()
 
     medias: list[tuple[str, bool]] = []
     for x in json_resp["url"]["data"]:
@@ -363,6 +363,40 @@ def _get_gallery_audio_url(metadata: Any) -> str | None:
     return None
 
 
+async def _transcribe_markup(
+    repository: Repository, url: str, duration: Any
+) -> InlineKeyboardMarkup | None:
+    """Кнопка «Текст» под коротким видео."""
+    if duration is None or duration >= 3 * 60:
+        return None
+    link_id = uuid.uuid4().hex
+    repository.db.saved_links.add(link_id, url)
+    await repository.save()
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    "Текст",
+                    callback_data=f"download:trans|{link_id}",
+                ),
+            ],
+        ]
+    )
+
+
+async def _reply_cached_video(
+    repository: Repository, url: str, message: Message, media: video_cache.CachedMedia
+) -> None:
+    """Уже залитое видео — по file_id, без yt-dlp и повторной загрузки."""
+    await message.reply_video(
+        media.file_id,
+        supports_streaming=True,
+        reply_markup=await _transcribe_markup(repository, url, media.duration),
+        caption=media.caption,
+        parse_mode="HTML" if media.caption else None,
+    )
+
+
 def make_video_loader(
     type_name: str,
     cookie_file: str | None = None,
@@ -380,6 +414,14 @@ def make_video_loader(
             auto_transcribe_short,
         )
 
+        # Авторасшифровке нужен сам файл — с ней всегда качаем заново
+        if not auto_transcription_enabled:
+            cached = video_cache.get(url)
+            if cached and len(cached) == 1 and cached[0].kind == "video":
+                await _reply_cached_video(repository, url, message, cached[0])
+                logger.info(f"video {type_name} sent from cache")
+                return
+
         logger.info(f"trying get video from {type_name}...")
 
         with tempfile.TemporaryDirectory(prefix=f"{type_name}_") as dir:
@@ -414,24 +456,8 @@ def make_video_loader(
                     logger.info("auto-transcribe rate-limited for %s", type_name)
 
             reply_markup = None
-            if (
-                not will_auto_transcribe
-                and duration is not None
-                and duration < 3 * 60
-            ):
-                link_id = uuid.uuid4().hex
-                repository.db.saved_links.add(link_id, url)
-                await repository.save()
-                reply_markup = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                "Текст",
-                                callback_data=f"download:trans|{link_id}",
-                            ),
-                        ],
-                    ]
-                )
+            if not will_auto_transcribe:
+                reply_markup = await _transcribe_markup(repository, url, duration)
 
             caption = _make_caption(info)
 
@@ -454,6 +480,7 @@ def make_video_loader(
                         caption=caption,
                         duration=float(duration) if duration else None,
                     )],
+                    info=info,
                 )
 
             logger.info(f"video {type_name} downloaded successfully")
@@ -3,10 +3,10 @@ import re
 from dataclasses import dataclass
 from typing import Any, Callable
 
-from aiohttp import ClientSession
 from yarl import Query
 
 from steward.framework import Feature, FeatureContext, subcommand
+from steward.helpers import http_clients
 from steward.helpers.command_validation import ValidationArgumentsError
 from steward.helpers.limiter import Duration, check_limit
 
@@ -25,13 +25,13 @@ class _ApiData:
     get_func: Callable[[dict], Any]
 
     async def fetch(self) -> float | None:
-        async with ClientSession() as session:
-            async with session.get(self.api, params=self.params) as response:
-                data = await response.json()
-                try:
-                    return float(self.get_func(data))
-                except Exception:
-                    return None
+        session = http_clients.session("exchange-rates")
+        async with session.get(self.api, params=self.params) as response:
+            data = await response.json()
+            try:
+                return float(self.get_func(data))
+            except Exception:
+                return None
 
 
 class ExchangeRateFeature(Feature):
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import logging
 import math
@@ -10,8 +11,9 @@ import subprocess
 import tempfile
 import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 from io import BytesIO
 
@@ -161,61 +163,129 @@ def _interpolate(keyframes: list[dict[str, Any]], t: float) -> dict[str, float]
     return None
 
 
-def _load_source_frames(path: Path) -> tuple[list[Image.Image], list[int]]:
+def _source_timing(path: Path) -> tuple[str, Callable[[int], int]]:
+    """ffmpeg frame rate and per-frame duration (ms) by frame index.
+
+    Only GIF/WebP carry per-frame durations; reading them seeks through the
+    file but keeps no decoded frames around.
+    """
     ext = path.suffix.lower()
     if ext in (".gif", ".webp"):
-        return _load_pil_animation(path)
-    return _load_via_imageio(path)
-
-
-def _load_pil_animation(path: Path) -> tuple[list[Image.Image], list[int]]:
-    frames: list[Image.Image] = []
-    durations: list[int] = []
-    with Image.open(path) as img:
-        n = getattr(img, "n_frames", 1)
-        for i in range(n):
-            img.seek(i)
-            frames.append(img.convert("RGBA").copy())
-            durations.append(int(img.info.get("duration", 100) or 100))
-    return frames, durations
-
+        durations: list[int] = []
+        with Image.open(path) as img:
+            for i in range(getattr(img, "n_frames", 1)):
+                img.seek(i)
+                durations.append(int(img.info.get("duration", 100) or 100))
+        total_ms = sum(durations) or 1
+        # Exact fraction preserves the original timing without rounding drift.
+        return f"{len(durations) * 1000}/{total_ms}", durations.__getitem__
 
-def _load_via_imageio(path: Path) -> tuple[list[Image.Image], list[int]]:
     import imageio.v3 as iio
 
-    frames = [Image.fromarray(arr).convert("RGBA") for arr in iio.imiter(str(path))]
     try:
         meta = iio.immeta(str(path))
         fps = float(meta.get("fps") or 30)
     except Exception:
         fps = 30.0
     duration_ms = max(1, int(round(1000 / fps)))
-    return frames, [duration_ms] * len(frames)
+    return f"1000/{duration_ms}", lambda _: duration_ms
+
+
+def _iter_source_frames(path: Path) -> Iterator[Image.Image]:
+    """Decode frames one at a time — the whole clip never sits in memory."""
+    ext = path.suffix.lower()
+    if ext in (".gif", ".webp"):
+        with Image.open(path) as img:
+            for i in range(getattr(img, "n_frames", 1)):
+                img.seek(i)
+                yield img.convert("RGBA")
+        return
+
+    import imageio.v3 as iio
+
+    for arr in iio.imiter(str(path)):
+        yield Image.fromarray(arr).convert("RGBA")
+
+
+def _output_size(size: tuple[int, int]) -> tuple[int, int]:
+    w, h = size
+    if max(w, h) > MAX_OUTPUT_DIM:
+        scale = MAX_OUTPUT_DIM / max(w, h)
+        w, h = int(w * scale), int(h * scale)
+    # libx264 needs even dimensions
+    return w - (w % 2), h - (h % 2)
+
+
+class _AvatarSprites:
+    """Circular avatar disks, masked and rotated once per (diameter, angle) bucket.
+
+    Keyframes interpolate smoothly, so neighbouring frames mostly land in the
+    same bucket; a handful of recent sprites is enough.
+    """
+
+    DIAM_STEP = 4
+    ANGLE_STEP = 2.0
+    MAX_SPRITES = 32
+
+    def __init__(self, avatar: Image.Image):
+        self._avatar = avatar.convert("RGBA")
+        self._disks: OrderedDict[int, Image.Image] = OrderedDict()
+        self._sprites: OrderedDict[tuple[int, float], Image.Image] = OrderedDict()
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key, value, limit: int):
+        cache[key] = value
+        if len(cache) > limit:
+            cache.popitem(last=False)
+
+    def _disk(self, diam: int) -> Image.Image:
+        disk = self._disks.get(diam)
+        if disk is None:
+            disk = self._avatar.resize((diam, diam), Image.LANCZOS)
+            mask = Image.new("L", (diam, diam), 0)
+            ImageDraw.Draw(mask).ellipse((0, 0, diam, diam), fill=255)
+            disk.putalpha(mask)
+            self._remember(self._disks, diam, disk, self.MAX_SPRITES)
+        else:
+            self._disks.move_to_end(diam)
+        return disk
+
+    def get(self, diam: int, angle: float) -> Image.Image:
+        # Округляем вверх: диск по-прежнему описывает рамку целиком
+        diam = -(-diam // self.DIAM_STEP) * self.DIAM_STEP
+        angle = round(angle / self.ANGLE_STEP) * self.ANGLE_STEP % 360
+        key = (diam, angle)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+        sprite = self._disk(diam)
+        if angle:
+            # Annotator/canvas convention: positive angle = clockwise.
+            # PIL.rotate is CCW, so negate.
+            sprite = sprite.rotate(-angle, resample=Image.BICUBIC, expand=True)
+        self._remember(self._sprites, key, sprite, self.MAX_SPRITES)
+        return sprite
 
 
 def _draw_avatar_circumscribed(
     frame: Image.Image,
-    avatar: Image.Image,
+    sprites: _AvatarSprites,
     box: dict[str, float],
+    scale: tuple[float, float] = (1.0, 1.0),
 ) -> None:
-    """Draw a circular avatar that circumscribes the bbox (bbox inscribed in circle)."""
-    w = max(2.0, float(box["w"]))
-    h = max(2.0, float(box["h"]))
-    diam = int(math.ceil(math.sqrt(w * w + h * h)))
-    cx = float(box["x"]) + w / 2
-    cy = float(box["y"]) + h / 2
+    """Draw a circular avatar that circumscribes the bbox (bbox inscribed in circle).
 
-    a = avatar.resize((diam, diam), Image.LANCZOS).convert("RGBA")
-    mask = Image.new("L", (diam, diam), 0)
-    ImageDraw.Draw(mask).ellipse((0, 0, diam, diam), fill=255)
-    a.putalpha(mask)
-
-    angle = float(box.get("angle", 0) or 0)
-    if angle:
-        # Annotator/canvas convention: positive angle = clockwise.
-        # PIL.rotate is CCW, so negate.
-        a = a.rotate(-angle, resample=Image.BICUBIC, expand=True)
+    `scale` maps annotation coordinates (source pixels) onto `frame`.
+    """
+    sx, sy = scale
+    w = max(2.0, float(box["w"]) * sx)
+    h = max(2.0, float(box["h"]) * sy)
+    diam = int(math.ceil(math.sqrt(w * w + h * h)))
+    cx = float(box["x"]) * sx + w / 2
+    cy = float(box["y"]) * sy + h / 2
 
+    a = sprites.get(diam, float(box.get("angle", 0) or 0))
     aw, ah = a.size
     tx = int(round(cx - aw / 2))
     ty = int(round(cy - ah / 2))
@@ -228,70 +298,84 @@ def _compose_mp4(
     avatar_a: Image.Image,
     avatar_b: Image.Image,
     output_path: Path,
-) -> None:
-    frames, durations = _load_source_frames(source_path)
-    if not frames:
-        raise RuntimeError(f"No frames in {source_path}")
+) -> int:
+    """Render the clip straight into ffmpeg's stdin; returns the frame count.
+
+    Frames are decoded, composited at output resolution and written one by
+    one, so memory stays at a few frames regardless of clip length.
+    """
+    fps_str, duration_of = _source_timing(source_path)
     keyframes_a = annotation.get("keyframes", {}).get("a", [])
     keyframes_b = annotation.get("keyframes", {}).get("b", [])
 
     # Avatar art rarely needs to be larger than the output. Resize once upfront.
-    avatar_a = _shrink_avatar(avatar_a)
-    avatar_b = _shrink_avatar(avatar_b)
-
-    composited: list[Image.Image] = []
-    cum_ms = 0
-    for i, frame in enumerate(frames):
-        t = cum_ms / 1000.0
-        composite = frame.copy()
-        for keyframes, avatar in ((keyframes_a, avatar_a), (keyframes_b, avatar_b)):
-            box = _interpolate(keyframes, t)
-            if box is None:
-                continue
-            _draw_avatar_circumscribed(composite, avatar, box)
-        cum_ms += durations[i]
-
-        if max(composite.size) > MAX_OUTPUT_DIM:
-            scale = MAX_OUTPUT_DIM / max(composite.size)
-            new_size = (int(composite.width * scale), int(composite.height * scale))
-            composite = composite.resize(new_size, Image.LANCZOS)
-
-        bg = Image.new("RGB", composite.size, (255, 255, 255))
-        bg.paste(composite, mask=composite.split()[3])
-        composited.append(bg)
-
-    # libx264 needs even dimensions
-    w0, h0 = composited[0].size
-    even = (w0 - (w0 % 2), h0 - (h0 % 2))
-    if even != (w0, h0):
-        composited = [img.resize(even, Image.LANCZOS) for img in composited]
-    w, h = even
-
-    total_ms = sum(durations) or 1
-    # Exact fraction preserves the original timing without rounding drift.
-    fps_str = f"{len(durations) * 1000}/{total_ms}"
-
-    raw = b"".join(img.tobytes() for img in composited)
-    proc = subprocess.run(
-        [
-            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
-            "-f", "rawvideo",
-            "-pixel_format", "rgb24",
-            "-video_size", f"{w}x{h}",
-            "-framerate", fps_str,
-            "-i", "-",
-            "-c:v", "libx264",
-            "-pix_fmt", "yuv420p",
-            "-crf", "26",
-            "-preset", "veryfast",
-            "-movflags", "+faststart",
-            str(output_path),
-        ],
-        input=raw,
-        capture_output=True,
+    layers = (
+        (keyframes_a, _AvatarSprites(_shrink_avatar(avatar_a))),
+        (keyframes_b, _AvatarSprites(_shrink_avatar(avatar_b))),
     )
-    if proc.returncode != 0:
-        raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode(errors='replace')[:500]}")
+
+    frames = _iter_source_frames(source_path)
+    first = next(frames, None)
+    if first is None:
+        raise RuntimeError(f"No frames in {source_path}")
+    w, h = _output_size(first.size)
+    scale = (w / first.width, h / first.height)
+
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            [
+                "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                "-f", "rawvideo",
+                "-pixel_format", "rgb24",
+                "-video_size", f"{w}x{h}",
+                "-framerate", fps_str,
+                "-i", "-",
+                "-c:v", "libx264",
+                "-pix_fmt", "yuv420p",
+                "-crf", "26",
+                "-preset", "veryfast",
+                "-movflags", "+faststart",
+                str(output_path),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+        )
+        written = 0
+        cum_ms = 0
+        try:
+            for frame in itertools.chain((first,), frames):
+                t = cum_ms / 1000.0
+                cum_ms += duration_of(written)
+                # Сначала уменьшаем кадр, потом рисуем аватары: спрайты
+                # получаются размера вывода, а не исходника
+                if frame.size != (w, h):
+                    frame = frame.resize((w, h), Image.LANCZOS)
+                for keyframes, sprites in layers:
+                    box = _interpolate(keyframes, t)
+                    if box is not None:
+                        _draw_avatar_circumscribed(frame, sprites, box, scale)
+                bg = Image.new("RGB", frame.size, (255, 255, 255))
+                bg.paste(frame, mask=frame.split()[3])
+                proc.stdin.write(bg.tobytes())
+                written += 1
+        except BrokenPipeError:
+            # ffmpeg упал — причину покажет stderr ниже
+            pass
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            frames.close()
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = proc.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed: {stderr.read().decode(errors='replace')[:500]}")
+    return written
 
 
 def _shrink_avatar(img: Image.Image) -> Image.Image:
@@ -431,7 +515,8 @@ class FuckFeature(Feature):
             try:
                 with tempfile.TemporaryDirectory(prefix="fuck_") as tmp_dir:
                     output_path = Path(tmp_dir) / "fuck.mp4"
-                    await asyncio.to_thread(
+                    started = time.perf_counter()
+                    frames = await asyncio.to_thread(
                         _compose_mp4,
                         source_path,
                         annotation,
@@ -439,6 +524,8 @@ class FuckFeature(Feature):
                         b_avatar,
                         output_path,
                     )
+                    ctx.metrics.observe("bot_fuck_render_seconds", time.perf_counter() - started)
+                    ctx.metrics.inc("bot_fuck_render_frames_total", value=frames)
                     with output_path.open("rb") as f:
                         await self.bot.send_animation(
                             chat_id=ctx.chat_id,
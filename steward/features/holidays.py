@@ -1,8 +1,6 @@
 import logging
 from datetime import date
 
-import aiohttp
-
 from steward.delayed_action.holiday_fetch import (
     HolidayFetchAction,
     _upsert_cache,
@@ -11,6 +9,7 @@ from steward.delayed_action.holiday_fetch import (
     parse_all_holidays,
 )
 from steward.framework import Feature, FeatureContext, subcommand
+from steward.helpers import http_clients
 from steward.helpers.formats import escape_markdown, format_lined_list
 
 logger = logging.getLogger(__name__)
@@ -41,8 +40,7 @@ class HolidaysFeature(Feature):
             return
 
         await ctx.reply("⏳ Загружаю праздники...")
-        async with aiohttp.ClientSession() as session:
-            html = await fetch_html(session, _SITE_URL)
+        html = await fetch_html(http_clients.session("holidays"), _SITE_URL)
 
         if not html:
             await ctx.reply("Не удалось загрузить праздники (Cloudflare или сеть)")
@@ -0,0 +1,75 @@
+"""Манифест фич: FeatureSpec каждого класса из реестра, снятый с живых классов.
+
+Реестр читает его при импорте вместо того, чтобы импортировать ~60 модулей
+фич. Пересобрать после добавления фичи или правки её команд, описаний и
+подкоманд:
+
+    python -m steward.features.manifest
+
+tests/test_lazy_features.py падает, если манифест разошёлся с классами.
+"""
+
+import json
+import sys
+from dataclasses import asdict, fields
+from functools import cache
+from pathlib import Path
+
+from steward.framework.lazy import FeatureRef, FeatureSpec, describe
+
+MANIFEST_PATH = Path(__file__).with_name("manifest.json")
+_FORMAT = 1
+
+
+def _tuples(value):
+    return tuple(_tuples(v) for v in value) if isinstance(value, list) else value
+
+
+def _spec_from_json(data: dict) -> FeatureSpec:
+    known = {f.name for f in fields(FeatureSpec)}
+    return FeatureSpec(**{key: _tuples(value) for key, value in data.items() if key in known})
+
+
+@cache
+def load() -> dict[str, FeatureSpec]:
+    """`module:ClassName` -> spec; empty if the manifest is missing or from another format."""
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get("format") != _FORMAT:
+        return {}
+    return {key: _spec_from_json(spec) for key, spec in data["features"].items()}
+
+
+def feature_ref(module: str, name: str) -> FeatureRef:
+    return FeatureRef(module, name, load().get(f"{module}:{name}"))
+
+
+def registered_refs() -> list[FeatureRef]:
+    """Every FeatureRef the registry declares, in declaration order."""
+    from steward.features import registry
+
+    return [value for value in vars(registry).values() if isinstance(value, FeatureRef)]
+
+
+def build() -> dict:
+    features = {}
+    for ref in registered_refs():
+        features[f"{ref.module}:{ref.__name__}"] = asdict(describe(ref.load()))
+    return {"format": _FORMAT, "features": dict(sorted(features.items()))}
+
+
+def dump(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, indent=1) + "\n"
+
+
+def main() -> None:
+    data = build()
+    MANIFEST_PATH.write_text(dump(data), encoding="utf-8")
+    print(f"{len(data['features'])} features -> {MANIFEST_PATH}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
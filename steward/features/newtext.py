@@ -4,6 +4,7 @@ import logging
 import httpx
 
 from steward.framework import Feature, FeatureContext, ask_message, subcommand, wizard
+from steward.helpers import http_clients
 from steward.helpers.media import fetch_tg_file_bytes
 from steward.helpers.tg_update_helpers import get_message, split_long_message
 
@@ -47,10 +48,11 @@ async def _yandex_ocr(content_b64: str, mime: str, api_key: str, folder_id: str)
         "x-folder-id": folder_id,
         "x-data-logging-enabled": "true",
     }
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.post(_YANDEX_OCR_URL, headers=headers, json=payload)
-        r.raise_for_status()
-        return _extract_text(r.json())
+    r = await http_clients.client("yandex-ocr").post(
+        _YANDEX_OCR_URL, headers=headers, json=payload, timeout=30.0
+    )
+    r.raise_for_status()
+    return _extract_text(r.json())
 
 
 class NewTextFeature(Feature):
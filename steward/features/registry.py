@@ -1,66 +1,80 @@
-from steward.features.admin import AdminFeature
-from steward.features.ai import AIFeature
-from steward.features.alias import AliasFeature
-# SettingsFeature imported lazily inside helpers to avoid cycles
-from steward.features.ai_related import AiRelatedFeature
-from steward.features.army import ArmyFeature
-from steward.features.ban import BanEnforcerFeature, BanFeature
-from steward.features.bills import BillsFeature
-from steward.features.birthday import BirthdayFeature
-from steward.features.broadcast import BroadcastFeature
-from steward.features.chat_collect import ChatCollectFeature
-from steward.features.curse import CurseFeature
-from steward.features.curse_metric import CurseMetricFeature
-from steward.features.db import DbFeature
-from steward.features.diana import DianaFeature
-from steward.features.download import DownloadFeature
-from steward.features.everyone import EveryoneFeature
-from steward.features.exchange_rates import ExchangeRateFeature
-from steward.features.feature_request import FeatureRequestFeature
-from steward.features.fuck import FuckFeature, SexFeature
-from steward.features.google_drive import GoogleDriveFeature
-from steward.features.highcast_cleanup import HighcastCleanupFeature
-from steward.features.holidays import HolidaysFeature
-from steward.features.joke import JokeFeature
-from steward.features.id import IdFeature
-from steward.features.incident import IncidentFeature
-from steward.features.lang import LangFeature
-from steward.features.layout import LayoutFeature
-from steward.features.link import LinkFeature
-from steward.features.me import MeFeature
-from steward.features.message_info import MessageInfoFeature
-from steward.features.miniapp import MiniAppFeature
-from steward.features.multiply import MultiplyFeature
-from steward.features.news_video import NewsVideoFeature
-from steward.features.newtext import NewTextFeature
-from steward.features.pasha import PashaFeature
-from steward.features.pretty_time import PrettyTimeFeature
-from steward.features.react import ReactFeature
-from steward.features.reaction_counter import ReactionCounterFeature
-from steward.features.remind import RemindersFeature, RemindFeature
-from steward.features.reward import RewardFeature
-from steward.features.rule import RuleFeature
-from steward.features.rule_answer import RuleAnswerFeature
-from steward.features.silence import SilenceEnforcerFeature, SilenceFeature
-from steward.features.stands import StandsFeature
-from steward.features.stats import StatsFeature
-from steward.features.subscribe import SubscribeFeature
-from steward.features.tarot import TarotFeature
-from steward.features.tennis import TennisFeature
-from steward.features.timezone import TimezoneFeature
-from steward.features.todo import TodoFeature
-from steward.features.settings import SettingsFeature
-from steward.features.shazam import ShazamFeature
-from steward.features.transcribe import AutoVideoTranscriptionFeature, TranscribeFeature
-from steward.features.translate import TranslateFeature
-from steward.features.tts import TtsTestFeature
-from steward.features.tunnel import TunnelFeature
-from steward.features.user_memory import UserMemoryFeature
-from steward.features.voice_video import VoiceVideoFeature
-from steward.features.watch import WatchFeature
+"""Реестр фич: порядок обхода хендлеров и группы для настроек чата.
+
+Фичи перечислены ссылками (FeatureRef), а не классами: их метаданные лежат в
+manifest.json, модули импортируются при первом обращении (см.
+steward.framework.lazy). После добавления фичи или правки её команд, описаний
+и подкоманд манифест пересобирается: python -m steward.features.manifest
+"""
+from steward.features.manifest import feature_ref
 from steward.framework import bucket
+from steward.framework.lazy import FeatureRef, LazyFeature
 from steward.handlers.handler import Handler
 
+AdminFeature = feature_ref("steward.features.admin", "AdminFeature")
+AIFeature = feature_ref("steward.features.ai", "AIFeature")
+AiRelatedFeature = feature_ref("steward.features.ai_related", "AiRelatedFeature")
+AliasFeature = feature_ref("steward.features.alias", "AliasFeature")
+ArmyFeature = feature_ref("steward.features.army", "ArmyFeature")
+BanEnforcerFeature = feature_ref("steward.features.ban", "BanEnforcerFeature")
+BanFeature = feature_ref("steward.features.ban", "BanFeature")
+BillsFeature = feature_ref("steward.features.bills", "BillsFeature")
+BirthdayFeature = feature_ref("steward.features.birthday", "BirthdayFeature")
+BroadcastFeature = feature_ref("steward.features.broadcast", "BroadcastFeature")
+ChatCollectFeature = feature_ref("steward.features.chat_collect", "ChatCollectFeature")
+CurseFeature = feature_ref("steward.features.curse", "CurseFeature")
+CurseMetricFeature = feature_ref("steward.features.curse_metric", "CurseMetricFeature")
+DbFeature = feature_ref("steward.features.db", "DbFeature")
+DianaFeature = feature_ref("steward.features.diana", "DianaFeature")
+DownloadFeature = feature_ref("steward.features.download.feature", "DownloadFeature")
+EveryoneFeature = feature_ref("steward.features.everyone", "EveryoneFeature")
+ExchangeRateFeature = feature_ref("steward.features.exchange_rates", "ExchangeRateFeature")
+FeatureRequestFeature = feature_ref("steward.features.feature_request", "FeatureRequestFeature")
+FuckFeature = feature_ref("steward.features.fuck", "FuckFeature")
+SexFeature = feature_ref("steward.features.fuck", "SexFeature")
+GoogleDriveFeature = feature_ref("steward.features.google_drive", "GoogleDriveFeature")
+HighcastCleanupFeature = feature_ref("steward.features.highcast_cleanup", "HighcastCleanupFeature")
+HolidaysFeature = feature_ref("steward.features.holidays", "HolidaysFeature")
+IdFeature = feature_ref("steward.features.id", "IdFeature")
+IncidentFeature = feature_ref("steward.features.incident", "IncidentFeature")
+JokeFeature = feature_ref("steward.features.joke", "JokeFeature")
+LangFeature = feature_ref("steward.features.lang", "LangFeature")
+LayoutFeature = feature_ref("steward.features.layout", "LayoutFeature")
+LinkFeature = feature_ref("steward.features.link", "LinkFeature")
+MeFeature = feature_ref("steward.features.me", "MeFeature")
+MessageInfoFeature = feature_ref("steward.features.message_info", "MessageInfoFeature")
+MiniAppFeature = feature_ref("steward.features.miniapp", "MiniAppFeature")
+MultiplyFeature = feature_ref("steward.features.multiply", "MultiplyFeature")
+NewsVideoFeature = feature_ref("steward.features.news_video", "NewsVideoFeature")
+NewTextFeature = feature_ref("steward.features.newtext", "NewTextFeature")
+PashaFeature = feature_ref("steward.features.pasha", "PashaFeature")
+PrettyTimeFeature = feature_ref("steward.features.pretty_time", "PrettyTimeFeature")
+ReactFeature = feature_ref("steward.features.react", "ReactFeature")
+ReactionCounterFeature = feature_ref("steward.features.reaction_counter", "ReactionCounterFeature")
+RemindFeature = feature_ref("steward.features.remind", "RemindFeature")
+RemindersFeature = feature_ref("steward.features.remind", "RemindersFeature")
+RewardFeature = feature_ref("steward.features.reward", "RewardFeature")
+RuleFeature = feature_ref("steward.features.rule", "RuleFeature")
+RuleAnswerFeature = feature_ref("steward.features.rule_answer", "RuleAnswerFeature")
+SettingsFeature = feature_ref("steward.features.settings", "SettingsFeature")
+ShazamFeature = feature_ref("steward.features.shazam", "ShazamFeature")
+SilenceEnforcerFeature = feature_ref("steward.features.silence", "SilenceEnforcerFeature")
+SilenceFeature = feature_ref("steward.features.silence", "SilenceFeature")
+StandsFeature = feature_ref("steward.features.stands", "StandsFeature")
+StatsFeature = feature_ref("steward.features.stats", "StatsFeature")
+SubscribeFeature = feature_ref("steward.features.subscribe", "SubscribeFeature")
+TarotFeature = feature_ref("steward.features.tarot", "TarotFeature")
+TennisFeature = feature_ref("steward.features.tennis", "TennisFeature")
+TimezoneFeature = feature_ref("steward.features.timezone", "TimezoneFeature")
+TodoFeature = feature_ref("steward.features.todo", "TodoFeature")
+AutoVideoTranscriptionFeature = feature_ref("steward.features.transcribe", "AutoVideoTranscriptionFeature")
+TranscribeFeature = feature_ref("steward.features.transcribe", "TranscribeFeature")
+TranslateFeature = feature_ref("steward.features.translate", "TranslateFeature")
+TtsTestFeature = feature_ref("steward.features.tts", "TtsTestFeature")
+TunnelFeature = feature_ref("steward.features.tunnel", "TunnelFeature")
+UserMemoryFeature = feature_ref("steward.features.user_memory", "UserMemoryFeature")
+VoiceVideoFeature = feature_ref("steward.features.voice_video", "VoiceVideoFeature")
+WatchFeature = feature_ref("steward.features.watch", "WatchFeature")
+
 
 EARLY = bucket("monitors")
 EARLY << [
@@ -141,16 +155,22 @@ LATE << [
 
 
 def all_features() -> list[Handler]:
+    """Every feature imported and built up front."""
     instances: list[Handler] = []
     for b in (EARLY, COMMANDS, LATE):
-        for cls in b.list:
-            instances.append(cls())
+        for ref in b.list:
+            instances.append(ref.load()())
     return instances
 
 
+def lazy_features() -> list[Handler]:
+    """Every feature as a LazyFeature: modules are imported on first use."""
+    return [LazyFeature(ref) for b in (EARLY, COMMANDS, LATE) for ref in b.list]
+
+
 # Логические группы: классы, которые тогглятся вместе (бан-команда + ban-enforcer
 # и т.п.). Первый класс группы — primary, по нему берётся slug, label, описание.
-CAPABILITIES_GROUPED: dict[str, list[list[type]]] = {
+CAPABILITIES_GROUPED: dict[str, list[list[FeatureRef]]] = {
     "ai":         [[AIFeature], [AiRelatedFeature], [PashaFeature], [DianaFeature], [TranslateFeature]],
     "transcribe": [[TranscribeFeature], [AutoVideoTranscriptionFeature], [ShazamFeature],
                    [MultiplyFeature], [VoiceVideoFeature]],
@@ -167,13 +187,13 @@ CAPABILITIES_GROUPED: dict[str, list[list[type]]] = {
     "moderation": [[BanFeature, BanEnforcerFeature], [SilenceFeature, SilenceEnforcerFeature]],
 }
 
-CAPABILITIES: dict[str, set[type]] = {
+CAPABILITIES: dict[str, set[FeatureRef]] = {
     cap: {cls for group in groups for cls in group}
     for cap, groups in CAPABILITIES_GROUPED.items()
 }
 
 
-ALWAYS_ON: set[type] = {
+ALWAYS_ON: set[FeatureRef] = {
     AdminFeature, MiniAppFeature, ChatCollectFeature,
     ReactionCounterFeature, UserMemoryFeature, HighcastCleanupFeature,
     DbFeature, BroadcastFeature,
@@ -196,46 +216,57 @@ CAPABILITY_LABELS: dict[str, str] = {
 ALL_CAPABILITIES: set[str] = set(CAPABILITIES.keys())
 
 
-def capability_of(feature_cls: type) -> str | None:
-    for cap, classes in CAPABILITIES.items():
-        if feature_cls in classes:
-            return cap
-    return None
+# Функции ниже принимают и класс фичи, и её FeatureRef, и имя класса
+type FeatureKey = type | FeatureRef | str
+
+_CAPABILITY_BY_NAME: dict[str, str] = {
+    ref.__name__: cap for cap, refs in CAPABILITIES.items() for ref in refs
+}
+_GROUP_BY_NAME: dict[str, list[FeatureRef]] = {
+    ref.__name__: group
+    for groups in CAPABILITIES_GROUPED.values()
+    for group in groups
+    for ref in group
+}
+_ALWAYS_ON_NAMES: set[str] = {ref.__name__ for ref in ALWAYS_ON}
+
+
+def _name(feature: FeatureKey) -> str:
+    return feature if isinstance(feature, str) else feature.__name__
+
+
+def capability_of(feature_cls: FeatureKey) -> str | None:
+    return _CAPABILITY_BY_NAME.get(_name(feature_cls))
 
 
-def _group_of(feature_cls: type) -> list[type] | None:
-    for groups in CAPABILITIES_GROUPED.values():
-        for group in groups:
-            if feature_cls in group:
-                return group
-    return None
+def _group_of(feature_cls: FeatureKey) -> list[FeatureRef] | None:
+    return _GROUP_BY_NAME.get(_name(feature_cls))
 
 
-def feature_group_primary(feature_cls: type) -> type:
+def feature_group_primary(feature_cls: FeatureKey) -> FeatureKey:
     group = _group_of(feature_cls)
     return group[0] if group else feature_cls
 
 
-def feature_slug(feature_cls: type) -> str:
+def feature_slug(feature_cls: FeatureKey) -> str:
     primary = feature_group_primary(feature_cls)
     custom_slug = getattr(primary, "settings_slug", None)
     if custom_slug:
         return custom_slug
-    return primary.__name__.removesuffix("Feature").lower()
+    return _name(primary).removesuffix("Feature").lower()
 
 
-def features_in_capability(cap: str) -> list[type]:
+def features_in_capability(cap: str) -> list[FeatureRef]:
     """Primary class of each group inside the capability."""
     return [group[0] for group in CAPABILITIES_GROUPED.get(cap, [])]
 
 
-def features_in_group(primary: type) -> list[type]:
+def features_in_group(primary: FeatureKey) -> list[FeatureKey]:
     group = _group_of(primary)
     return list(group) if group else [primary]
 
 
-def is_always_on(feature_cls: type) -> bool:
-    if feature_cls in ALWAYS_ON:
-        return True
-    # SettingsFeature is registered lazily in COMMANDS; treat by name to avoid import cycle.
-    return feature_cls.__name__ == "SettingsFeature"
+def is_always_on(feature_cls: FeatureKey) -> bool:
+    name = _name(feature_cls)
+    # SettingsFeature не выключается, хоть и не в ALWAYS_ON: по нему и включают остальное
+    return name in _ALWAYS_ON_NAMES or name == "SettingsFeature"
@@ -1,6 +1,8 @@
 import logging
 import random
 import re
+from dataclasses import dataclass
+from functools import lru_cache
 
 from telegram import ReactionTypeEmoji
 
@@ -9,10 +11,75 @@ from steward.framework import Feature, FeatureContext, collection, on_message
 
 logger = logging.getLogger(__name__)
 
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _flags(rule: Rule) -> int:
+    return re.IGNORECASE if rule.pattern.ignore_case_flag == 1 else 0
+
+
+@lru_cache(maxsize=4096)
+def _compile(regex: str, flags: int) -> re.Pattern | None:
+    # Свой кэш: у re всего 512 слотов, тысяча правил его вымывает
+    try:
+        return re.compile(regex, flags)
+    except re.error as e:
+        logger.warning("Bad rule regex %r: %s", regex, e)
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _compile_prefilter(patterns: tuple[tuple[str, int], ...]) -> re.Pattern | None:
+    """One alternation of all chat patterns: if it misses, no rule matches.
+
+    Each pattern keeps its own flags via a scoped (?i:...) group. Patterns
+    with backreferences would point at the wrong group once combined, so
+    such chats get no prefilter.
+    """
+    parts = []
+    for regex, flags in patterns:
+        if _BACKREF_RE.search(regex):
+            return None
+        parts.append(f"(?{'i' if flags & re.IGNORECASE else '-i'}:{regex})")
+    try:
+        return re.compile("|".join(parts))
+    except re.error:
+        return None
+
+
+@dataclass
+class _ChatRules:
+    version: int
+    rules: list[tuple[Rule, re.Pattern]]
+    prefilter: re.Pattern | None
+
 
 class RuleAnswerFeature(Feature):
     rules = collection("rules")
 
+    def __init__(self):
+        super().__init__()
+        self._chat_rules: dict[int, _ChatRules] = {}
+
+    def _rules_for_chat(self, chat_id: int) -> _ChatRules:
+        """Compiled rules scoped to chat_id; rebuilt when the rules index changes."""
+        rules = self.repository.db.rules
+        index = self.repository.indexes.get("rules", "chats")
+        index.refresh(rules)
+        cached = self._chat_rules.get(chat_id)
+        if cached is not None and cached.version == index.version:
+            return cached
+        compiled = []
+        for rule in index.lookup(rules, chat_id):
+            pattern = _compile(rule.pattern.regex, _flags(rule))
+            if pattern is not None:
+                compiled.append((rule, pattern))
+        prefilter = _compile_prefilter(
+            tuple((rule.pattern.regex, _flags(rule)) for rule, _ in compiled)
+        ) if compiled else None
+        cached = self._chat_rules[chat_id] = _ChatRules(index.version, compiled, prefilter)
+        return cached
+
     _AI_TRIGGERS = ["дворецкий", "уважаемый"]
     _AI_MEDIA_ATTRS = ("video", "video_note", "voice", "audio", "photo", "sticker", "animation", "document")
 
@@ -38,22 +105,20 @@ class RuleAnswerFeature(Feature):
             return False
         if self._addressed_to_ai(ctx):
             return False
-        rules_list = list(self.rules)
-
-        def matches(rule: Rule) -> bool:
-            # Правило срабатывает только в чатах из своего скоупа.
-            if ctx.chat_id not in rule.chats:
-                return False
-            if not re.search(
-                rule.pattern.regex,
-                ctx.message.text,
-                re.IGNORECASE if rule.pattern.ignore_case_flag == 1 else 0,
-            ):
-                return False
-            # from_users пуст => не от кого; {0} => от всех.
-            return ctx.user_id in rule.from_users or 0 in rule.from_users
+        # Правило срабатывает только в чатах из своего скоупа.
+        chat_rules = self._rules_for_chat(ctx.chat_id)
+        if not chat_rules.rules:
+            return False
+        text = ctx.message.text
+        if chat_rules.prefilter is not None and not chat_rules.prefilter.search(text):
+            return False
 
-        available = [r for r in rules_list if matches(r)]
+        user_id = ctx.user_id
+        available = [
+            rule for rule, pattern in chat_rules.rules
+            # from_users пуст => не от кого; {0} => от всех.
+            if (user_id in rule.from_users or 0 in rule.from_users) and pattern.search(text)
+        ]
         if not available:
             return False
         rule = random.choice(available)
@@ -63,9 +63,8 @@ class SettingsFeature(Feature):
     def known_permissions(self) -> list[str]:
         seen: set[str] = set()
         for h in getattr(self, "_all_handlers", []) or []:
-            for sub in getattr(h, "_subcommands", []) or []:
-                if sub.permission:
-                    seen.add(sub.permission)
+            for permission, _, _ in h.permission_uses():
+                seen.add(permission)
         return sorted(seen)
 
     # ── Root ────────────────────────────────────────────────────────────────
@@ -4,7 +4,7 @@ from pathlib import Path
 
 from steward.framework import Feature, FeatureContext, subcommand
 from steward.helpers.limiter import Duration, check_limit
-from steward.helpers.media import fetch_tg_file_to, run_ffmpeg
+from steward.helpers.media import borrow_tg_file, release_tg_file, run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
@@ -83,10 +83,13 @@ class ShazamFeature(Feature):
 
     async def _recognize(self, ctx: FeatureContext, file_id: str) -> dict | None:
         from shazamio import Shazam
-        with tempfile.TemporaryDirectory(prefix="shazam_") as tmp_dir:
-            raw_path = Path(tmp_dir) / "input"
-            mp3_path = Path(tmp_dir) / "audio.mp3"
-            await fetch_tg_file_to(ctx.bot, file_id, raw_path)
-            await run_ffmpeg("-i", str(raw_path), "-ac", "1", "-ar", "44100", str(mp3_path))
-            result = await Shazam().recognize(str(mp3_path))
-            return result.get("track")
+        # ffmpeg читает исходник на месте — в local mode без копирования
+        raw_path = await borrow_tg_file(ctx.bot, file_id, prefix="shazam_")
+        try:
+            with tempfile.TemporaryDirectory(prefix="shazam_") as tmp_dir:
+                mp3_path = Path(tmp_dir) / "audio.mp3"
+                await run_ffmpeg("-i", str(raw_path), "-ac", "1", "-ar", "44100", str(mp3_path))
+                result = await Shazam().recognize(str(mp3_path))
+                return result.get("track")
+        finally:
+            release_tg_file(raw_path)
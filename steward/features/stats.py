@@ -255,6 +255,12 @@ class StatsFeature(Feature):
     ) -> tuple[str, Keyboard]:
         n = len(_STATS)
         indices = [(offset + i) % n for i in range(min(WINDOW_SIZE, n))]
+        # Все метрики окна — одним пакетом параллельных запросов
+        metric_results = iter(await ctx.metrics.query_many(
+            _promql(_STATS[i], scope, period, chat_id, top_n=MAIN_TOP_N)
+            for i in indices
+            if not _STATS[i].is_db
+        ))
         sections = []
         for i in indices:
             s = _STATS[i]
@@ -262,10 +268,7 @@ class StatsFeature(Feature):
                 entries = _monkey_leaderboard(ctx.repository, scope, chat_id, MAIN_TOP_N)
                 sections.append(_format_monkey_section(entries, s.label))
             else:
-                result = await ctx.metrics.query(
-                    _promql(s, scope, period, chat_id, top_n=MAIN_TOP_N)
-                )
-                sections.append(_format_section(result, s.label))
+                sections.append(_format_section(next(metric_results), s.label))
         header = f"📊 {_SCOPE_LABELS[scope]} | {_PERIOD_LABELS[period]}"
         text = header + "\n\n" + "\n\n".join(sections)
         rows = self._switch_rows(scope, period, "main", offset, chat_id)
@@ -321,17 +324,17 @@ class StatsFeature(Feature):
                     lines.append(f"{i}. `@{name}` — {val} 🐵")
                 text = "\n".join(lines)
         else:
-            current = await ctx.metrics.query(
-                _promql(m, scope, period, chat_id, top_n=DETAIL_TOP_N)
-            )
-            prev_map: dict[str, float] | None = None
+            queries = [_promql(m, scope, period, chat_id, top_n=DETAIL_TOP_N)]
             prev = _prev_period(period)
             if prev:
                 prev_range, prev_offset = prev
-                prev_results = await ctx.metrics.query(
+                queries.append(
                     _promql(m, scope, period, chat_id, range_str=prev_range, offset=prev_offset)
                 )
-                prev_map = {s.labels.get("user_id", ""): s.value for s in prev_results}
+            current, *prev_results = await ctx.metrics.query_many(queries)
+            prev_map: dict[str, float] | None = None
+            if prev_results:
+                prev_map = {s.labels.get("user_id", ""): s.value for s in prev_results[0]}
             header = f"{m.label}\n{_SCOPE_LABELS[scope]} | {_PERIOD_LABELS[period]}"
             if not current:
                 text = f"{header}\n\nНет данных"
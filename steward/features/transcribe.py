@@ -1,5 +1,4 @@
 import logging
-import tempfile
 from pathlib import Path
 from typing import Any
 
@@ -9,7 +8,7 @@ from steward.features.curse_metric import CurseMetricFeature
 from steward.features.voice_video.transcription import create_transcription_reply
 from steward.framework import Feature, FeatureContext, step, subcommand, wizard
 from steward.helpers.curse_processing import process_transcribed_curse_text
-from steward.helpers.media import fetch_tg_file_to
+from steward.helpers.media import borrow_tg_file, release_tg_file
 from steward.session.context import ChatStepContext
 from steward.session.step import Step
 
@@ -342,24 +341,11 @@ class TranscribeFeature(Feature):
         )
 
     async def _resolve_audio_path(self, ctx: FeatureContext, file_id: str) -> Path:
-        with tempfile.NamedTemporaryFile(
-            prefix="dvoretskii_transcribe_",
-            suffix=".media",
-            delete=False,
-        ) as temporary_file:
-            audio_path = Path(temporary_file.name)
-
-        try:
-            return await fetch_tg_file_to(ctx.bot, file_id, audio_path)
-        except Exception:
-            self._remove_audio_path(audio_path)
-            raise
+        # В local mode — сам файл Bot API сервера, без копии во временный
+        return await borrow_tg_file(
+            ctx.bot, file_id, prefix="dvoretskii_transcribe_", suffix=".media"
+        )
 
     @staticmethod
     def _remove_audio_path(audio_path: Path | None) -> None:
-        if audio_path is None:
-            return
-        try:
-            audio_path.unlink(missing_ok=True)
-        except OSError as e:
-            logger.warning("Unable to remove /transcribe file %s: %s", audio_path, e)
+        release_tg_file(audio_path)
@@ -2,9 +2,8 @@ import logging
 import re
 from os import environ
 
-from aiohttp import ClientSession
-
 from steward.framework import Feature, FeatureContext, on_message, subcommand
+from steward.helpers import http_clients
 from steward.helpers.command_validation import validate_arguments
 from steward.helpers.limiter import Duration, check_limit
 
@@ -61,25 +60,25 @@ class TranslateFeature(Feature):
 
         check_limit(self, 20, Duration.MINUTE, name=str(ctx.user_id))
 
-        async with ClientSession() as session:
-            async with session.post(
-                "https://translate.api.cloud.yandex.net/translate/v2/translate",
-                json={
-                    "texts": [text],
-                    "targetLanguageCode": lang,
-                    "sourceLanguageCode": from_lang,
-                },
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Api-Key {environ.get('TRANSLATE_KEY_SECRET')}",
-                },
-            ) as response:
-                data = await response.json()
-                if (
-                    "message" in data
-                    and "unsupported target_language_code" in data["message"]
-                ):
-                    await ctx.reply(f"Язык {lang} не поддерживается для перевода")
-                    return
-                translated = data["translations"][0]["text"]
-                await ctx.reply(translated)
+        session = http_clients.session("yandex-translate")
+        async with session.post(
+            "https://translate.api.cloud.yandex.net/translate/v2/translate",
+            json={
+                "texts": [text],
+                "targetLanguageCode": lang,
+                "sourceLanguageCode": from_lang,
+            },
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Api-Key {environ.get('TRANSLATE_KEY_SECRET')}",
+            },
+        ) as response:
+            data = await response.json()
+            if (
+                "message" in data
+                and "unsupported target_language_code" in data["message"]
+            ):
+                await ctx.reply(f"Язык {lang} не поддерживается для перевода")
+                return
+            translated = data["translations"][0]["text"]
+            await ctx.reply(translated)
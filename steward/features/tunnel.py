@@ -910,7 +910,7 @@ class TunnelFeature(Feature):
         dispatch = None
         for url, key in found:
             try:
-                cached = video_cache.get(url)
+                cached = video_cache.get(url, source="tunnel")
                 if cached:
                     await self._send_cached(anchor, cached)
                     continue
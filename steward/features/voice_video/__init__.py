@@ -2,7 +2,6 @@ import asyncio
 import dataclasses
 import logging
 import random
-import tempfile
 import uuid
 from pathlib import Path
 
@@ -24,6 +23,7 @@ from steward.framework import (
     subcommand,
 )
 from steward.helpers.curse_processing import process_transcribed_curse_text
+from steward.helpers.media import borrow_tg_file, release_tg_file
 
 logger = logging.getLogger(__name__)
 
@@ -438,34 +438,12 @@ class VoiceVideoFeature(Feature):
         )
 
     async def _resolve_audio_path(self, ctx: FeatureContext, file_id: str) -> Path:
-        tg_file = await ctx.bot.get_file(file_id)
-        if not tg_file.file_path:
-            raise Exception("File path is not available")
-
-        suffix = Path(tg_file.file_path).suffix
-        with tempfile.NamedTemporaryFile(
-            prefix="dvoretskii_voice_",
-            suffix=suffix,
-            delete=False,
-        ) as temporary_file:
-            audio_path = Path(temporary_file.name)
-
-        try:
-            await tg_file.download_to_drive(custom_path=audio_path)
-        except Exception:
-            self._remove_audio_path(audio_path)
-            raise
-        return audio_path
+        # В local mode — сам файл Bot API сервера, без копии во временный
+        return await borrow_tg_file(ctx.bot, file_id, prefix="dvoretskii_voice_")
 
     @staticmethod
     def _remove_audio_path(audio_path: Path | None) -> None:
-        if audio_path is None:
-            return
-
-        try:
-            audio_path.unlink(missing_ok=True)
-        except OSError as e:
-            logger.warning("Unable to remove temporary voice file %s: %s", audio_path, e)
+        release_tg_file(audio_path)
 
     async def _remove_voice_prompt(self, message) -> None:
         try:
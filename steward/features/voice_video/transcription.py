@@ -9,10 +9,10 @@ from typing import Any, AsyncIterator, Callable
 from telegram.constants import ParseMode
 from telegram.error import BadRequest, RetryAfter
 
-from steward.data.models.ai_message import AiMessage
 from steward.features.voice_video.conversion import run_ffmpeg
 from steward.features.voice_video.visual import describe_video
 from steward.helpers.ai import Model, make_text_stream
+from steward.helpers.ai_context import remember_ai_reply
 from steward.helpers.formats import spoiler_block
 from steward.helpers.stt import transcribe_audio_bytes
 
@@ -570,17 +570,9 @@ async def create_transcription_reply(
 
 async def _register_ai_reply_target(repository, reply_target, bot_message) -> None:
     try:
-        chat_id = reply_target.chat.id
-        msg_id = bot_message.message_id
-        repository.db.ai_messages[f"{chat_id}_{msg_id}"] = AiMessage(
-            time.time(), reply_target.message_id, "ai"
+        remember_ai_reply(
+            repository, reply_target.chat.id, bot_message, reply_target.message_id, "ai"
         )
-        if len(repository.db.ai_messages) > 1000:
-            oldest = min(
-                repository.db.ai_messages,
-                key=lambda k: repository.db.ai_messages[k].timestamp,
-            )
-            del repository.db.ai_messages[oldest]
         await repository.save()
     except Exception as e:
         logger.debug("failed to register transcription as ai reply target: %s", e)
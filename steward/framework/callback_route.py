@@ -73,7 +73,10 @@ class CallbackSchema:
         return "|".join(parts)
 
     def parse(self, raw: str) -> dict[str, Any] | None:
-        parts = raw.split("|")
+        return self.parse_parts(raw.split("|"))
+
+    def parse_parts(self, parts: list[str]) -> dict[str, Any] | None:
+        """parse() for data already split on '|' (shared by all candidate routes)."""
         if not parts or parts[0] != self.name:
             return None
         if len(parts) - 1 != len(self.fields):
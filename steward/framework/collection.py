@@ -1,5 +1,6 @@
 from typing import Any, Callable, Generic, Iterable, TypeVar
 
+from steward.data.index import CollectionIndex, IndexSpec
 from steward.data.repository import Repository
 
 T = TypeVar("T")
@@ -42,11 +43,28 @@ class ListCollection(Generic[T], _BaseCollection):
     def __len__(self) -> int:
         return len(self._data())
 
+    def _index(self, kw: dict[str, Any]) -> tuple[CollectionIndex, Any] | None:
+        indexes = getattr(self._repository, "indexes", None)
+        if indexes is None:
+            return None
+        for field, expected in kw.items():
+            index = indexes.get(self._attr, field)
+            if index is not None and not index.spec.multi:
+                return index, expected
+        return None
+
+    def _candidates(self, kw: dict[str, Any]) -> Iterable[T]:
+        found = self._index(kw)
+        if found is None:
+            return self._data()
+        index, expected = found
+        return index.lookup(self._data(), expected)
+
     def filter(self, **kw: Any) -> list[T]:
-        return [x for x in self._data() if _matches(x, kw)]
+        return [x for x in self._candidates(kw) if _matches(x, kw)]
 
     def find_by(self, **kw: Any) -> T | None:
-        for x in self._data():
+        for x in self._candidates(kw):
             if _matches(x, kw):
                 return x
         return None
@@ -66,21 +84,29 @@ class ListCollection(Generic[T], _BaseCollection):
             if current is None or current == 0:
                 setattr(item, self._id_field, self.next_id())
         self._data().append(item)
+        self._notify("added", item)
         return item
 
     def remove(self, item: T) -> None:
         self._data().remove(item)
+        self._notify("removed", item)
 
     def remove_where(self, **kw: Any) -> int:
         items = self.filter(**kw)
         for item in items:
-            self._data().remove(item)
+            self.remove(item)
         return len(items)
 
     def replace_all(self, items: Iterable[T]) -> None:
         data = self._data()
         data.clear()
         data.extend(items)
+        self._notify("replaced")
+
+    def _notify(self, event: str, *args: Any) -> None:
+        indexes = getattr(self._repository, "indexes", None)
+        if indexes is not None:
+            getattr(indexes, event)(self._attr, *args)
 
     def sort_by(self, key: Callable[[T], Any], reverse: bool = False) -> list[T]:
         return sorted(self._data(), key=key, reverse=reverse)
@@ -162,9 +188,11 @@ class DictCollection(Generic[K, V], _BaseCollection):
 
 
 class _CollectionDescriptor:
-    def __init__(self, attr: str, id_field: str = "id"):
+    # indexes — поля элементов, по которым find_by/filter идут через индекс
+    def __init__(self, attr: str, id_field: str = "id", indexes: Iterable[str] = ()):
         self.attr = attr
         self.id_field = id_field
+        self.indexes = tuple(indexes)
 
     def __set_name__(self, owner, name):
         self._owner_name = name
@@ -177,11 +205,16 @@ class _CollectionDescriptor:
             raise RuntimeError(
                 f"Collection '{self.attr}' accessed before repository injection on {owner.__name__}"
             )
+        registry = getattr(repo, "indexes", None)
+        if registry is not None:
+            for field in self.indexes:
+                # Поля элементов фичи правят на месте — перестраиваем после save()
+                registry.register(IndexSpec(self.attr, field, mutable=True))
         return _build_collection(repo, self.attr, self.id_field)
 
 
-def collection(attr: str, *, id_field: str = "id") -> Any:
-    return _CollectionDescriptor(attr, id_field)
+def collection(attr: str, *, id_field: str = "id", indexes: Iterable[str] = ()) -> Any:
+    return _CollectionDescriptor(attr, id_field, indexes)
 
 
 def _build_collection(repository: Repository, attr: str, id_field: str) -> Any:
@@ -40,7 +40,7 @@ from steward.framework.wizard import (
 from steward.handlers.handler import Handler
 from steward.helpers.command_validation import (
     ValidationArgumentsError,
-    validate_command_msg,
+    command_name,
 )
 from steward.metrics.base import ContextMetrics
 from steward.session.session_handler_base import SessionHandlerBase
@@ -63,6 +63,7 @@ class Feature(Handler):
 
     _subcommands: list[Subcommand]
     _callbacks: list[CallbackRoute]
+    _callbacks_by_name: dict[str, list[CallbackRoute]]
     _wizards: dict[str, WizardSpec]
     _paginators: dict[str, _PaginatorSpec]
     _custom_steps: dict[str, type]
@@ -124,6 +125,9 @@ class Feature(Handler):
 
         cls._subcommands = sort_subcommands(subcommands)
         cls._callbacks = callbacks
+        cls._callbacks_by_name = {}
+        for route in callbacks:
+            cls._callbacks_by_name.setdefault(route.schema.name, []).append(route)
         cls._wizards = wizards
         cls._paginators = paginators
         cls._custom_steps = custom_steps
@@ -143,6 +147,13 @@ class Feature(Handler):
                 return CallbackFactory(route.schema)
         raise KeyError(f"No callback route registered: {name!r}")
 
+    def callback_prefixes(self) -> set[str]:
+        """First '|' segments of callback data this feature can handle."""
+        prefixes = set(self._callbacks_by_name)
+        if self._paginators:
+            prefixes.add(self._pagination_prefix)
+        return prefixes
+
     def get_command(self) -> str | None:
         return self.command
 
@@ -160,8 +171,7 @@ class Feature(Handler):
     async def chat(self, ctx: ChatBotContext) -> bool:  # type: ignore[override]
         if self.command is not None:
             commands = self.get_command_with_aliases()
-            validation = validate_command_msg(ctx.update, commands)
-            if validation:
+            if command_name(ctx.update) in commands:
                 args = self._extract_args(ctx, commands)
                 feature_ctx = from_chat_context(ctx)
                 handled = await self._dispatch_subcommand(feature_ctx, args)
@@ -183,7 +193,8 @@ class Feature(Handler):
         if not data:
             return False
 
-        if self._paginators:
+        parts = data.split("|")
+        if self._paginators and parts[0] == self._pagination_prefix:
             parsed = _split_pagination_data(self._pagination_prefix, data)
             if parsed is not None:
                 name, metadata, page = parsed
@@ -193,8 +204,8 @@ class Feature(Handler):
                     await self._render_paginator(feature_ctx, spec, metadata, page, edit=True)
                     return True
 
-        for route in self._callbacks:
-            parsed_cb = route.schema.parse(data)
+        for route in self._callbacks_by_name.get(parts[0], ()):
+            parsed_cb = route.schema.parse_parts(parts)
             if parsed_cb is None:
                 continue
             feature_ctx = from_callback_context(ctx)
@@ -314,6 +325,13 @@ class Feature(Handler):
             raise ValidationArgumentsError()
         return False
 
+    def permission_uses(self) -> list[tuple[str, str, str]]:
+        return [
+            (sub.permission, sub.raw or "", sub.description)
+            for sub in self._subcommands
+            if sub.permission
+        ]
+
     def help(self) -> str | None:  # type: ignore[override]
         if self.custom_help is not None:
             return self.custom_help
@@ -473,6 +491,15 @@ class Feature(Handler):
         await self._activate_session(session, ctx)
         return True
 
+    def resume_wizard(self, key: tuple[int, int], state: dict) -> FeatureWizardSession | None:
+        """Put a wizard saved by snapshot_session() back at its step; None if it no longer fits."""
+        session = self._wizard_sessions.get(state.get("wizard", ""))
+        if session is None or not session.resume_session(key, state):
+            return None
+        session.repository = self.repository
+        session.bot = self.bot
+        return session
+
     async def _activate_session(
         self, session: SessionHandlerBase, ctx: FeatureContext
     ) -> None:
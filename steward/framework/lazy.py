@@ -0,0 +1,332 @@
+"""Ленивая загрузка фич.
+
+Реестр хранит не классы, а FeatureRef — модуль, имя класса и FeatureSpec с
+тем, что нужно боту до первого обращения к фиче: команды, алиасы, префиксы
+callback, на какие апдейты она смотрит без команды, тексты /help и
+AI-роутера. Всё это снимается с настоящих классов describe() и лежит в
+steward/features/manifest.json.
+
+LazyFeature подставляется в список хендлеров вместо экземпляра фичи. Таблица
+маршрутов строится по спецификации, а модуль фичи импортируется, когда апдейт
+до неё действительно дошёл: в потоке, чтобы event loop не стоял, пока
+тянутся moviepy и yt-dlp. Фичи с @on_init грузятся сразу в post_init — их
+хуки должны отработать на старте. warm_up() догружает остальное в фоне.
+
+Всё, чего нет в спецификации, LazyFeature берёт у настоящего экземпляра,
+загружая его синхронно прямо в event loop, — с предупреждением в лог: такое
+обращение стоит перенести в спецификацию.
+
+Метрика: feature_load_seconds{feature}.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from steward.handlers.handler import Handler
+from steward.metrics.base import MetricsEngine
+
+logger = logging.getLogger(__name__)
+
+# Пауза после старта перед фоновой догрузкой фич: сначала — первые апдейты
+WARMUP_DELAY_SEC = 5.0
+
+# Апдейты, которые фича может обработать без своей команды или префикса callback
+ACTIONS = ("chat", "message_edited", "reaction", "callback")
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    command: str | None = None
+    aliases: tuple[str, ...] = ()
+    description: str = ""
+    settings_slug: str | None = None
+    settings_label: str | None = None
+    callback_prefixes: tuple[str, ...] = ()
+    monitors: tuple[str, ...] = ()
+    has_init: bool = False
+    only_for_admin: bool = False
+    only_for_chat_admin: bool = False
+    excluded_from_ai_router: bool = False
+    help: str | None = None
+    help_compact: str | None = None
+    prompt: str | None = None
+    permissions: tuple[tuple[str, str, str], ...] = ()
+
+
+def describe(cls: type[Handler]) -> FeatureSpec:
+    """Everything the bot reads from a feature before it is used, taken from the real class."""
+    from steward.bot.dispatch import _handles
+    from steward.framework.feature import Feature
+
+    handler = cls()
+    get_prefixes = getattr(handler, "callback_prefixes", None)
+    help_compact = getattr(handler, "help_compact", None)
+    return FeatureSpec(
+        command=getattr(cls, "command", None),
+        aliases=tuple(getattr(cls, "aliases", ()) or ()),
+        description=getattr(cls, "description", "") or "",
+        settings_slug=getattr(cls, "settings_slug", None),
+        settings_label=getattr(cls, "settings_label", None),
+        callback_prefixes=tuple(sorted(get_prefixes())) if get_prefixes is not None else (),
+        monitors=tuple(action for action in ACTIONS if _handles(handler, action)),
+        has_init=bool(getattr(cls, "_on_init_hooks", None))
+        or cls.init not in (Feature.init, Handler.init),
+        only_for_admin=cls.only_for_admin,
+        only_for_chat_admin=cls.only_for_chat_admin,
+        excluded_from_ai_router=getattr(cls, "excluded_from_ai_router", False),
+        help=handler.help(),
+        help_compact=help_compact() if help_compact is not None else None,
+        prompt=handler.prompt(),
+        permissions=tuple(handler.permission_uses()),
+    )
+
+
+class FeatureRef:
+    """Stand-in for a feature class: its name, module and spec, importable on demand.
+
+    Compares equal to the class it refers to, so registry lookups accept either.
+    """
+
+    def __init__(self, module: str, name: str, spec: FeatureSpec | None = None):
+        self.__name__ = name
+        self.module = module
+        self._spec = spec
+        self._cls: type[Handler] | None = None
+
+    @property
+    def spec(self) -> FeatureSpec:
+        if self._spec is None:
+            # Фичи нет в манифесте — узнаём всё у самого класса
+            logger.warning("Feature %s is missing from the manifest", self.__name__)
+            self._spec = describe(self.load())
+        return self._spec
+
+    @property
+    def loaded(self) -> bool:
+        return self._cls is not None
+
+    def load(self) -> type[Handler]:
+        if self._cls is None:
+            self._cls = getattr(importlib.import_module(self.module), self.__name__)
+        return self._cls
+
+    @property
+    def command(self) -> str | None:
+        return self.spec.command
+
+    @property
+    def aliases(self) -> tuple[str, ...]:
+        return self.spec.aliases
+
+    @property
+    def description(self) -> str:
+        return self.spec.description
+
+    @property
+    def settings_slug(self) -> str | None:
+        return self.spec.settings_slug
+
+    @property
+    def settings_label(self) -> str | None:
+        return self.spec.settings_label
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FeatureRef):
+            return (other.module, other.__name__) == (self.module, self.__name__)
+        if isinstance(other, type):
+            return (other.__module__, other.__name__) == (self.module, self.__name__)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.module, self.__name__))
+
+    def __repr__(self) -> str:
+        return f"FeatureRef({self.module}:{self.__name__})"
+
+
+_metrics: MetricsEngine | None = None
+
+
+def set_metrics(metrics: MetricsEngine | None):
+    global _metrics
+    _metrics = metrics
+
+
+class LazyFeature(Handler):
+    """Handler proxy that imports and builds its feature on the first update routed to it."""
+
+    def __init__(self, ref: FeatureRef):
+        self._lazy_ref = ref
+        self._lazy_instance: Handler | None = None
+        self._lazy_load_seconds: float | None = None
+        # То, что бот присваивает хендлерам (repository, bot, ...), — переносится в экземпляр
+        self._lazy_injected: dict[str, Any] = {}
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name.startswith("_lazy_"):
+            return
+        self._lazy_injected[name] = value
+        if self._lazy_instance is not None:
+            setattr(self._lazy_instance, name, value)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name.startswith("_lazy_"):
+            raise AttributeError(name)
+        if self._lazy_instance is None:
+            logger.warning(
+                "Feature %s loaded synchronously for %r; add it to FeatureSpec",
+                self._lazy_ref.__name__,
+                name,
+            )
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "lazy"
+        return f"<LazyFeature {self._lazy_ref.__name__} ({state})>"
+
+    @property
+    def ref(self) -> FeatureRef:
+        return self._lazy_ref
+
+    @property
+    def spec(self) -> FeatureSpec:
+        return self._lazy_ref.spec
+
+    @property
+    def loaded(self) -> bool:
+        return self._lazy_instance is not None
+
+    @property
+    def feature_class(self) -> Any:
+        return self._lazy_ref
+
+    def load(self) -> Handler:
+        """Import and build the feature now, on the calling thread."""
+        if self._lazy_instance is None:
+            started = time.perf_counter()
+            self._build()
+            self._record_load(time.perf_counter() - started)
+        return self._lazy_instance  # type: ignore[return-value]
+
+    async def ensure_loaded(self) -> Handler:
+        if self._lazy_instance is None:
+            started = time.perf_counter()
+            if not self._lazy_ref.loaded:
+                await asyncio.to_thread(importlib.import_module, self._lazy_ref.module)
+            # Пока шёл импорт, фичу мог собрать параллельный апдейт
+            if self._lazy_instance is None:
+                self._build()
+                self._record_load(time.perf_counter() - started)
+        return self._lazy_instance  # type: ignore[return-value]
+
+    def _build(self) -> None:
+        instance = self._lazy_ref.load()()
+        for name, value in self._lazy_injected.items():
+            setattr(instance, name, value)
+        self._lazy_instance = instance
+
+    def _record_load(self, seconds: float) -> None:
+        self._lazy_load_seconds = seconds
+        logger.info("Feature %s loaded in %.0fms", self._lazy_ref.__name__, seconds * 1000)
+        if _metrics is not None:
+            _metrics.observe("feature_load_seconds", {"feature": self._lazy_ref.__name__}, seconds)
+
+    @property
+    def load_seconds(self) -> float | None:
+        return self._lazy_load_seconds
+
+    # --- то, что известно без загрузки ---
+
+    @property
+    def command(self) -> str | None:
+        return self.spec.command
+
+    @property
+    def aliases(self) -> tuple[str, ...]:
+        return self.spec.aliases
+
+    @property
+    def description(self) -> str:
+        return self.spec.description
+
+    @property
+    def only_for_admin(self) -> bool:  # type: ignore[override]
+        return self.spec.only_for_admin
+
+    @property
+    def only_for_chat_admin(self) -> bool:  # type: ignore[override]
+        return self.spec.only_for_chat_admin
+
+    @property
+    def excluded_from_ai_router(self) -> bool:
+        return self.spec.excluded_from_ai_router
+
+    def get_command(self) -> str | None:
+        return self.spec.command
+
+    def get_command_with_aliases(self) -> list[str]:
+        if self.spec.command is None:
+            return []
+        return [self.spec.command, *self.spec.aliases]
+
+    def callback_prefixes(self) -> set[str]:
+        return set(self.spec.callback_prefixes)
+
+    def help(self) -> str | None:
+        return self.spec.help
+
+    def help_compact(self) -> str | None:
+        return self.spec.help_compact
+
+    def prompt(self) -> str | None:
+        return self.spec.prompt
+
+    def permission_uses(self) -> list[tuple[str, str, str]]:
+        return [tuple(use) for use in self.spec.permissions]  # type: ignore[misc]
+
+    # --- то, ради чего фичу приходится загрузить ---
+
+    def resume_wizard(self, key: tuple[int, int], state: dict) -> Any:
+        # Сессия с диска — фичу всё равно придётся загрузить, и это старт бота
+        return self.load().resume_wizard(key, state)
+
+    async def init(self):
+        if self.spec.has_init:
+            await (await self.ensure_loaded()).init()
+
+    async def chat(self, context) -> bool:
+        return await (await self.ensure_loaded()).chat(context)
+
+    async def message_edited(self, context) -> bool:
+        return await (await self.ensure_loaded()).message_edited(context)
+
+    async def callback(self, context) -> bool:
+        return await (await self.ensure_loaded()).callback(context)
+
+    async def reaction(self, context) -> bool:
+        return await (await self.ensure_loaded()).reaction(context)
+
+
+async def warm_up(handlers: list[Handler], *, delay: float = 0.0) -> int:
+    """Load every still-lazy feature in the background; message monitors first.
+
+    Returns the number of features loaded.
+    """
+    if delay > 0:
+        await asyncio.sleep(delay)
+    pending = [h for h in handlers if isinstance(h, LazyFeature) and not h.loaded]
+    # Мониторы всё равно загрузятся на первом же сообщении в чате
+    pending.sort(key=lambda h: not h.spec.monitors)
+    loaded = 0
+    for handler in pending:
+        try:
+            await handler.ensure_loaded()
+            loaded += 1
+        except Exception:
+            logger.exception("Failed to warm up %s", handler.ref.__name__)
+    return loaded
@@ -159,6 +159,9 @@ class _AskMessageStep(Step):
     def stop(self) -> None:
         self.is_waiting = False
 
+    def snapshot(self) -> dict | None:
+        return {"is_waiting": self.is_waiting}
+
 
 class _ConditionalStep(Step):
     def __init__(self, inner: Step, when: Callable[[SessionContext], bool]):
@@ -178,6 +181,12 @@ class _ConditionalStep(Step):
     def stop(self) -> None:
         self._inner.stop()
 
+    def snapshot(self) -> dict | None:
+        return self._inner.snapshot()
+
+    def restore(self, state: dict) -> None:
+        self._inner.restore(state)
+
 
 def ask(
     key: str,
@@ -329,6 +338,15 @@ class FeatureWizardSession(SessionHandlerBase):
     async def on_stop(self, update, context):
         pass
 
+    def snapshot_session(self, key):
+        data = self._snapshot_data(key)
+        if data is None:
+            return None
+        return {"feature": type(self._feature).__name__, "wizard": self._spec.name, **data}
+
+    def resume_session(self, key, state: dict) -> bool:
+        return self._restore_data(key, state)
+
 
 class _AdhocSession(SessionHandlerBase):
     def __init__(
@@ -44,7 +44,16 @@ class Handler:
         """AI prompt for command routing — detailed instructions for the AI model."""
         return None
 
+    def permission_uses(self) -> list[tuple[str, str, str]]:
+        """(permission, subcommand usage, description) for every permission-gated subcommand."""
+        return []
+
+    @property
+    def feature_class(self) -> type:
+        """What the registry knows this handler as (LazyFeature answers with its FeatureRef)."""
+        return self.__class__
+
     @property
     def capability(self) -> str | None:
         from steward.features.registry import capability_of
-        return capability_of(self.__class__)
\ No newline at end of file
+        return capability_of(self.feature_class)
\ No newline at end of file
@@ -6,9 +6,9 @@ from os import environ
 from typing import AsyncIterator
 
 import httpx
-from aiohttp import ClientSession
 from openai import OpenAI
 
+from steward.helpers import http_clients
 from steward.helpers.limiter import Duration, check_limit
 
 logger = logging.getLogger(__name__)
@@ -84,18 +84,17 @@ async def make_yandex_ai_query(
 ):
     _check_yandex_limits(user_id)
 
-    async with ClientSession() as session:
-        async with session.post(
-            _YANDEX_COMPLETION_URL,
-            json=_yandex_payload(messages, system_prompt, model, stream=False),
-            headers=_yandex_headers(),
-        ) as response:
-            data = await response.json()
-            try:
-                return data["result"]["alternatives"][0]["message"]["text"]
-            except Exception as e:
-                logger.error(f"AI request failed: {data}")
-                raise e
+    async with http_clients.session("yandex-ai").post(
+        _YANDEX_COMPLETION_URL,
+        json=_yandex_payload(messages, system_prompt, model, stream=False),
+        headers=_yandex_headers(),
+    ) as response:
+        data = await response.json()
+        try:
+            return data["result"]["alternatives"][0]["message"]["text"]
+        except Exception as e:
+            logger.error(f"AI request failed: {data}")
+            raise e
 
 
 def _yandex_vlm_model_uri() -> str | None:
@@ -130,16 +129,17 @@ async def make_yandex_vlm_describe(
         "max_tokens": max_tokens,
         "temperature": 0.2,
     }
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        r = await client.post(_YANDEX_OPENAI_URL, json=payload, headers=_yandex_headers())
-        if r.status_code >= 400:
-            body = r.text[:1000]
-            logger.error(
-                "VLM HTTP %s for model=%s images=%d max_tokens=%d body=%s",
-                r.status_code, model, len(images_b64), max_tokens, body,
-            )
-            r.raise_for_status()
-        data = r.json()
+    r = await http_clients.client("yandex-ai").post(
+        _YANDEX_OPENAI_URL, json=payload, headers=_yandex_headers(), timeout=120.0
+    )
+    if r.status_code >= 400:
+        body = r.text[:1000]
+        logger.error(
+            "VLM HTTP %s for model=%s images=%d max_tokens=%d body=%s",
+            r.status_code, model, len(images_b64), max_tokens, body,
+        )
+        r.raise_for_status()
+    data = r.json()
     try:
         text = data["choices"][0]["message"]["content"]
     except (KeyError, IndexError, TypeError) as e:
@@ -168,37 +168,36 @@ async def make_yandex_ai_stream(
 
     async def _iter():
         prev_text = ""
-        async with ClientSession() as session:
-            async with session.post(
-                _YANDEX_COMPLETION_URL,
-                json=_yandex_payload(messages, system_prompt, model, stream=True),
-                headers=_yandex_headers(),
-            ) as response:
-                async for raw in response.content:
-                    line = raw.decode("utf-8", errors="ignore").strip()
-                    if not line:
-                        continue
-                    try:
-                        data = _json.loads(line)
-                    except _json.JSONDecodeError:
-                        logger.debug("yandex stream: non-json line: %s", line[:200])
-                        continue
-                    try:
-                        current = data["result"]["alternatives"][0]["message"]["text"]
-                    except (KeyError, IndexError, TypeError):
-                        err = data.get("error") if isinstance(data, dict) else None
-                        if err:
-                            raise RuntimeError(f"yandex stream error: {err}")
-                        continue
-                    if not isinstance(current, str):
-                        continue
-                    if current.startswith(prev_text):
-                        delta = current[len(prev_text):]
-                    else:
-                        delta = current  # fallback: full-replace
-                    prev_text = current
-                    if delta:
-                        yield delta
+        async with http_clients.session("yandex-ai").post(
+            _YANDEX_COMPLETION_URL,
+            json=_yandex_payload(messages, system_prompt, model, stream=True),
+            headers=_yandex_headers(),
+        ) as response:
+            async for raw in response.content:
+                line = raw.decode("utf-8", errors="ignore").strip()
+                if not line:
+                    continue
+                try:
+                    data = _json.loads(line)
+                except _json.JSONDecodeError:
+                    logger.debug("yandex stream: non-json line: %s", line[:200])
+                    continue
+                try:
+                    current = data["result"]["alternatives"][0]["message"]["text"]
+                except (KeyError, IndexError, TypeError):
+                    err = data.get("error") if isinstance(data, dict) else None
+                    if err:
+                        raise RuntimeError(f"yandex stream error: {err}")
+                    continue
+                if not isinstance(current, str):
+                    continue
+                if current.startswith(prev_text):
+                    delta = current[len(prev_text):]
+                else:
+                    delta = current  # fallback: full-replace
+                prev_text = current
+                if delta:
+                    yield delta
 
     return _iter()
 
@@ -2,15 +2,13 @@ from inspect import isawaitable
 from time import time
 from typing import AsyncIterator, Awaitable, Callable
 
-import telethon
-from async_lru import alru_cache
 from telegram import Message
-from telethon import TelegramClient
 
 import asyncio
 
 from steward.bot.context import ChatBotContext
 from steward.data.models.ai_message import AiMessage
+from steward.helpers.message_threads import from_ptb, get_thread_store
 from steward.helpers.tg_streaming import stream_reply
 from steward.helpers.thinking import try_contextual_placeholder
 from steward.helpers.user_language import language_prompt_for
@@ -30,9 +28,12 @@ type AiStreamCallable = Callable[
 
 type QuickCallable = Callable[[str], str | Awaitable[str]]
 type PostProcessCallable = Callable[
-    [Message, str], Awaitable[None] | None
+    [Message, str], Awaitable[str | None] | str | None
 ]
 
+# Сколько ответов ИИ помним для продолжения диалога реплаем
+MAX_AI_MESSAGES = 1000
+
 _ai_handlers: dict[str, AiCallable] = {}
 _ai_stream_handlers: dict[str, AiStreamCallable] = {}
 _ai_quick_handlers: dict[str, QuickCallable] = {}
@@ -75,52 +76,61 @@ def get_ai_quick_handler(name: str) -> QuickCallable | None:
     return _ai_quick_handlers.get(name)
 
 
-@alru_cache(1024)
-async def _get_message_by_id(tg_client: TelegramClient, chat_id, message_id):
-    message = await tg_client.get_messages(chat_id, ids=message_id)
-    assert message is None or isinstance(message, telethon.types.Message)
-    return message
+async def build_reply_context(context: ChatBotContext, text: str) -> list[tuple[str, str]]:
+    chat_id = context.message.chat.id
+    ai_messages = context.repository.db.ai_messages
+    store = get_thread_store()
+    store.record(context.message)
 
+    async def fetch_many(ids: list[int]):
+        return await context.client.get_messages(chat_id, ids=ids)
 
-async def build_reply_context(context: ChatBotContext, text: str) -> list[tuple[str, str]]:
-    result = []
+    def link_of(message_id: int) -> int | None:
+        ai_message = ai_messages.get(f"{chat_id}_{message_id}")
+        return ai_message.message_id if ai_message is not None else None
 
-    message = await _get_message_by_id(
-        context.client,
-        context.message.chat.id,
-        context.message.id,
-    )
+    chain = await store.resolve_chain(chat_id, context.message.id, fetch_many, link_of)
+    context.metrics.inc("ai_context_messages_total", {"source": "local"}, chain.hits)
+    context.metrics.inc("ai_context_messages_total", {"source": "fetched"}, chain.misses)
+    if chain.fetches:
+        context.metrics.inc("ai_context_fetches_total", value=chain.fetches)
 
+    result = []
+    # Последнее сообщение цепочки — сам запрос, его текст передан отдельно
+    for message in chain.messages[:-1]:
+        if message.text:
+            role = "assistant" if message.sender_id == context.bot.id else "user"
+            result.append((role, message.text))
     result.append(("user", text))
+    return result
 
-    while message:
-        reply_to_msg_id = 0
-        if message.reply_to and message.reply_to.reply_to_msg_id:
-            reply_to_msg_id = message.reply_to.reply_to_msg_id
-        elif (
-            f"{context.message.chat.id}_{message.id}"
-            in context.repository.db.ai_messages
-        ):
-            reply_to_msg_id = context.repository.db.ai_messages[
-                f"{context.message.chat.id}_{message.id}"
-            ].message_id
-
-        if reply_to_msg_id == 0:
-            break
-
-        message = await _get_message_by_id(
-            context.client,
-            context.message.chat.id,
-            reply_to_msg_id,
-        )
-
-        if message and message.message:
-            if message.from_id and message.from_id.user_id == context.bot.id:
-                result.append(("assistant", message.message))
-            else:
-                result.append(("user", message.message))
 
-    return [*reversed(result)]
+def remember_ai_reply(
+    repository,
+    chat_id: int,
+    bot_message: Message,
+    reply_to_id: int,
+    handler_name: str,
+    text: str | None = None,
+) -> None:
+    """Register `bot_message` as an AI reply so replies to it continue the dialogue.
+
+    `text` overrides what the message is remembered with (streamed replies
+    are sent as a placeholder and filled in by edits).
+    """
+    ai_messages = repository.db.ai_messages
+    key = f"{chat_id}_{bot_message.message_id}"
+    # Вставки идут по возрастанию времени, поэтому самый старый — первый ключ
+    ai_messages.pop(key, None)
+    ai_messages[key] = AiMessage(time(), reply_to_id, handler_name)
+    while len(ai_messages) > MAX_AI_MESSAGES:
+        del ai_messages[next(iter(ai_messages))]
+
+    message = from_ptb(bot_message)
+    message.reply_to_id = message.reply_to_id or reply_to_id
+    if text is not None:
+        message.text = text
+    get_thread_store().add(chat_id, message)
 
 
 async def execute_ai_request(
@@ -142,16 +152,14 @@ async def execute_ai_request(
 
     bot_message = await context.message.reply_markdown(response)
 
-    context.repository.db.ai_messages[
-        f"{context.message.chat.id}_{bot_message.id}"
-    ] = AiMessage(time(), context.message.id, handler_name)
-
-    if len(context.repository.db.ai_messages) > 1000:
-        oldest = min(
-            context.repository.db.ai_messages,
-            key=lambda k: context.repository.db.ai_messages[k].timestamp,
-        )
-        del context.repository.db.ai_messages[oldest]
+    # Запоминаем то, что Telegram показал, а не markdown-исходник модели
+    remember_ai_reply(
+        context.repository,
+        context.message.chat.id,
+        bot_message,
+        context.message.id,
+        handler_name,
+    )
     await context.repository.save()
 
 
@@ -181,6 +189,8 @@ async def execute_ai_request_streaming(
     `post_process(bot_message, full_text)` is invoked after the stream
     finishes; subclasses can use it to inspect/rewrite the sent message
     (e.g. content-filter substitutions for Pasha's Yandex denial phrase).
+    If it edits the message it returns the new text, so the dialogue
+    remembers what the user actually saw; None means the text is unchanged.
 
     Persists the final message the same way."""
     user_id = context.message.from_user.id
@@ -209,10 +219,9 @@ async def execute_ai_request_streaming(
             try_contextual_placeholder(text, quick_call)
         )
 
+    # Текст ответа нужен и post_process, и хранилищу переписки
     captured: list[str] = []
-    stream_for_reply = ai_stream_call(user_id, messages)
-    if post_process is not None:
-        stream_for_reply = _captured_stream(stream_for_reply, captured)
+    stream_for_reply = _captured_stream(ai_stream_call(user_id, messages), captured)
 
     try:
         # If stream is an awaitable, let stream_reply resolve it AFTER sending
@@ -227,26 +236,27 @@ async def execute_ai_request_streaming(
         if upgrade_task is not None and not upgrade_task.done():
             upgrade_task.cancel()
 
+    sent_text = "".join(captured)
     if post_process is not None:
-        result = post_process(bot_message, "".join(captured))
+        result = post_process(bot_message, sent_text)
         if isawaitable(result):
-            await result
+            result = await result
+        if result is not None:
+            sent_text = result
 
     if quick_call is not None:
         asyncio.create_task(
             _remember_facts_bg(context.repository, user_id, text, quick_call)
         )
 
-    context.repository.db.ai_messages[
-        f"{context.message.chat.id}_{bot_message.id}"
-    ] = AiMessage(time(), context.message.id, handler_name)
-
-    if len(context.repository.db.ai_messages) > 1000:
-        oldest = min(
-            context.repository.db.ai_messages,
-            key=lambda k: context.repository.db.ai_messages[k].timestamp,
-        )
-        del context.repository.db.ai_messages[oldest]
+    remember_ai_reply(
+        context.repository,
+        context.message.chat.id,
+        bot_message,
+        context.message.id,
+        handler_name,
+        sent_text,
+    )
     await context.repository.save()
 
 
@@ -19,10 +19,10 @@ from io import BytesIO
 from pathlib import Path
 from typing import Optional
 
-from aiohttp_socks import ProxyConnector
 from PIL import Image, ImageDraw, ImageFont
 from telegram.ext import ExtBot
 
+from steward.helpers import http_clients
 from steward.helpers.media import fetch_tg_file_bytes
 
 logger = logging.getLogger(__name__)
@@ -120,16 +120,13 @@ async def save_photo_from_url(user_id: int, url: str) -> Optional[Path]:
     if not url:
         return None
     try:
-        from aiohttp import ClientSession, ClientTimeout
-        proxy_url = os.environ.get("DOWNLOAD_PROXY")
-        connector = ProxyConnector.from_url(proxy_url) if proxy_url else None
-        timeout = ClientTimeout(total=10)
-        async with ClientSession(connector=connector, timeout=timeout) as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    logger.info("avatar: photo_url for %s returned HTTP %s", user_id, resp.status)
-                    return None
-                data = await resp.read()
+        from aiohttp import ClientTimeout
+        session = http_clients.session("avatars", proxy=os.environ.get("DOWNLOAD_PROXY"))
+        async with session.get(url, timeout=ClientTimeout(total=10)) as resp:
+            if resp.status != 200:
+                logger.info("avatar: photo_url for %s returned HTTP %s", user_id, resp.status)
+                return None
+            data = await resp.read()
     except Exception as e:
         logger.warning("avatar: photo_url for %s failed: %s", user_id, e)
         return None
@@ -0,0 +1,385 @@
+"""Материализованный реестр долгов по счетам.
+
+Сводка /bills и /api/bills пересчитывали compute_bill_balances по всем
+позициям и платежам по нескольку раз на каждый показ. Реестр держит готовый
+результат compute_bill_balances(все счета, все платежи) и обновляет его по
+частям.
+
+Расчёт распадается на независимые группы «пара людей + валюта»: платёж A→B
+трогает только клетки A↔B в счетах своей валюты, переплата — тоже, а
+net_debts сворачивает A→B с B→A. Поэтому при изменении счёта пересчитываются
+только пары, которые в нём были или появились, а при изменении платежа —
+только его пара. Группа считается тем же compute_bill_balances на своём
+подмножестве: счета с этой парой, счета из bill_ids её платежей и, если есть
+возвраты, первый открытый счёт валюты (туда уходит остаток возврата).
+
+Что изменилось, узнаём без правок по всему коду: счета и платежи меняют на
+месте и зовут обычный полный repository.save(). Он сдвигает _full_save_seq,
+а с ним field_version("bills_v2") и field_version("bill_payments_v2"); когда
+версия сдвинулась, реестр сравнивает отпечатки счетов и платежей с прошлыми.
+Поэтому сохранение счетов нельзя сужать до save("bill_persons") и других
+чужих полей: версия счетов не сдвинется, и реестр останется устаревшим. На каждой синхронизации случайная группа сверяется с
+пересчётом с нуля; расхождение — повод перестроить реестр целиком.
+"""
+
+import logging
+import random
+import weakref
+from typing import Any
+
+from steward.data.models.bill_v2 import BillPaymentV2, BillV2
+from steward.data.repository import Repository
+from steward.helpers.bills_money import BillBalances, compute_bill_balances, compute_bill_debts, net_debts
+
+logger = logging.getLogger(__name__)
+
+# Сколько случайных групп сверять с пересчётом с нуля на каждой синхронизации
+VERIFY_SAMPLE = 1
+
+# (человек, человек, валюта); люди упорядочены
+type Group = tuple[str, str, str]
+type Debts = dict[str, dict[str, int]]
+type Credits = dict[tuple[str, str, str], int]
+
+
+def _group(a: str, b: str, currency: str) -> Group:
+    return (a, b, currency) if a <= b else (b, a, currency)
+
+
+def _bill_fingerprint(bill: BillV2) -> tuple:
+    # Всё, от чего зависит compute_bill_debts и место счёта в расчёте. Плоский
+    # список вместо вложенных генераторов: снимается со всех счетов на каждой
+    # синхронизации
+    items: list = [bill.currency, bill.closed, bill.distribution_status, bill.created_at]
+    for tx in bill.transactions:
+        items.append(tx.creditor)
+        items.append(tx.unit_price_minor)
+        for asg in tx.assignments:
+            items.append(asg.unit_count)
+            items.append(asg.denominator)
+            items.append(tuple(asg.debtors))
+        items.append(None)
+    return tuple(items)
+
+
+def _payment_fingerprint(payment: BillPaymentV2) -> tuple:
+    return (
+        payment.debtor,
+        payment.creditor,
+        payment.amount_minor,
+        payment.status,
+        getattr(payment, "currency", "BYN"),
+        tuple(payment.bill_ids),
+        getattr(payment, "is_refund", False),
+    )
+
+
+def _payment_group(payment: BillPaymentV2) -> Group:
+    return _group(payment.debtor, payment.creditor, getattr(payment, "currency", "BYN"))
+
+
+def _groups_of(debts: Debts, currency: str) -> set[Group]:
+    return {
+        _group(debtor, creditor, currency)
+        for debtor, creds in debts.items()
+        for creditor in creds
+    }
+
+
+def _cells(balances: dict[int, Debts], group: Group) -> dict[int, list[tuple[str, str, int]]]:
+    a, b, _ = group
+    out: dict[int, list[tuple[str, str, int]]] = {}
+    for bill_id, debts in balances.items():
+        cells = [
+            (debtor, creditor, amount)
+            for debtor in (a, b)
+            for creditor, amount in debts.get(debtor, {}).items()
+            if creditor in (a, b) and amount > 0
+        ]
+        if cells:
+            out[bill_id] = cells
+    return out
+
+
+class BillLedger:
+    """compute_bill_balances(all bills, all payments), kept up to date per (pair, currency)."""
+
+    def __init__(self):
+        self._bills: dict[int, BillV2] = {}
+        self._bill_fp: dict[int, tuple] = {}
+        # net_debts(compute_bill_debts(...)) каждого счёта — фаза 1 расчёта
+        self._bill_debts: dict[int, Debts] = {}
+        self._pair_bills: dict[Group, set[int]] = {}
+
+        # Платежи ключуем по объекту: id у них строковые и не обязаны быть уникальны
+        self._payments: dict[int, BillPaymentV2] = {}
+        self._payment_fp: dict[int, tuple] = {}
+        self._payment_order: dict[int, int] = {}
+        self._group_payments: dict[Group, set[int]] = {}
+
+        self._first_open: dict[str, int] = {}
+        # Какие счета брала в расчёт группа — чтобы знать, кого пересчитать
+        self._group_inputs: dict[Group, set[int]] = {}
+        self._bill_groups: dict[int, set[Group]] = {}
+        self._group_cells: dict[Group, dict[int, list[tuple[str, str, int]]]] = {}
+        self._group_credits: dict[Group, Credits] = {}
+
+        # Материализованный результат
+        self._balances: dict[int, Debts] = {}
+        self._credits: Credits = {}
+
+        self.version: Any = None
+        self.rebuilds = 0
+        self.recomputed_groups = 0
+
+    def balances(self, bills: list[BillV2] | None = None) -> BillBalances:
+        """Same shape as compute_bill_balances(); per-bill debts restricted to `bills` (all by default)."""
+        ids = self._bills.keys() if bills is None else [bill.id for bill in bills]
+        return (
+            {
+                bill_id: {debtor: dict(creds) for debtor, creds in self._balances.get(bill_id, {}).items()}
+                for bill_id in ids
+            },
+            dict(self._credits),
+        )
+
+    def rebuild(self, bills: list[BillV2], payments: list[BillPaymentV2]) -> None:
+        rebuilds = self.rebuilds
+        self.__init__()
+        self.rebuilds = rebuilds + 1
+        self.sync(bills, payments)
+
+    def sync(
+        self,
+        bills: list[BillV2],
+        payments: list[BillPaymentV2],
+        *,
+        bills_changed: bool = True,
+        payments_changed: bool = True,
+    ) -> int:
+        """Apply whatever changed since the last sync; returns the number of recomputed groups.
+
+        `bills_changed=False` skips diffing the bills (the costly part) when only
+        payments were saved.
+        """
+        dirty: set[Group] = set()
+        if bills_changed:
+            self._sync_bills(bills, dirty)
+            self._sync_first_open(dirty)
+        if payments_changed:
+            self._sync_payments(payments, dirty)
+        # Сначала снимаем старые клетки всех групп, потом пишем новые: счёт,
+        # сменивший валюту, держит ту же клетку в группах двух валют
+        for group in dirty:
+            self._retract(group)
+        for group in dirty:
+            self._apply(group)
+        self.recomputed_groups += len(dirty)
+        return len(dirty)
+
+    def _sync_bills(self, bills: list[BillV2], dirty: set[Group]) -> None:
+        seen: set[int] = set()
+        for bill in bills:
+            seen.add(bill.id)
+            fp = _bill_fingerprint(bill)
+            if self._bill_fp.get(bill.id) == fp and self._bills.get(bill.id) is bill:
+                continue
+            self._drop_bill(bill.id, dirty)
+            # Новый счёт мог быть уже упомянут в bill_ids платежей
+            dirty.update(self._bill_groups.get(bill.id, ()))
+            debts = net_debts(compute_bill_debts(bill.transactions, bill.currency))
+            self._bills[bill.id] = bill
+            self._bill_fp[bill.id] = fp
+            self._bill_debts[bill.id] = {debtor: dict(creds) for debtor, creds in debts.items()}
+            for group in _groups_of(debts, bill.currency):
+                self._pair_bills.setdefault(group, set()).add(bill.id)
+                dirty.add(group)
+        for bill_id in [bill_id for bill_id in self._bills if bill_id not in seen]:
+            self._drop_bill(bill_id, dirty)
+
+    def _drop_bill(self, bill_id: int, dirty: set[Group]) -> None:
+        bill = self._bills.pop(bill_id, None)
+        if bill is None:
+            return
+        # Валюту берём из отпечатка: на объекте её могли уже поменять
+        currency = self._bill_fp.pop(bill_id)[0]
+        debts = self._bill_debts.pop(bill_id, {})
+        for group in _groups_of(debts, currency):
+            bills = self._pair_bills.get(group)
+            if bills is not None:
+                bills.discard(bill_id)
+                if not bills:
+                    del self._pair_bills[group]
+        dirty.update(self._bill_groups.get(bill_id, ()))
+
+    def _sync_first_open(self, dirty: set[Group]) -> None:
+        first: dict[str, tuple] = {}
+        for bill in self._bills.values():
+            if bill.closed:
+                continue
+            key = (bill.created_at, bill.id)
+            current = first.get(bill.currency)
+            if current is None or key < current:
+                first[bill.currency] = key
+        first_open = {currency: key[1] for currency, key in first.items()}
+        if first_open == self._first_open:
+            return
+        changed = {
+            currency
+            for currency in first_open.keys() | self._first_open.keys()
+            if first_open.get(currency) != self._first_open.get(currency)
+        }
+        self._first_open = first_open
+        # Остаток возврата без счёта уходит в первый открытый счёт валюты
+        for group, keys in self._group_payments.items():
+            if group[2] in changed and any(
+                getattr(self._payments[key], "is_refund", False) for key in keys
+            ):
+                dirty.add(group)
+
+    def _sync_payments(self, payments: list[BillPaymentV2], dirty: set[Group]) -> None:
+        order: dict[int, int] = {}
+        for index, payment in enumerate(payments):
+            key = id(payment)
+            order[key] = index
+            fp = _payment_fingerprint(payment)
+            old_fp = self._payment_fp.get(key)
+            if old_fp == fp and self._payments.get(key) is payment:
+                continue
+            if key in self._payments:
+                self._drop_payment(key, dirty)
+            group = _payment_group(payment)
+            self._payments[key] = payment
+            self._payment_fp[key] = fp
+            self._group_payments.setdefault(group, set()).add(key)
+            dirty.add(group)
+        for key in [key for key in self._payments if key not in order]:
+            self._drop_payment(key, dirty)
+        self._payment_order = order
+
+    def _drop_payment(self, key: int, dirty: set[Group]) -> None:
+        self._payments.pop(key)
+        fp = self._payment_fp.pop(key)
+        group = _group(fp[0], fp[1], fp[4])
+        keys = self._group_payments.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._group_payments[group]
+        dirty.add(group)
+
+    def _group_input(self, group: Group) -> tuple[list[BillV2], list[BillPaymentV2], set[int]]:
+        """Bills and payments the group depends on, plus every bill id whose change affects it."""
+        payments = sorted(
+            (self._payments[key] for key in self._group_payments.get(group, ())),
+            key=lambda payment: self._payment_order[id(payment)],
+        )
+        depends = set(self._pair_bills.get(group, ()))
+        has_refund = False
+        for payment in payments:
+            # Упомянутые, но ещё не существующие счета тоже: их появление меняет расчёт
+            depends.update(payment.bill_ids)
+            has_refund = has_refund or getattr(payment, "is_refund", False)
+        if has_refund and group[2] in self._first_open:
+            depends.add(self._first_open[group[2]])
+        bills = [self._bills[bill_id] for bill_id in depends if bill_id in self._bills]
+        return bills, payments, depends
+
+    def _compute_group(self, group: Group, bills: list[BillV2], payments: list[BillPaymentV2], *, fresh: bool = False):
+        balances, credits = compute_bill_balances(
+            bills,
+            payments,
+            bill_debts=None if fresh else self._bill_debts,
+        )
+        # Счета чужой валюты (из bill_ids платежа) в расчёте есть, но их клетки
+        # принадлежат группе своей валюты
+        foreign = {bill.id for bill in bills if bill.currency != group[2]}
+        a, b, _ = group
+        return _cells({k: v for k, v in balances.items() if k not in foreign}, group), {
+            key: amount for key, amount in credits.items() if key[0] in (a, b) and key[1] in (a, b)
+        }
+
+    def _retract(self, group: Group) -> None:
+        for bill_id, cells in self._group_cells.pop(group, {}).items():
+            debts = self._balances.get(bill_id, {})
+            for debtor, creditor, _ in cells:
+                creds = debts.get(debtor)
+                if creds is not None:
+                    creds.pop(creditor, None)
+                    if not creds:
+                        del debts[debtor]
+            if not debts:
+                self._balances.pop(bill_id, None)
+        for key in self._group_credits.pop(group, {}):
+            self._credits.pop(key, None)
+        for bill_id in self._group_inputs.pop(group, ()):
+            groups = self._bill_groups.get(bill_id)
+            if groups is not None:
+                groups.discard(group)
+                if not groups:
+                    del self._bill_groups[bill_id]
+
+    def _apply(self, group: Group) -> None:
+        bills, payments, depends = self._group_input(group)
+        if not bills and not payments:
+            return
+        cells, credits = self._compute_group(group, bills, payments)
+        self._group_inputs[group] = depends
+        for bill_id in depends:
+            self._bill_groups.setdefault(bill_id, set()).add(group)
+        if cells:
+            self._group_cells[group] = cells
+            for bill_id, bill_cells in cells.items():
+                debts = self._balances.setdefault(bill_id, {})
+                for debtor, creditor, amount in bill_cells:
+                    debts.setdefault(debtor, {})[creditor] = amount
+        if credits:
+            self._group_credits[group] = credits
+            self._credits.update(credits)
+
+    def verify(self, sample: int = VERIFY_SAMPLE) -> bool:
+        """Recompute a few random groups from the live objects; False on any mismatch."""
+        groups = list(self._group_inputs)
+        if not groups:
+            return True
+        for group in random.sample(groups, min(sample, len(groups))):
+            bills, payments, _ = self._group_input(group)
+            cells, credits = self._compute_group(group, bills, payments, fresh=True)
+            if cells != self._group_cells.get(group, {}) or credits != self._group_credits.get(group, {}):
+                logger.warning("bills ledger: group %s is out of sync", group)
+                return False
+        return True
+
+
+_ledgers: "weakref.WeakKeyDictionary[Repository, BillLedger]" = weakref.WeakKeyDictionary()
+
+
+def _db_version(repository: Repository) -> tuple[tuple, tuple]:
+    bills, payments = repository.db.bills_v2, repository.db.bill_payments_v2
+    return (
+        (repository.field_version("bills_v2"), id(bills), len(bills)),
+        (repository.field_version("bill_payments_v2"), id(payments), len(payments)),
+    )
+
+
+def ledger_for(repository: Repository) -> BillLedger:
+    """The repository's ledger, synced with the current bills and payments."""
+    ledger = _ledgers.get(repository)
+    bills, payments = repository.db.bills_v2, repository.db.bill_payments_v2
+    if ledger is None:
+        ledger = _ledgers[repository] = BillLedger()
+        ledger.rebuild(bills, payments)
+    else:
+        bills_version, payments_version = _db_version(repository)
+        if (bills_version, payments_version) == ledger.version:
+            return ledger
+        ledger.sync(
+            bills,
+            payments,
+            bills_changed=bills_version != ledger.version[0],
+            payments_changed=payments_version != ledger.version[1],
+        )
+        if not ledger.verify():
+            ledger.rebuild(bills, payments)
+    ledger.version = _db_version(repository)
+    return ledger
@@ -16,6 +16,10 @@ CURRENCY_SYMBOLS: dict[str, str] = {
 
 CURRENCY_PREFIX: set[str] = {"USD", "EUR"}
 
+# Результат compute_bill_balances: {bill_id: {debtor: {creditor: minor}}}
+# и переплаты {(debtor, creditor, currency): minor}
+type BillBalances = tuple[dict[int, dict[str, dict[str, int]]], dict[tuple[str, str, str], int]]
+
 
 def minor_from_float(value: float) -> int:
     """Convert a float amount (e.g. 3.0) to minor units (300)."""
@@ -171,13 +175,24 @@ def apply_payments(
 def compute_bill_balances(
     bills,
     payments,
-) -> tuple[dict[int, dict[str, dict[str, int]]], dict[tuple[str, str, str], int]]:
+    *,
+    bill_debts: dict[int, dict[str, dict[str, int]]] | None = None,
+) -> BillBalances:
+    """Per-bill outstanding debts after payments, plus unallocated overpayments.
+
+    `bill_debts` are precomputed net_debts(compute_bill_debts(...)) per bill id
+    (see bills_ledger); they are copied, not modified.
+    """
     from steward.data.models.bill_v2 import PaymentStatus
 
     ordered_bills = sorted(bills, key=lambda bill: (bill.created_at, bill.id))
     bills_by_id = {bill.id: bill for bill in ordered_bills}
     balances: dict[int, dict[str, dict[str, int]]] = {
-        bill.id: net_debts(compute_bill_debts(bill.transactions, bill.currency))
+        bill.id: (
+            {debtor: dict(creds) for debtor, creds in bill_debts[bill.id].items()}
+            if bill_debts is not None and bill.id in bill_debts
+            else net_debts(compute_bill_debts(bill.transactions, bill.currency))
+        )
         for bill in ordered_bills
     }
     credits: dict[tuple[str, str, str], int] = {}
@@ -2,7 +2,7 @@ import logging
 import time
 from dataclasses import dataclass
 
-from aiohttp import ClientSession
+from steward.helpers import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -44,16 +44,16 @@ class CakePriceFetcher:
             return self._cached
 
         try:
-            async with ClientSession() as session:
-                async with session.get(
-                    COINGECKO_URL,
-                    params={
-                        "ids": "pancakeswap-token",
-                        "vs_currencies": "usd",
-                        "include_24hr_change": "true",
-                    },
-                ) as resp:
-                    data = await resp.json()
+            session = http_clients.session("coingecko")
+            async with session.get(
+                COINGECKO_URL,
+                params={
+                    "ids": "pancakeswap-token",
+                    "vs_currencies": "usd",
+                    "include_24hr_change": "true",
+                },
+            ) as resp:
+                data = await resp.json()
 
             cake = data.get("pancakeswap-token", {})
             price = cake.get("usd")
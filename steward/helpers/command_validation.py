@@ -98,6 +98,30 @@ def validate_command_msg(
     return ValidationResult(False)  # не команда
 
 
+def command_name(update: Update) -> str | None:
+    """Lower-cased name of the /command addressed to this bot, None otherwise.
+
+    Same rules as validate_command_msg, but parses the message once instead
+    of once per candidate name.
+    """
+    if not isinstance(update, Update) or not update.effective_message:
+        return None
+    message = update.effective_message
+    if not (
+        message.entities
+        and message.entities[0].type == MessageEntity.BOT_COMMAND
+        and message.entities[0].offset == 0
+        and message.text
+        and message.get_bot()
+    ):
+        return None
+    command_parts = message.text[1 : message.entities[0].length].split("@")
+    bot_username = message.get_bot().username
+    if len(command_parts) > 1 and command_parts[1].lower() != bot_username.lower():
+        return None  # команда другому боту
+    return command_parts[0].lower()
+
+
 def validate_admin(update: Update, repository: Repository):
     from_user = get_from_user(update)
     return from_user and repository.is_admin(from_user.id)
@@ -1,18 +1,77 @@
+import json
+import logging
+import os
 import re
-from functools import cached_property, lru_cache
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Hashable, Iterable
 
 import crosstem
 import pymorphy3
 
+logger = logging.getLogger(__name__)
 
 _TOKEN_RE = re.compile(r"[A-Za-zА-Яа-яЁё]+", re.UNICODE)
+_CACHE_FORMAT = 1
 
 
 def _norm(word: str) -> str:
     return word.lower().replace("ё", "е")
 
 
+class FormsCache:
+    """Bounded LRU of token → its word forms."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, frozenset[str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, token: str) -> frozenset[str] | None:
+        forms = self._data.get(token)
+        if forms is not None:
+            self._data.move_to_end(token)
+        return forms
+
+    def put(self, token: str, forms: frozenset[str]):
+        self._data[token] = forms
+        self._data.move_to_end(token)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self) -> list[tuple[str, frozenset[str]]]:
+        return list(self._data.items())
+
+
+@dataclass(frozen=True)
+class CurseIndex:
+    """All forms of the bad and ignored words, expanded once per word list."""
+
+    bad_forms: frozenset[str]
+    ignore_forms: frozenset[str]
+
+
 class CurseDetector:
+    def __init__(self, cache_size: int | None = None):
+        if cache_size is None:
+            cache_size = int(os.environ.get("CURSE_FORMS_CACHE_SIZE", "32768"))
+        # Игнор-слова раскрываются без стемминга, поэтому два кэша форм
+        self._all_forms_cache = FormsCache(cache_size)
+        self._pymorphy_cache = FormsCache(cache_size)
+        # token → мат ли это по текущему индексу; LRU, сбрасывается с индексом
+        self._verdicts: OrderedDict[str, bool] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._index: CurseIndex | None = None
+        self._index_key: tuple[frozenset[str], frozenset[str]] | None = None
+        self._index_version: Hashable | None = None
+        # count_many зовут и из пула потоков, и с loop'а
+        self._lock = threading.RLock()
+
     @cached_property
     def _morph(self):
         return pymorphy3.MorphAnalyzer()
@@ -21,57 +80,149 @@ class CurseDetector:
     def _stemmer(self):
         return crosstem.DerivationalStemmer("rus")
 
+    def index(
+        self,
+        bad_words: Iterable[str],
+        ignore_words: Iterable[str] | None = None,
+        version: Hashable | None = None,
+    ) -> CurseIndex:
+        """Expanded forms for these word lists; rebuilt only when the lists change.
+
+        `version` is a cheap token that changes together with the lists
+        (see Repository.field_version): while it matches, the lists are not
+        even re-read.
+        """
+        # Версия и индекс меняются вместе под замком: иначе loop увидит новую
+        # версию раньше, чем поток соберёт под неё индекс, и возьмёт старый
+        with self._lock:
+            if version is not None and version == self._index_version and self._index is not None:
+                return self._index
+            key = (frozenset(_norm(w) for w in bad_words), frozenset(_norm(w) for w in (ignore_words or ())))
+            if self._index is None or key != self._index_key:
+                bad_forms: set[str] = set()
+                for word in key[0]:
+                    bad_forms.update(self._all_forms(word))
+                ignore_forms: set[str] = set()
+                for word in key[1]:
+                    ignore_forms.update(self._pymorphy_forms(word))
+                self._index = CurseIndex(frozenset(bad_forms), frozenset(ignore_forms))
+                self._index_key = key
+                self._verdicts = OrderedDict()
+            self._index_version = version
+            return self._index
+
     def count(
         self,
         text: str,
         bad_words: set[str],
         ignore_words: set[str] | None = None,
+        version: Hashable | None = None,
     ) -> int:
         if not text or text.startswith("/") or not bad_words:
             return 0
+        return self.count_many([text], bad_words, ignore_words, version)[0]
 
-        bad_forms = self._bad_forms(frozenset(_norm(w) for w in bad_words))
-        ignore_forms = self._ignore_forms(frozenset(_norm(w) for w in (ignore_words or set())))
-
-        count = 0
-        for token in self._tokens(text):
-            token_forms = self._all_forms(token)
-            if token_forms & ignore_forms:
-                continue
-            if token_forms & bad_forms:
-                count += 1
-        return count
+    def count_many(
+        self,
+        texts: list[str],
+        bad_words: set[str],
+        ignore_words: set[str] | None = None,
+        version: Hashable | None = None,
+    ) -> list[int]:
+        """Token counts for several chunks of text; each distinct token is resolved once.
+
+        Unlike count(), a chunk starting with "/" is counted too: the chunks
+        are pieces of one message, and only a whole command message is skipped.
+        """
+        if not bad_words:
+            return [0] * len(texts)
+        index = self.index(bad_words, ignore_words, version)
+        tokenized = [self._tokens(text) if text else [] for text in texts]
+        counts = []
+        verdicts = self._verdicts
+        for tokens in tokenized:
+            count = 0
+            for token in tokens:
+                # Лочим по токену, а не на весь батч: count() с loop'а не
+                # должен ждать, пока поток разбирает длинную расшифровку
+                with self._lock:
+                    verdict = verdicts.get(token)
+                    if verdict is None:
+                        self.misses += 1
+                        forms = self._all_forms(token)
+                        verdict = not (forms & index.ignore_forms) and bool(forms & index.bad_forms)
+                        verdicts[token] = verdict
+                        if len(verdicts) > self._all_forms_cache.maxsize:
+                            verdicts.popitem(last=False)
+                    else:
+                        self.hits += 1
+                        verdicts.move_to_end(token)
+                count += verdict
+            counts.append(count)
+        return counts
+
+    def cache_stats(self) -> tuple[int, int, int]:
+        """(hits, misses, size) of the per-token verdict cache."""
+        return self.hits, self.misses, len(self._verdicts)
 
     def _tokens(self, text: str) -> list[str]:
         return [_norm(token) for token in _TOKEN_RE.findall(text)]
 
-    @lru_cache(maxsize=4096)
     def _pymorphy_forms(self, word: str) -> frozenset[str]:
-        forms = {word}
-        for parsed in self._morph.parse(word):
-            forms.add(_norm(parsed.normal_form))
-        return frozenset(forms)
+        forms = self._pymorphy_cache.get(word)
+        if forms is None:
+            parsed_forms = {word}
+            for parsed in self._morph.parse(word):
+                parsed_forms.add(_norm(parsed.normal_form))
+            forms = frozenset(parsed_forms)
+            self._pymorphy_cache.put(word, forms)
+        return forms
 
-    @lru_cache(maxsize=4096)
     def _all_forms(self, word: str) -> frozenset[str]:
-        forms = set(self._pymorphy_forms(word))
-        for form in list(forms):
-            try:
-                forms.add(_norm(self._stemmer.stem(form)))
-            except Exception:
-                pass
-        return frozenset(forms)
-
-    @lru_cache(maxsize=128)
-    def _bad_forms(self, words: frozenset[str]) -> frozenset[str]:
-        forms: set[str] = set()
-        for word in words:
-            forms.update(self._all_forms(word))
-        return frozenset(forms)
-
-    @lru_cache(maxsize=128)
-    def _ignore_forms(self, words: frozenset[str]) -> frozenset[str]:
-        forms: set[str] = set()
-        for word in words:
-            forms.update(self._pymorphy_forms(word))
-        return frozenset(forms)
+        forms = self._all_forms_cache.get(word)
+        if forms is None:
+            expanded = set(self._pymorphy_forms(word))
+            for form in list(expanded):
+                try:
+                    expanded.add(_norm(self._stemmer.stem(form)))
+                except Exception:
+                    pass
+            forms = frozenset(expanded)
+            self._all_forms_cache.put(word, forms)
+        return forms
+
+    def save_cache(self, path: str):
+        with self._lock:
+            data = {
+                "format": _CACHE_FORMAT,
+                "pymorphy3": pymorphy3.__version__,
+                "all_forms": {token: sorted(forms) for token, forms in self._all_forms_cache.items()},
+                "pymorphy_forms": {token: sorted(forms) for token, forms in self._pymorphy_cache.items()},
+            }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load_cache(self, path: str) -> int:
+        """Warm the caches from save_cache() output; returns loaded token count."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning("Curse forms cache %s is unreadable: %s", path, e)
+            return 0
+        # Другая версия словарей — формы могли поменяться, греемся заново
+        if data.get("format") != _CACHE_FORMAT or data.get("pymorphy3") != pymorphy3.__version__:
+            return 0
+        with self._lock:
+            for token, forms in data.get("pymorphy_forms", {}).items():
+                self._pymorphy_cache.put(token, frozenset(forms))
+            for token, forms in data.get("all_forms", {}).items():
+                self._all_forms_cache.put(token, frozenset(forms))
+        return len(self._all_forms_cache)
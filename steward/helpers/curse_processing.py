@@ -1,16 +1,76 @@
+import asyncio
 import logging
+import os
 from typing import Any
 
 from steward.data.repository import Repository
 from steward.helpers.curse_debt import accrue_curse_debt, today_msk
 from steward.helpers.curse_detector import CurseDetector
-from steward.metrics.base import ContextMetrics, Labels
+from steward.metrics.base import ContextMetrics, Labels, MetricsEngine
 
 
 logger = logging.getLogger(__name__)
 
 CURSE_REACTION = "🤬"
 _DETECTOR = CurseDetector()
+# Транскрипции длинные: режем на куски, чтобы count_many шёл в пуле потоков
+_TRANSCRIPT_CHUNK_LINES = 20
+_metrics: MetricsEngine | None = None
+# Сколько попаданий и промахов кэша уже отдано в счётчики
+_reported = (0, 0)
+
+
+def set_metrics(metrics: MetricsEngine | None):
+    global _metrics
+    _metrics = metrics
+
+
+def _forms_cache_path() -> str | None:
+    return os.environ.get("CURSE_FORMS_CACHE_PATH") or None
+
+
+def load_curse_forms_cache() -> int:
+    """Warm the detector from CURSE_FORMS_CACHE_PATH, if configured."""
+    path = _forms_cache_path()
+    if path is None:
+        return 0
+    return _DETECTOR.load_cache(path)
+
+
+def save_curse_forms_cache():
+    path = _forms_cache_path()
+    if path is None:
+        return
+    try:
+        _DETECTOR.save_cache(path)
+    except OSError:
+        logger.warning("failed to save curse forms cache", exc_info=True)
+
+
+def _index_version(repo: Repository) -> tuple:
+    words, ignore = repo.db.curse_words, repo.db.curse_ignore_words
+    return (
+        repo.field_version("curse_words"),
+        repo.field_version("curse_ignore_words"),
+        id(words), len(words), id(ignore), len(ignore),
+    )
+
+
+def _report_cache():
+    # Кэш общий на процесс — метрики без меток чата и юзера. Попадания и
+    # промахи — счётчики (hit rate = rate(hits) / rate(hits + misses)),
+    # прибавляем прирост с прошлого отчёта
+    global _reported
+    if _metrics is None:
+        return
+    hits, misses, size = _DETECTOR.cache_stats()
+    reported_hits, reported_misses = _reported
+    if hits > reported_hits:
+        _metrics.inc("bot_curse_token_cache_hits_total", {}, hits - reported_hits)
+    if misses > reported_misses:
+        _metrics.inc("bot_curse_token_cache_misses_total", {}, misses - reported_misses)
+    _reported = (hits, misses)
+    _metrics.set("bot_curse_token_cache_size", {}, size)
 
 
 def _metric_user_name(user: Any, user_id: int) -> str:
@@ -48,15 +108,31 @@ async def process_curse_text(
     if not text:
         return 0
 
-    words = set(repo.db.curse_words)
-    if not words:
+    if not repo.db.curse_words:
         return 0
 
     count = _DETECTOR.count(
         text,
-        words,
-        set(repo.db.curse_ignore_words),
+        repo.db.curse_words,
+        repo.db.curse_ignore_words,
+        _index_version(repo),
+    )
+    _report_cache()
+    return await _apply_curse_count(
+        repo, metrics, count,
+        user_id=user_id, source_message=source_message, metric_labels=metric_labels,
     )
+
+
+async def _apply_curse_count(
+    repo: Repository,
+    metrics: ContextMetrics,
+    count: int,
+    *,
+    user_id: int,
+    source_message: Any | None,
+    metric_labels: Labels | None,
+) -> int:
     if count <= 0:
         return 0
 
@@ -84,7 +160,8 @@ async def process_transcribed_curse_text(
     text: str | None,
     capability_cls: type,
 ) -> int:
-    if not text or source_message is None:
+    # Как и count(): сообщение-команда не считается, куски расшифровки — все
+    if not text or text.startswith("/") or source_message is None:
         return 0
     if getattr(source_message, "forward_origin", None) is not None:
         return 0
@@ -100,11 +177,28 @@ async def process_transcribed_curse_text(
     if not repo.is_capability_enabled(chat_id, capability_cls):
         return 0
 
-    return await process_curse_text(
+    if not repo.db.curse_words:
+        return 0
+
+    lines = text.splitlines()
+    chunks = [
+        "\n".join(lines[i : i + _TRANSCRIPT_CHUNK_LINES])
+        for i in range(0, len(lines), _TRANSCRIPT_CHUNK_LINES)
+    ]
+    # Холодный кэш на длинной расшифровке — сотни разборов pymorphy, не на loop'е
+    counts = await asyncio.to_thread(
+        _DETECTOR.count_many,
+        chunks,
+        set(repo.db.curse_words),
+        set(repo.db.curse_ignore_words),
+        _index_version(repo),
+    )
+    _report_cache()
+    return await _apply_curse_count(
         repo,
         metrics,
+        sum(counts),
         user_id=user_id,
-        text=text,
         source_message=source_message,
         metric_labels={
             "user_id": str(user_id),
@@ -0,0 +1,236 @@
+"""Общие HTTP-клиенты для исходящих интеграций (Yandex, VictoriaMetrics, t.me, ...).
+
+Раньше каждый запрос открывал свой `aiohttp.ClientSession()` / `httpx.AsyncClient()`
+и платил за DNS, TCP и TLS заново. Теперь на каждый апстрим — один пул
+соединений с keep-alive, лимитом параллельных соединений на хост и таймаутами
+по умолчанию; запросы через прокси живут в отдельном пуле того же апстрима.
+
+    session = http_clients.session("yandex-ai")
+    async with session.post(url, json=payload) as resp: ...
+
+    client = http_clients.client("yandex-stt")
+    r = await client.post(url, json=body)
+
+Сессии и клиенты общие — `async with` на них самих не нужен, закрывает их
+владелец реестра (Bot на остановке). Таймаут отдельного запроса по-прежнему
+передаётся в сам запрос.
+
+Метрики:
+- http_client_in_flight{client} — запросы, ждущие заголовков ответа;
+- http_client_pool_utilization{client} — то же, делённое на лимит пула;
+- http_client_connections_total{client, reused} — сколько запросов открыли
+  новое соединение, а сколько ушли по уже открытому.
+"""
+import asyncio
+import importlib.util
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+import httpx
+from aiohttp_socks import ProxyConnector
+
+from steward.metrics.base import MetricsEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 16
+DEFAULT_KEEPALIVE_SEC = 30.0
+DNS_CACHE_SEC = 300
+# Как у aiohttp по умолчанию; запросы со своим таймаутом передают его сами
+DEFAULT_AIOHTTP_TIMEOUT = aiohttp.ClientTimeout(total=300, sock_connect=30)
+DEFAULT_HTTPX_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# HTTP/2 у httpx — только если установлен h2 (httpx[http2])
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class _Pool:
+    name: str
+    limit: int
+    loop: asyncio.AbstractEventLoop
+    http: Any = None  # aiohttp.ClientSession | httpx.AsyncClient
+    in_flight: int = 0
+    labels: dict[str, str] = field(default_factory=dict)
+
+
+class HttpClients:
+    """Application-scoped registry of pooled aiohttp sessions and httpx clients."""
+
+    def __init__(
+        self,
+        metrics: MetricsEngine | None = None,
+        *,
+        limit: int = DEFAULT_LIMIT,
+        limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+        keepalive: float = DEFAULT_KEEPALIVE_SEC,
+    ):
+        self._metrics = metrics
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive = keepalive
+        # (вид, апстрим, прокси) → пул
+        self._pools: dict[tuple[str, str, str | None], _Pool] = {}
+
+    def session(self, name: str, *, proxy: str | None = None) -> aiohttp.ClientSession:
+        """Pooled aiohttp session for upstream `name` (optionally through `proxy`)."""
+        pool = self._live_pool("aiohttp", name, proxy)
+        if pool.http is None:
+            kwargs = dict(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive,
+                ttl_dns_cache=DNS_CACHE_SEC,
+            )
+            connector = ProxyConnector.from_url(proxy, **kwargs) if proxy else aiohttp.TCPConnector(**kwargs)
+            pool.http = aiohttp.ClientSession(
+                connector=connector,
+                timeout=DEFAULT_AIOHTTP_TIMEOUT,
+                trace_configs=[self._trace_config(pool)],
+            )
+        return pool.http
+
+    def client(self, name: str, *, proxy: str | None = None) -> httpx.AsyncClient:
+        """Pooled httpx client for upstream `name`; HTTP/2 when h2 is installed."""
+        pool = self._live_pool("httpx", name, proxy)
+        if pool.http is None:
+            limits = httpx.Limits(
+                max_connections=self._limit_per_host,
+                max_keepalive_connections=self._limit_per_host,
+                keepalive_expiry=self._keepalive,
+            )
+            transport = httpx.AsyncHTTPTransport(http2=_HTTP2, limits=limits, proxy=proxy)
+            pool.http = httpx.AsyncClient(
+                transport=_CountingTransport(transport, self, pool),
+                timeout=DEFAULT_HTTPX_TIMEOUT,
+            )
+        return pool.http
+
+    async def close(self) -> None:
+        pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            if pool.http is None or pool.loop is not asyncio.get_running_loop():
+                continue
+            try:
+                if isinstance(pool.http, aiohttp.ClientSession):
+                    await pool.http.close()
+                else:
+                    await pool.http.aclose()
+            except Exception:
+                logger.exception("Failed to close HTTP pool %s", pool.name)
+
+    def _live_pool(self, kind: str, name: str, proxy: str | None) -> _Pool:
+        loop = asyncio.get_running_loop()
+        key = (kind, name, proxy or None)
+        pool = self._pools.get(key)
+        # Сессия привязана к своему event loop; после закрытия или смены loop
+        # (тесты, asyncio.run в скриптах) создаём пул заново
+        if pool is None or pool.loop is not loop or _closed(pool.http):
+            pool = _Pool(name=name, limit=self._limit_per_host, loop=loop, labels={"client": name})
+            self._pools[key] = pool
+        return pool
+
+    def _trace_config(self, pool: _Pool) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_start(*_):
+            self._track(pool, +1)
+
+        async def on_end(*_):
+            self._track(pool, -1)
+
+        async def on_new_connection(*_):
+            self._count_connection(pool, reused=False)
+
+        async def on_reused_connection(*_):
+            self._count_connection(pool, reused=True)
+
+        trace.on_request_start.append(on_start)
+        trace.on_request_end.append(on_end)
+        trace.on_request_exception.append(on_end)
+        trace.on_connection_create_end.append(on_new_connection)
+        trace.on_connection_reuseconn.append(on_reused_connection)
+        return trace
+
+    def _track(self, pool: _Pool, delta: int) -> None:
+        pool.in_flight = max(0, pool.in_flight + delta)
+        if self._metrics is None:
+            return
+        self._metrics.set("http_client_in_flight", pool.labels, pool.in_flight)
+        self._metrics.set("http_client_pool_utilization", pool.labels, pool.in_flight / pool.limit)
+
+    def _count_connection(self, pool: _Pool, *, reused: bool) -> None:
+        if self._metrics is not None:
+            self._metrics.inc(
+                "http_client_connections_total",
+                {**pool.labels, "reused": "true" if reused else "false"},
+            )
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport to feed the same metrics as the aiohttp trace hooks."""
+
+    def __init__(self, inner: httpx.AsyncHTTPTransport, owner: HttpClients, pool: _Pool):
+        self._inner = inner
+        self._owner = owner
+        self._pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        connected = False
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict):
+            nonlocal connected
+            if event_name.startswith("connection.connect_tcp"):
+                connected = True
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        self._owner._track(self._pool, +1)
+        try:
+            response = await self._inner.handle_async_request(request)
+        finally:
+            self._owner._track(self._pool, -1)
+        self._owner._count_connection(self._pool, reused=not connected)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _closed(http: Any) -> bool:
+    if http is None:
+        return False
+    if isinstance(http, aiohttp.ClientSession):
+        return http.closed
+    return http.is_closed
+
+
+_clients: HttpClients | None = None
+
+
+def install(clients: HttpClients) -> HttpClients:
+    """Make `clients` the registry used by session()/client() below."""
+    global _clients
+    _clients = clients
+    return clients
+
+
+def get_clients() -> HttpClients:
+    # Вне бота (скрипты, тесты) — реестр без метрик, создаётся при первом запросе
+    global _clients
+    if _clients is None:
+        _clients = HttpClients()
+    return _clients
+
+
+def session(name: str, *, proxy: str | None = None) -> aiohttp.ClientSession:
+    return get_clients().session(name, proxy=proxy)
+
+
+def client(name: str, *, proxy: str | None = None) -> httpx.AsyncClient:
+    return get_clients().client(name, proxy=proxy)
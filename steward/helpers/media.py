@@ -7,7 +7,11 @@ or invoke ffmpeg should use these helpers instead of reimplementing them.
 from __future__ import annotations
 
 import asyncio
+import fcntl
 import logging
+import os
+import shutil
+import tempfile
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -17,6 +21,12 @@ logger = logging.getLogger(__name__)
 
 _VIDEO_SUFFIXES = frozenset({".mkv", ".mov", ".mp4", ".webm"})
 
+# Рабочая директория локального Bot API сервера; в контейнер бота
+# примонтирована read-only, файлы в ней бот только читает
+LOCAL_FILES_ROOT = Path("/data")
+# linux/fs.h: FICLONE — reflink (copy-on-write клон) на btrfs/xfs
+_FICLONE = 0x40049409
+
 
 def is_video_file(path: str | Path) -> bool:
     return Path(path).suffix.lower() in _VIDEO_SUFFIXES
@@ -34,39 +44,107 @@ def _strip_file_url(file_path: str) -> str:
     return path.lstrip("/")
 
 
+def _local_path(bot: ExtBot, file_path: str | None) -> Path | None:
+    if not file_path:
+        return None
+    local_path = LOCAL_FILES_ROOT / str(bot.token) / _strip_file_url(file_path)
+    return local_path if local_path.exists() else None
+
+
+def is_local_tg_path(path: str | Path) -> bool:
+    """True for files owned by the local Bot API server (never delete those)."""
+    return Path(path).is_relative_to(LOCAL_FILES_ROOT)
+
+
 async def fetch_tg_file_bytes(bot: ExtBot, file_id: str) -> bytes:
     """Return the raw bytes of a Telegram file.
 
     Tries the local-mode path `/data/{token}/{file_path}` first (mounted when
     running against the local Bot API server), falls back to downloading via
-    `get_file().download_as_bytearray()`.
+    `get_file().download_as_bytearray()`. Meant for small files (photos,
+    avatars); for audio/video use borrow_tg_file() or fetch_tg_file_to().
     """
     tg_file = await bot.get_file(file_id)
-    if tg_file.file_path:
-        rel = _strip_file_url(tg_file.file_path)
-        local_path = Path(f"/data/{bot.token}/{rel}")
-        if local_path.exists():
-            return local_path.read_bytes()
+    local_path = _local_path(bot, tg_file.file_path)
+    if local_path is not None:
+        return await asyncio.to_thread(local_path.read_bytes)
     return bytes(await tg_file.download_as_bytearray())
 
 
+async def borrow_tg_file(bot: ExtBot, file_id: str, *, prefix: str, suffix: str | None = None) -> Path:
+    """Readable path of a Telegram file without copying it when possible.
+
+    In local mode this is the Bot API server's own file, read in place.
+    Otherwise the file is downloaded to a temp file (`prefix`, `suffix` — the
+    original extension by default). Either way hand the path back with
+    release_tg_file() when done.
+    """
+    tg_file = await bot.get_file(file_id)
+    if not tg_file.file_path:
+        raise RuntimeError("File path is not available")
+    local_path = _local_path(bot, tg_file.file_path)
+    if local_path is not None:
+        return local_path
+
+    if suffix is None:
+        suffix = Path(tg_file.file_path).suffix
+    with tempfile.NamedTemporaryFile(prefix=prefix, suffix=suffix, delete=False) as temporary_file:
+        dest = Path(temporary_file.name)
+    try:
+        await tg_file.download_to_drive(custom_path=dest)
+    except Exception:
+        dest.unlink(missing_ok=True)
+        raise
+    return dest
+
+
+def release_tg_file(path: Path | None) -> None:
+    """Remove a borrow_tg_file() temp download; local Bot API files stay."""
+    if path is None or is_local_tg_path(path):
+        return
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning("Unable to remove temporary Telegram file %s: %s", path, e)
+
+
 async def fetch_tg_file_to(bot: ExtBot, file_id: str, dest: Path) -> Path:
-    """Download a Telegram file to `dest` on disk. Returns `dest`.
+    """Put a Telegram file at `dest` on disk. Returns `dest`.
 
-    Uses the local-mode path when available to avoid a round trip.
+    For callers that need their own copy (to modify or outlive the original).
+    Uses the local-mode path when available to avoid a round trip; the copy
+    runs in a thread and never holds the whole file in memory.
     """
     tg_file = await bot.get_file(file_id)
-    if tg_file.file_path:
-        rel = _strip_file_url(tg_file.file_path)
-        local_path = Path(f"/data/{bot.token}/{rel}")
-        if local_path.exists():
-            dest.write_bytes(local_path.read_bytes())
-            return dest
-    data = await tg_file.download_as_bytearray()
-    dest.write_bytes(bytes(data))
+    local_path = _local_path(bot, tg_file.file_path)
+    if local_path is not None:
+        await asyncio.to_thread(link_or_copy, local_path, dest)
+        return dest
+    await tg_file.download_to_drive(custom_path=dest)
     return dest
 
 
+def link_or_copy(src: Path, dest: Path) -> None:
+    """Make `dest` a copy of `src` as cheaply as the filesystems allow.
+
+    Hardlink when both are on one filesystem, then a reflink, then
+    shutil.copyfile (sendfile(2) on Linux, chunked copy elsewhere).
+    """
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+        return
+    except OSError:
+        pass
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return
+        except OSError:
+            pass
+    shutil.copyfile(src, dest)
+
+
 async def ffprobe_duration(path: Path) -> float:
     """Return media duration in seconds via ffprobe. Raises on failure."""
     proc = await asyncio.create_subprocess_exec(
@@ -0,0 +1,180 @@
+"""Локальное хранилище переписки для восстановления цепочек ответов.
+
+build_reply_context раньше шёл по цепочке reply_to через MTProto — один
+get_messages на каждую предыдущую реплику, последовательно. Теперь все
+сообщения, которые бот видит или отправляет, вместе со ссылкой на то, чему они
+отвечают, складываются сюда: на каждый чат — кольцевой буфер последних
+сообщений, сами чаты вытесняются по LRU. Обе операции — O(1).
+
+Цепочка сначала разматывается по буферу. Чего в нём нет (бот перезапускался,
+сообщение старше буфера), добирается одним get_messages(ids=[...]) на все
+пропуски, которые удалось узнать заранее: если для недостающего ответа бота
+известна ссылка из ai_messages, по цепочке идём дальше, не дожидаясь запроса.
+"""
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+DEFAULT_PER_CHAT = 512
+DEFAULT_MAX_CHATS = 2048
+# Защита от бесконечных и слишком длинных цепочек
+MAX_CHAIN = 100
+
+
+@dataclass(slots=True)
+class ThreadMessage:
+    message_id: int
+    reply_to_id: int | None
+    sender_id: int | None
+    text: str
+
+
+@dataclass(slots=True)
+class ChainResult:
+    # От самого раннего сообщения к самому позднему
+    messages: list[ThreadMessage]
+    hits: int = 0
+    misses: int = 0
+    fetches: int = 0
+
+
+type FetchMany = Callable[[list[int]], Awaitable[Iterable[Any]]]
+type LinkOf = Callable[[int], int | None]
+
+
+def from_ptb(message: Any) -> ThreadMessage:
+    """ThreadMessage from a python-telegram-bot Message."""
+    reply = message.reply_to_message
+    user = message.from_user
+    return ThreadMessage(
+        message_id=message.message_id,
+        reply_to_id=reply.message_id if reply is not None else None,
+        sender_id=user.id if user is not None else None,
+        text=message.text or message.caption or "",
+    )
+
+
+def from_telethon(message: Any) -> ThreadMessage:
+    """ThreadMessage from a Telethon Message (what get_messages returns)."""
+    reply = message.reply_to
+    return ThreadMessage(
+        message_id=message.id,
+        reply_to_id=getattr(reply, "reply_to_msg_id", None) or None,
+        sender_id=getattr(message.from_id, "user_id", None),
+        text=message.message or "",
+    )
+
+
+class MessageThreadStore:
+    """Per-chat ring buffers of recent messages with LRU eviction of whole chats."""
+
+    def __init__(self, per_chat: int = DEFAULT_PER_CHAT, max_chats: int = DEFAULT_MAX_CHATS):
+        self._per_chat = per_chat
+        self._max_chats = max_chats
+        self._chats: OrderedDict[int, OrderedDict[int, ThreadMessage]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(len(messages) for messages in self._chats.values())
+
+    def add(self, chat_id: int, message: ThreadMessage) -> None:
+        messages = self._chats.get(chat_id)
+        if messages is None:
+            messages = self._chats[chat_id] = OrderedDict()
+            if len(self._chats) > self._max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        # Правка сообщения заменяет запись, но место в буфере не освежает
+        existed = message.message_id in messages
+        messages[message.message_id] = message
+        if not existed and len(messages) > self._per_chat:
+            messages.popitem(last=False)
+
+    def record(self, message: Any) -> None:
+        """Remember a python-telegram-bot Message the bot received or sent."""
+        if message is None or message.chat is None:
+            return
+        # Вложенный reply_to_message не кладём: у него нет своей ссылки
+        # дальше по цепочке, и он выглядел бы её началом
+        self.add(message.chat.id, from_ptb(message))
+
+    def get(self, chat_id: int, message_id: int) -> ThreadMessage | None:
+        messages = self._chats.get(chat_id)
+        if messages is None:
+            return None
+        self._chats.move_to_end(chat_id)
+        return messages.get(message_id)
+
+    async def resolve_chain(
+        self,
+        chat_id: int,
+        message_id: int,
+        fetch_many: FetchMany,
+        link_of: LinkOf = lambda _id: None,
+    ) -> ChainResult:
+        """Walk replies back from `message_id` (inclusive).
+
+        `link_of(id)` is the fallback parent for messages without a reply link
+        (bot replies registered in ai_messages); `fetch_many(ids)` loads
+        messages missing from the buffer, one call per batch of misses.
+        """
+        result = ChainResult(messages=[])
+        chain: list[int] = []
+        pending: list[int] = []
+        seen: set[int] = set()
+        current = message_id
+        while current and current not in seen and len(chain) < MAX_CHAIN:
+            seen.add(current)
+            chain.append(current)
+            message = self.get(chat_id, current)
+            if message is not None:
+                result.hits += 1
+                current = message.reply_to_id or link_of(current)
+                continue
+            result.misses += 1
+            pending.append(current)
+            parent = link_of(current)
+            if parent:
+                # Родитель известен и без самого сообщения — догрузим пачкой потом
+                current = parent
+                continue
+            await self._fetch(chat_id, pending, fetch_many, result)
+            pending = []
+            message = self.get(chat_id, current)
+            current = message.reply_to_id if message is not None else None
+        if pending:
+            await self._fetch(chat_id, pending, fetch_many, result)
+
+        for id_ in chain:
+            message = self.get(chat_id, id_)
+            # Удалённое сообщение обрывает цепочку, как и раньше
+            if message is None:
+                break
+            result.messages.append(message)
+        result.messages.reverse()
+        self.hits += result.hits
+        self.misses += result.misses
+        return result
+
+    async def _fetch(
+        self, chat_id: int, ids: list[int], fetch_many: FetchMany, result: ChainResult
+    ) -> None:
+        result.fetches += 1
+        for message in await fetch_many(ids) or ():
+            if message is not None:
+                self.add(chat_id, from_telethon(message))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_store = MessageThreadStore()
+
+
+def get_thread_store() -> MessageThreadStore:
+    return _store
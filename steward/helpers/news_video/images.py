@@ -5,7 +5,7 @@ import asyncio
 import logging
 from pathlib import Path
 
-import httpx
+from steward.helpers import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +24,9 @@ def _ddg_search(query: str, max_results: int = 8) -> list[dict]:
 
 async def _download(url: str) -> bytes | None:
     try:
-        async with httpx.AsyncClient(
-            timeout=15, follow_redirects=True, headers=_HEADERS
-        ) as client:
-            resp = await client.get(url)
+        resp = await http_clients.client("news-images").get(
+            url, headers=_HEADERS, timeout=15, follow_redirects=True
+        )
         if resp.status_code == 200 and len(resp.content) > 5_000:
             return resp.content
     except Exception:
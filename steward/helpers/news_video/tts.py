@@ -25,6 +25,8 @@ from pathlib import Path
 
 import httpx
 
+from steward.helpers import http_clients
+
 logger = logging.getLogger(__name__)
 
 _YANDEX_TTS_V3_URL = "https://tts.api.cloud.yandex.net/tts/v3/utteranceSynthesis"
@@ -199,12 +201,12 @@ async def _tts_one(text: str, api_key: str, voice: str, folder_id: str) -> bytes
     if folder_id:
         payload["folderId"] = folder_id
     try:
-        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-            resp = await client.post(
-                _YANDEX_TTS_V3_URL,
-                headers={"Authorization": f"Api-Key {api_key}"},
-                json=payload,
-            )
+        resp = await http_clients.client("yandex-tts").post(
+            _YANDEX_TTS_V3_URL,
+            headers={"Authorization": f"Api-Key {api_key}"},
+            json=payload,
+            timeout=_TIMEOUT,
+        )
     except Exception:
         logger.exception("news TTS transport error")
         return None
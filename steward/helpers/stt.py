@@ -8,6 +8,8 @@ from typing import cast
 
 import httpx
 
+from steward.helpers import http_clients
+
 logger = logging.getLogger(__name__)
 
 _ELEVEN_FAIL_THRESHOLD = 3
@@ -236,54 +238,54 @@ async def _yandex_transcribe(audio_mp3: bytes) -> str | None:
     headers = {"Authorization": f"Api-Key {api_key}"}
 
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            r = await client.post(_YANDEX_STT_SUBMIT_URL, json=body, headers=headers)
-            if r.status_code >= 400:
-                logger.warning("Yandex STT submit HTTP %s: %s", r.status_code, r.text[:300])
-                return None
-            op = r.json() if isinstance(r.json(), dict) else {}
-            op_id = op.get("id")
-            if not op_id:
-                logger.warning("Yandex STT response missing operation id: %s", op)
+        client = http_clients.client("yandex-stt")
+        r = await client.post(_YANDEX_STT_SUBMIT_URL, json=body, headers=headers, timeout=120.0)
+        if r.status_code >= 400:
+            logger.warning("Yandex STT submit HTTP %s: %s", r.status_code, r.text[:300])
+            return None
+        op = r.json() if isinstance(r.json(), dict) else {}
+        op_id = op.get("id")
+        if not op_id:
+            logger.warning("Yandex STT response missing operation id: %s", op)
+            return None
+
+        op_url = _YANDEX_OPERATION_URL.format(op_id)
+        for _ in range(_YANDEX_POLL_MAX_ATTEMPTS):
+            await asyncio.sleep(_YANDEX_POLL_INTERVAL_SEC)
+            op_r = await client.get(op_url, headers=headers, timeout=120.0)
+            if op_r.status_code >= 400:
+                logger.warning(
+                    "Yandex STT poll HTTP %s: %s", op_r.status_code, op_r.text[:300]
+                )
+                continue
+            data = op_r.json()
+            if not data.get("done"):
+                continue
+            err = data.get("error")
+            if err:
+                logger.warning("Yandex STT operation failed: %s", err)
                 return None
 
-            op_url = _YANDEX_OPERATION_URL.format(op_id)
-            for _ in range(_YANDEX_POLL_MAX_ATTEMPTS):
-                await asyncio.sleep(_YANDEX_POLL_INTERVAL_SEC)
-                op_r = await client.get(op_url, headers=headers)
-                if op_r.status_code >= 400:
-                    logger.warning(
-                        "Yandex STT poll HTTP %s: %s", op_r.status_code, op_r.text[:300]
-                    )
-                    continue
-                data = op_r.json()
-                if not data.get("done"):
-                    continue
-                err = data.get("error")
-                if err:
-                    logger.warning("Yandex STT operation failed: %s", err)
-                    return None
-
-                rec_url = _YANDEX_GET_RECOGNITION_URL.format(op_id)
-                rec_r = await client.get(rec_url, headers=headers)
-                if rec_r.status_code >= 400:
-                    logger.warning(
-                        "Yandex STT getRecognition HTTP %s: %s",
-                        rec_r.status_code,
-                        rec_r.text[:300],
-                    )
-                    return None
-                events = _parse_yandex_ndjson(rec_r.text)
-                text = _extract_yandex_text_from_events(events)
-                if not text:
-                    logger.warning(
-                        "Yandex STT no text in %d events; first event keys: %s",
-                        len(events),
-                        list(events[0].keys()) if events else [],
-                    )
-                return text or ""
-            logger.warning("Yandex STT polling timed out for operation %s", op_id)
-            return None
+            rec_url = _YANDEX_GET_RECOGNITION_URL.format(op_id)
+            rec_r = await client.get(rec_url, headers=headers, timeout=120.0)
+            if rec_r.status_code >= 400:
+                logger.warning(
+                    "Yandex STT getRecognition HTTP %s: %s",
+                    rec_r.status_code,
+                    rec_r.text[:300],
+                )
+                return None
+            events = _parse_yandex_ndjson(rec_r.text)
+            text = _extract_yandex_text_from_events(events)
+            if not text:
+                logger.warning(
+                    "Yandex STT no text in %d events; first event keys: %s",
+                    len(events),
+                    list(events[0].keys()) if events else [],
+                )
+            return text or ""
+        logger.warning("Yandex STT polling timed out for operation %s", op_id)
+        return None
     except Exception as e:
         logger.exception("Yandex STT failed: %s", e)
         return None
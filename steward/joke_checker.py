@@ -3,13 +3,13 @@ import logging
 import os
 from datetime import datetime, timezone
 
-from aiohttp import ClientSession, ClientTimeout
-from aiohttp_socks import ProxyConnector
+from aiohttp import ClientTimeout
 from bs4 import BeautifulSoup
 from telegram.ext import ExtBot
 from telethon import TelegramClient
 
 from steward.data.repository import Repository
+from steward.helpers import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -29,20 +29,18 @@ async def get_channel_posts(channel: str) -> list[dict]:
     url = f"https://t.me/s/{channel}"
     posts = []
     try:
-        proxy_url = os.environ.get("DOWNLOAD_PROXY")
-        connector = ProxyConnector.from_url(proxy_url) if proxy_url else None
         headers = {
             "User-Agent": _USER_AGENT,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
         }
         timeout = ClientTimeout(total=30, connect=10)
-        async with ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.warning("Channel %s returned HTTP %s", channel, response.status)
-                    return posts
-                content = await response.text()
+        session = http_clients.session("telegram-web", proxy=os.environ.get("DOWNLOAD_PROXY"))
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status != 200:
+                logger.warning("Channel %s returned HTTP %s", channel, response.status)
+                return posts
+            content = await response.text()
 
         soup = BeautifulSoup(content, "html.parser")
         for msg_div in soup.find_all("div", class_="tgme_widget_message"):
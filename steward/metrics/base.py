@@ -1,8 +1,13 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 Labels = dict[str, str]
 
+# Сколько запросов одного пакета query_many одновременно идут в VictoriaMetrics
+QUERY_CONCURRENCY = 8
+
 
 class MetricQueryError(RuntimeError):
     pass
@@ -36,6 +41,12 @@ class MetricsEngine(ABC):
     @abstractmethod
     async def query(self, promql: str, *, strict: bool = False) -> list[MetricSample]: ...
 
+    async def query_many(
+        self, promqls: Iterable[str], *, strict: bool = False
+    ) -> list[list[MetricSample]]:
+        """Run several instant queries concurrently; results come back in input order."""
+        return await gather_queries(self, promqls, strict=strict)
+
     @abstractmethod
     async def query_range(
         self,
@@ -65,6 +76,11 @@ class ContextMetrics:
     async def query(self, promql: str, *, strict: bool = False) -> list[MetricSample]:
         return await self._engine.query(promql, strict=strict)
 
+    async def query_many(
+        self, promqls: Iterable[str], *, strict: bool = False
+    ) -> list[list[MetricSample]]:
+        return await gather_queries(self, promqls, strict=strict)
+
     async def query_range(
         self,
         promql: str,
@@ -75,3 +91,20 @@ class ContextMetrics:
         strict: bool = False,
     ) -> list[MetricSeries]:
         return await self._engine.query_range(promql, start, end, step, strict=strict)
+
+
+async def gather_queries(
+    queryable, promqls: Iterable[str], *, strict: bool = False
+) -> list[list[MetricSample]]:
+    promqls = list(promqls)
+    # Одинаковые запросы в одном пакете уходят в VictoriaMetrics один раз
+    unique = list(dict.fromkeys(promqls))
+    semaphore = asyncio.Semaphore(QUERY_CONCURRENCY)
+
+    async def run(promql: str) -> list[MetricSample]:
+        async with semaphore:
+            return await queryable.query(promql, strict=strict)
+
+    results = await asyncio.gather(*(run(q) for q in unique))
+    by_query = dict(zip(unique, results))
+    return [list(by_query[q]) for q in promqls]
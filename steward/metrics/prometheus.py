@@ -1,8 +1,11 @@
+import asyncio
 import logging
+import time
 
 import aiohttp
 from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server
 
+from steward.helpers import http_clients
 from steward.metrics.base import (
     Labels,
     MetricQueryError,
@@ -13,13 +16,21 @@ from steward.metrics.base import (
 
 logger = logging.getLogger(__name__)
 
+# VictoriaMetrics и так видит счётчики с задержкой скрейпа — результат
+# мгновенного запроса можно переиспользовать несколько секунд
+QUERY_CACHE_TTL = 10.0
+
 
 class PrometheusMetricsEngine(MetricsEngine):
-    def __init__(self, vm_url: str | None = None):
+    def __init__(self, vm_url: str | None = None, *, query_cache_ttl: float = QUERY_CACHE_TTL):
         self._counters: dict[str, Counter] = {}
         self._gauges: dict[str, Gauge] = {}
         self._histograms: dict[str, Histogram] = {}
         self._vm_url = vm_url
+        self._query_cache_ttl = query_cache_ttl
+        # (promql, номер интервала TTL) → результат / ещё идущий запрос
+        self._query_cache: dict[tuple[str, int], list[MetricSample]] = {}
+        self._queries_in_flight: dict[tuple[str, int], asyncio.Task] = {}
 
     def _get_counter(self, name: str, labels: Labels) -> Counter:
         if name not in self._counters:
@@ -37,52 +48,73 @@ class PrometheusMetricsEngine(MetricsEngine):
         return self._histograms[name]
 
     def inc(self, name: str, labels: Labels, value: float = 1) -> None:
-        self._get_counter(name, labels).labels(**labels).inc(value)
+        _child(self._get_counter(name, labels), labels).inc(value)
 
     def set(self, name: str, labels: Labels, value: float) -> None:
-        self._get_gauge(name, labels).labels(**labels).set(value)
+        _child(self._get_gauge(name, labels), labels).set(value)
 
     def observe(self, name: str, labels: Labels, value: float) -> None:
-        self._get_histogram(name, labels).labels(**labels).observe(value)
+        _child(self._get_histogram(name, labels), labels).observe(value)
 
     def start_server(self, port: int) -> None:
         start_http_server(port, registry=REGISTRY)
 
     async def query(self, promql: str, *, strict: bool = False) -> list[MetricSample]:
+        """Instant query; identical in-flight queries share one request, results are cached briefly."""
         if not self._vm_url:
             if strict:
                 raise MetricQueryError("VictoriaMetrics URL is not configured")
             return []
+        ttl = self._query_cache_ttl
+        key = (promql, int(time.time() // ttl) if ttl > 0 else 0)
+        if (cached := self._query_cache.get(key)) is not None:
+            return list(cached)
+        task = self._queries_in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_query(promql))
+            self._queries_in_flight[key] = task
+            task.add_done_callback(lambda done: self._query_done(key, done))
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self._vm_url}/api/v1/query",
-                    params={"query": promql},
-                ) as resp:
-                    data = await resp.json()
-                    if data.get("status") != "success":
-                        logger.warning("VM query failed: %s", data)
-                        if strict:
-                            raise MetricQueryError(f"VictoriaMetrics query failed: {data}")
-                        return []
-                    results = []
-                    for item in data.get("data", {}).get("result", []):
-                        labels = item.get("metric", {})
-                        value = float(item.get("value", [0, "0"])[1])
-                        results.append(MetricSample(labels=labels, value=value))
-                    return results
-        except aiohttp.ClientConnectorError as e:
-            logger.warning("VM unreachable: %s", e)
+            # shield: отмена одного ожидающего не отменяет запрос для остальных
+            return list(await asyncio.shield(task))
+        except MetricQueryError:
             if strict:
-                raise MetricQueryError("VictoriaMetrics is unreachable") from e
+                raise
             return []
+
+    def _query_done(self, key: tuple[str, int], task: asyncio.Task) -> None:
+        self._queries_in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self._query_cache_ttl <= 0:
+            return
+        # Держим только текущий интервал — старые ключи больше не спросят
+        for stale in [k for k in self._query_cache if k[1] != key[1]]:
+            del self._query_cache[stale]
+        self._query_cache[key] = task.result()
+
+    async def _fetch_query(self, promql: str) -> list[MetricSample]:
+        try:
+            async with http_clients.session("victoriametrics").get(
+                f"{self._vm_url}/api/v1/query",
+                params={"query": promql},
+            ) as resp:
+                data = await resp.json()
+                if data.get("status") != "success":
+                    logger.warning("VM query failed: %s", data)
+                    raise MetricQueryError(f"VictoriaMetrics query failed: {data}")
+                results = []
+                for item in data.get("data", {}).get("result", []):
+                    labels = item.get("metric", {})
+                    value = float(item.get("value", [0, "0"])[1])
+                    results.append(MetricSample(labels=labels, value=value))
+                return results
+        except aiohttp.ClientConnectorError as e:
+            logger.warning("VM unreachable: %s", e)
+            raise MetricQueryError("VictoriaMetrics is unreachable") from e
         except MetricQueryError:
             raise
         except Exception as e:
             logger.exception("VM query error: %s", e)
-            if strict:
-                raise MetricQueryError("VictoriaMetrics query error") from e
-            return []
+            raise MetricQueryError("VictoriaMetrics query error") from e
 
     async def query_range(
         self,
@@ -98,33 +130,32 @@ class PrometheusMetricsEngine(MetricsEngine):
                 raise MetricQueryError("VictoriaMetrics URL is not configured")
             return []
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self._vm_url}/api/v1/query_range",
-                    params={
-                        "query": promql,
-                        "start": f"{start}",
-                        "end": f"{end}",
-                        "step": f"{step}",
-                    },
-                ) as resp:
-                    data = await resp.json()
-                    if data.get("status") != "success":
-                        logger.warning("VM range query failed: %s", data)
-                        if strict:
-                            raise MetricQueryError(f"VictoriaMetrics range query failed: {data}")
-                        return []
-                    results: list[MetricSeries] = []
-                    for item in data.get("data", {}).get("result", []):
-                        labels = item.get("metric", {})
-                        points: list[tuple[float, float]] = []
-                        for ts, val in item.get("values", []) or []:
-                            try:
-                                points.append((float(ts), float(val)))
-                            except (TypeError, ValueError):
-                                continue
-                        results.append(MetricSeries(labels=labels, points=points))
-                    return results
+            async with http_clients.session("victoriametrics").get(
+                f"{self._vm_url}/api/v1/query_range",
+                params={
+                    "query": promql,
+                    "start": f"{start}",
+                    "end": f"{end}",
+                    "step": f"{step}",
+                },
+            ) as resp:
+                data = await resp.json()
+                if data.get("status") != "success":
+                    logger.warning("VM range query failed: %s", data)
+                    if strict:
+                        raise MetricQueryError(f"VictoriaMetrics range query failed: {data}")
+                    return []
+                results: list[MetricSeries] = []
+                for item in data.get("data", {}).get("result", []):
+                    labels = item.get("metric", {})
+                    points: list[tuple[float, float]] = []
+                    for ts, val in item.get("values", []) or []:
+                        try:
+                            points.append((float(ts), float(val)))
+                        except (TypeError, ValueError):
+                            continue
+                    results.append(MetricSeries(labels=labels, points=points))
+                return results
         except aiohttp.ClientConnectorError as e:
             logger.warning("VM unreachable: %s", e)
             if strict:
@@ -137,3 +168,8 @@ class PrometheusMetricsEngine(MetricsEngine):
             if strict:
                 raise MetricQueryError("VictoriaMetrics range query error") from e
             return []
+
+
+def _child(metric, labels: Labels):
+    # У метрики без меток .labels() нет — пишем в неё саму
+    return metric.labels(**labels) if labels else metric
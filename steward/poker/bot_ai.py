@@ -1,5 +1,6 @@
 import random
 from steward.poker.engine import PokerGame, best_hand
+from steward.poker.equity import estimate_equity
 
 BOT_NAMES = [
     "Добрыня", "Иннокентий", "Святослав", "Любава", "Ярослав",
@@ -12,6 +13,9 @@ DIFFICULTY_MEDIUM = "medium"
 DIFFICULTY_HARD = "hard"
 DIFFICULTIES = [DIFFICULTY_EASY, DIFFICULTY_MEDIUM, DIFFICULTY_HARD]
 
+# Сколько секунд hard-бот считает эквити на одно решение (решение на loop'е)
+HARD_EQUITY_BUDGET = 0.015
+
 
 def _hand_strength(hole_cards, community):
     if not hole_cards:
@@ -265,27 +269,6 @@ def _decide_hard(game: PokerGame, player_idx: int) -> tuple[str, int]:
     rank, score = _hand_strength(hole, community)
     pot_odds = to_call / (pot + to_call) if (pot + to_call) > 0 else 0
 
-    has_flush_draw = False
-    has_straight_draw = False
-    if hole and community:
-        all_suits = [c.suit for c in hole + community]
-        from collections import Counter
-        suit_counts = Counter(all_suits)
-        has_flush_draw = any(v == 4 for v in suit_counts.values())
-
-        all_ranks = sorted(set(c.rank for c in hole + community))
-        for i in range(len(all_ranks) - 3):
-            window = all_ranks[i:i + 5] if i + 5 <= len(all_ranks) else all_ranks[i:]
-            if len(window) >= 4 and window[-1] - window[0] <= 4:
-                has_straight_draw = True
-                break
-
-    draw_equity = 0.0
-    if has_flush_draw:
-        draw_equity += 0.18 if len(community) == 3 else 0.09
-    if has_straight_draw:
-        draw_equity += 0.16 if len(community) == 3 else 0.08
-
     if rank >= 6:
         if can_raise:
             if random.random() < 0.3:
@@ -303,7 +286,11 @@ def _decide_hard(game: PokerGame, player_idx: int) -> tuple[str, int]:
             return "raise", raise_to
         return "all_in", 0
 
-    if rank >= 3:
+    # Ниже стрита решаем по эквити против живых соперников: оно учитывает и
+    # силу пары на этой доске, и дро, и число оппонентов
+    equity = estimate_equity(hole, community, max(1, active_count - 1), budget=HARD_EQUITY_BUDGET)
+
+    if equity >= 0.7 or rank >= 3:
         if random.random() < 0.7 and can_raise:
             raise_to = current_bet + max(bb * 2, pot // 3)
             raise_to = min(raise_to, p.chips + p.bet)
@@ -314,56 +301,24 @@ def _decide_hard(game: PokerGame, player_idx: int) -> tuple[str, int]:
             return "check", 0
         return "all_in", 0
 
-    if rank >= 2:
-        if can_check:
-            if random.random() < 0.4 and can_raise:
-                raise_to = current_bet + max(bb * 2, pot // 3)
-                raise_to = min(raise_to, p.chips + p.bet)
-                return "raise", raise_to
-            return "check", 0
-        if pot_odds < 0.3 and can_call:
-            return "call", 0
-        if to_call <= bb * 4:
-            if can_call:
-                return "call", 0
-            return "all_in", 0
-        return "fold", 0
-
-    if rank >= 1:
-        if can_check:
-            if random.random() < 0.25 and can_raise:
-                raise_to = current_bet + bb * 2
-                raise_to = min(raise_to, p.chips + p.bet)
-                return "raise", raise_to
-            return "check", 0
-        if pot_odds < 0.25 and can_call:
-            return "call", 0
-        if to_call <= bb * 2:
-            if can_call:
-                return "call", 0
-            return "all_in", 0
-        return "fold", 0
-
-    if draw_equity > 0.1:
-        if can_check:
-            if random.random() < 0.3 and can_raise:
-                raise_to = current_bet + max(bb * 2, int(pot * 0.5))
-                raise_to = min(raise_to, p.chips + p.bet)
-                return "raise", raise_to
-            return "check", 0
-        if pot_odds < draw_equity + 0.05 and can_call:
-            return "call", 0
-        if to_call <= bb * 3 and can_call:
-            return "call", 0
-        return "fold", 0
-
     if can_check:
-        if random.random() < 0.1 and can_raise:
-            raise_to = current_bet + max(bb * 3, int(pot * 0.7))
+        # Полублеф: чем больше эквити, тем охотнее ставим
+        if random.random() < min(0.4, equity * 0.6) and can_raise:
+            raise_to = current_bet + max(bb * 2, int(pot * 0.5))
             raise_to = min(raise_to, p.chips + p.bet)
             return "raise", raise_to
         return "check", 0
 
+    if equity >= pot_odds + 0.05:
+        if can_call:
+            return "call", 0
+        if equity >= 0.5:
+            return "all_in", 0
+    if to_call <= bb * 2 and equity >= pot_odds:
+        if can_call:
+            return "call", 0
+        return "all_in", 0
+
     if random.random() < 0.06 and can_raise:
         raise_to = current_bet + bb * random.randint(3, 5)
         raise_to = min(raise_to, p.chips + p.bet)
@@ -2,6 +2,8 @@ import random
 from collections import Counter
 from itertools import combinations
 
+from steward.poker.evaluator import best_cards, hand_value, value_to_score
+
 SUITS = ["h", "d", "c", "s"]
 RANK_SYMBOLS = {
     2: "2",
@@ -145,6 +147,15 @@ def hand_label(hole, community):
 
 
 def best_hand(hole, community):
+    all_cards = hole + community
+    if len(all_cards) < 5:
+        return (0,), []
+    score = value_to_score(hand_value(all_cards))
+    return score, best_cards(all_cards, score)
+
+
+def best_hand_bruteforce(hole, community):
+    """best_hand через перебор всех пятёрок — эталон для тестов и бенчмарка."""
     all_cards = hole + community
     if len(all_cards) < 5:
         return (0,), []
@@ -628,10 +639,12 @@ class PokerGame:
         return pots
 
     def state_for(self, user_id):
-        idx = next((i for i, p in enumerate(self.players) if p.user_id == user_id), -1)
+        return {**self.public_state(), **self.private_state(user_id)}
 
+    def public_state(self):
+        """Часть состояния, одинаковая для всех зрителей (карты видны только на шоудауне)."""
         players_data = []
-        for i, p in enumerate(self.players):
+        for p in self.players:
             pd = {
                 "id": p.user_id,
                 "name": p.name,
@@ -648,6 +661,31 @@ class PokerGame:
                 pd["cards"] = [c.to_dict() for c in p.hole_cards]
             players_data.append(pd)
 
+        return {
+            "phase": self.phase,
+            "community": [c.to_dict() for c in self.community],
+            "pot": self.pot,
+            "pots": self._build_side_pots(),
+            "currentBet": self.current_bet,
+            "dealerIndex": self.dealer_idx,
+            "smallBlindIndex": self.sb_idx,
+            "bigBlindIndex": self.bb_idx,
+            "currentIndex": self.current_idx
+            if self.phase not in (PHASE_WAITING, PHASE_SHOWDOWN)
+            else -1,
+            "players": players_data,
+            "minRaise": self.min_raise,
+            "minRaiseTo": self.current_bet + self.min_raise,
+            "handNum": self.hand_num,
+            "results": self.results,
+            "lastAction": self.last_action,
+            "smallBlind": self.small_blind,
+            "bigBlind": self.big_blind,
+        }
+
+    def private_state(self, user_id):
+        """Поля конкретного зрителя: его карты, комбинация и доступные действия."""
+        idx = next((i for i, p in enumerate(self.players) if p.user_id == user_id), -1)
         me = self.players[idx] if idx >= 0 else None
 
         actions = []
@@ -669,9 +707,6 @@ class PokerGame:
                     actions.append("raise")
                 actions.append("all_in")
 
-        call_amount = max(0, self.current_bet - me.bet) if me else 0
-        min_raise_to = self.current_bet + self.min_raise
-
         my_hand = None
         if me and me.hole_cards and self.phase != PHASE_WAITING:
             name, descr = hand_label(me.hole_cards, self.community)
@@ -679,30 +714,11 @@ class PokerGame:
                 my_hand = {"name": name, "description": descr}
 
         return {
-            "phase": self.phase,
-            "community": [c.to_dict() for c in self.community],
-            "pot": self.pot,
-            "pots": self._build_side_pots(),
             "myHand": my_hand,
-            "currentBet": self.current_bet,
-            "dealerIndex": self.dealer_idx,
-            "smallBlindIndex": self.sb_idx,
-            "bigBlindIndex": self.bb_idx,
-            "currentIndex": self.current_idx
-            if self.phase not in (PHASE_WAITING, PHASE_SHOWDOWN)
-            else -1,
             "myIndex": idx,
             "myCards": [c.to_dict() for c in me.hole_cards]
             if me and me.hole_cards
             else [],
-            "players": players_data,
-            "minRaise": self.min_raise,
-            "minRaiseTo": min_raise_to,
-            "callAmount": call_amount,
-            "handNum": self.hand_num,
+            "callAmount": max(0, self.current_bet - me.bet) if me else 0,
             "actions": actions,
-            "results": self.results,
-            "lastAction": self.last_action,
-            "smallBlind": self.small_blind,
-            "bigBlind": self.big_blind,
         }
@@ -0,0 +1,157 @@
+"""Табличный оценщик покерных рук на 5–7 карт.
+
+Рука сводится к битовым маскам рангов (13 бит, двойка — младший бит): по
+всем картам, по картам с count == 2/3/4 и по картам самой длинной масти.
+Стриты и «старшие N рангов» маски берутся из таблиц на 8192 элемента,
+поэтому 7 карт оцениваются без перебора 21 пятёрки.
+
+Значение руки — int, упорядоченный так же, как кортежи engine._eval5:
+категория в битах 20–23, дальше до пяти рангов по 4 бита, старший первым.
+Те же таблицы использует векторная оценка в equity.py.
+"""
+
+SUIT_INDEX = {"h": 0, "d": 1, "c": 2, "s": 3}
+
+# Сколько рангов после категории в кортеже _eval5
+_SCORE_LENGTH = {8: 1, 7: 2, 6: 2, 5: 5, 4: 1, 3: 3, 2: 3, 1: 4, 0: 5}
+_WHEEL = 0b1000000001111  # A-2-3-4-5
+
+
+def _build_straights() -> list[int]:
+    table = [0] * 8192
+    for mask in range(8192):
+        for high in range(12, 3, -1):
+            window = 0b11111 << (high - 4)
+            if mask & window == window:
+                table[mask] = high + 2
+                break
+        else:
+            if mask & _WHEEL == _WHEEL:
+                table[mask] = 5
+    return table
+
+
+def _build_top(n: int) -> list[int]:
+    """Старшие n рангов маски, упакованные по 4 бита (старший — левее)."""
+    table = [0] * 8192
+    for mask in range(8192):
+        packed, taken = 0, 0
+        for r in range(12, -1, -1):
+            if taken == n:
+                break
+            if mask >> r & 1:
+                packed = packed << 4 | (r + 2)
+                taken += 1
+        table[mask] = packed << 4 * (n - taken)
+    return table
+
+
+STRAIGHT_HIGH = _build_straights()
+TOP1 = _build_top(1)
+TOP2 = _build_top(2)
+TOP3 = _build_top(3)
+TOP5 = _build_top(5)
+
+
+def _bit(rank: int) -> int:
+    return 1 << (rank - 2) if rank else 0
+
+
+def value_from_masks(all_mask: int, pairs: int, trips: int, quads: int, flush: int) -> int:
+    """Hand value from rank masks; `flush` is the mask of a 5+ card suit or 0."""
+    if flush:
+        high = STRAIGHT_HIGH[flush]
+        if high:
+            return 8 << 20 | high << 16
+    if quads:
+        q = TOP1[quads]
+        return 7 << 20 | q << 16 | TOP1[all_mask & ~_bit(q)] << 12
+    if trips:
+        t = TOP1[trips]
+        second = max(TOP1[trips & ~_bit(t)], TOP1[pairs])
+        if second:
+            return 6 << 20 | t << 16 | second << 12
+    if flush:
+        return 5 << 20 | TOP5[flush]
+    high = STRAIGHT_HIGH[all_mask]
+    if high:
+        return 4 << 20 | high << 16
+    if trips:
+        t = TOP1[trips]
+        return 3 << 20 | t << 16 | TOP2[all_mask & ~_bit(t)] << 8
+    if pairs:
+        p1 = TOP1[pairs]
+        p2 = TOP1[pairs & ~_bit(p1)]
+        if p2:
+            return 2 << 20 | p1 << 16 | p2 << 12 | TOP1[all_mask & ~_bit(p1) & ~_bit(p2)] << 8
+        return 1 << 20 | p1 << 16 | TOP3[all_mask & ~_bit(p1)] << 4
+    return TOP5[all_mask]
+
+
+def hand_value(cards) -> int:
+    """Value of the best 5-card hand among 5–7 `cards` (objects with rank/suit)."""
+    counts = [0] * 15
+    suits = [0, 0, 0, 0]
+    suit_masks = [0, 0, 0, 0]
+    for card in cards:
+        counts[card.rank] += 1
+        s = SUIT_INDEX[card.suit]
+        suits[s] += 1
+        suit_masks[s] |= 1 << (card.rank - 2)
+    all_mask = pairs = trips = quads = 0
+    for rank in range(2, 15):
+        n = counts[rank]
+        if not n:
+            continue
+        bit = 1 << (rank - 2)
+        all_mask |= bit
+        if n == 2:
+            pairs |= bit
+        elif n == 3:
+            trips |= bit
+        elif n == 4:
+            quads |= bit
+    flush = 0
+    for s in range(4):
+        if suits[s] >= 5:
+            flush = suit_masks[s]
+    return value_from_masks(all_mask, pairs, trips, quads, flush)
+
+
+def value_to_score(value: int) -> tuple[int, ...]:
+    """The same value as an engine._eval5-style tuple: (category, *ranks)."""
+    category = value >> 20
+    length = _SCORE_LENGTH[category]
+    return (category, *(value >> 16 - 4 * i & 0xF for i in range(length)))
+
+
+def _straight_ranks(high: int) -> list[int]:
+    if high == 5:
+        return [5, 4, 3, 2, 14]
+    return list(range(high, high - 5, -1))
+
+
+def best_cards(cards, score: tuple[int, ...]) -> list:
+    """The five cards that make `score` (from value_to_score(hand_value(cards)))."""
+    category = score[0]
+    if category in (8, 5):
+        by_suit: dict[str, list] = {}
+        for card in cards:
+            by_suit.setdefault(card.suit, []).append(card)
+        suited = max(by_suit.values(), key=len)
+        ranks = _straight_ranks(score[1]) if category == 8 else list(score[1:])
+        by_rank = {card.rank: card for card in suited}
+        return [by_rank[r] for r in ranks]
+    if category == 4:
+        by_rank = {}
+        for card in cards:
+            by_rank.setdefault(card.rank, card)
+        return [by_rank[r] for r in _straight_ranks(score[1])]
+
+    group_sizes = {
+        7: (4, 1), 6: (3, 2), 3: (3, 1, 1), 2: (2, 2, 1), 1: (2, 1, 1, 1), 0: (1, 1, 1, 1, 1),
+    }[category]
+    picked = []
+    for rank, n in zip(score[1:], group_sizes):
+        picked.extend([card for card in cards if card.rank == rank][:n])
+    return picked
@@ -11,6 +11,9 @@ from urllib.parse import parse_qsl
 
 from aiohttp import web
 
+from steward.api import state_delta
+from steward.api.state_delta import DeltaStream
+from steward.api.ws_fanout import WsFanout, encode
 from steward.poker.engine import PokerGame, Player, PHASE_SHOWDOWN, PHASE_WAITING
 from steward.poker.bot_ai import decide, BOT_NAMES, DIFFICULTIES, DIFFICULTY_MEDIUM
 from steward.data.repository import Repository
@@ -61,6 +64,8 @@ class Room:
         self.name = name
         self.creator_id = creator_id
         self.connections: dict[int, web.WebSocketResponse] = {}
+        self.fanout = WsFanout("poker", room_id)
+        self.deltas = DeltaStream("game_state", "game_delta")
         self.game = PokerGame(small_blind, big_blind, start_chips)
         self.started = False
         self._next_hand_task: asyncio.Task | None = None
@@ -150,12 +155,7 @@ class Room:
         self.game.players = [p for p in self.game.players if not p.is_bot]
 
     async def broadcast(self, msg: dict):
-        data = json.dumps(msg, ensure_ascii=False)
-        for ws in list(self.connections.values()):
-            try:
-                await ws.send_str(data)
-            except Exception:
-                pass
+        self.fanout.send_all(self.connections, encode(msg))
 
     def _inject_blind_info(self, state: dict):
         state["blindIncreaseEnabled"] = self.blind_increase_enabled
@@ -174,16 +174,27 @@ class Room:
         )
         return state
 
+    def _public_state(self) -> dict:
+        public = self.game.public_state()
+        public["readyPlayers"] = list(self.ready_players)
+        return self._inject_blind_info(public)
+
+    def state_message(self, uid: int, ws: web.WebSocketResponse) -> str:
+        """Полное состояние для одного сокета: вход в комнату, реконнект, resync."""
+        public = self._public_state()
+        private = self.game.private_state(uid)
+        if state_delta.speaks_delta(ws):
+            self.deltas.publish(public)
+            return self.deltas.snapshot(ws, private)
+        return encode({"type": "game_state", "state": {**public, **private}})
+
     async def send_states(self):
         self._arm_turn_timer()
-        for uid, ws in list(self.connections.items()):
-            try:
-                state = self.game.state_for(uid)
-                state["readyPlayers"] = list(self.ready_players)
-                self._inject_blind_info(state)
-                await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
-            except Exception:
-                logger.exception("send_states error for uid=%s room=%s", uid, self.id)
+        self.fanout.send_each(
+            self.connections,
+            self.deltas.renderer(self._public_state(), self.connections, self.game.private_state),
+            key=self.deltas.key_for(self.connections),
+        )
 
     async def _schedule_next(self):
         await asyncio.sleep(_NEXT_HAND_DELAY)
@@ -568,6 +579,7 @@ class RoomManager:
         self.rooms: dict[str, Room] = {}
         self.player_rooms: dict[int, str] = {}
         self.lobby_connections: dict[int, web.WebSocketResponse] = {}
+        self.lobby_fanout = WsFanout("poker", "lobby")
         self._on_room_cleanup: callable = None
         self._disconnect_timers: dict[int, asyncio.Task] = {}
 
@@ -580,12 +592,8 @@ class RoomManager:
         return [r.to_dict() for r in self.rooms.values()]
 
     async def broadcast_rooms(self):
-        data = json.dumps({"type": "rooms_list", "rooms": self.list_rooms()}, ensure_ascii=False)
-        for ws in list(self.lobby_connections.values()):
-            try:
-                await ws.send_str(data)
-            except Exception:
-                pass
+        data = encode({"type": "rooms_list", "rooms": self.list_rooms()})
+        self.lobby_fanout.send_all(self.lobby_connections, data, key="rooms_list")
 
     def create_room(self, name: str, user_id: int, user_name: str,
                     small_blind: int = 10, big_blind: int = 20, start_chips: int = 1000,
@@ -614,8 +622,14 @@ class RoomManager:
 _manager = RoomManager()
 
 
+def _reply(ws: web.WebSocketResponse, msg: dict, key: str | None = None) -> None:
+    # Ответ одному сокету — через его очередь, а не ws.send_str: иначе он
+    # обгонит или отстанет от рассылок лобби и комнаты в тот же сокет
+    _manager.lobby_fanout.send(ws, encode(msg), key)
+
+
 def _find_user(repository: Repository, user_id: int) -> User | None:
-    return next((u for u in repository.db.users if u.id == user_id), None)
+    return repository.get_user(user_id)
 
 
 def _get_or_create_user(repository: Repository, user_id: int, username: str = "") -> User:
@@ -733,7 +747,7 @@ async def _leave(user_id: int, room: Room, metrics=None, repository: Repository
         _manager.cleanup_room(room.id)
 
     if room.play_for_monkeys and repository is not None:
-        await repository.save()
+        await repository.flush("users")
 
     await _manager.broadcast_rooms()
     return monkeys_balance
@@ -754,6 +768,7 @@ async def poker_ws_handler(request: web.Request):
     from steward.api.auth import ws_session_user
     ws = web.WebSocketResponse()
     await ws.prepare(request)
+    state_delta.negotiate(request, ws)
 
     metrics = request.app.get("metrics")
     repository: Repository = request.app["repository"]
@@ -774,17 +789,14 @@ async def poker_ws_handler(request: web.Request):
                 player = next((p for p in room.game.players if p.user_id == user_id), None)
                 if player:
                     player.sitting_out = False
-                await ws.send_str(json.dumps({"type": "reconnected", "room": room.to_dict()}, ensure_ascii=False))
+                _reply(ws, {"type": "reconnected", "room": room.to_dict()})
                 if room.started:
-                    state = room.game.state_for(user_id)
-                    state["readyPlayers"] = list(room.ready_players)
-                    room._inject_blind_info(state)
-                    await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                    room.fanout.send(ws, room.state_message(user_id, ws))
                     if room.game.phase == PHASE_SHOWDOWN:
                         room.queue_next_hand()
         if not current_room:
             _manager.lobby_connections[user_id] = ws
-            await ws.send_str(json.dumps({"type": "authed"}))
+            _reply(ws, {"type": "authed"})
 
     try:
         async for msg in ws:
@@ -798,18 +810,18 @@ async def poker_ws_handler(request: web.Request):
 
                 if t == "auth":
                     if user_id is not None:
-                        await ws.send_str(json.dumps({"type": "authed"}))
+                        _reply(ws, {"type": "authed"})
                         continue
                     init_data_raw = str(data.get("initData", ""))
                     tg_user = _validate_telegram_init_data(init_data_raw)
                     if not tg_user or not tg_user.get("id"):
-                        await ws.send_str(json.dumps({"type": "error", "message": "Invalid Telegram auth"}))
+                        _reply(ws, {"type": "error", "message": "Invalid Telegram auth"})
                         continue
 
                     user_id = int(tg_user["id"])
                     user_name = str(tg_user.get("username") or tg_user.get("first_name") or "Player")[:30]
                     if not user_id:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Telegram user required"}))
+                        _reply(ws, {"type": "error", "message": "Telegram user required"})
                         continue
 
                     if user_id in _manager.player_rooms:
@@ -823,28 +835,30 @@ async def poker_ws_handler(request: web.Request):
                             if player:
                                 player.sitting_out = False
                             logger.info("uid=%s reconnected to room=%s", user_id, rid)
-                            await ws.send_str(json.dumps({"type": "reconnected", "room": room.to_dict()}, ensure_ascii=False))
+                            _reply(ws, {"type": "reconnected", "room": room.to_dict()})
                             if room.started:
-                                state = room.game.state_for(user_id)
-                                state["readyPlayers"] = list(room.ready_players)
-                                room._inject_blind_info(state)
-                                await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                                room.fanout.send(ws, room.state_message(user_id, ws))
                                 if room.game.phase == PHASE_SHOWDOWN:
                                     room.queue_next_hand()
                             continue
 
                     _manager.lobby_connections[user_id] = ws
-                    await ws.send_str(json.dumps({"type": "authed"}))
+                    _reply(ws, {"type": "authed"})
+
+                elif t == "resync":
+                    # Клиент дельта-протокола пропустил версию — шлём снимок
+                    if current_room and user_id and current_room.started:
+                        current_room.fanout.send(ws, current_room.state_message(user_id, ws))
 
                 elif t == "list_rooms":
-                    await ws.send_str(json.dumps({"type": "rooms_list", "rooms": _manager.list_rooms()}, ensure_ascii=False))
+                    _reply(ws, {"type": "rooms_list", "rooms": _manager.list_rooms()}, key="rooms_list")
 
                 elif t == "create_room":
                     if not user_id:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Not authed"}))
+                        _reply(ws, {"type": "error", "message": "Not authed"})
                         continue
                     if user_id in _manager.player_rooms:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Already in a room"}))
+                        _reply(ws, {"type": "error", "message": "Already in a room"})
                         continue
 
                     name = str(data.get("name", f"Room {len(_manager.rooms) + 1}"))[:40]
@@ -865,13 +879,13 @@ async def poker_ws_handler(request: web.Request):
                         ok_buy_in, payload = _charge_buy_in_monkeys(repository, user_id, user_name, sc)
                         if not ok_buy_in:
                             need = payload
-                            await ws.send_str(json.dumps({
+                            _reply(ws, {
                                 "type": "error",
                                 "message": f"Need {need} monkeys to enter this room",
-                            }))
+                            })
                             continue
                         monkeys_balance = payload
-                        await repository.save()
+                        await repository.flush("users")
 
                     room = _manager.create_room(
                         name, user_id, user_name, sb, bb, sc, bc, bd, bi_enabled, bi_interval, play_for_monkeys
@@ -884,28 +898,28 @@ async def poker_ws_handler(request: web.Request):
                     _manager.lobby_connections.pop(user_id, None)
                     current_room = room
                     logger.info("uid=%s created room=%s with %d bots", user_id, room.id, bc)
-                    await ws.send_str(json.dumps({
+                    _reply(ws, {
                         "type": "room_joined",
                         "room": room.to_dict(),
                         "monkeysBalance": monkeys_balance,
-                    }, ensure_ascii=False))
+                    })
                     await _manager.broadcast_rooms()
 
                 elif t == "join_room":
                     if not user_id:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Not authed"}))
+                        _reply(ws, {"type": "error", "message": "Not authed"})
                         continue
                     if user_id in _manager.player_rooms:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Already in a room"}))
+                        _reply(ws, {"type": "error", "message": "Already in a room"})
                         continue
 
                     room_id = data.get("roomId")
                     room = _manager.get_room(room_id)
                     if not room:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Room not found"}))
+                        _reply(ws, {"type": "error", "message": "Room not found"})
                         continue
                     if room._total_players() >= 8:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Room full"}))
+                        _reply(ws, {"type": "error", "message": "Room full"})
                         continue
 
                     room.connections[user_id] = ws
@@ -916,13 +930,13 @@ async def poker_ws_handler(request: web.Request):
                         if not ok_buy_in:
                             need = payload
                             room.connections.pop(user_id, None)
-                            await ws.send_str(json.dumps({
+                            _reply(ws, {
                                 "type": "error",
                                 "message": f"Need {need} monkeys to enter this room",
-                            }))
+                            })
                             continue
                         monkeys_balance = payload
-                        await repository.save()
+                        await repository.flush("users")
                     else:
                         saved_chips = room.chip_bank.pop(user_id, None)
                         chips = saved_chips if saved_chips is not None else room.start_chips
@@ -940,19 +954,16 @@ async def poker_ws_handler(request: web.Request):
                     _manager.lobby_connections.pop(user_id, None)
                     current_room = room
                     logger.info("uid=%s joined room=%s", user_id, room.id)
-                    await ws.send_str(json.dumps({
+                    _reply(ws, {
                         "type": "room_joined",
                         "room": room.to_dict(),
                         "monkeysBalance": monkeys_balance,
-                    }, ensure_ascii=False))
+                    })
                     await room.broadcast({"type": "room_updated", "room": room.to_dict()})
                     await _manager.broadcast_rooms()
 
                     if room.started:
-                        state = room.game.state_for(user_id)
-                        state["readyPlayers"] = list(room.ready_players)
-                        room._inject_blind_info(state)
-                        await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                        room.fanout.send(ws, room.state_message(user_id, ws))
 
                 elif t == "leave_room":
                     if current_room and user_id:
@@ -960,19 +971,19 @@ async def poker_ws_handler(request: web.Request):
                         monkeys_balance = await _leave(user_id, current_room, metrics, repository)
                         current_room = None
                         _manager.lobby_connections[user_id] = ws
-                        await ws.send_str(json.dumps({"type": "left_room", "monkeysBalance": monkeys_balance}))
+                        _reply(ws, {"type": "left_room", "monkeysBalance": monkeys_balance})
 
                 elif t == "start_game":
                     if not current_room:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Not in room"}))
+                        _reply(ws, {"type": "error", "message": "Not in room"})
                         continue
                     if current_room.creator_id != user_id:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Only creator can start"}))
+                        _reply(ws, {"type": "error", "message": "Only creator can start"})
                         continue
 
                     total = current_room._total_players()
                     if total < 2:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Need 2+ players (including bots)"}))
+                        _reply(ws, {"type": "error", "message": "Need 2+ players (including bots)"})
                         continue
 
                     current_room.game.players = [
@@ -996,7 +1007,7 @@ async def poker_ws_handler(request: web.Request):
                     ok = current_room.game.start_hand()
                     if not ok:
                         current_room.started = False
-                        await ws.send_str(json.dumps({"type": "error", "message": "Cannot start game"}))
+                        _reply(ws, {"type": "error", "message": "Cannot start game"})
                         continue
                     logger.info("room=%s game started by uid=%s, hand #%d", current_room.id, user_id, current_room.game.hand_num)
                     if metrics:
@@ -1012,7 +1023,7 @@ async def poker_ws_handler(request: web.Request):
 
                 elif t == "action":
                     if not current_room or not current_room.started:
-                        await ws.send_str(json.dumps({"type": "error", "message": "No active game"}))
+                        _reply(ws, {"type": "error", "message": "No active game"})
                         continue
 
                     try:
@@ -1020,7 +1031,7 @@ async def poker_ws_handler(request: web.Request):
                         amount = int(data.get("amount", 0))
                         ok, result = current_room.game.action(user_id, act, amount)
                         if not ok:
-                            await ws.send_str(json.dumps({"type": "error", "message": result}))
+                            _reply(ws, {"type": "error", "message": result})
                             continue
 
                         logger.info(
@@ -1037,17 +1048,14 @@ async def poker_ws_handler(request: web.Request):
                             current_room._schedule_bot_if_needed()
                     except Exception:
                         logger.exception("room=%s action error uid=%s act=%s", current_room.id, user_id, data.get("action"))
-                        await ws.send_str(json.dumps({"type": "error", "message": "Internal error"}))
+                        _reply(ws, {"type": "error", "message": "Internal error"})
 
                 elif t == "ready":
                     if not current_room or not current_room.started:
                         continue
                     if current_room.game.phase != PHASE_SHOWDOWN:
                         try:
-                            state = current_room.game.state_for(user_id)
-                            state["readyPlayers"] = list(current_room.ready_players)
-                            current_room._inject_blind_info(state)
-                            await ws.send_str(json.dumps({"type": "game_state", "state": state}, ensure_ascii=False))
+                            current_room.fanout.send(ws, current_room.state_message(user_id, ws))
                         except Exception:
                             logger.exception("room=%s state sync failed for uid=%s", current_room.id, user_id)
                         continue
@@ -1060,10 +1068,10 @@ async def poker_ws_handler(request: web.Request):
                     if not current_room or not user_id:
                         continue
                     if current_room.creator_id != user_id:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Only creator can change settings"}))
+                        _reply(ws, {"type": "error", "message": "Only creator can change settings"})
                         continue
                     if current_room.started:
-                        await ws.send_str(json.dumps({"type": "error", "message": "Cannot change settings during game"}))
+                        _reply(ws, {"type": "error", "message": "Cannot change settings during game"})
                         continue
 
                     sb = data.get("smallBlind")
@@ -1082,10 +1090,10 @@ async def poker_ws_handler(request: web.Request):
                         current_room.big_blind = max(current_room.small_blind * 2, min(2000, int(bb)))
                         current_room.base_big_blind = current_room.big_blind
                     if play_for_monkeys is not None and bool(play_for_monkeys) != current_room.play_for_monkeys:
-                        await ws.send_str(json.dumps({
+                        _reply(ws, {
                             "type": "error",
                             "message": "Currency mode cannot be changed after room creation",
-                        }))
+                        })
                         continue
                     if sc is not None:
                         current_room.start_chips = _normalize_start_chips(
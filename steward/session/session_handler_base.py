@@ -20,6 +20,7 @@ from steward.session.session_registry import (
     deactivate_session,
     deactivate_session_by_key,
     get_session_key,
+    touch_session,
 )
 from steward.session.step import Step
 
@@ -121,6 +122,8 @@ class SessionHandlerBase(Handler):
             if session.current_handler_index >= len(session.steps):
                 logger.debug("Stopping session...")
                 await self._stop_session(context.update, session, is_interrupted=False)
+        # Шаг сдвинулся — в снимке должна оказаться новая позиция
+        touch_session(context.update)
 
         return True
 
@@ -150,3 +153,33 @@ class SessionHandlerBase(Handler):
         for step in session.steps:
             step.stop()
         deactivate_session_by_key(key)
+
+    def snapshot_session(self, key: tuple[int, int]) -> dict | None:
+        """State needed to resume the session after a restart, or None if it can't be saved."""
+        return None
+
+    def _snapshot_data(self, key: tuple[int, int]) -> dict | None:
+        session = self.sessions.get(key)
+        if session is None:
+            return None
+        steps = [step.snapshot() for step in session.steps]
+        if any(state is None for state in steps):
+            return None
+        return {
+            "step": session.current_handler_index,
+            "steps": steps,
+            "context": {
+                k: v for k, v in session.context.items() if k != "__internal_session_data__"
+            },
+        }
+
+    def _restore_data(self, key: tuple[int, int], state: dict) -> bool:
+        session = SessionData(deepcopy(self.steps))
+        if len(state["steps"]) != len(session.steps) or not 0 <= state["step"] < len(session.steps):
+            return False
+        session.current_handler_index = state["step"]
+        session.context.update(state["context"])
+        for step, step_state in zip(session.steps, state["steps"]):
+            step.restore(step_state)
+        self.sessions[key] = session
+        return True
@@ -1,5 +1,24 @@
+"""Активные многошаговые сессии: какой хендлер ведёт диалог с пользователем в чате.
+
+SessionRegistry держит сессии с индексами по чату и по пользователю. Проверки
+на каждом апдейте (has_active_session_in_chat) — O(1), а не проход по всем
+сессиям. Истечение по TTL ведёт куча сроков: касание сессии только обновляет
+время активности, а запись в куче переставляется, когда до неё доходит
+очередь. Кучу разбирает фоновая задача run(), а не каждый апдейт.
+
+С SESSION_SNAPSHOT_PATH визарды фич переживают перезапуск: registry пишется на
+диск раз в SNAPSHOT_INTERVAL_SEC после изменений и на остановке, а restore()
+поднимает сессии с того же шага. Сохраняется только то, что хендлер умеет
+отдать через snapshot_session() и что без потерь проходит через JSON.
+"""
+
+import asyncio
+import heapq
+import json
 import logging
-from datetime import datetime, timedelta, timezone
+import os
+import time
+from itertools import count
 from typing import Any
 
 from telegram import Update
@@ -10,9 +29,9 @@ logger = logging.getLogger(__name__)
 
 type SessionKey = tuple[int, int]
 
-# TODO: Make a class not static
-sessions: dict[SessionKey, Any] = {}
-session_last_activity: dict[SessionKey, datetime] = {}
+# Как часто фоновая задача сбрасывает изменившиеся сессии на диск
+SNAPSHOT_INTERVAL_SEC = 5.0
+_SNAPSHOT_FORMAT = 1
 
 
 def get_session_key(update: Update):
@@ -21,27 +40,267 @@ def get_session_key(update: Update):
     return get_message(update).chat.id, get_from_user(update).id
 
 
-def _touch_session_key(key: SessionKey):
-    session_last_activity[key] = datetime.now(timezone.utc)
+class SessionRegistry:
+    def __init__(self):
+        self.sessions: dict[SessionKey, Any] = {}
+        self.last_activity: dict[SessionKey, float] = {}
+        self._by_chat: dict[int, set[int]] = {}
+        self._by_user: dict[int, set[int]] = {}
+        # (активность на момент записи, номер записи, ключ); у живой сессии одна
+        # действующая запись — её номер в _scheduled, остальные выбрасываются
+        self._deadlines: list[tuple[float, int, SessionKey]] = []
+        self._scheduled: dict[SessionKey, int] = {}
+        self._seq = count()
+        # С TTL <= 0 сессии не истекают, и куча сроков не ведётся; выставляет run()
+        self._expiring = True
+        # Снимок собирается из готовых JSON-записей; пересобираются только изменившиеся
+        self._records: dict[SessionKey, str | None] = {}
+        self._changed: set[SessionKey] = set()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        return key in self.sessions
+
+    def get(self, key: SessionKey) -> Any:
+        return self.sessions.get(key)
+
+    def activate(self, key: SessionKey, handler: Any, at: float | None = None) -> None:
+        at = time.time() if at is None else at
+        if key not in self.sessions:
+            chat_id, user_id = key
+            self._by_chat.setdefault(chat_id, set()).add(user_id)
+            self._by_user.setdefault(user_id, set()).add(chat_id)
+        self.sessions[key] = handler
+        self.last_activity[key] = at
+        if self._expiring and key not in self._scheduled:
+            self._schedule(key, at)
+        self._changed.add(key)
+        self.dirty = True
+
+    def touch(self, key: SessionKey) -> None:
+        if key in self.sessions:
+            self.last_activity[key] = time.time()
+            self._changed.add(key)
+            self.dirty = True
+
+    def deactivate(self, key: SessionKey) -> None:
+        if self.sessions.pop(key, None) is None:
+            return
+        self.last_activity.pop(key, None)
+        self._scheduled.pop(key, None)
+        self._records.pop(key, None)
+        self._changed.discard(key)
+        chat_id, user_id = key
+        _discard(self._by_chat, chat_id, user_id)
+        _discard(self._by_user, user_id, chat_id)
+        self.dirty = True
+
+    def clear(self) -> None:
+        self.sessions.clear()
+        self.last_activity.clear()
+        self._by_chat.clear()
+        self._by_user.clear()
+        self._deadlines.clear()
+        self._scheduled.clear()
+        self._records.clear()
+        self._changed.clear()
+        self.dirty = False
+
+    def has_session_in_chat(self, chat_id: int) -> bool:
+        return chat_id in self._by_chat
+
+    def users_in_chat(self, chat_id: int) -> frozenset[int]:
+        return frozenset(self._by_chat.get(chat_id, ()))
+
+    def chats_of_user(self, user_id: int) -> frozenset[int]:
+        return frozenset(self._by_user.get(user_id, ()))
+
+    def _schedule(self, key: SessionKey, at: float) -> None:
+        seq = next(self._seq)
+        self._scheduled[key] = seq
+        heapq.heappush(self._deadlines, (at, seq, key))
+
+    def next_deadline(self, ttl_seconds: float) -> float | None:
+        """Earliest moment a session may expire; can be early, never late."""
+        if not self._deadlines:
+            return None
+        return self._deadlines[0][0] + ttl_seconds
+
+    def expire_due(self, ttl_seconds: float, now: float | None = None) -> int:
+        """Expire sessions idle for ttl_seconds; touches only heap entries that are due."""
+        if ttl_seconds <= 0:
+            return 0
+        threshold = (time.time() if now is None else now) - ttl_seconds
+        expired = 0
+        while self._deadlines and self._deadlines[0][0] <= threshold:
+            _, seq, key = heapq.heappop(self._deadlines)
+            if self._scheduled.get(key) != seq:
+                continue
+            last_activity = self.last_activity[key]
+            if last_activity > threshold:
+                # Сессию трогали после записи — переносим срок
+                self._schedule(key, last_activity)
+                continue
+            handler = self.sessions.get(key)
+            if handler is not None and hasattr(handler, "expire_session_by_key"):
+                try:
+                    handler.expire_session_by_key(key)
+                except Exception:
+                    logger.exception("Failed to expire stale session: %s", key)
+            self.deactivate(key)
+            expired += 1
+        return expired
+
+    def set_ttl(self, ttl_seconds: float) -> None:
+        """With ttl_seconds <= 0 sessions never expire and are not put on the deadline heap."""
+        self._expiring = ttl_seconds > 0
+        if not self._expiring:
+            self._deadlines.clear()
+            self._scheduled.clear()
+
+    async def run(self, ttl_seconds: float, snapshot_path: str | None = None) -> None:
+        """Expire sessions on their deadlines and keep the snapshot fresh; runs until cancelled."""
+        self.set_ttl(ttl_seconds)
+        while True:
+            delays = []
+            if ttl_seconds > 0:
+                deadline = self.next_deadline(ttl_seconds)
+                # Новая сессия истечёт не раньше чем через ttl — дольше спать незачем
+                delays.append(ttl_seconds if deadline is None else deadline - time.time())
+            if snapshot_path is not None:
+                delays.append(SNAPSHOT_INTERVAL_SEC)
+            if not delays:
+                return
+            await asyncio.sleep(max(min(delays), 0))
+
+            # Один сбойный проход не должен останавливать истечение и снимки насовсем
+            try:
+                expired = self.expire_due(ttl_seconds)
+                if expired:
+                    logger.info("Cleaned %s stale session(s)", expired)
+                if snapshot_path is not None and self.dirty:
+                    await self._write_snapshot(snapshot_path)
+            except Exception:
+                logger.exception("Session registry pass failed")
+
+    async def _write_snapshot(self, path: str) -> None:
+        write = asyncio.ensure_future(asyncio.to_thread(_write, path, self.snapshot()))
+        try:
+            await asyncio.shield(write)
+        except OSError:
+            # Снимок не лёг — сессии снова ждут записи, в том числе save() на остановке
+            self.dirty = True
+            logger.warning("failed to save sessions", exc_info=True)
+        except asyncio.CancelledError:
+            # Поток отменой не остановить: ждём его, иначе он заменит файл
+            # уже после save() на остановке и вернёт старый снимок
+            await asyncio.wait([write])
+            if write.exception() is not None:
+                self.dirty = True
+            raise
+
+    def snapshot(self) -> str:
+        """Resumable sessions as a JSON document; clears the dirty flag."""
+        for key in self._changed:
+            self._records[key] = self._record(key)
+        self._changed.clear()
+        self.dirty = False
+        records = ",\n".join(r for r in self._records.values() if r is not None)
+        return f'{{"format": {_SNAPSHOT_FORMAT}, "sessions": [\n{records}\n]}}\n'
+
+    def _record(self, key: SessionKey) -> str | None:
+        handler = self.sessions[key]
+        snapshot_session = getattr(handler, "snapshot_session", None)
+        state = snapshot_session(key) if snapshot_session is not None else None
+        if state is None:
+            return None
+        record = {
+            "chat_id": key[0],
+            "user_id": key[1],
+            "last_activity": self.last_activity[key],
+            **state,
+        }
+        # Кортежи, нестроковые ключи и объекты после JSON уже не те — такие сессии не сохраняем
+        try:
+            text = json.dumps(record, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+        return text if json.loads(text) == record else None
+
+    def restore(self, data: dict, handlers: list, ttl_seconds: float = 0) -> int:
+        """Resume sessions from snapshot() output; returns how many came back.
+
+        Each record goes to the handler whose feature class it names, via
+        `resume_wizard(key, state)`; sessions idle longer than ttl_seconds are dropped.
+        """
+        if data.get("format") != _SNAPSHOT_FORMAT:
+            return 0
+        by_feature = {h.feature_class.__name__: h for h in handlers}
+        now = time.time()
+        restored = 0
+        for record in data.get("sessions", []):
+            key = (record["chat_id"], record["user_id"])
+            last_activity = record["last_activity"]
+            if ttl_seconds > 0 and last_activity <= now - ttl_seconds:
+                continue
+            feature = by_feature.get(record.get("feature"))
+            if feature is None:
+                continue
+            try:
+                handler = feature.resume_wizard(key, record)
+            except Exception:
+                logger.exception("Failed to resume session %s", key)
+                continue
+            if handler is not None:
+                self.activate(key, handler, at=last_activity)
+                restored += 1
+        return restored
+
+
+def _discard(index: dict[int, set[int]], key: int, value: int) -> None:
+    values = index.get(key)
+    if values is None:
+        return
+    values.discard(value)
+    if not values:
+        del index[key]
+
+
+def _write(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+registry = SessionRegistry()
+
+
+def snapshot_path() -> str | None:
+    return os.environ.get("SESSION_SNAPSHOT_PATH") or None
 
 
 def touch_session(update: Update):
-    _touch_session_key(get_session_key(update))
+    registry.touch(get_session_key(update))
 
 
 def activate_session(handler: Any, update: Update):
     logger.info("activate session")
-    key = get_session_key(update)
-    sessions[key] = handler
-    _touch_session_key(key)
+    registry.activate(get_session_key(update), handler)
 
 
 def try_get_session_handler(update: Update):
     key = get_session_key(update)
-    if key in sessions:
-        _touch_session_key(key)
-        return sessions[key]
-    return None
+    handler = registry.get(key)
+    if handler is not None:
+        registry.touch(key)
+    return handler
 
 
 def deactivate_session(update: Update):
@@ -50,29 +309,39 @@ def deactivate_session(update: Update):
 
 
 def deactivate_session_by_key(key: SessionKey):
-    sessions.pop(key, None)
-    session_last_activity.pop(key, None)
+    registry.deactivate(key)
 
 
 def has_active_session_in_chat(chat_id: int) -> bool:
-    return any(key[0] == chat_id for key in sessions)
+    return registry.has_session_in_chat(chat_id)
 
 
 def cleanup_stale_sessions(ttl_seconds: int) -> int:
-    if ttl_seconds <= 0:
-        return 0
+    return registry.expire_due(ttl_seconds)
+
 
-    threshold = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
-    stale_keys = [k for k, ts in session_last_activity.items() if ts < threshold]
-    if not stale_keys:
+def load(handlers: list, ttl_seconds: float = 0) -> int:
+    """Resume sessions from SESSION_SNAPSHOT_PATH, if configured."""
+    path = snapshot_path()
+    if path is None:
         return 0
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning("Session snapshot %s is unreadable: %s", path, e)
+        return 0
+    return registry.restore(data, handlers, ttl_seconds)
 
-    for key in stale_keys:
-        handler = sessions.get(key)
-        if handler is not None and hasattr(handler, "expire_session_by_key"):
-            try:
-                handler.expire_session_by_key(key)
-            except Exception:
-                logger.exception("Failed to expire stale session: %s", key)
-        deactivate_session_by_key(key)
-    return len(stale_keys)
+
+def save() -> None:
+    path = snapshot_path()
+    if path is None or not registry.dirty:
+        return
+    try:
+        _write(path, registry.snapshot())
+    except OSError:
+        registry.dirty = True
+        logger.warning("failed to save sessions", exc_info=True)
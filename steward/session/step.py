@@ -13,3 +13,11 @@ class Step:
 
     def stop(self):
         pass
+
+    def snapshot(self) -> dict | None:
+        """JSON-safe state to resume this step after a restart; None if it can't be resumed."""
+        return None
+
+    def restore(self, state: dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
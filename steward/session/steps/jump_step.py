@@ -38,3 +38,6 @@ class JumpStep(Step):
         session_context[self.iteration_key] += 1
 
         return True
+
+    def snapshot(self):
+        return {"counter": self.counter}
@@ -58,3 +58,6 @@ class KeyboardStep(Step):
             ]
             return True
         return False
+
+    def snapshot(self):
+        return {"is_waiting": self.is_waiting}
@@ -70,3 +70,6 @@ class QuestionStep(Step):
 
     def stop(self):
         self.is_waiting = False
+
+    def snapshot(self):
+        return {"is_waiting": self.is_waiting}
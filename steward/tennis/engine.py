@@ -5,7 +5,7 @@
 from __future__ import annotations
 
 import statistics
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 
 from steward.data.models.tennis import TennisMatch, TennisSession
@@ -165,8 +165,9 @@ def current_point_server(
 # ── падел: теннисный счёт очки→гейм→сет→матч ──────────────────────────────────
 # Падел считается как теннис: в гейме очки 0/15/30/40 (+ Ad или «золотой мяч»),
 # сет — до 6 геймов с разницей ≥2, при 6:6 тай-брейк до 7 (разница ≥2), матч —
-# best-of-N сетов. Всё состояние реконструируется из points_log (список 'a'/'b'),
-# поэтому undo = снять последний поинт и пересчитать. Чистая функция, без I/O.
+# best-of-N сетов. Всё состояние реконструируется из points_log (список 'a'/'b')
+# функцией padel_state; по ходу матча его ведёт PadelScorer — поинт за поинтом,
+# с undo без пересчёта журнала. Без I/O.
 
 PADEL_GAMES_PER_SET = 6
 PADEL_TIEBREAK_TO = 7
@@ -302,13 +303,131 @@ def padel_state(
 def padel_server_side(points_log: list[str], party_first_server: str, **kwargs) -> str:
     """Приблизительный индикатор: подача в паделе переходит к другой паре каждый
     гейм. Считаем по чётности числа сыгранных геймов (тай-брейк — как один гейм)."""
+    return padel_server_for(padel_state(points_log, **kwargs), party_first_server)
+
+
+def padel_server_for(state: PadelState, party_first_server: str) -> str:
+    """padel_server_side по уже посчитанному состоянию (см. PadelScorer)."""
     base = party_first_server if party_first_server in (SIDE_A, SIDE_B) else SIDE_A
     other = SIDE_B if base == SIDE_A else SIDE_A
-    st = padel_state(points_log, **kwargs)
-    played_games = sum(ga + gb for ga, gb in st.completed_sets) + st.games_a + st.games_b
+    played_games = sum(ga + gb for ga, gb in state.completed_sets) + state.games_a + state.games_b
     return base if played_games % 2 == 0 else other
 
 
+@dataclass(frozen=True)
+class _PadelFrame:
+    sets_a: int = 0
+    sets_b: int = 0
+    games_a: int = 0
+    games_b: int = 0
+    pa: int = 0
+    pb: int = 0
+    in_tb: bool = False
+    completed_sets: tuple[tuple[int, int], ...] = ()
+    winner: str | None = None
+
+
+class PadelScorer:
+    """Счёт падела, который ведётся по ходу игры, а не пересчитывается из журнала.
+
+    apply(side) и undo() — O(1): на каждый поинт журнала в стеке лежит
+    неизменяемый кадр состояния, undo просто снимает верхний. Результат
+    совпадает с padel_state(журнал) — тот остаётся эталоном для тестов.
+    """
+
+    def __init__(
+        self,
+        *,
+        golden_point: bool = True,
+        sets_to_win: int = PADEL_DEFAULT_SETS_TO_WIN,
+        games_per_set: int = PADEL_GAMES_PER_SET,
+        tiebreak_to: int = PADEL_TIEBREAK_TO,
+    ):
+        self.golden_point = golden_point
+        self.sets_to_win = sets_to_win
+        self.games_per_set = games_per_set
+        self.tiebreak_to = tiebreak_to
+        self._frames: list[_PadelFrame] = [_PadelFrame()]
+
+    @classmethod
+    def from_log(cls, points_log: list[str], **kwargs) -> PadelScorer:
+        scorer = cls(**kwargs)
+        for side in points_log:
+            scorer.apply(side)
+        return scorer
+
+    def __len__(self) -> int:
+        """Сколько поинтов журнала учтено."""
+        return len(self._frames) - 1
+
+    @property
+    def state(self) -> PadelState:
+        f = self._frames[-1]
+        la, lb = _padel_point_labels(f.pa, f.pb, self.golden_point, f.in_tb)
+        return PadelState(
+            sets_a=f.sets_a,
+            sets_b=f.sets_b,
+            games_a=f.games_a,
+            games_b=f.games_b,
+            points_a=f.pa,
+            points_b=f.pb,
+            point_label_a=la,
+            point_label_b=lb,
+            in_tiebreak=f.in_tb,
+            completed_sets=list(f.completed_sets),
+            match_complete=f.winner is not None,
+            winner=f.winner,
+        )
+
+    def apply(self, side: str) -> PadelState:
+        self._frames.append(self._step(self._frames[-1], side))
+        return self.state
+
+    def undo(self) -> PadelState:
+        if len(self._frames) > 1:
+            self._frames.pop()
+        return self.state
+
+    def _step(self, f: _PadelFrame, side: str) -> _PadelFrame:
+        # Те же переходы, что в цикле padel_state; «пустой» поинт (после конца
+        # матча или не 'a'/'b') тоже кладёт кадр, чтобы undo шёл в ногу с журналом
+        if f.winner is not None or side not in (SIDE_A, SIDE_B):
+            return f
+        pa = f.pa + (side == SIDE_A)
+        pb = f.pb + (side == SIDE_B)
+
+        if f.in_tb:
+            hi, lo = max(pa, pb), min(pa, pb)
+            if hi >= self.tiebreak_to and hi - lo >= 2:
+                return self._finish_set(f, f.games_a + (pa > pb), f.games_b + (pb > pa))
+            return replace(f, pa=pa, pb=pb)
+
+        gw = _padel_game_winner(pa, pb, self.golden_point)
+        if gw is None:
+            return replace(f, pa=pa, pb=pb)
+        ga = f.games_a + (gw == SIDE_A)
+        gb = f.games_b + (gw == SIDE_B)
+        gps = self.games_per_set
+        if (ga >= gps and ga - gb >= 2) or (gb >= gps and gb - ga >= 2):
+            return self._finish_set(f, ga, gb)
+        return replace(f, games_a=ga, games_b=gb, pa=0, pb=0, in_tb=ga == gps and gb == gps)
+
+    def _finish_set(self, f: _PadelFrame, ga: int, gb: int) -> _PadelFrame:
+        sets_a = f.sets_a + (ga > gb)
+        sets_b = f.sets_b + (gb > ga)
+        winner = None
+        if sets_a >= self.sets_to_win:
+            winner = SIDE_A
+        elif sets_b >= self.sets_to_win:
+            winner = SIDE_B
+        return _PadelFrame(
+            sets_a=sets_a,
+            sets_b=sets_b,
+            completed_sets=f.completed_sets + ((ga, gb),),
+            winner=winner,
+        )
+
+
 def session_wins(session: TennisSession) -> tuple[int, int]:
     a = sum(1 for m in session.matches if m.winner == SIDE_A)
     b = sum(1 for m in session.matches if m.winner == SIDE_B)
@@ -19,19 +19,19 @@ from urllib.parse import parse_qsl
 
 from aiohttp import web
 
-from steward.data.models.tennis import TennisMatch, TennisSession
+from steward.api.ws_fanout import WsFanout, encode
+from steward.data.models.tennis import TennisLivePoints, TennisMatch, TennisSession
 from steward.data.repository import Repository
 from steward.tennis.engine import (
     SIDE_A,
     SIDE_B,
+    PadelScorer,
     current_point_server,
     is_padel,
     is_party_complete,
     is_valid_party_score,
     next_first_server,
-    padel_server_side,
-    padel_state,
-    party_point_to_side,
+    padel_server_for,
     session_wins,
     sport_meta,
 )
@@ -106,11 +106,14 @@ class TennisRoom:
         self.repository = repository
         self.manager = manager
         self.connections: dict[int, web.WebSocketResponse] = {}
+        self.fanout = WsFanout("tennis", str(session.id))
         # Текст последней озвучки/коммента — фронт играет его через speak()
         # вместо стандартной «Партия! Победил X. Счёт 11:7». In-memory, не
         # сохраняется в БД.
         self.last_commentary: str = ""
         self.last_commentary_seq: int = 0  # счётчик для фронта чтобы не повторять
+        # Счёт падела по ходу матча; строится из points_log при первом обращении
+        self._padel: PadelScorer | None = None
 
     # ── permissions ──────────────────────────────────────────────────────────
 
@@ -128,12 +131,24 @@ class TennisRoom:
 
     # ── state serialization for frontend ─────────────────────────────────────
 
+    def _padel_scorer(self) -> PadelScorer:
+        golden = self.session.golden_point
+        sets_to_win = max(1, self.session.sets_to_win or 2)
+        scorer = self._padel
+        if (
+            scorer is None
+            or scorer.golden_point != golden
+            or scorer.sets_to_win != sets_to_win
+            or len(scorer) != len(self.session.points_log)
+        ):
+            # Первый тап после загрузки или журнал поменяли в обход комнаты
+            scorer = self._padel = PadelScorer.from_log(
+                self.session.points_log, golden_point=golden, sets_to_win=sets_to_win
+            )
+        return scorer
+
     def _padel_state(self):
-        return padel_state(
-            list(self.session.points_log),
-            golden_point=self.session.golden_point,
-            sets_to_win=max(1, self.session.sets_to_win or 2),
-        )
+        return self._padel_scorer().state
 
     def to_state(self, viewer_id: int | None = None) -> dict:
         wins_a, wins_b = session_wins(self.session)
@@ -141,12 +156,7 @@ class TennisRoom:
         if padel:
             st = self._padel_state()
             current_score = [st.sets_a, st.sets_b]
-            current_server = padel_server_side(
-                list(self.session.points_log),
-                self.session.first_server,
-                golden_point=self.session.golden_point,
-                sets_to_win=max(1, self.session.sets_to_win or 2),
-            )
+            current_server = padel_server_for(st, self.session.first_server)
             padel_block = {
                 "sets": [st.sets_a, st.sets_b],
                 "games": [st.games_a, st.games_b],
@@ -240,6 +250,36 @@ class TennisRoom:
         self.session.current_score_a = 0
         self.session.current_score_b = 0
         self.session.points_log = []
+        self._padel = None
+
+    async def _save_points(self) -> None:
+        """Сохранить очки текущей партии, не перезаписывая tennis_sessions.
+
+        Тап меняет только points_log и лайв-счёт одной сессии — пишем их
+        отдельной маленькой записью; при загрузке она сворачивается обратно
+        в сессию (Repository._migrate)."""
+        live = next(
+            (lp for lp in self.repository.db.tennis_live_points if lp.session_id == self.session.id),
+            None,
+        )
+        if live is None:
+            live = TennisLivePoints(session_id=self.session.id)
+            self.repository.db.tennis_live_points.append(live)
+        live.points_log = list(self.session.points_log)
+        live.current_score_a = self.session.current_score_a
+        live.current_score_b = self.session.current_score_b
+        live.updated_at = self.session.last_activity_at or datetime.now()
+        await self.repository.save("tennis_live_points")
+
+    async def _save_session(self) -> None:
+        """Сохранить сессию целиком; лайв-запись очков больше не нужна.
+
+        tennis_live_points пишем всегда: после загрузки в памяти список пуст,
+        а в файле могут остаться записи, которые иначе свернутся снова."""
+        self.repository.db.tennis_live_points = [
+            lp for lp in self.repository.db.tennis_live_points if lp.session_id != self.session.id
+        ]
+        await self.repository.save("tennis_sessions", "tennis_live_points")
 
     async def record_match_with_score(
         self, score_a: int, score_b: int
@@ -258,7 +298,7 @@ class TennisRoom:
 
         info = {"match_completed": True}
         self.session.last_activity_at = datetime.now()
-        await self.repository.save()
+        await self._save_session()
 
         # Сразу бродкастим: счёт появляется на табло, стандартная озвучка играет
         self.last_commentary = ""
@@ -268,20 +308,6 @@ class TennisRoom:
         asyncio.create_task(self.manager._announce_match(self.session, match))
         return True, "", info
 
-    def _sync_live_score(self) -> None:
-        """Пересчитать current_score_a/b из points_log по правилам спорта.
-
-        Наст. теннис/сквош — сырые очки текущей партии. Падел — счёт по сетам
-        (полная раскладка считается в to_state)."""
-        if is_padel(self.session.sport):
-            st = self._padel_state()
-            self.session.current_score_a = st.sets_a
-            self.session.current_score_b = st.sets_b
-        else:
-            a, b = party_point_to_side(self.session.points_log)
-            self.session.current_score_a = a
-            self.session.current_score_b = b
-
     async def add_point(self, side: str) -> tuple[bool, str, dict]:
         """Начислить одно очко стороне (тап = очко). Когда «партия» добирается до
         конца — она автоматически финализируется как TennisMatch, а лайв-счёт
@@ -294,38 +320,42 @@ class TennisRoom:
         if side not in (SIDE_A, SIDE_B):
             return False, "Неизвестная сторона", {}
 
-        self.session.points_log.append(side)
-        self.session.last_activity_at = datetime.now()
-
+        # Счёт ведётся инкрементально: тап — один шаг, без пересчёта всей партии
         if is_padel(self.session.sport):
-            st = self._padel_state()
+            scorer = self._padel_scorer()
+            self.session.points_log.append(side)
+            self.session.last_activity_at = datetime.now()
+            st = scorer.apply(side)
             self.session.current_score_a = st.sets_a
             self.session.current_score_b = st.sets_b
             if not st.match_complete:
-                await self.repository.save()
+                await self._save_points()
                 await self.broadcast()
                 return True, "", {"match_completed": False}
             match = self._append_completed_party(st.sets_a, st.sets_b)
             self._reset_current_party()
-            await self.repository.save()
+            await self._save_session()
             self.last_commentary = ""
             await self.broadcast()
             asyncio.create_task(self.manager._announce_match(self.session, match))
             return True, "", {"match_completed": True, "winner": match.winner}
 
-        a, b = party_point_to_side(self.session.points_log)
+        self.session.points_log.append(side)
+        self.session.last_activity_at = datetime.now()
+        a = self.session.current_score_a + (side == SIDE_A)
+        b = self.session.current_score_b + (side == SIDE_B)
         self.session.current_score_a = a
         self.session.current_score_b = b
 
         if not is_party_complete(a, b):
-            await self.repository.save()
+            await self._save_points()
             await self.broadcast()
             return True, "", {"match_completed": False, "current_score": [a, b]}
 
         # Партия добрана — финализируем
         match = self._append_completed_party(a, b)
         self._reset_current_party()
-        await self.repository.save()
+        await self._save_session()
         self.last_commentary = ""
         await self.broadcast()
         asyncio.create_task(self.manager._announce_match(self.session, match))
@@ -340,10 +370,18 @@ class TennisRoom:
             return False, "Сессия уже закрыта"
         if not self.session.points_log:
             return False, "В текущей партии нет очков"
-        self.session.points_log.pop()
-        self._sync_live_score()
+        if is_padel(self.session.sport):
+            scorer = self._padel_scorer()
+            self.session.points_log.pop()
+            st = scorer.undo()
+            self.session.current_score_a = st.sets_a
+            self.session.current_score_b = st.sets_b
+        else:
+            side = self.session.points_log.pop()
+            self.session.current_score_a -= side == SIDE_A
+            self.session.current_score_b -= side == SIDE_B
         self.session.last_activity_at = datetime.now()
-        await self.repository.save()
+        await self._save_points()
         await self.broadcast()
         return True, ""
 
@@ -355,7 +393,7 @@ class TennisRoom:
             return False, "Нечего сбрасывать"
         self._reset_current_party()
         self.session.last_activity_at = datetime.now()
-        await self.repository.save()
+        await self._save_session()
         await self.broadcast()
         return True, ""
 
@@ -378,7 +416,7 @@ class TennisRoom:
         m.score_b = score_b
         m.winner = SIDE_A if score_a > score_b else SIDE_B
         self.session.last_activity_at = datetime.now()
-        await self.repository.save()
+        await self.repository.save("tennis_sessions")
         return True, ""
 
     async def undo_last_match(self) -> tuple[bool, str]:
@@ -398,7 +436,7 @@ class TennisRoom:
             serve_streak=self.session.serve_streak,
         )
         self.session.last_activity_at = datetime.now()
-        await self.repository.save()
+        await self.repository.save("tennis_sessions")
         return True, ""
 
     async def close(self, reason: str = "manual") -> None:
@@ -408,7 +446,7 @@ class TennisRoom:
         self.session.ended_at = now
         self.session.last_activity_at = now
         self.session.closed_reason = reason
-        await self.repository.save()
+        await self.repository.save("tennis_sessions")
         asyncio.create_task(self.manager._announce_session_end(self.session, reason))
 
     def _latest_match_end(self) -> datetime | None:
@@ -422,12 +460,13 @@ class TennisRoom:
     # ── broadcast ────────────────────────────────────────────────────────────
 
     async def broadcast(self, type_: str = "state", **extra) -> None:
-        for uid, ws in list(self.connections.items()):
-            payload = {"type": type_, "state": self.to_state(uid), **extra}
-            try:
-                await ws.send_str(json.dumps(payload, ensure_ascii=False))
-            except Exception:
-                logger.exception("tennis broadcast failed uid=%s", uid)
+        # От зрителя в состоянии зависит только флаг can_edit
+        self.fanout.send_each(
+            self.connections,
+            lambda uid: encode({"type": type_, "state": self.to_state(uid), **extra}),
+            key=type_ if type_ == "state" else None,
+            group=self.can_edit,
+        )
 
 
 # ── RoomManager ──────────────────────────────────────────────────────────────
@@ -438,6 +477,8 @@ class TennisRoomManager:
         self._ttl_task: asyncio.Task | None = None
         self._bot = None                              # ExtBot для уведомлений
         self._user_display: Callable[[int], str] | None = None
+        # Прямые ответы сокету; очередь сокета общая с рассылкой комнаты
+        self.direct_fanout = WsFanout("tennis", "direct")
 
     def configure_notifications(self, bot, user_display: Callable[[int], str]) -> None:
         """Бот для отправки уведомлений по таймауту + способ отрендерить имя игрока."""
@@ -664,22 +705,19 @@ async def tennis_ws_handler(request: web.Request):
     user_id: int | None = None
     current_room: TennisRoom | None = None
 
-    async def _send(payload: dict) -> None:
-        try:
-            await ws.send_str(json.dumps(payload, ensure_ascii=False))
-        except Exception:
-            pass
+    def _send(payload: dict) -> None:
+        _manager.direct_fanout.send(ws, encode(payload))
 
     async def _attach_for(uid: int) -> None:
         """Связать соединение с активной сессией пользователя (если есть)."""
         nonlocal current_room
         room = _manager.find_active_for_user(repository, uid)
         if room is None:
-            await _send({"type": "no_active"})
+            _send({"type": "no_active"})
             return
         current_room = room
         room.connections[uid] = ws
-        await _send({"type": "state", "state": room.to_state(uid)})
+        _send({"type": "state", "state": room.to_state(uid)})
 
     # 1) Cookie/header-аутентификация (выставляется AuthContext через /api/auth/webapp).
     #    Работает и в браузере, и в Telegram WebApp после первой инициализации.
@@ -704,31 +742,31 @@ async def tennis_ws_handler(request: web.Request):
             if t == "hello":
                 # Если cookie-сессия уже сработала — игнорируем повторную авторизацию
                 if user_id is not None:
-                    await _send({"type": "ok"})
+                    _send({"type": "ok"})
                     continue
                 init_data_raw = str(data.get("init_data", ""))
                 tg_user = _validate_telegram_init_data(init_data_raw)
                 if not tg_user or not tg_user.get("id"):
-                    await _send({"type": "error", "message": "Invalid Telegram auth"})
+                    _send({"type": "error", "message": "Invalid Telegram auth"})
                     continue
                 user_id = int(tg_user["id"])
                 await _attach_for(user_id)
 
             elif t == "finish_party":
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.is_player(user_id):
-                    await _send({"type": "error", "message": "Только участники игры могут писать счёт"})
+                    _send({"type": "error", "message": "Только участники игры могут писать счёт"})
                     continue
                 raw_a = data.get("score_a")
                 raw_b = data.get("score_b")
                 if not isinstance(raw_a, (int, float)) or not isinstance(raw_b, (int, float)):
-                    await _send({"type": "error", "message": "Нужны оба числа"})
+                    _send({"type": "error", "message": "Нужны оба числа"})
                     continue
                 ok, err, _info = await current_room.record_match_with_score(int(raw_a), int(raw_b))
                 if not ok:
-                    await _send({"type": "error", "message": err})
+                    _send({"type": "error", "message": err})
                     continue
                 await current_room.broadcast()
 
@@ -736,80 +774,80 @@ async def tennis_ws_handler(request: web.Request):
                 # Point-by-point: тап = очко. add_point сам бродкастит и при
                 # доборе партии финализирует её + запускает озвучку.
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.is_player(user_id):
-                    await _send({"type": "error", "message": "Только участники игры могут вести счёт"})
+                    _send({"type": "error", "message": "Только участники игры могут вести счёт"})
                     continue
                 side = str(data.get("side", "")).lower()
                 ok, err, _info = await current_room.add_point(side)
                 if not ok:
-                    await _send({"type": "error", "message": err})
+                    _send({"type": "error", "message": err})
                     continue
 
             elif t == "undo_point":
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.is_player(user_id):
-                    await _send({"type": "error", "message": "Отменять может только участник игры"})
+                    _send({"type": "error", "message": "Отменять может только участник игры"})
                     continue
                 ok, err = await current_room.undo_point()
                 if not ok:
-                    await _send({"type": "error", "message": err})
+                    _send({"type": "error", "message": err})
                     continue
 
             elif t == "reset_party":
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.is_player(user_id):
-                    await _send({"type": "error", "message": "Сбросить может только участник игры"})
+                    _send({"type": "error", "message": "Сбросить может только участник игры"})
                     continue
                 ok, err = await current_room.reset_current_party()
                 if not ok:
-                    await _send({"type": "error", "message": err})
+                    _send({"type": "error", "message": err})
                     continue
 
             elif t == "edit_match":
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.is_player(user_id):
-                    await _send({"type": "error", "message": "Править счёт могут только участники игры"})
+                    _send({"type": "error", "message": "Править счёт могут только участники игры"})
                     continue
                 try:
                     idx = int(data.get("idx"))
                     score_a = int(data.get("score_a"))
                     score_b = int(data.get("score_b"))
                 except (TypeError, ValueError):
-                    await _send({"type": "error", "message": "Параметры edit_match невалидны"})
+                    _send({"type": "error", "message": "Параметры edit_match невалидны"})
                     continue
                 ok, err = await current_room.update_match(idx, score_a, score_b)
                 if not ok:
-                    await _send({"type": "error", "message": err})
+                    _send({"type": "error", "message": err})
                     continue
                 await current_room.broadcast()
 
             elif t == "undo":
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.is_player(user_id):
-                    await _send({"type": "error", "message": "Отменять может только участник игры"})
+                    _send({"type": "error", "message": "Отменять может только участник игры"})
                     continue
                 ok, err = await current_room.undo_last_match()
                 if not ok:
-                    await _send({"type": "error", "message": err})
+                    _send({"type": "error", "message": err})
                     continue
                 await current_room.broadcast()
 
             elif t == "close":
                 if current_room is None or user_id is None:
-                    await _send({"type": "error", "message": "Not authed"})
+                    _send({"type": "error", "message": "Not authed"})
                     continue
                 if not current_room.can_edit(user_id):
-                    await _send({"type": "error", "message": "Только игроки могут закрыть сессию"})
+                    _send({"type": "error", "message": "Только игроки могут закрыть сессию"})
                     continue
                 await current_room.close("manual")
                 await current_room.broadcast("closed", reason="manual")
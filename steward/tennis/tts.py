@@ -13,6 +13,7 @@ import os
 import httpx
 
 from steward.data.models.tennis import TennisMatch, TennisSession
+from steward.helpers import http_clients
 from steward.tennis.engine import SIDE_A, session_wins
 
 logger = logging.getLogger(__name__)
@@ -82,12 +83,12 @@ async def _synthesize_v3(text: str, api_key: str, voice: str, folder_id: str) ->
     if folder_id:
         payload["folderId"] = folder_id
     try:
-        async with httpx.AsyncClient(timeout=_REQUEST_TIMEOUT_SEC) as client:
-            resp = await client.post(
-                _YANDEX_TTS_V3_URL,
-                headers={"Authorization": f"Api-Key {api_key}"},
-                json=payload,
-            )
+        resp = await http_clients.client("yandex-tts").post(
+            _YANDEX_TTS_V3_URL,
+            headers={"Authorization": f"Api-Key {api_key}"},
+            json=payload,
+            timeout=_REQUEST_TIMEOUT_SEC,
+        )
     except Exception:
         return None
     if resp.status_code >= 400:
@@ -124,18 +125,18 @@ async def synthesize(text: str) -> bytes | None:
         logger.info("tennis TTS v3 failed, falling back to v1")
 
     try:
-        async with httpx.AsyncClient(timeout=_REQUEST_TIMEOUT_SEC) as client:
-            response = await client.post(
-                _YANDEX_TTS_URL,
-                headers={"Authorization": f"Api-Key {api_key}"},
-                data={
-                    "text": text,
-                    "lang": _DEFAULT_LANG,
-                    "voice": voice,
-                    "format": "oggopus",
-                    "folderId": folder_id,
-                },
-            )
+        response = await http_clients.client("yandex-tts").post(
+            _YANDEX_TTS_URL,
+            headers={"Authorization": f"Api-Key {api_key}"},
+            data={
+                "text": text,
+                "lang": _DEFAULT_LANG,
+                "voice": voice,
+                "format": "oggopus",
+                "folderId": folder_id,
+            },
+            timeout=_REQUEST_TIMEOUT_SEC,
+        )
     except httpx.HTTPError as e:
         logger.info("tennis TTS v1 transport error: %s", e)
         return None
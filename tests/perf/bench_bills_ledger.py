@@ -0,0 +1,115 @@
+"""Сводка /bills в чате с тысячами счетов: пересчёт с нуля против реестра долгов.
+
+Запуск: python -m tests.perf.bench_bills_ledger [bills]
+
+Прежний показ сводки звал compute_bill_balances пять раз (format_overview,
+format_overview_rich, кнопки оплаты). Меряем его, затем — BillLedger:
+построение с нуля (старт бота), показ без изменений, синхронизацию после
+правки одной позиции и после нового платежа.
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from steward.data.models.bill_v2 import (
+    BillItemAssignment,
+    BillPaymentV2,
+    BillPerson,
+    BillTransaction,
+    BillV2,
+)
+from steward.features.bills import fmt
+from steward.helpers.bills_ledger import BillLedger
+
+DEFAULT_BILLS = 3000
+PEOPLE = [f"p{i}" for i in range(12)]
+ROUNDS = 5
+
+
+def build(n: int) -> tuple[list[BillV2], list[BillPaymentV2]]:
+    rng = random.Random(1)
+    start = datetime(2024, 1, 1)
+    bills, payments = [], []
+    for bill_id in range(1, n + 1):
+        participants = rng.sample(PEOPLE, 4)
+        transactions = [
+            BillTransaction(
+                id=f"{bill_id}-{i}",
+                item_name="позиция",
+                creditor=rng.choice(participants),
+                unit_price_minor=rng.randint(100, 5000),
+                quantity=2,
+                assignments=[
+                    BillItemAssignment(unit_count=1, debtors=rng.sample(participants, 2)),
+                    BillItemAssignment(unit_count=1, debtors=rng.sample(participants, 1)),
+                ],
+            )
+            for i in range(8)
+        ]
+        bills.append(BillV2(
+            id=bill_id, name=f"Счёт {bill_id}", author_person_id=participants[0],
+            participants=participants, transactions=transactions,
+            created_at=start + timedelta(hours=bill_id), closed=rng.random() < 0.7,
+        ))
+        debtor, creditor = rng.sample(participants, 2)
+        payments.append(BillPaymentV2(
+            id=str(bill_id), debtor=debtor, creditor=creditor,
+            amount_minor=rng.randint(100, 3000), status="confirmed",
+            bill_ids=[bill_id] if rng.random() < 0.8 else [],
+        ))
+    return bills, payments
+
+
+def _render(bills, payments, by_id, ledger=None):
+    fmt.format_overview(bills, PEOPLE[0], by_id, payments, ledger=ledger)
+    fmt.format_overview_rich(bills, PEOPLE[0], by_id, payments, ledger=ledger)
+    fmt._compute_balances(bills, PEOPLE[0], payments, ledger)
+
+
+def _ms(func) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main(n: int):
+    bills, payments = build(n)
+    by_id = {pid: BillPerson(id=pid, display_name=pid) for pid in PEOPLE}
+    mine = [bill for bill in bills if PEOPLE[0] in bill.participants]
+    print(f"{n} bills, {sum(len(b.transactions) for b in bills)} items, {len(payments)} payments")
+
+    full = _ms(lambda: _render(mine, payments, by_id))
+    print(f"  overview, full recompute : {full:>8.1f} ms")
+
+    ledger = BillLedger()
+    rebuild = _ms(lambda: ledger.rebuild(bills, payments))
+    print(f"  ledger rebuild (startup) : {rebuild:>8.1f} ms")
+    cached = _ms(lambda: _render(mine, payments, by_id, ledger.balances(mine)))
+    print(f"  overview from ledger     : {cached:>8.1f} ms  (×{full / cached:.0f})")
+
+    rng = random.Random(2)
+
+    def edit_item():
+        bill = rng.choice(bills)
+        bill.transactions[0].unit_price_minor += 1
+        ledger.sync(bills, payments)
+
+    def add_payment():
+        debtor, creditor = rng.sample(PEOPLE, 2)
+        payments.append(BillPaymentV2(
+            id=str(len(payments)), debtor=debtor, creditor=creditor,
+            amount_minor=500, status="confirmed",
+        ))
+        # ledger_for так и зовёт, когда save() задел только платежи
+        ledger.sync(bills, payments, bills_changed=False)
+
+    print(f"  sync after item edit     : {_ms(edit_item):>8.1f} ms")
+    print(f"  sync after new payment   : {_ms(add_payment):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BILLS)
@@ -0,0 +1,78 @@
+"""Скорость поиска хода бота шахмат и шашек на фиксированных позициях.
+
+Запуск: python -m tests.perf.bench_board_search [budget_sec]
+
+Для каждой позиции — узлы в секунду, досчитанная глубина и время до хода
+при бюджете hard-бота; затем — насколько тормозит event loop, пока бот
+думает в пуле процессов (максимальная пауза между тиками по 5 мс).
+"""
+import asyncio
+import sys
+import time
+
+import chess
+
+from steward.boardgames import checkers_logic, search
+from steward.boardgames.chess_logic import BOT_HARD
+
+CHESS_POSITIONS = {
+    "start": chess.STARTING_FEN,
+    "italian": "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "middlegame": "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "endgame": "8/5pk1/6p1/8/3R4/6PP/5PK1/3r4 w - - 0 40",
+}
+
+
+def _checkers_positions() -> dict[str, list[list[str]]]:
+    start = checkers_logic.new_board()
+    sparse = [["." for _ in range(8)] for _ in range(8)]
+    for r, c, p in [(5, 0, "w"), (5, 2, "w"), (6, 5, "w"), (7, 2, "W"), (2, 1, "b"), (2, 5, "b"), (1, 4, "b"), (0, 3, "B")]:
+        sparse[r][c] = p
+    return {"start": start, "sparse": sparse}
+
+
+def _report(name: str, result: search.SearchResult) -> None:
+    rate = result.nodes / result.elapsed if result.elapsed else 0.0
+    print(
+        f"  {name:<11} {rate:>9,.0f} nodes/s  depth {result.depth:>2}  "
+        f"{result.elapsed * 1000:>6.0f} ms  move {result.move}"
+    )
+
+
+async def _loop_lag() -> float:
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    # Первый вызов поднимает воркеры — прогреваем, чтобы мерить сам поиск
+    await search.choose_chess_move(chess.Board(), BOT_HARD)
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    await search.choose_chess_move(chess.Board(CHESS_POSITIONS["middlegame"]), BOT_HARD)
+    stop.set()
+    await tick
+    search.shutdown()
+    return max(gaps)
+
+
+def main(budget: float):
+    print(f"chess, budget {budget:.2f}s")
+    for name, fen in CHESS_POSITIONS.items():
+        search._tt.clear()
+        _report(name, search.search_chess(chess.Board(fen), budget))
+    print(f"checkers, budget {budget:.2f}s")
+    for name, board in _checkers_positions().items():
+        search._tt.clear()
+        _report(name, search.search_checkers(board, "white", None, budget))
+    lag = asyncio.run(_loop_lag())
+    print(f"event loop max gap while the bot thinks in the pool: {lag * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else search.SEARCH_BUDGET_SEC[BOT_HARD])
@@ -0,0 +1,381 @@
+"""Нагрузочный прогон Bot: поток апдейтов в _chat/_callback/_inline_query.
+
+Запуск: python -m tests.perf.bench_bot_load [--rate 200] [--duration 30]
+            [--users 10000] [--replay updates.jsonl] [--dump updates.jsonl]
+            [--out results.json] [--compare baseline.json]
+
+Бот собирается как в main.py (все фичи + /help, без AI-роутера — он ходит в
+сеть), Bot API подменён MockRequest из tests/conftest.py, Telethon — моком.
+База синтетическая: N пользователей, настроек чатов и напоминаний
+(build_db из bench_repository_save), хранилище — настоящий JournalFileStorage
+во временном каталоге с окном group commit как в проде.
+
+Апдейты идут с заданной частотой, не дожидаясь предыдущих (как
+concurrent_updates в PTB): текст, команды, реакции, нажатия кнопок, inline.
+Вместо генерации можно проиграть записанный поток: JSONL с Update.to_dict()
+по строке (--dump сохраняет сгенерированный поток в том же формате).
+
+Отчёт: p50/p95/p99 времени обработки по видам апдейтов, лаг event loop,
+сохранения в секунду (запрошенные save() и реальные записи хранилища),
+прирост RSS. --out пишет то же в JSON, --compare сравнивает с прошлым
+прогоном и подсвечивает ухудшения больше REGRESSION_THRESHOLD.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+from telegram import Update
+from telegram.ext import CallbackContext
+
+from steward.bot.bot import Bot
+from steward.data.repository import JournalFileStorage, Repository
+from steward.features._special.help import HelpFeature
+from steward.features.registry import all_features
+from steward.metrics import NoopMetricsEngine
+from tests.conftest import CHAT_ID, MockRequest, make_bot
+from tests.perf.bench_repository_save import build_db
+
+RESULTS_FORMAT = 1
+# Во сколько раз метрика может ухудшиться, прежде чем --compare поднимет флаг
+REGRESSION_THRESHOLD = 1.2
+LAG_TICK_SEC = 0.01
+SAVE_WINDOW_SEC = 1.0
+
+# Доли видов апдейтов в сгенерированном потоке
+DEFAULT_MIX = {"text": 0.6, "command": 0.15, "reaction": 0.1, "callback": 0.1, "inline": 0.05}
+COMMANDS = ["/help", "/id", "/me", "/pretty_time", "/remind", "/layout привет"]
+TEXTS = [
+    "привет всем",
+    "кто идёт вечером?",
+    "ну это уже слишком",
+    "ghbdtn",
+    "завтра в 10 созвон",
+    "ахаха",
+]
+REACTIONS = ["👍", "🔥", "😁", "🤬"]
+CALLBACKS = ["help|1", "pagination|2", "unknown|1"]
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"}
+
+
+def _message(message_id: int, user_id: int, chat_id: int, text: str) -> dict:
+    message = {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"},
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return message
+
+
+def generate(count: int, users: int, chats: int, seed: int = 1, mix: dict[str, float] = DEFAULT_MIX) -> list[dict]:
+    """Synthetic update stream as Bot API JSON (what Update.de_json accepts)."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    updates = []
+    for update_id in range(1, count + 1):
+        kind = rng.choices(kinds, weights)[0]
+        user_id = rng.randrange(1, users + 1)
+        chat_id = CHAT_ID - rng.randrange(chats)
+        message_id = 1_000 + update_id
+        update: dict[str, Any] = {"update_id": update_id}
+        if kind == "text":
+            update["message"] = _message(message_id, user_id, chat_id, rng.choice(TEXTS))
+        elif kind == "command":
+            update["message"] = _message(message_id, user_id, chat_id, rng.choice(COMMANDS))
+        elif kind == "reaction":
+            update["message_reaction"] = {
+                "chat": {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"},
+                "message_id": rng.randrange(1_000, message_id),
+                "user": _user(user_id),
+                "date": int(time.time()),
+                "old_reaction": [],
+                "new_reaction": [{"type": "emoji", "emoji": rng.choice(REACTIONS)}],
+            }
+        elif kind == "callback":
+            update["callback_query"] = {
+                "id": str(update_id),
+                "from": _user(user_id),
+                "chat_instance": str(chat_id),
+                "data": rng.choice(CALLBACKS),
+                "message": _message(message_id, 1, chat_id, "меню"),
+            }
+        else:
+            update["inline_query"] = {
+                "id": str(update_id),
+                "from": _user(user_id),
+                "query": rng.choice(TEXTS),
+                "offset": "",
+            }
+        updates.append(update)
+    return updates
+
+
+def kind_of(update: Update) -> str:
+    if update.callback_query is not None:
+        return "callback"
+    if update.inline_query is not None:
+        return "inline"
+    if update.message_reaction is not None:
+        return "reaction"
+    text = update.message.text if update.message is not None else None
+    return "command" if text and text.startswith("/") else "text"
+
+
+class CountingStorage(JournalFileStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = 0
+
+    async def write_dict(self, data):
+        self.writes += 1
+        await super().write_dict(data)
+
+    async def write_changes(self, changes):
+        self.writes += 1
+        await super().write_changes(changes)
+
+
+async def build(tmp_dir: str, users: int) -> tuple[Bot, Any, CountingStorage]:
+    storage = CountingStorage(f"{tmp_dir}/db.json", journal_path=f"{tmp_dir}/db.json.journal")
+    repository = Repository(storage, save_window=SAVE_WINDOW_SEC)
+    repository.db = build_db(users)
+    await repository.save()
+    await repository.flush()
+
+    handlers = all_features()
+    handlers.append(HelpFeature(handlers))
+    bot = Bot(handlers, repository, NoopMetricsEngine())
+    bot.bot, application = await make_bot(MockRequest())
+    bot.client = MagicMock()
+    bot.client.get_messages = AsyncMock(return_value=[])
+    # То же, что делают Bot.start и post_init, без сети и фоновых задач
+    for handler in handlers:
+        handler.bot = bot.bot
+    await repository.migrate()
+    for handler in handlers:
+        if init_coro := handler.init():
+            await init_coro
+    return bot, application, storage
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        # Не Linux — только пик (ru_maxrss в КБ)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def run(raw_updates: list[dict], rate: float, users: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench_bot_load_") as tmp_dir:
+        bot, application, storage = await build(tmp_dir, users)
+        repository = bot.repository
+        saves = 0
+        original_save = repository.save
+
+        async def counting_save(*fields):
+            nonlocal saves
+            saves += 1
+            await original_save(*fields)
+
+        repository.save = counting_save
+        storage.writes = 0
+
+        routes = {
+            "text": bot._chat,
+            "command": bot._chat,
+            "reaction": bot._chat,
+            "callback": bot._callback,
+            "inline": bot._inline_query,
+        }
+        updates = [Update.de_json(raw, bot.bot) for raw in raw_updates]
+        latencies: dict[str, list[float]] = defaultdict(list)
+        errors = 0
+        lags: list[float] = []
+        done = False
+
+        async def measure_lag():
+            while not done:
+                started = time.perf_counter()
+                await asyncio.sleep(LAG_TICK_SEC)
+                lags.append(max(0.0, time.perf_counter() - started - LAG_TICK_SEC))
+
+        async def handle(update: Update, kind: str, due: float):
+            nonlocal errors
+            try:
+                await routes[kind](update, CallbackContext(application))
+            except Exception:
+                errors += 1
+            # От момента, когда апдейт должен был прийти, — ожидание loop тоже считается
+            latencies[kind].append(time.perf_counter() - due)
+
+        gc.collect()
+        rss_before = _rss_mb()
+        lag_task = asyncio.create_task(measure_lag())
+        started = time.perf_counter()
+        tasks = []
+        for i, update in enumerate(updates):
+            due = started + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(handle(update, kind_of(update), due)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        await repository.flush()
+        done = True
+        await lag_task
+        gc.collect()
+        rss_after = _rss_mb()
+        await application.shutdown()
+
+    all_latencies = [s for samples in latencies.values() for s in samples]
+    return {
+        "format": RESULTS_FORMAT,
+        "revision": _revision(),
+        "config": {"updates": len(updates), "rate": rate, "users": users},
+        "elapsed_sec": elapsed,
+        "throughput_per_sec": len(updates) / elapsed,
+        "errors": errors,
+        "latency": {"all": _percentiles(all_latencies)}
+        | {kind: _percentiles(samples) for kind, samples in sorted(latencies.items())},
+        "loop_lag": _percentiles(lags),
+        "saves_per_sec": saves / elapsed,
+        "storage_writes_per_sec": storage.writes / elapsed,
+        "rss_growth_mb": rss_after - rss_before,
+    }
+
+
+def _revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# Метрики, по которым сравниваем прогоны: больше — хуже
+COMPARED = [
+    ("latency.all.p50_ms", "latency p50, ms"),
+    ("latency.all.p95_ms", "latency p95, ms"),
+    ("latency.all.p99_ms", "latency p99, ms"),
+    ("loop_lag.p99_ms", "loop lag p99, ms"),
+    ("loop_lag.max_ms", "loop lag max, ms"),
+    ("storage_writes_per_sec", "storage writes/s"),
+    ("rss_growth_mb", "RSS growth, MB"),
+]
+
+
+def _lookup(results: dict, dotted: str) -> float:
+    value: Any = results
+    for part in dotted.split("."):
+        value = value[part]
+    return float(value)
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """Lines for metrics that got worse than `baseline` by more than REGRESSION_THRESHOLD."""
+    regressions = []
+    for key, label in COMPARED:
+        before, after = _lookup(baseline, key), _lookup(current, key)
+        # Мелочь в пределах миллисекунды/мегабайта — шум, не регресс
+        if after > max(before * REGRESSION_THRESHOLD, before + 1.0):
+            regressions.append(f"{label}: {before:.2f} -> {after:.2f}")
+    return regressions
+
+
+def report(results: dict) -> None:
+    config = results["config"]
+    print(
+        f"{config['updates']} updates @ {config['rate']:.0f}/s, {config['users']} users "
+        f"({results['revision']}): {results['throughput_per_sec']:.0f}/s, errors {results['errors']}"
+    )
+    print(f"{'kind':>9} | {'count':>6} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'max':>8}")
+    for kind, p in results["latency"].items():
+        print(
+            f"{kind:>9} | {p['count']:>6} | {p['p50_ms']:>6.1f}ms | {p['p95_ms']:>6.1f}ms | "
+            f"{p['p99_ms']:>6.1f}ms | {p['max_ms']:>6.1f}ms"
+        )
+    lag = results["loop_lag"]
+    print(f"loop lag: p50 {lag['p50_ms']:.1f}ms  p99 {lag['p99_ms']:.1f}ms  max {lag['max_ms']:.1f}ms")
+    print(
+        f"saves/s: {results['saves_per_sec']:.1f} requested, "
+        f"{results['storage_writes_per_sec']:.1f} written; RSS +{results['rss_growth_mb']:.1f} MB"
+    )
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.perf.bench_bot_load")
+    parser.add_argument("--rate", type=float, default=200.0, help="updates per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of generated traffic")
+    parser.add_argument("--users", type=int, default=10_000, help="synthetic database size")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay", help="JSONL of recorded Update dicts to play instead of generating")
+    parser.add_argument("--dump", help="write the generated stream as JSONL and exit")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="previous --out file; exit 1 on regressions")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        raw = [json.loads(line) for line in Path(args.replay).read_text().splitlines() if line.strip()]
+    else:
+        raw = generate(int(args.rate * args.duration), args.users, args.chats, args.seed)
+    if args.dump:
+        Path(args.dump).write_text("".join(json.dumps(u, ensure_ascii=False) + "\n" for u in raw))
+        return 0
+
+    # Bot логирует каждый апдейт на INFO — в замерах это шум
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(run(raw, args.rate, args.users))
+    report(results)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), results)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""Сколько стоит найти обработчик нажатой кнопки в зависимости от числа роутов.
+
+Запуск: python -m tests.perf.bench_callback_dispatch [60 600 6000]
+
+Сравниваем прежний путь — каждый роут каждой фичи делает schema.parse(data) —
+с DispatchTable: префикс до первого '|' → фичи-владельцы → их роуты с этим
+именем. Жмём кнопку последнего роута (худший случай для перебора) и кнопку
+с неизвестным префиксом.
+"""
+import sys
+import time
+from unittest.mock import MagicMock
+
+from steward.bot.dispatch import DispatchTable
+from steward.framework import Feature, on_callback
+
+DEFAULT_ROUTES = [60, 600, 6000]
+ROUTES_PER_FEATURE = 10
+REPEAT = 2_000
+
+
+def build_features(routes: int) -> list[Feature]:
+    features = []
+    for i in range(max(1, routes // ROUTES_PER_FEATURE)):
+        attrs = {}
+        for j in range(ROUTES_PER_FEATURE):
+            async def handler(self, ctx, item_id: int, page: int):
+                return True
+            attrs[f"cb_{j}"] = on_callback(f"f{i}:a{j}", schema="<item_id:int>|<page:int>")(handler)
+        features.append(type(f"Bench{i}Feature", (Feature,), attrs)())
+    return features
+
+
+def _update(data: str):
+    update = MagicMock()
+    update.callback_query.data = data
+    return update
+
+
+def linear(features: list[Feature], data: str):
+    for feature in features:
+        for route in feature._callbacks:
+            if route.schema.parse(data) is not None:
+                return route
+    return None
+
+
+def indexed(table: DispatchTable, update) -> object | None:
+    data = update.callback_query.data
+    parts = data.split("|")
+    for feature in table.route(update, "callback"):
+        for route in feature._callbacks_by_name.get(parts[0], ()):
+            if route.schema.parse_parts(parts) is not None:
+                return route
+    return None
+
+
+def _per_call(func) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - started) / REPEAT
+
+
+def bench(routes: int) -> dict[str, float]:
+    features = build_features(routes)
+    table = DispatchTable(features)
+    last = f"f{len(features) - 1}:a{ROUTES_PER_FEATURE - 1}|42|3"
+    hit, miss = _update(last), _update("nobody:knows|1")
+    assert linear(features, last) is indexed(table, hit) is not None
+    return {
+        "linear_hit": _per_call(lambda: linear(features, last)),
+        "indexed_hit": _per_call(lambda: indexed(table, hit)),
+        "linear_miss": _per_call(lambda: linear(features, "nobody:knows|1")),
+        "indexed_miss": _per_call(lambda: indexed(table, miss)),
+    }
+
+
+def main(sizes: list[int]):
+    print(f"{'routes':>7} | {'linear hit':>10} | {'table hit':>10} | {'linear miss':>11} | {'table miss':>10}")
+    for n in sizes:
+        r = bench(n)
+        print(
+            f"{n:>7} | {r['linear_hit'] * 1e6:>8.1f}µs | {r['indexed_hit'] * 1e6:>8.1f}µs | "
+            f"{r['linear_miss'] * 1e6:>9.1f}µs | {r['indexed_miss'] * 1e6:>8.1f}µs"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or DEFAULT_ROUTES)
@@ -0,0 +1,116 @@
+"""Трансляция в сотни чатов одновременно с напоминаниями: прямые вызовы Bot API против общей очереди.
+
+Запуск: python -m tests.perf.bench_outbound_queue [chats]
+
+Подставной сервер держит лимиты Telegram, ускоренные в SPEEDUP раз (общий
+30/с, в группу 20/мин), и на превышение отвечает 429 с retry_after. Без
+очереди отправители честно ждут retry_after и повторяют — как это делает
+python-telegram-bot. Меряем число 429, время до доставки всей трансляции и
+задержку напоминаний, сработавших посреди неё.
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+import warnings
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+
+from steward.bot.outbound import (
+    GLOBAL_BURST,
+    GLOBAL_RATE,
+    GROUP_BURST,
+    GROUP_RATE,
+    OutboundQueue,
+    Priority,
+)
+
+DEFAULT_CHATS = 300
+REMINDERS = 40
+SPEEDUP = 20.0
+
+
+class FloodServer:
+    """Sliding-window limits: 30 per second overall, 20 per minute per chat."""
+
+    def __init__(self):
+        self.floods = 0
+        self._global: deque[float] = deque()
+        self._chats: dict[int, deque[float]] = defaultdict(deque)
+
+    async def send(self, chat_id: int) -> None:
+        await asyncio.sleep(0.002)
+        now = time.monotonic()
+        window, per_chat_window = 1 / SPEEDUP, 60 / SPEEDUP
+        sent, chat_sent = self._global, self._chats[chat_id]
+        while sent and now - sent[0] > window:
+            sent.popleft()
+        while chat_sent and now - chat_sent[0] > per_chat_window:
+            chat_sent.popleft()
+        if len(sent) >= 30 or len(chat_sent) >= 20:
+            self.floods += 1
+            raise RetryAfter(timedelta(seconds=1 / SPEEDUP))
+        sent.append(now)
+        chat_sent.append(now)
+
+
+async def _direct(server: FloodServer, chat_id: int) -> None:
+    while True:
+        try:
+            return await server.send(chat_id)
+        except RetryAfter as e:
+            await asyncio.sleep(float(e.retry_after))
+
+
+async def run(chats: int, use_queue: bool) -> tuple[int, float, list[float]]:
+    server = FloodServer()
+    queue = OutboundQueue(
+        global_rate=GLOBAL_RATE * SPEEDUP,
+        global_burst=GLOBAL_BURST,
+        group_rate=GROUP_RATE * SPEEDUP,
+        group_burst=GROUP_BURST,
+    )
+
+    async def send(chat_id: int, priority: Priority) -> None:
+        if use_queue:
+            await queue.send(chat_id, lambda: server.send(chat_id), priority)
+        else:
+            await _direct(server, chat_id)
+
+    async def reminder(chat_id: int, fire_at: float) -> float:
+        await asyncio.sleep(fire_at)
+        started = time.monotonic()
+        await send(chat_id, Priority.NOTIFY)
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    broadcast = asyncio.gather(*(send(-1000 - i, Priority.BULK) for i in range(chats)))
+    reminders = asyncio.gather(*(
+        reminder(-2000 - i, i * 0.01) for i in range(REMINDERS)
+    ))
+    await broadcast
+    broadcast_time = time.monotonic() - started
+    latencies = await reminders
+    queue.close()
+    return server.floods, broadcast_time, latencies
+
+
+def main() -> None:
+    warnings.simplefilter("ignore", DeprecationWarning)
+    logging.disable(logging.WARNING)
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CHATS
+    print(f"{chats} чатов, {REMINDERS} напоминаний, лимиты ускорены в {SPEEDUP:g} раз")
+    for label, use_queue in (("напрямую", False), ("через очередь", True)):
+        floods, elapsed, latencies = asyncio.run(run(chats, use_queue))
+        print(
+            f"{label:>14}: 429 — {floods:5d}, трансляция {elapsed * 1000:7.0f} мс, "
+            f"напоминание p50 {statistics.median(latencies) * 1000:5.0f} мс, "
+            f"max {max(latencies) * 1000:5.0f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Скорость оценки покерных рук: перебор пятёрок через _eval5 против таблиц.
+
+Запуск: python -m tests.perf.bench_poker_eval [hands]
+
+Меряем оценки 7-карточных рук в секунду: прежний best_hand (21 пятёрка
+через _eval5), табличный evaluator.hand_value и векторную
+equity.hand_values, плюс сколько раздач Monte Carlo успевает за бюджет
+hard-бота против трёх соперников.
+"""
+import random
+import sys
+import time
+from itertools import combinations
+
+import numpy as np
+
+from steward.poker.bot_ai import HARD_EQUITY_BUDGET
+from steward.poker.engine import SUITS, Card, _eval5
+from steward.poker.equity import card_id, estimate_equity, hand_values
+from steward.poker.evaluator import hand_value
+
+DEFAULT_HANDS = 20_000
+
+
+def _bruteforce(cards):
+    return max(_eval5(list(combo)) for combo in combinations(cards, 5))
+
+
+def _rate(func, hands) -> float:
+    started = time.perf_counter()
+    for hand in hands:
+        func(hand)
+    return len(hands) / (time.perf_counter() - started)
+
+
+def main(n: int):
+    deck = [Card(r, s) for r in range(2, 15) for s in SUITS]
+    rnd = random.Random(1)
+    hands = [rnd.sample(deck, 7) for _ in range(n)]
+    ids = np.array([[card_id(c) for c in h] for h in hands])
+
+    old = _rate(_bruteforce, hands)
+    table = _rate(hand_value, hands)
+    started = time.perf_counter()
+    hand_values(ids)
+    vectorized = n / (time.perf_counter() - started)
+    print(f"{n} random 7-card hands")
+    print(f"  _eval5 × 21      : {old:>12,.0f} hands/s")
+    print(f"  hand_value       : {table:>12,.0f} hands/s  (×{table / old:.0f})")
+    print(f"  hand_values (np) : {vectorized:>12,.0f} hands/s  (×{vectorized / old:.0f})")
+
+    hole = [Card(14, "h"), Card(13, "h")]
+    board = [Card(12, "h"), Card(7, "c"), Card(2, "d")]
+    rng = np.random.default_rng(0)
+    trials = 20_000
+    started = time.perf_counter()
+    equity = estimate_equity(hole, board, 3, budget=60, max_trials=trials, rng=rng)
+    rate = trials / (time.perf_counter() - started)
+    print(
+        f"  Monte Carlo vs 3 : {rate:>12,.0f} run-outs/s → ~{rate * HARD_EQUITY_BUDGET:,.0f} "
+        f"in the {HARD_EQUITY_BUDGET * 1000:.0f}ms hard-bot budget (AhKh on Qh7c2d: {equity:.2f})"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_HANDS)
@@ -0,0 +1,105 @@
+"""Сколько event loop простаивает за один Repository.save().
+
+Запуск: python -m tests.perf.bench_repository_save [1000 10000 100000]
+
+Для каждого размера базы (users + chat_settings + reminders по N записей)
+меряем, на сколько максимум «залипает» loop, пока идёт save: параллельно
+крутится тикер с sleep(0) и пишет самую длинную паузу между тиками.
+Сравниваем с прежним путём — asdict + json.dumps прямо на loop'е.
+"""
+import asyncio
+import datetime
+import json
+import sys
+import time
+from dataclasses import asdict
+
+from steward.data.models.chat_settings import ChatSettings
+from steward.data.models.db import Database
+from steward.data.models.user import User
+from steward.data.repository import JsonEncoder, Repository, Storage
+from steward.delayed_action.reminder import ReminderDelayedAction, ReminderGenerator
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+ROUNDS = 3
+
+
+class _NullStorage(Storage):
+    async def read_dict(self):
+        return {}
+
+    async def write_dict(self, data):
+        await asyncio.to_thread(json.dumps, data, sort_keys=True, indent=4, cls=JsonEncoder)
+
+
+def build_db(n: int) -> Database:
+    db = Database()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i in range(n):
+        db.users.append(User(i, f"user{i}", [-i], first_name=f"User {i}"))
+        db.chat_settings.append(ChatSettings(chat_id=-i, enabled_capabilities={"ai", "fun"}))
+        db.delayed_actions.append(
+            ReminderDelayedAction(
+                generator=ReminderGenerator(next_fire=now),
+                id=i,
+                chat_id=-i,
+                user_id=i,
+                text=f"reminder {i}",
+                created_at=now,
+            )
+        )
+    return db
+
+
+async def _max_loop_stall(work) -> tuple[float, float]:
+    """(самая длинная пауза loop'а, полное время work) в секундах."""
+    stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await work()
+    total = time.perf_counter() - started
+    done = True
+    await tick
+    return stall, total
+
+
+async def bench(n: int) -> dict[str, float]:
+    repo = Repository(_NullStorage())
+    repo.db = build_db(n)
+
+    async def inline_save():
+        json.dumps(asdict(repo.db), sort_keys=True, indent=4, cls=JsonEncoder)
+
+    inline = [await _max_loop_stall(inline_save) for _ in range(ROUNDS)]
+    offloop = [await _max_loop_stall(repo.save) for _ in range(ROUNDS)]
+    return {
+        "inline_stall": min(s for s, _ in inline),
+        "offloop_stall": min(s for s, _ in offloop),
+        "offloop_total": min(t for _, t in offloop),
+    }
+
+
+async def main(sizes: list[int]):
+    print(f"{'records':>8} | {'inline stall':>12} | {'save stall':>10} | {'save total':>10}")
+    for n in sizes:
+        r = await bench(n)
+        print(
+            f"{n:>8} | {r['inline_stall'] * 1000:>10.1f}ms | "
+            f"{r['offloop_stall'] * 1000:>8.1f}ms | {r['offloop_total'] * 1000:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(a) for a in sys.argv[1:]] or DEFAULT_SIZES))
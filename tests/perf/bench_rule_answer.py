@@ -0,0 +1,105 @@
+"""Стоимость RuleAnswerFeature на одно текстовое сообщение.
+
+Запуск: python -m tests.perf.bench_rule_answer [rules chats]
+
+По умолчанию 1000 правил × 100 чатов: каждое правило живёт в 1–3 чатах,
+регэкспы разные (слово + немного синтаксиса). Сравниваем прежний answer()
+(list(rules) + re.search по каждому правилу с проверкой чата) с индексом
+по чатам и общим префильтром. Обе фичи гоняем через chat() на одном и том
+же контексте, так что накладные расходы моков одинаковые. Меряем сообщение
+без совпадений — это подавляющее большинство трафика — и сообщение, на
+которое правило есть.
+"""
+import asyncio
+import random
+import re
+import sys
+import time
+from unittest.mock import MagicMock
+
+from steward.data.models.rule import Response, Rule, RulePattern
+from steward.features.rule_answer import RuleAnswerFeature
+from steward.framework import on_message
+from tests.conftest import make_repository, make_text_context
+
+REPEAT = 500
+
+
+def build_rules(n_rules: int, n_chats: int) -> list[Rule]:
+    rnd = random.Random(1)
+    rules = []
+    for i in range(n_rules):
+        chats = {-(1000 + rnd.randrange(n_chats)) for _ in range(rnd.randint(1, 3))}
+        rules.append(Rule(
+            id=i + 1,
+            from_users={0},
+            pattern=RulePattern(regex=rf"\bслово{i}(ка|чик)?\b", ignore_case_flag=i % 2),
+            # Нулевая вероятность: меряем поиск, а не отправку ответа
+            responses=[Response(0, 0, 0, text="ok")],
+            tags=[],
+            chats=chats,
+        ))
+    return rules
+
+
+class LegacyRuleAnswerFeature(RuleAnswerFeature):
+    """Прежний answer(): перебор всех правил на каждое сообщение."""
+
+    @on_message
+    async def answer(self, ctx) -> bool:
+        if ctx.message is None or not isinstance(ctx.message.text, str):
+            return False
+        if self._addressed_to_ai(ctx):
+            return False
+        rules_list = list(self.rules)
+
+        def matches(rule: Rule) -> bool:
+            if ctx.chat_id not in rule.chats:
+                return False
+            if not re.search(
+                rule.pattern.regex,
+                ctx.message.text,
+                re.IGNORECASE if rule.pattern.ignore_case_flag == 1 else 0,
+            ):
+                return False
+            return ctx.user_id in rule.from_users or 0 in rule.from_users
+
+        available = [r for r in rules_list if matches(r)]
+        return bool(available) and False
+
+
+async def _per_call(func) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        await func()
+    return (time.perf_counter() - started) / REPEAT
+
+
+async def bench(n_rules: int, n_chats: int):
+    repo = make_repository()
+    repo.db.rules = build_rules(n_rules, n_chats)
+    features = {}
+    for name, cls in (("old", LegacyRuleAnswerFeature), ("indexed", RuleAnswerFeature)):
+        feature = features[name] = cls()
+        feature.repository = repo
+        feature.bot = MagicMock()
+
+    target = repo.db.rules[-1]
+    chat_id = next(iter(target.chats))
+    texts = {
+        "miss": "обычное сообщение без триггеров, просто болтовня в чате",
+        "hit": f"а вот и слово{n_rules - 1}ка в тексте",
+    }
+    print(f"{n_rules} rules × {n_chats} chats")
+    for name, text in texts.items():
+        ctx = make_text_context(text, repo=repo, chat_id=chat_id)
+        timings = {}
+        for kind, feature in features.items():
+            await feature.chat(ctx)  # прогрев кэшей компиляции
+            timings[kind] = await _per_call(lambda: feature.chat(ctx))
+        print(f"  {name:>4}: old {timings['old'] * 1e6:>8.1f}µs | indexed {timings['indexed'] * 1e6:>7.1f}µs")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]] or [1000, 100]
+    asyncio.run(bench(*args))
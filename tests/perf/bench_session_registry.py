@@ -0,0 +1,103 @@
+"""Тысячи живых визардов: проверки сессий на каждом апдейте, старый проход по всем против индексов.
+
+Запуск: python -m tests.perf.bench_session_registry [sessions]
+
+Прежний registry на каждом апдейте искал устаревшие сессии проходом по всем
+и для has_active_session_in_chat перебирал все ключи. Здесь он повторён как
+SweepRegistry. Поток апдейтов: половина — от участников сессий, половина —
+из чатов без сессий. Отдельно меряем, сколько снимок для диска держит event loop.
+"""
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from steward.session.session_registry import SessionRegistry, _write
+
+DEFAULT_SESSIONS = 5000
+UPDATES = 20_000
+TTL_SECONDS = 4 * 3600
+
+
+class SweepRegistry:
+    """The registry before the index: dicts only, full scans per update."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.last_activity = {}
+
+    def activate(self, key, handler):
+        self.sessions[key] = handler
+        self.last_activity[key] = datetime.now(timezone.utc)
+
+    def on_update(self, key, chat_id) -> bool:
+        threshold = datetime.now(timezone.utc) - timedelta(seconds=TTL_SECONDS)
+        for stale in [k for k, ts in self.last_activity.items() if ts < threshold]:
+            self.sessions.pop(stale, None)
+            self.last_activity.pop(stale, None)
+        if key in self.sessions:
+            self.last_activity[key] = datetime.now(timezone.utc)
+            return True
+        return any(k[0] == chat_id for k in self.sessions)
+
+
+class _Wizard:
+    def snapshot_session(self, key):
+        return {
+            "feature": "PollFeature", "wizard": "poll:add", "step": 1,
+            "steps": [{"is_waiting": False}, {"is_waiting": True}],
+            "context": {"title": f"Опрос {key[1]}", "audience": "team"},
+        }
+
+
+def _indexed_on_update(sessions: SessionRegistry, key, chat_id) -> bool:
+    if key in sessions:
+        sessions.touch(key)
+        return True
+    return sessions.has_session_in_chat(chat_id)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SESSIONS
+    rng = random.Random(1)
+    keys = [(-1000 - i // 3, i) for i in range(count)]
+    updates = [
+        (key, key[0]) if rng.random() < 0.5 else ((-9, 1), -1 - rng.randrange(10_000))
+        for key in (rng.choice(keys) for _ in range(UPDATES))
+    ]
+    wizard = _Wizard()
+    old, new = SweepRegistry(), SessionRegistry()
+    for key in keys:
+        old.activate(key, wizard)
+        new.activate(key, wizard)
+
+    print(f"{count} сессий, {UPDATES} апдейтов")
+    for label, check in (
+        ("проход по всем", lambda key, chat_id: old.on_update(key, chat_id)),
+        ("индексы", lambda key, chat_id: _indexed_on_update(new, key, chat_id)),
+    ):
+        started = time.perf_counter()
+        for key, chat_id in updates:
+            check(key, chat_id)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>15}: {elapsed / UPDATES * 1e6:8.1f} мкс на апдейт")
+
+    started = time.perf_counter()
+    new.expire_due(TTL_SECONDS)
+    print(f"{'истечение':>15}: {(time.perf_counter() - started) * 1000:8.2f} мс за проход таймера")
+
+    # Первый снимок сериализует всё, следующие — только тронутые с прошлого раза
+    for label, touched in (("снимок, весь", keys), ("снимок, 1%", keys[::100])):
+        for key in touched:
+            new.touch(key)
+        started = time.perf_counter()
+        text = new.snapshot()
+        built = time.perf_counter() - started
+        with tempfile.TemporaryDirectory() as directory:
+            _write(f"{directory}/sessions.json", text)
+        print(f"{label:>15}: {built * 1000:8.1f} мс в event loop, {len(text) // 1024} КБ")
+
+
+if __name__ == "__main__":
+    main()
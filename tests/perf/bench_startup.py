@@ -0,0 +1,184 @@
+"""Холодный старт бота: цена импорта каждой фичи и время до первого ответа.
+
+Запуск: python -m tests.perf.bench_startup [--json | --check]
+
+Профиль идёт в свежем процессе. Сначала импортируется ядро бота
+(steward.bot.bot), затем модули фич в порядке реестра. По каждой фиче
+пишутся время импорта и прирост RSS. Общие зависимости достаются первой
+фиче, которая их потянула, — как в python -X importtime.
+
+Холодный старт меряется в отдельном процессе с нуля. Бот собирается как в
+main.py, но без AI-роутера и init-хуков: они ходят в сеть. Bot API подменён
+MockRequest. Время считается от запуска интерпретатора до ответа на /id.
+Сравниваются ленивый реестр и реестр со всеми фичами сразу (eager).
+
+--check — бюджет для CI: выходит с ошибкой, если ленивый старт не ответил,
+загрузил больше четверти фич или уложился дольше STARTUP_BUDGET_SEC секунд.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+# Секунды от запуска интерпретатора до ответа на первый апдейт; сейчас около 3
+STARTUP_BUDGET_SEC = float(os.environ.get("STARTUP_BUDGET_SEC", "8"))
+
+FIRST_UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": -100, "type": "supergroup", "title": "Startup"},
+        "from": {"id": 1, "is_bot": False, "first_name": "User"},
+        "text": "/id",
+        "entities": [{"type": "bot_command", "offset": 0, "length": 3}],
+    },
+}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        # Не Linux — только пик (ru_maxrss в КБ)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile_features() -> list[dict]:
+    """Import the bot core, then every feature module in registry order; time and RSS per step."""
+    rows = []
+    rss, started = _rss_mb(), time.perf_counter()
+    importlib.import_module("steward.bot.bot")
+    rows.append({"feature": "(ядро бота)", "import_ms": (time.perf_counter() - started) * 1000,
+                 "rss_mb": _rss_mb() - rss})
+
+    from steward.features.manifest import registered_refs
+
+    for ref in registered_refs():
+        rss, started = _rss_mb(), time.perf_counter()
+        importlib.import_module(ref.module)
+        rows.append({"feature": ref.__name__, "import_ms": (time.perf_counter() - started) * 1000,
+                     "rss_mb": _rss_mb() - rss})
+    return rows
+
+
+async def first_update(eager: bool) -> dict:
+    """Build the bot like main.py and handle one /id; runs in a fresh process."""
+    from telegram import Update
+    from telegram.ext import CallbackContext
+
+    from steward.bot.bot import Bot
+    from steward.features._special.help import HelpFeature
+    from steward.features.registry import all_features, lazy_features
+    from steward.framework.lazy import LazyFeature
+    from steward.metrics import NoopMetricsEngine
+    from tests.conftest import MockRequest, make_bot, make_repository
+
+    handlers = all_features() if eager else lazy_features()
+    handlers.append(HelpFeature(handlers))
+    bot = Bot(handlers, make_repository(), NoopMetricsEngine())
+    request = MockRequest()
+    bot.bot, application = await make_bot(request)
+    bot.client = MagicMock()
+    bot.client.get_messages = AsyncMock(return_value=[])
+    for handler in handlers:
+        handler.bot = bot.bot
+    await bot._chat(Update.de_json(FIRST_UPDATE, bot.bot), CallbackContext(application))
+    handled_at = time.time()
+    return {
+        "handled_at": handled_at,
+        "replied": any(endpoint == "sendMessage" for endpoint, _ in request.calls),
+        "features_loaded": sum(
+            1 for h in handlers if not isinstance(h, LazyFeature) or h.loaded
+        ),
+        "rss_mb": _rss_mb(),
+    }
+
+
+def cold_start(eager: bool = False, timeout: float = 120.0) -> dict:
+    """Time from spawning a fresh interpreter to the reply to its first update."""
+    command = [sys.executable, "-m", "tests.perf.bench_startup", "--first-update"]
+    if eager:
+        command.append("--eager")
+    spawned_at = time.time()
+    output = subprocess.run(command, capture_output=True, text=True, timeout=timeout, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result["cold_start_s"] = result.pop("handled_at") - spawned_at
+    return result
+
+
+def _fresh(flag: str) -> list[dict]:
+    output = subprocess.run(
+        [sys.executable, "-m", "tests.perf.bench_startup", flag],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def check_budget() -> list[str]:
+    """Problems with a lazy cold start; empty if it is within budget."""
+    from steward.features.manifest import registered_refs
+
+    result = cold_start(eager=False)
+    problems = []
+    if not result["replied"]:
+        problems.append("no reply to the first update")
+    if result["features_loaded"] >= len(registered_refs()) // 4:
+        problems.append(f"{result['features_loaded']} features loaded for one /id")
+    if result["cold_start_s"] > STARTUP_BUDGET_SEC:
+        problems.append(
+            f"first update handled {result['cold_start_s']:.2f}s after start, "
+            f"budget {STARTUP_BUDGET_SEC}s"
+        )
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    parser.add_argument("--check", action="store_true", help="fail if cold start is over budget")
+    parser.add_argument("--profile", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--first-update", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Внутренние режимы: запускаются в отдельном процессе и печатают JSON
+    if args.profile:
+        print(json.dumps(profile_features()))
+        return
+    if args.first_update:
+        print(json.dumps(asyncio.run(first_update(args.eager))))
+        return
+    if args.check:
+        problems = check_budget()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+    profile = _fresh("--profile")
+    starts = {"lazy": cold_start(eager=False), "eager": cold_start(eager=True)}
+    if args.json:
+        print(json.dumps({"profile": profile, "cold_start": starts}, ensure_ascii=False, indent=1))
+        return
+    print(f"{'фича':<32} {'импорт, мс':>10} {'RSS, МБ':>8}")
+    for row in sorted(profile, key=lambda r: -r["import_ms"]):
+        print(f"{row['feature']:<32} {row['import_ms']:10.1f} {row['rss_mb']:8.1f}")
+    print(f"{'всего':<32} {sum(r['import_ms'] for r in profile):10.1f} {sum(r['rss_mb'] for r in profile):8.1f}")
+    print()
+    for mode, result in starts.items():
+        print(
+            f"{mode:>5}: первый ответ через {result['cold_start_s']:.2f} с, "
+            f"загружено фич {result['features_loaded']}, RSS {result['rss_mb']:.0f} МБ"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Байты и CPU на рассылку состояния покерного стола: полные снимки против дельт.
+
+Запуск: python -m tests.perf.bench_state_delta [hands]
+
+Боты доигрывают раздачи за столом на 9 мест, после каждого действия
+состояние рассылается всем 9 зрителям: как раньше (state_for + json.dumps на
+каждого), через StateMessage (общая часть кодируется один раз) и дельтами
+DeltaStream. Считаем суммарные байты и время сериализации.
+"""
+import json
+import sys
+import time
+
+from steward.api import state_delta
+from steward.api.state_delta import DeltaStream
+from steward.api.ws_fanout import StateMessage
+from steward.poker.bot_ai import decide
+from steward.poker.engine import PHASE_SHOWDOWN, PHASE_WAITING, PokerGame
+
+DEFAULT_HANDS = 200
+SEATS = 9
+
+
+class _Socket:
+    closed = False
+
+
+def main(hands: int):
+    game = PokerGame()
+    uids = list(range(1, SEATS + 1))
+    for uid in uids:
+        game.add_player(uid, f"Игрок {uid}", chips=10**9)
+    sockets = {uid: _Socket() for uid in uids}
+    for ws in sockets.values():
+        state_delta._delta_sockets.add(ws)
+    stream = DeltaStream("game_state", "game_delta")
+
+    full_bytes = shared_bytes = delta_bytes = 0
+    full_time = shared_time = delta_time = 0.0
+    broadcasts = 0
+
+    def broadcast():
+        nonlocal full_bytes, shared_bytes, delta_bytes, full_time, shared_time, delta_time, broadcasts
+        broadcasts += 1
+        started = time.perf_counter()
+        for uid in uids:
+            full_bytes += len(json.dumps({"type": "game_state", "state": game.state_for(uid)}, ensure_ascii=False))
+        full_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        message = StateMessage("game_state", game.public_state())
+        for uid in uids:
+            shared_bytes += len(message.render(game.private_state(uid)))
+        shared_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        stream.publish(game.public_state())
+        for uid in uids:
+            data = stream.render(sockets[uid], game.private_state(uid))
+            delta_bytes += len(data) if data is not None else 0
+        delta_time += time.perf_counter() - started
+
+    for _ in range(hands):
+        if not game.start_hand():
+            break
+        broadcast()
+        guard = 0
+        while game.phase not in (PHASE_SHOWDOWN, PHASE_WAITING) and guard < 1000:
+            guard += 1
+            idx = game.current_idx
+            player = game.players[idx]
+            act, amount = decide(game, idx, "easy")
+            if not game.action(player.user_id, act, amount)[0]:
+                game.action(player.user_id, "fold")
+            broadcast()
+
+    print(f"{hands} hands at {SEATS} seats, {broadcasts} broadcasts × {SEATS} viewers")
+    for label, size, spent in (
+        ("state_for + dumps", full_bytes, full_time),
+        ("StateMessage", shared_bytes, shared_time),
+        ("DeltaStream", delta_bytes, delta_time),
+    ):
+        print(
+            f"  {label:<18}: {size / broadcasts / SEATS:>8,.0f} B/viewer  "
+            f"{spent / broadcasts * 1e6:>8,.0f} µs/broadcast  (bytes ×{full_bytes / size:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_HANDS)
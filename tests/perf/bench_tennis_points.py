@@ -0,0 +1,52 @@
+"""Стоимость одного тапа в паделе: полный пересчёт points_log против PadelScorer.
+
+Запуск: python -m tests.perf.bench_tennis_points [points]
+
+Длинный матч до трёх сетов с тай-брейками: после каждого очка считаем счёт
+заново через padel_state (как раньше делал add_point) и одним шагом
+PadelScorer.apply. Печатаем среднее и худшее время на тап.
+"""
+import random
+import sys
+import time
+
+from steward.tennis.engine import SIDE_A, SIDE_B, PadelScorer, padel_state
+
+DEFAULT_POINTS = 400
+
+
+def main(points: int):
+    rng = random.Random(1)
+    # Почти равные стороны — больше ровно/тай-брейков, матч идёт дольше
+    log = [SIDE_A if rng.random() < 0.5 else SIDE_B for _ in range(points)]
+
+    replay_total = replay_worst = 0.0
+    history: list[str] = []
+    for side in log:
+        history.append(side)
+        started = time.perf_counter()
+        padel_state(list(history), golden_point=False, sets_to_win=3)
+        spent = time.perf_counter() - started
+        replay_total += spent
+        replay_worst = max(replay_worst, spent)
+
+    scorer = PadelScorer(golden_point=False, sets_to_win=3)
+    scorer_total = scorer_worst = 0.0
+    for side in log:
+        started = time.perf_counter()
+        scorer.apply(side)
+        spent = time.perf_counter() - started
+        scorer_total += spent
+        scorer_worst = max(scorer_worst, spent)
+    assert scorer.state == padel_state(log, golden_point=False, sets_to_win=3)
+
+    print(f"{points} points")
+    for label, total, worst in (
+        ("padel_state replay", replay_total, replay_worst),
+        ("PadelScorer.apply", scorer_total, scorer_worst),
+    ):
+        print(f"  {label:<19}: {total / points * 1e6:>8,.1f} µs/tap avg  {worst * 1e6:>8,.1f} µs worst")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_POINTS)
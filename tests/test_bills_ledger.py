@@ -0,0 +1,197 @@
+"""Реестр долгов: инкрементальные обновления совпадают с пересчётом с нуля."""
+import random
+from datetime import datetime, timedelta
+
+from steward.data.models.bill_v2 import (
+    UNKNOWN_PERSON_ID,
+    BillItemAssignment,
+    BillPaymentV2,
+    BillTransaction,
+    BillV2,
+)
+from steward.helpers.bills_ledger import BillLedger, ledger_for
+from steward.helpers.bills_money import compute_bill_balances
+from tests.conftest import make_repository
+
+PEOPLE = ["anna", "boris", "vera", "gleb", "dima"]
+CURRENCIES = ["BYN", "BYN", "USD"]
+START = datetime(2025, 1, 1)
+
+
+def _normalized(balances, credits):
+    return (
+        {bill_id: {d: dict(c) for d, c in debts.items() if c} for bill_id, debts in balances.items()},
+        dict(credits),
+    )
+
+
+class _World:
+    """Случайные правки счетов и платежей — так же на месте, как их правит бот."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.bills: list[BillV2] = []
+        self.payments: list[BillPaymentV2] = []
+        self.next_bill = 1
+        self.next_tx = 1
+
+    def _tx(self) -> BillTransaction:
+        rng = self.rng
+        self.next_tx += 1
+        assignments = []
+        for _ in range(rng.randint(1, 3)):
+            den = rng.choice([1, 1, 2, 4])
+            assignments.append(
+                BillItemAssignment(
+                    unit_count=rng.randint(1, den),
+                    debtors=rng.sample(PEOPLE, rng.randint(0, 3)),
+                    denominator=den,
+                )
+            )
+        return BillTransaction(
+            id=str(self.next_tx),
+            item_name="x",
+            creditor=rng.choice(PEOPLE + [UNKNOWN_PERSON_ID]),
+            unit_price_minor=rng.randint(1, 5000),
+            assignments=assignments,
+        )
+
+    def add_bill(self):
+        rng = self.rng
+        bill = BillV2(
+            id=self.next_bill,
+            name="b",
+            author_person_id=rng.choice(PEOPLE),
+            participants=rng.sample(PEOPLE, 3),
+            transactions=[self._tx() for _ in range(rng.randint(0, 4))],
+            created_at=START + timedelta(hours=rng.randint(0, 50)),
+            currency=rng.choice(CURRENCIES),
+            distribution_status=rng.choice(["final", "final", "final", "draft"]),
+        )
+        self.next_bill += 1
+        self.bills.append(bill)
+
+    def edit_item(self):
+        bill = self.rng.choice(self.bills)
+        if not bill.transactions:
+            bill.transactions.append(self._tx())
+            return
+        tx = self.rng.choice(bill.transactions)
+        choice = self.rng.randrange(4)
+        if choice == 0:
+            tx.unit_price_minor = self.rng.randint(1, 5000)
+        elif choice == 1:
+            self.rng.choice(tx.assignments).debtors = self.rng.sample(PEOPLE, self.rng.randint(0, 3))
+        elif choice == 2:
+            tx.creditor = self.rng.choice(PEOPLE)
+        else:
+            bill.transactions.remove(tx)
+
+    def edit_bill(self):
+        bill = self.rng.choice(self.bills)
+        choice = self.rng.randrange(4)
+        if choice == 0:
+            bill.closed = not bill.closed
+        elif choice == 1:
+            bill.distribution_status = self.rng.choice(["final", "draft", "distributing"])
+        elif choice == 2:
+            bill.currency = self.rng.choice(CURRENCIES)
+        else:
+            self.bills.remove(bill)
+
+    def add_payment(self):
+        rng = self.rng
+        debtor, creditor = rng.sample(PEOPLE, 2)
+        bill_ids = rng.sample(range(1, self.next_bill + 2), rng.choice([0, 0, 1, 2]))
+        self.payments.append(
+            BillPaymentV2(
+                id=str(rng.random()),
+                debtor=debtor,
+                creditor=creditor,
+                amount_minor=rng.randint(1, 6000),
+                status=rng.choice(["confirmed", "auto_confirmed", "pending", "rejected"]),
+                bill_ids=bill_ids,
+                currency=rng.choice(CURRENCIES),
+                is_refund=rng.random() < 0.2,
+            )
+        )
+
+    def edit_payment(self):
+        payment = self.rng.choice(self.payments)
+        choice = self.rng.randrange(3)
+        if choice == 0:
+            payment.status = self.rng.choice(["confirmed", "rejected", "pending"])
+        elif choice == 1:
+            payment.amount_minor = self.rng.randint(1, 6000)
+        else:
+            self.payments.remove(payment)
+
+    def step(self):
+        ops = [self.add_bill, self.add_payment]
+        if self.bills:
+            ops += [self.edit_item, self.edit_item, self.edit_bill]
+        if self.payments:
+            ops += [self.edit_payment]
+        self.rng.choice(ops)()
+
+
+def test_ledger_matches_full_recomputation_after_random_edits():
+    for seed in range(60):
+        world = _World(random.Random(seed))
+        ledger = BillLedger()
+        for step in range(60):
+            world.step()
+            ledger.sync(world.bills, world.payments)
+            expected = _normalized(*compute_bill_balances(world.bills, world.payments))
+            assert _normalized(*ledger.balances()) == expected, f"seed={seed} step={step}"
+        assert ledger.verify(sample=100)
+
+
+def test_payment_recomputes_only_its_pair():
+    world = _World(random.Random(1))
+    for _ in range(40):
+        world.add_bill()
+    ledger = BillLedger()
+    ledger.sync(world.bills, world.payments)
+    world.payments.append(
+        BillPaymentV2(id="p", debtor="anna", creditor="boris", amount_minor=100, status="confirmed")
+    )
+    assert ledger.sync(world.bills, world.payments) == 1
+    assert ledger.sync(world.bills, world.payments) == 0
+
+
+def _bill(amount):
+    return BillV2(
+        id=1, name="b", author_person_id="anna", participants=["anna", "boris"],
+        transactions=[
+            BillTransaction(
+                id="1", item_name="x", creditor="anna", unit_price_minor=amount,
+                assignments=[BillItemAssignment(unit_count=1, debtors=["boris"])],
+            )
+        ],
+    )
+
+
+async def test_ledger_follows_saves_and_rebuilds_when_check_fails():
+    repository = make_repository()
+    repository.db.bills_v2.append(_bill(1000))
+    ledger = ledger_for(repository)
+    assert ledger.balances()[0] == {1: {"boris": {"anna": 1000}}}
+
+    repository.db.bills_v2[0].transactions[0].unit_price_minor = 400
+    # Без save() реестр не пересчитывается — правку видит следующий save
+    assert ledger_for(repository).balances()[0] == {1: {"boris": {"anna": 1000}}}
+    await repository.save("bills_v2")
+    assert ledger_for(repository).balances()[0] == {1: {"boris": {"anna": 400}}}
+
+    # Испорченное состояние не проходит сверку и ведёт к перестройке
+    ledger._bill_debts[1] = {"boris": {"anna": 1}}
+    ledger._retract(("anna", "boris", "BYN"))
+    ledger._apply(("anna", "boris", "BYN"))
+    assert not ledger.verify(sample=10)
+    repository.db.bill_payments_v2.append(
+        BillPaymentV2(id="p", debtor="boris", creditor="anna", amount_minor=100, status="confirmed")
+    )
+    await repository.save("bill_payments_v2")
+    assert ledger_for(repository).balances()[0] == {1: {"boris": {"anna": 300}}}
+    assert ledger.rebuilds == 2
@@ -0,0 +1,93 @@
+"""Поиск хода ботов: итеративное углубление с бюджетом, пул процессов."""
+import asyncio
+import random
+import time
+
+import chess
+import pytest
+
+from steward.boardgames import search
+from steward.boardgames.chess_logic import BOT_HARD
+
+
+def _empty():
+    return [["." for _ in range(8)] for _ in range(8)]
+
+
+def test_incremental_zobrist_matches_full_key():
+    rng = random.Random(7)
+    board = chess.Board()
+    key = search.chess_key(board)
+    for _ in range(120):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        before = search._chess_state(board)
+        board.push(rng.choice(moves))
+        key = search._chess_key_after(key, before, search._chess_state(board))
+        assert key == search.chess_key(board)
+
+
+def test_chess_finds_mate_and_winning_capture():
+    mate = search.search_chess(chess.Board("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1"), 1.0)
+    assert mate.move == chess.Move.from_uci("a1a8")
+    assert mate.score >= search.MATE_SCORE - 10
+    # Ферзь под боем, защищён лишь один раз — берём его ладьёй
+    capture = search.search_chess(chess.Board("4k3/8/8/3q4/8/8/3R4/3RK3 w - - 0 1"), 0.5)
+    assert capture.move == chess.Move.from_uci("d2d5")
+
+
+def test_mate_scores_in_the_table_are_relative_to_the_node():
+    s = search._ChessSearch(chess.Board(), 1.0)
+    s.tt = {}
+    # Мат через два полухода от узла, найденный в трёх полуходах от корня
+    s._store(1, 4, search.MATE_SCORE - 5, -search._INF, search._INF, None, 3)
+
+    assert s._probe(1, 4, -search._INF, search._INF, 0)[0] == search.MATE_SCORE - 2
+    assert s._probe(1, 4, -search._INF, search._INF, 6)[0] == search.MATE_SCORE - 8
+    with pytest.raises(TypeError):
+        search._Search(1.0)
+
+
+def test_budget_expiry_still_returns_a_legal_move():
+    board = chess.Board("r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10")
+    started = time.perf_counter()
+    result = search.search_chess(board, 0.05)
+    assert time.perf_counter() - started < 0.5
+    assert result.move in board.legal_moves
+
+
+def test_checkers_takes_the_longest_series():
+    board = _empty()
+    board[5][5] = "w"
+    board[4][4] = "b"
+    board[2][2] = "b"
+    board[0][7] = "b"
+    result = search.search_checkers(board, "white", None, 0.3)
+    assert result.move["from"] == [5, 5] and result.move["to"] == [3, 3]
+
+
+async def test_event_loop_stays_responsive_while_bot_thinks(monkeypatch):
+    monkeypatch.setitem(search.SEARCH_BUDGET_SEC, BOT_HARD, 0.4)
+    board = chess.Board()
+    # Прогрев: первый вызов поднимает процесс-воркер
+    await search.choose_chess_move(board, BOT_HARD)
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    try:
+        board.push_uci("e2e4")
+        move = await search.choose_chess_move(board, BOT_HARD)
+    finally:
+        tick.cancel()
+        search.shutdown()
+    assert move in board.legal_moves
+    assert len(gaps) > 20 and max(gaps) < 0.1
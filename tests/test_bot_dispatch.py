@@ -0,0 +1,89 @@
+"""DispatchTable: O(1) command/callback routing, message monitors, capability cache."""
+from unittest.mock import MagicMock
+
+from steward.bot.dispatch import DispatchTable
+from steward.features.bills import BillsFeature
+from steward.features.chat_collect import ChatCollectFeature
+from steward.features.id import IdFeature
+from steward.features.joke import JokeFeature
+from steward.features.registry import all_features
+from steward.features.settings import SettingsFeature
+from steward.helpers.command_validation import command_name
+from tests.conftest import make_repository, make_text_update, make_update
+
+
+def _table():
+    handlers = all_features()
+    return handlers, DispatchTable(handlers)
+
+
+def _types(handlers) -> list[type]:
+    return [type(h) for h in handlers]
+
+
+def test_command_routes_to_owner_and_monitors_in_order():
+    handlers, table = _table()
+    route = table.route(make_update("id"), "chat")
+
+    assert IdFeature in _types(route)
+    assert BillsFeature not in _types(route)
+    assert ChatCollectFeature in _types(route)
+    assert route == [h for h in handlers if h in route]
+
+
+def test_plain_text_visits_only_message_monitors():
+    _, table = _table()
+    route = table.route(make_text_update("привет"), "chat")
+
+    assert ChatCollectFeature in _types(route)
+    assert IdFeature not in _types(route)
+    assert all(h._on_message_handlers for h in route)
+
+
+def test_command_for_other_bot_is_plain_text():
+    update = make_update("id", bot_username="testbot")
+    update.effective_message.text = "/id@otherbot"
+    update.effective_message.entities[0].length = len("/id@otherbot")
+    assert command_name(update) is None
+    assert command_name(make_update("ID")) == "id"
+
+    _, table = _table()
+    assert table.route(update, "chat") == table.monitors["chat"]
+
+
+def test_always_on_features_have_no_capability():
+    handlers, table = _table()
+    by_type = {type(h): h for h in handlers}
+    assert table.capabilities[id(by_type[ChatCollectFeature])] is None
+    assert table.capabilities[id(by_type[JokeFeature])] == "fun"
+
+
+async def test_capability_cache_is_dropped_on_settings_save():
+    repo = make_repository()
+    assert not repo.is_capability_enabled(-1, JokeFeature)
+
+    repo.chat_settings_for(-1).enabled_capabilities.add("fun")
+    assert not repo.is_capability_enabled(-1, JokeFeature)
+    await repo.save("chat_settings")
+    assert repo.is_capability_enabled(-1, JokeFeature)
+
+
+def _callback_update(data: str):
+    update = make_text_update("")
+    update.callback_query = MagicMock()
+    update.callback_query.data = data
+    return update
+
+
+def test_callback_routes_by_schema_name():
+    handlers, table = _table()
+    settings = next(h for h in handlers if type(h) is SettingsFeature)
+    assert table.route(_callback_update("settings:root|-100"), "callback") == [settings]
+    assert table.route(_callback_update("nobody:knows|1"), "callback") == []
+
+
+def test_pagination_prefix_is_registered():
+    handlers, table = _table()
+    for h in handlers:
+        if getattr(h, "_paginators", None):
+            assert h in table.route(_callback_update(f"{h._pagination_prefix}|x||0"), "callback")
@@ -0,0 +1,114 @@
+"""CurseDetector: expanded word index, verdict cache, batched counting."""
+from steward.helpers import curse_processing
+from steward.helpers.curse_detector import CurseDetector, FormsCache
+
+BAD = {"блин"}
+
+
+def test_count_many_matches_count():
+    detector = CurseDetector()
+    texts = ["блин, опять", "ничего такого", "блины и блином"]
+    assert detector.count_many(texts, BAD) == [detector.count(t, BAD) for t in texts]
+    assert detector.count_many(texts, BAD)[:2] == [1, 0]
+
+
+def test_only_a_command_message_is_skipped():
+    detector = CurseDetector()
+    assert detector.count("/блин команда", BAD) == 0
+    # Кусок расшифровки, начавшийся со слэша, — не команда
+    assert detector.count_many(["/блин команда"], BAD) == [1]
+
+
+def test_index_is_reused_while_version_holds():
+    detector = CurseDetector()
+    first = detector.index(BAD, set(), version=1)
+    assert detector.index({"другое"}, set(), version=1) is first
+    assert detector.index({"другое"}, set(), version=2) is not first
+    # Те же слова под новой версией — индекс не пересобирается
+    again = detector.index({"другое"}, set(), version=3)
+    assert again is detector.index({"другое"}, set(), version=4)
+
+
+def test_version_is_kept_only_with_its_index():
+    detector = CurseDetector()
+    first = detector.index(BAD, set(), version=1)
+    detector._all_forms = lambda word: 1 / 0
+    try:
+        detector.index({"другое"}, set(), version=2)
+    except ZeroDivisionError:
+        pass
+    del detector._all_forms
+
+    # Сборка под версию 2 упала — версия 2 не должна отдавать старый индекс
+    assert detector.index({"другое"}, set(), version=2) is not first
+
+
+def test_repeated_tokens_hit_the_cache():
+    detector = CurseDetector()
+    detector.count("блин блин блин", BAD)
+    hits, misses, size = detector.cache_stats()
+    assert (hits, misses, size) == (2, 1, 1)
+
+
+def test_verdict_cache_evicts_least_recently_used():
+    detector = CurseDetector(cache_size=2)
+    detector.count("блин опять", BAD)
+    detector.count("блин", BAD)
+    detector.count("снова", BAD)
+
+    assert list(detector._verdicts) == ["блин", "снова"]
+
+
+def test_ignore_words_win():
+    detector = CurseDetector()
+    assert detector.count("блин", BAD, {"блин"}) == 0
+
+
+def test_forms_cache_is_bounded():
+    cache = FormsCache(2)
+    for word in ("a", "b", "c"):
+        cache.put(word, frozenset({word}))
+    assert cache.get("a") is None
+    assert len(cache) == 2
+
+
+def test_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "forms.json")
+    detector = CurseDetector()
+    detector.count("блин опять", BAD)
+    detector.save_cache(path)
+
+    restored = CurseDetector()
+    assert restored.load_cache(path) >= 2
+    assert restored._all_forms_cache.get("опять") == detector._all_forms_cache.get("опять")
+    assert restored.count("блин опять", BAD) == 1
+
+
+def test_cache_stats_are_reported_without_chat_labels(monkeypatch):
+    recorded = []
+
+    class Metrics:
+        def inc(self, name, labels, value=1):
+            recorded.append(("inc", name, labels, value))
+
+        def set(self, name, labels, value):
+            recorded.append(("set", name, labels, value))
+
+    detector = CurseDetector()
+    monkeypatch.setattr(curse_processing, "_DETECTOR", detector)
+    monkeypatch.setattr(curse_processing, "_metrics", Metrics())
+    monkeypatch.setattr(curse_processing, "_reported", (0, 0))
+    detector.count("блин блин", BAD)
+    curse_processing._report_cache()
+    detector.count("блин опять", BAD)
+    curse_processing._report_cache()
+
+    # Счётчики получают прирост с прошлого отчёта, размер — гауж
+    assert recorded == [
+        ("inc", "bot_curse_token_cache_hits_total", {}, 1),
+        ("inc", "bot_curse_token_cache_misses_total", {}, 1),
+        ("set", "bot_curse_token_cache_size", {}, 1),
+        ("inc", "bot_curse_token_cache_hits_total", {}, 1),
+        ("inc", "bot_curse_token_cache_misses_total", {}, 1),
+        ("set", "bot_curse_token_cache_size", {}, 2),
+    ]
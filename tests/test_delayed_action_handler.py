@@ -0,0 +1,105 @@
+"""DelayedActionHandler: heap schedule, incremental resync, catch-up policy."""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from steward.bot.delayed_action_handler import ActionSchedule, DelayedActionHandler
+from steward.delayed_action.base import CatchUp, DelayedAction
+from steward.delayed_action.generators.base import Generator
+from tests.conftest import make_repository
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# id генератора на каждый вызов get_next
+CALLS: list[int] = []
+
+
+@dataclass
+class FixedGenerator(Generator):
+    fire_at: datetime | None
+
+    def get_next(self, now):
+        CALLS.append(id(self))
+        return self.fire_at
+
+
+@dataclass
+class RecordingAction(DelayedAction):
+    name: str
+    log: list
+
+    async def execute(self, context):
+        self.log.append(self.name)
+        await asyncio.sleep(0)
+
+
+@dataclass
+class LateAction(RecordingAction):
+    catch_up = CatchUp.RUN
+
+
+def _action(name, at, log=None, cls=RecordingAction):
+    return cls(generator=FixedGenerator(fire_at=at), name=name, log=log if log is not None else [])
+
+
+def _calls(action) -> int:
+    return CALLS.count(id(action.generator))
+
+
+async def test_sync_asks_only_new_and_changed_actions():
+    schedule = ActionSchedule()
+    a, b = _action("a", NOW + timedelta(hours=1)), _action("b", NOW + timedelta(hours=2))
+    await schedule.sync([a, b], NOW)
+    c = _action("c", NOW + timedelta(minutes=30))
+    await schedule.sync([a, b, c], NOW)
+    assert (_calls(a), _calls(b), _calls(c)) == (1, 1, 1)
+    assert schedule.nearest() == NOW + timedelta(minutes=30)
+
+    b.generator.fire_at = NOW + timedelta(minutes=10)
+    await schedule.sync([a, b], NOW)
+    assert (_calls(a), _calls(b)) == (1, 2)
+    assert schedule.nearest() == NOW + timedelta(minutes=10)
+    assert len(schedule) == 2
+
+
+async def test_finished_and_due_actions():
+    schedule = ActionSchedule()
+    done = _action("done", None)
+    soon = _action("soon", NOW - timedelta(seconds=1))
+    later = _action("later", NOW + timedelta(hours=1))
+    assert await schedule.sync([done, soon, later], NOW) == [done]
+    assert [s.action for s in schedule.pop_due(NOW)] == [soon]
+    assert schedule.nearest() == NOW + timedelta(hours=1)
+
+
+def _handler(repo, concurrency=8):
+    return DelayedActionHandler(repo, MagicMock(), MagicMock(), MagicMock(), concurrency=concurrency)
+
+
+async def test_save_of_other_fields_does_not_resync():
+    repo = make_repository()
+    action = _action("a", datetime.now(timezone.utc) + timedelta(hours=1))
+    repo.db.delayed_actions = [action]
+    handler = _handler(repo)
+    await handler._sync(datetime.now(timezone.utc))
+    await repo.save("users")
+    await handler._sync(datetime.now(timezone.utc))
+    assert _calls(action) == 1
+
+
+async def test_missed_actions_follow_catch_up_policy():
+    repo = make_repository()
+    log = []
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    repo.db.delayed_actions = [
+        _action("skipped", long_ago, log),
+        _action("late", long_ago, log, cls=LateAction),
+        _action("on_time", datetime.now(timezone.utc) - timedelta(seconds=1), log),
+    ]
+    handler = _handler(repo, concurrency=2)
+    await handler._sync(datetime.now(timezone.utc))
+    await handler._run_due(MagicMock())
+    assert sorted(log) == ["late", "on_time"]
+    # Генераторы не сдвинулись — действия запаркованы, а не крутятся в цикле
+    assert handler._schedule.nearest() is None
+    assert len(repo.db.delayed_actions) == 3
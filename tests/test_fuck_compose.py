@@ -0,0 +1,70 @@
+"""FuckFeature compositor: frames are streamed into ffmpeg one by one."""
+import io
+import subprocess
+from unittest.mock import MagicMock
+
+from PIL import Image
+
+from steward.features import fuck
+
+ANNOTATION = {
+    "keyframes": {
+        "a": [
+            {"t": 0, "x": 10, "y": 10, "w": 100, "h": 100},
+            {"t": 1, "x": 500, "y": 300, "w": 200, "h": 150, "angle": 90},
+        ],
+        "b": [{"t": 0, "x": 300, "y": 10, "w": 80, "h": 80}],
+    }
+}
+
+
+def _gif(tmp_path, frames: int, size=(801, 600)):
+    path = tmp_path / "asset.gif"
+    images = [Image.new("RGBA", size, (i * 10 % 255, 0, 0, 255)) for i in range(frames)]
+    images[0].save(path, save_all=True, append_images=images[1:], duration=50, loop=0)
+    return path
+
+
+def test_frames_are_written_incrementally(tmp_path, monkeypatch):
+    writes = []
+    proc = MagicMock()
+    proc.stdin = MagicMock(write=lambda data: writes.append(len(data)))
+    proc.wait.return_value = 0
+    popen = MagicMock(return_value=proc)
+    monkeypatch.setattr(subprocess, "Popen", popen)
+
+    avatar = Image.new("RGBA", (640, 640), (0, 255, 0, 255))
+    count = fuck._compose_mp4(_gif(tmp_path, 12), ANNOTATION, avatar, avatar, tmp_path / "out.mp4")
+
+    args = popen.call_args.args[0]
+    assert args[args.index("-video_size") + 1] == "480x358"
+    assert args[args.index("-framerate") + 1] == "12000/600"
+    assert count == 12
+    assert writes == [480 * 358 * 3] * 12
+    proc.stdin.close.assert_called_once()
+
+
+def test_ffmpeg_error_is_reported(tmp_path, monkeypatch):
+    def fake_popen(cmd, stdin, stdout, stderr):
+        stderr.write(b"boom")
+        proc = MagicMock()
+        proc.stdin = io.BytesIO()
+        proc.wait.return_value = 1
+        return proc
+
+    monkeypatch.setattr(subprocess, "Popen", fake_popen)
+    avatar = Image.new("RGBA", (64, 64))
+    try:
+        fuck._compose_mp4(_gif(tmp_path, 2), ANNOTATION, avatar, avatar, tmp_path / "out.mp4")
+    except RuntimeError as e:
+        assert "boom" in str(e)
+    else:
+        raise AssertionError("ffmpeg failure must raise")
+
+
+def test_avatar_sprites_are_reused_per_bucket():
+    sprites = fuck._AvatarSprites(Image.new("RGBA", (100, 100), (0, 0, 255, 255)))
+    first = sprites.get(101, 10.4)
+    assert sprites.get(103, 9.6) is first
+    assert first.size != (104, 104)  # повёрнут
+    assert sprites.get(101, 0).size == (104, 104)
@@ -0,0 +1,70 @@
+"""HttpClients: общие пулы соединений к внешним API и их метрики."""
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from steward.helpers.http_clients import HttpClients
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.counters: list[tuple[str, dict]] = []
+        self.gauges: dict[tuple[str, str], float] = {}
+
+    def inc(self, name, labels=None, value=1):
+        self.counters.append((name, labels))
+
+    def set(self, name, labels, value):
+        self.gauges[(name, labels["client"])] = value
+
+
+async def _server() -> TestServer:
+    async def hello(request):
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", hello)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def test_aiohttp_session_is_shared_and_keeps_connections_alive():
+    server = await _server()
+    metrics = RecordingMetrics()
+    clients = HttpClients(metrics)
+    try:
+        session = clients.session("vm")
+        assert clients.session("vm") is session
+        assert clients.session("other") is not session
+        for _ in range(3):
+            async with session.get(server.make_url("/")) as resp:
+                assert (await resp.json()) == {"ok": True}
+        reused = [labels["reused"] for name, labels in metrics.counters if name == "http_client_connections_total"]
+        assert reused == ["false", "true", "true"]
+        assert metrics.gauges[("http_client_in_flight", "vm")] == 0
+    finally:
+        await clients.close()
+        await server.close()
+    assert session.closed
+    # После close() пул создаётся заново
+    assert clients.session("vm") is not session
+    await clients.close()
+
+
+async def test_httpx_client_is_shared_and_reports_connections():
+    server = await _server()
+    metrics = RecordingMetrics()
+    clients = HttpClients(metrics)
+    try:
+        client = clients.client("stt")
+        assert clients.client("stt") is client
+        for _ in range(3):
+            r = await client.get(str(server.make_url("/")))
+            assert r.json() == {"ok": True}
+        reused = [labels["reused"] for name, labels in metrics.counters if name == "http_client_connections_total"]
+        assert reused == ["false", "true", "true"]
+        assert metrics.gauges[("http_client_pool_utilization", "stt")] == 0
+    finally:
+        await clients.close()
+        await server.close()
+    assert client.is_closed
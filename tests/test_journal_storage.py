@@ -0,0 +1,170 @@
+"""JournalFileStorage: append-only journal + snapshot compaction."""
+import json
+from datetime import datetime
+
+from steward.data.models.tennis import TennisSession
+from steward.data.models.user import User
+from steward.data.repository import JournalFileStorage, Repository
+
+
+def _storage(tmp_path, **kwargs) -> JournalFileStorage:
+    return JournalFileStorage(
+        str(tmp_path / "db.json"),
+        journal_path=str(tmp_path / "data" / "db.json.journal"),
+        **kwargs,
+    )
+
+
+def _journal_lines(storage: JournalFileStorage) -> list[dict]:
+    with open(storage.journal_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def _fresh_repo(tmp_path, **kwargs) -> Repository:
+    repo = Repository(_storage(tmp_path, **kwargs))
+    await repo.migrate()
+    return repo
+
+
+async def test_migrate_writes_snapshot_and_empty_journal(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    with open(tmp_path / "db.json", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["version"] == repo.db.version
+    assert repo._storage._journal_bytes == 0
+
+
+async def test_save_appends_only_changed_keys(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save()
+
+    lines = _journal_lines(repo._storage)
+    assert len(lines) == 1
+    assert list(lines[0]["set"]) == ["users"]
+    assert lines[0]["set"]["users"][0]["username"] == "alice"
+
+
+async def test_save_with_fields_skips_full_serialization(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    repo.db.tennis_sessions.append(TennisSession(
+        id=1, chat_id=-1, player_a_id=1, player_b_id=2, started_at=datetime.now()
+    ))
+    await repo.save("tennis_sessions")
+
+    lines = _journal_lines(repo._storage)
+    assert [list(line["set"]) for line in lines] == [["tennis_sessions"]]
+
+    # Неизменившееся поле в журнал не попадает
+    await repo.save("tennis_sessions")
+    assert len(_journal_lines(repo._storage)) == 1
+
+
+async def test_reopen_replays_journal(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save("users")
+    repo.db.users[0].monkeys = 42
+    await repo.save("users")
+
+    reopened = await _fresh_repo(tmp_path)
+    assert reopened.db.users[0].username == "alice"
+    assert reopened.db.users[0].monkeys == 42
+    # migrate() сворачивает журнал в снапшот
+    assert reopened._storage._journal_bytes == 0
+    with open(tmp_path / "db.json", encoding="utf-8") as f:
+        assert json.load(f)["users"][0]["monkeys"] == 42
+
+
+async def test_torn_journal_tail_is_dropped(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save("users")
+    with open(repo._storage.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"set": {"users": [{"id": 2, "userna')
+
+    reopened = await _fresh_repo(tmp_path)
+    assert [u.id for u in reopened.db.users] == [1]
+
+
+async def test_replay_after_crash_before_journal_truncate_is_idempotent(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save("users")
+    with open(repo._storage.journal_path, encoding="utf-8") as f:
+        journal = f.read()
+
+    repo.db.users[0].monkeys = 7
+    await repo.save("users")
+    await repo.compact()
+    # Имитируем падение между записью снапшота и очисткой журнала
+    with open(repo._storage.journal_path, "w", encoding="utf-8") as f:
+        f.write(journal)
+    with open(repo._storage.journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"set": {"users": [{"id": 1, "username": "alice", "monkeys": 7}]}, "unset": []}) + "\n")
+
+    reopened = await _fresh_repo(tmp_path)
+    assert reopened.db.users[0].monkeys == 7
+
+
+async def test_corrupted_snapshot_recovers_from_tmp(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save("users")
+    await repo.compact()
+
+    snapshot = (tmp_path / "db.json").read_text(encoding="utf-8")
+    (tmp_path / "db.json.tmp").write_text(snapshot, encoding="utf-8")
+    (tmp_path / "db.json").write_text(snapshot[: len(snapshot) // 2], encoding="utf-8")
+
+    reopened = await _fresh_repo(tmp_path)
+    assert reopened.db.users[0].username == "alice"
+
+
+async def test_journal_is_compacted_when_it_outgrows_snapshot(tmp_path):
+    repo = await _fresh_repo(tmp_path, min_compact_bytes=0)
+    repo.db.users.append(User(1, "alice"))
+    for i in range(50):
+        repo.db.users[0].monkeys = i
+        await repo.save("users")
+
+    storage = repo._storage
+    assert storage._journal_bytes <= max(storage.min_compact_bytes, storage._snapshot_bytes)
+    reopened = await _fresh_repo(tmp_path)
+    assert reopened.db.users[0].monkeys == 49
+
+
+async def test_empty_snapshot_recovers_from_tmp(tmp_path):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save("users")
+    await repo.compact()
+
+    snapshot = (tmp_path / "db.json").read_text(encoding="utf-8")
+    (tmp_path / "db.json.tmp").write_text(snapshot, encoding="utf-8")
+    # Упали сразу после open(..., "w") при записи на месте
+    (tmp_path / "db.json").write_text("", encoding="utf-8")
+
+    reopened = await _fresh_repo(tmp_path)
+    assert reopened.db.users[0].username == "alice"
+
+
+async def test_in_place_compaction_replaces_longer_snapshot(tmp_path, monkeypatch):
+    repo = await _fresh_repo(tmp_path)
+    repo.db.users.extend(User(i, f"user{i}") for i in range(20))
+    await repo.save("users")
+    await repo.compact()
+
+    def no_rename(src, dst):
+        raise OSError("Device or resource busy")
+
+    monkeypatch.setattr("steward.data.repository.os.replace", no_rename)
+    repo.db.users = repo.db.users[:1]
+    await repo.save("users")
+    await repo.compact()
+    monkeypatch.undo()
+
+    assert not (tmp_path / "db.json.tmp").exists()
+    reopened = await _fresh_repo(tmp_path)
+    assert [u.id for u in reopened.db.users] == [0]
@@ -0,0 +1,99 @@
+"""Ленивый реестр: манифест совпадает с классами, фичи грузятся по первому апдейту.
+
+Бюджет холодного старта меряется по часам, поэтому проверяется не здесь, а в
+python -m tests.perf.bench_startup --check.
+"""
+import logging
+import subprocess
+import sys
+
+from steward.bot.dispatch import DispatchTable
+from steward.features import manifest
+from steward.features.bills import BillsFeature
+from steward.features.chat_collect import ChatCollectFeature
+from steward.features.id import IdFeature
+from steward.features.registry import all_features, lazy_features
+from steward.framework.lazy import LazyFeature, warm_up
+from tests.conftest import make_text_update, make_update
+
+
+def test_manifest_matches_feature_classes():
+    on_disk = manifest.MANIFEST_PATH.read_text(encoding="utf-8")
+    assert manifest.dump(manifest.build()) == on_disk, (
+        "manifest.json is stale, run: python -m steward.features.manifest"
+    )
+
+
+def test_spec_matches_loaded_feature():
+    for lazy, eager in zip(lazy_features(), all_features()):
+        assert lazy.feature_class == type(eager)
+        assert lazy.get_command_with_aliases() == eager.get_command_with_aliases()
+        assert lazy.help() == eager.help()
+        assert lazy.prompt() == eager.prompt()
+        assert lazy.permission_uses() == eager.permission_uses()
+
+
+def test_registry_import_does_not_import_features():
+    code = (
+        "import sys, steward.features.registry; "
+        "print(sorted(m for m in ('yt_dlp', 'steward.features.bills', "
+        "'steward.features.download.feature') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_routing_uses_spec_without_loading():
+    handlers = lazy_features()
+    table = DispatchTable(handlers)
+    route = table.route(make_update("id"), "chat")
+    classes = [h.feature_class for h in route]
+
+    assert IdFeature in classes
+    assert ChatCollectFeature in classes
+    assert BillsFeature not in classes
+    assert table.route(make_text_update("привет"), "chat") == table.monitors["chat"]
+    assert not any(h.loaded for h in handlers)
+
+
+async def test_injected_attributes_reach_the_loaded_feature():
+    lazy = next(h for h in lazy_features() if h.feature_class == IdFeature)
+    lazy.repository = repository = object()
+
+    feature = await lazy.ensure_loaded()
+
+    assert isinstance(feature, IdFeature)
+    assert feature.repository is repository
+    lazy.bot = bot = object()
+    assert feature.bot is bot
+
+
+async def test_warm_up_loads_the_rest():
+    handlers = lazy_features()[:6]
+    await handlers[0].ensure_loaded()
+
+    assert await warm_up(handlers) == 5
+    assert all(isinstance(h, LazyFeature) and h.loaded for h in handlers)
+
+
+def test_implicit_load_is_logged(caplog):
+    lazy = next(h for h in lazy_features() if h.feature_class == IdFeature)
+
+    with caplog.at_level(logging.WARNING, logger="steward.framework.lazy"):
+        assert lazy._subcommands
+        assert lazy._subcommands
+
+    assert lazy.loaded
+    assert [r.getMessage() for r in caplog.records] == [
+        "Feature IdFeature loaded synchronously for '_subcommands'; add it to FeatureSpec"
+    ]
+
+
+def test_permission_catalogue_does_not_load_features():
+    handlers = lazy_features()
+    permissions = {p for h in handlers for p, _, _ in h.permission_uses()}
+
+    assert permissions
+    assert not any(h.loaded for h in handlers)
@@ -0,0 +1,133 @@
+"""Кэш file_id скачанных медиа: канонические ключи, LRU, переживание рестарта."""
+import pytest
+
+from steward.features.download import video_cache
+from steward.features.download.video_cache import CachedMedia, MediaCache, media_key
+
+
+@pytest.mark.parametrize(
+    "urls, key",
+    [
+        (
+            [
+                "https://www.youtube.com/watch?v=dQw4w9WgXcQ&si=abc",
+                "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+                "https://youtu.be/dQw4w9WgXcQ?t=42",
+                "https://youtube.com/shorts/dQw4w9WgXcQ",
+            ],
+            "youtube:dQw4w9WgXcQ",
+        ),
+        (
+            [
+                "https://www.tiktok.com/@someone/video/7311111111111111111?is_from_webapp=1",
+                "https://m.tiktok.com/v/7311111111111111111",
+                "https://tiktok.com/@other/video/7311111111111111111",
+            ],
+            "tiktok:7311111111111111111",
+        ),
+        (
+            [
+                "https://www.instagram.com/reel/C1a2b3/?igsh=xyz",
+                "https://instagram.com/p/C1a2b3/",
+                "https://www.instagram.com/someone/reel/C1a2b3",
+            ],
+            "instagram:C1a2b3",
+        ),
+        (["https://vm.tiktok.com/ZMabc123/"], "tiktok-short:ZMabc123"),
+        (["https://music.yandex.ru/album/1/track/42?utm=1"], "yandex-music:42"),
+    ],
+)
+def test_url_variants_share_one_key(urls, key):
+    assert {media_key(url) for url in urls} == {key}
+
+
+def test_unrecognised_urls_keep_identifying_query():
+    first = media_key("https://www.youtube.com/playlist?list=PL1&si=abc")
+    second = media_key("https://youtube.com/playlist?list=PL2")
+
+    assert first != second
+    assert first == media_key("https://m.youtube.com/playlist?utm_source=tg&list=PL1")
+    assert media_key("https://youtube.com/watch?list=PL1") != media_key("https://youtube.com/watch?list=PL2")
+    assert media_key("https://example.com/clip/?utm_source=x#top") == "example.com/clip"
+
+
+def test_short_link_becomes_alias_of_extractor_id():
+    cache = MediaCache()
+    medias = [CachedMedia("file-1")]
+    info = {"extractor_key": "TikTok", "id": "7311111111111111111"}
+    cache.put("https://vm.tiktok.com/ZMabc123/", medias, aliases=(video_cache.info_key(info),))
+    assert cache.get("https://www.tiktok.com/@someone/video/7311111111111111111") == medias
+    assert cache.get("https://vm.tiktok.com/ZMabc123") == medias
+
+
+def test_lru_and_age_limits(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(video_cache.time, "time", lambda: now[0])
+    cache = MediaCache(max_entries=2, max_age=100)
+    cache.put("https://youtu.be/aaaaaaaaaaa", [CachedMedia("a")])
+    cache.put("https://youtu.be/bbbbbbbbbbb", [CachedMedia("b")])
+    cache.get("https://youtu.be/aaaaaaaaaaa")
+    cache.put("https://youtu.be/ccccccccccc", [CachedMedia("c")])
+    assert cache.get("https://youtu.be/bbbbbbbbbbb") is None
+    assert cache.get("https://youtu.be/aaaaaaaaaaa") is not None
+    now[0] += 101
+    assert cache.get("https://youtu.be/aaaaaaaaaaa") is None
+
+
+def test_survives_restart(tmp_path):
+    path = str(tmp_path / "data" / "media_cache.json")
+    cache = MediaCache()
+    cache.put("https://youtu.be/dQw4w9WgXcQ", [CachedMedia("v", caption="<b>x</b>", duration=12.0)])
+    cache.put("https://www.instagram.com/p/C1a2b3/", [CachedMedia("p1", kind="photo"), CachedMedia("p2", kind="photo")])
+    cache.save(path)
+
+    restored = MediaCache()
+    assert restored.load(path) == 2
+    assert restored.get("https://www.youtube.com/watch?v=dQw4w9WgXcQ") == [
+        CachedMedia("v", caption="<b>x</b>", duration=12.0)
+    ]
+    assert [m.file_id for m in restored.get("https://instagram.com/reel/C1a2b3")] == ["p1", "p2"]
+    assert MediaCache().load(str(tmp_path / "missing.json")) == 0
+
+
+async def test_failed_flush_keeps_the_cache_dirty(tmp_path, monkeypatch):
+    path = tmp_path / "media_cache.json"
+    monkeypatch.setenv("MEDIA_CACHE_PATH", str(path))
+    monkeypatch.setattr(video_cache, "FLUSH_DELAY_SEC", 0)
+    monkeypatch.setattr(video_cache, "_cache", MediaCache())
+    video_cache._cache.put("https://youtu.be/dQw4w9WgXcQ", [CachedMedia("v")])
+
+    def broken_write(path, data):
+        raise OSError("disk full")
+
+    write = video_cache._write
+    monkeypatch.setattr(video_cache, "_write", broken_write)
+    await video_cache._flush_later()
+    assert video_cache._cache.dirty
+
+    monkeypatch.setattr(video_cache, "_write", write)
+    # Запись на остановке дописывает то, что не легло при сбросе
+    video_cache.save()
+    assert MediaCache().load(str(path)) == 1
+
+
+def test_lookups_are_counted(monkeypatch):
+    counters = []
+
+    class Metrics:
+        def inc(self, name, labels=None, value=1):
+            counters.append((name, labels))
+
+        def set(self, name, labels, value):
+            pass
+
+    monkeypatch.setattr(video_cache, "_cache", MediaCache())
+    monkeypatch.setattr(video_cache, "_metrics", Metrics())
+    monkeypatch.delenv("MEDIA_CACHE_PATH", raising=False)
+    video_cache.get("https://youtu.be/dQw4w9WgXcQ", source="inline")
+    video_cache.put("https://youtu.be/dQw4w9WgXcQ", [CachedMedia("v")])
+    video_cache.get("https://youtube.com/shorts/dQw4w9WgXcQ", source="tunnel")
+    assert counters == [
+        ("media_cache_lookups_total", {"source": "inline", "result": "miss"}),
+        ("media_cache_lookups_total", {"source": "tunnel", "result": "hit"}),
+    ]
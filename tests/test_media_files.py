@@ -0,0 +1,68 @@
+"""Файлы Telegram в local mode: читаем на месте, не копируя в память."""
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+from steward.helpers import media
+from steward.helpers.media import (
+    borrow_tg_file,
+    fetch_tg_file_to,
+    link_or_copy,
+    release_tg_file,
+)
+
+
+def _bot(tmp_path, monkeypatch, file_path="videos/file_1.mp4", content=None):
+    monkeypatch.setattr(media, "LOCAL_FILES_ROOT", tmp_path / "data")
+    bot = MagicMock()
+    bot.token = "123:abc"
+    tg_file = MagicMock()
+    tg_file.file_path = file_path
+    tg_file.download_to_drive = AsyncMock()
+    bot.get_file = AsyncMock(return_value=tg_file)
+    if content is not None:
+        local = tmp_path / "data" / bot.token / file_path
+        local.parent.mkdir(parents=True)
+        local.write_bytes(content)
+    return bot, tg_file
+
+
+async def test_borrow_reads_local_file_in_place(tmp_path, monkeypatch):
+    bot, tg_file = _bot(tmp_path, monkeypatch, content=b"video")
+    path = await borrow_tg_file(bot, "id", prefix="t_")
+    assert path == tmp_path / "data" / "123:abc" / "videos/file_1.mp4"
+    tg_file.download_to_drive.assert_not_awaited()
+    # Файл Bot API сервера не удаляем
+    release_tg_file(path)
+    assert path.read_bytes() == b"video"
+
+
+async def test_borrow_downloads_remote_file_to_temp(tmp_path, monkeypatch):
+    bot, tg_file = _bot(tmp_path, monkeypatch)
+    path = await borrow_tg_file(bot, "id", prefix="t_")
+    tg_file.download_to_drive.assert_awaited_once_with(custom_path=path)
+    assert path.suffix == ".mp4" and path.exists()
+    release_tg_file(path)
+    assert not path.exists()
+
+
+async def test_fetch_to_copies_local_file_without_download(tmp_path, monkeypatch):
+    bot, tg_file = _bot(tmp_path, monkeypatch, content=b"x" * 3_000_000)
+    dest = tmp_path / "copy.mp4"
+    dest.write_bytes(b"stale")
+    assert await fetch_tg_file_to(bot, "id", dest) == dest
+    assert dest.stat().st_size == 3_000_000
+    tg_file.download_to_drive.assert_not_awaited()
+
+
+def test_link_or_copy_falls_back_to_copy(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    src.write_bytes(b"payload")
+
+    def no_link(*_):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(media.os, "link", no_link)
+    dest = tmp_path / "dest"
+    link_or_copy(src, dest)
+    assert dest.read_bytes() == b"payload"
+    assert not Path(dest).samefile(src)
@@ -0,0 +1,195 @@
+"""Хранилище переписки: цепочки ответов без запроса на каждую реплику."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from steward.data.models.ai_message import AiMessage
+from steward.helpers import ai_context, message_threads
+from steward.helpers.message_threads import MessageThreadStore, ThreadMessage
+
+BOT_ID = 999
+CHAT = -100
+
+
+def _tl(id_, reply_to=None, sender=1, text=None):
+    """Telethon-подобное сообщение, как его возвращает get_messages."""
+    return SimpleNamespace(
+        id=id_,
+        reply_to=SimpleNamespace(reply_to_msg_id=reply_to) if reply_to else None,
+        from_id=SimpleNamespace(user_id=sender),
+        message=text if text is not None else f"m{id_}",
+    )
+
+
+def _fetcher(messages):
+    calls = []
+
+    async def fetch_many(ids):
+        calls.append(list(ids))
+        return [messages.get(i) for i in ids]
+
+    return fetch_many, calls
+
+
+async def test_chain_resolves_from_buffer_without_fetching():
+    store = MessageThreadStore()
+    store.add(CHAT, ThreadMessage(1, None, 1, "привет"))
+    store.add(CHAT, ThreadMessage(2, 1, BOT_ID, "здравствуй"))
+    store.add(CHAT, ThreadMessage(3, 2, 1, "как дела"))
+    fetch_many, calls = _fetcher({})
+    chain = await store.resolve_chain(CHAT, 3, fetch_many)
+    assert [m.text for m in chain.messages] == ["привет", "здравствуй", "как дела"]
+    assert (chain.hits, chain.misses, calls) == (3, 0, [])
+
+
+async def test_misses_are_fetched_in_one_batch_when_links_are_known():
+    store = MessageThreadStore()
+    # Бот перезапустился: в буфере только последний вопрос, ответы бота
+    # известны по ai_messages, сами сообщения — нет
+    store.add(CHAT, ThreadMessage(5, 4, 1, "и ещё"))
+    links = {4: 3, 2: 1}
+    remote = {
+        4: _tl(4, sender=BOT_ID),
+        3: _tl(3, reply_to=2),
+        2: _tl(2, sender=BOT_ID),
+        1: _tl(1),
+    }
+    fetch_many, calls = _fetcher(remote)
+    chain = await store.resolve_chain(CHAT, 5, fetch_many, links.get)
+    assert [m.message_id for m in chain.messages] == [1, 2, 3, 4, 5]
+    # Без ссылки для 3 пришлось остановиться и догрузить, дальше — второй пачкой
+    assert calls == [[4, 3], [2, 1]]
+    assert (chain.hits, chain.misses, chain.fetches) == (1, 4, 2)
+
+    # Второй раз всё уже локально
+    again = await store.resolve_chain(CHAT, 5, fetch_many, links.get)
+    assert (again.hits, again.misses, len(calls)) == (5, 0, 2)
+
+
+async def test_deleted_message_cuts_the_chain():
+    store = MessageThreadStore()
+    store.add(CHAT, ThreadMessage(3, 2, 1, "c"))
+    fetch_many, _calls = _fetcher({1: _tl(1)})
+    chain = await store.resolve_chain(CHAT, 3, fetch_many)
+    assert [m.message_id for m in chain.messages] == [3]
+
+
+def test_ring_buffer_and_chat_lru():
+    store = MessageThreadStore(per_chat=2, max_chats=2)
+    for id_ in (1, 2, 3):
+        store.add(1, ThreadMessage(id_, None, 1, ""))
+    assert store.get(1, 1) is None and store.get(1, 3) is not None
+    store.add(2, ThreadMessage(1, None, 1, ""))
+    store.get(1, 3)  # чат 1 снова самый свежий
+    store.add(3, ThreadMessage(1, None, 1, ""))
+    assert store.get(2, 1) is None
+    assert store.get(1, 3) is not None and store.get(3, 1) is not None
+
+
+async def test_build_reply_context_uses_store_and_reports_hits(monkeypatch):
+    store = MessageThreadStore()
+    monkeypatch.setattr(message_threads, "_store", store)
+    store.add(CHAT, ThreadMessage(10, None, 1, "кто ты"))
+    store.add(CHAT, ThreadMessage(11, 10, BOT_ID, "я бот"))
+    client = MagicMock()
+    context = SimpleNamespace(
+        repository=SimpleNamespace(db=SimpleNamespace(ai_messages={f"{CHAT}_11": AiMessage(0, 10, "ai")})),
+        bot=SimpleNamespace(id=BOT_ID),
+        client=client,
+        metrics=MagicMock(),
+        message=SimpleNamespace(
+            message_id=12,
+            id=12,
+            chat=SimpleNamespace(id=CHAT),
+            from_user=SimpleNamespace(id=1),
+            reply_to_message=SimpleNamespace(message_id=11),
+            text="а что умеешь",
+            caption=None,
+        ),
+    )
+    messages = await ai_context.build_reply_context(context, "что умеешь")
+    assert messages == [("user", "кто ты"), ("assistant", "я бот"), ("user", "что умеешь")]
+    client.get_messages.assert_not_called()
+    context.metrics.inc.assert_any_call("ai_context_messages_total", {"source": "local"}, 3)
+
+
+def test_remember_ai_reply_evicts_oldest_and_records_reply(monkeypatch):
+    store = MessageThreadStore()
+    monkeypatch.setattr(message_threads, "_store", store)
+    repository = SimpleNamespace(db=SimpleNamespace(ai_messages={}))
+    for id_ in range(ai_context.MAX_AI_MESSAGES + 5):
+        sent = SimpleNamespace(
+            message_id=id_, chat=SimpleNamespace(id=CHAT), reply_to_message=None,
+            from_user=SimpleNamespace(id=BOT_ID), text="...", caption=None,
+        )
+        ai_context.remember_ai_reply(repository, CHAT, sent, 7, "ai", "ответ")
+    ai_messages = repository.db.ai_messages
+    assert len(ai_messages) == ai_context.MAX_AI_MESSAGES
+    assert f"{CHAT}_4" not in ai_messages and f"{CHAT}_5" in ai_messages
+    last = ai_context.MAX_AI_MESSAGES + 4
+    assert store.get(CHAT, last) == ThreadMessage(last, 7, BOT_ID, "ответ")
+
+
+def _ai_context_stub(monkeypatch):
+    store = MessageThreadStore()
+    monkeypatch.setattr(message_threads, "_store", store)
+
+    async def build_reply_context(context, text):
+        return [("user", text)]
+
+    async def save():
+        pass
+
+    monkeypatch.setattr(ai_context, "build_reply_context", build_reply_context)
+    monkeypatch.setattr(ai_context, "language_prompt_for", lambda repository, user_id: None)
+    monkeypatch.setattr(ai_context, "prune_expired", lambda repository: None)
+    monkeypatch.setattr(ai_context, "get_recent_facts", lambda repository, user_id: [])
+    context = SimpleNamespace(
+        repository=SimpleNamespace(db=SimpleNamespace(ai_messages={}), save=save),
+        message=SimpleNamespace(
+            id=7, chat=SimpleNamespace(id=CHAT),
+            from_user=SimpleNamespace(id=1, full_name="u", username="u"),
+        ),
+    )
+    return store, context
+
+
+async def test_ai_reply_remembers_rendered_text_not_markdown(monkeypatch):
+    sent = SimpleNamespace(
+        message_id=50, reply_to_message=None,
+        from_user=SimpleNamespace(id=BOT_ID), text="жирный ответ", caption=None,
+    )
+    store, context = _ai_context_stub(monkeypatch)
+
+    async def reply_markdown(text):
+        return sent
+
+    context.message.reply_markdown = reply_markdown
+    await ai_context.execute_ai_request(context, "вопрос", lambda uid, m: "*жирный* ответ", "ai")
+    assert store.get(CHAT, 50) == ThreadMessage(50, 7, BOT_ID, "жирный ответ")
+
+
+async def test_streamed_reply_remembers_post_processed_text(monkeypatch):
+    sent = SimpleNamespace(
+        message_id=51, reply_to_message=None,
+        from_user=SimpleNamespace(id=BOT_ID), text="думаю…", caption=None,
+    )
+    store, context = _ai_context_stub(monkeypatch)
+
+    async def stream_reply(target, chunks, placeholder_upgrade=None):
+        async for _ in chunks:
+            pass
+        return sent
+
+    async def chunks(uid, messages):
+        yield "я не "
+        yield "Яндекс"
+
+    async def post_process(bot_message, full_text):
+        assert full_text == "я не Яндекс"
+        return "я не скажу"
+
+    monkeypatch.setattr(ai_context, "stream_reply", stream_reply)
+    await ai_context.execute_ai_request_streaming(
+        context, "кто ты", chunks, "pasha", post_process=post_process
+    )
+    assert store.get(CHAT, 51) == ThreadMessage(51, 7, BOT_ID, "я не скажу")
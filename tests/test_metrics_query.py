@@ -0,0 +1,93 @@
+"""Слой запросов к VictoriaMetrics: склейка одинаковых запросов, кэш, query_many."""
+import asyncio
+from collections.abc import Collection
+
+import pytest
+
+from steward.metrics import base, prometheus
+from steward.metrics.base import MetricQueryError, MetricSample
+from steward.metrics.prometheus import PrometheusMetricsEngine
+
+
+def _engine(monkeypatch, *, fail: Collection[str] = frozenset()):
+    engine = PrometheusMetricsEngine("http://vm")
+    calls: list[str] = []
+    gate = asyncio.Event()
+
+    async def fetch(promql):
+        calls.append(promql)
+        await gate.wait()
+        if promql in fail:
+            raise MetricQueryError("boom")
+        return [MetricSample(labels={"q": promql}, value=len(calls))]
+
+    monkeypatch.setattr(engine, "_fetch_query", fetch)
+    gate.set()
+    return engine, calls, gate
+
+
+async def test_identical_in_flight_queries_share_one_request(monkeypatch):
+    engine, calls, gate = _engine(monkeypatch)
+    gate.clear()
+    pending = [asyncio.ensure_future(engine.query("up")) for _ in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(*pending)
+    assert calls == ["up"]
+    assert all(r == results[0] for r in results)
+    # Каждый получает свой список — правки одного не видны другим
+    results[0].clear()
+    assert results[1]
+
+
+async def test_results_cached_within_time_bucket(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(prometheus.time, "time", lambda: now[0])
+    engine, calls, _gate = _engine(monkeypatch)
+    await engine.query("up")
+    now[0] += 5
+    await engine.query("up")
+    assert calls == ["up"]
+    now[0] += prometheus.QUERY_CACHE_TTL
+    await engine.query("up")
+    assert calls == ["up", "up"]
+
+
+async def test_query_many_keeps_order_and_dedupes(monkeypatch):
+    engine, calls, _gate = _engine(monkeypatch, fail={"bad"})
+    results = await engine.query_many(["a", "b", "a", "bad"])
+    assert [r[0].labels["q"] if r else None for r in results] == ["a", "b", "a", None]
+    assert sorted(calls) == ["a", "b", "bad"]
+    with pytest.raises(MetricQueryError):
+        await engine.query_many(["bad"], strict=True)
+    # Ошибки не кэшируются
+    assert calls.count("bad") == 2
+
+
+async def test_query_many_bounds_concurrency(monkeypatch):
+    engine = PrometheusMetricsEngine("http://vm")
+    in_flight, peak = 0, 0
+
+    async def fetch(promql):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return []
+
+    monkeypatch.setattr(engine, "_fetch_query", fetch)
+    # Как история профиля за месяц: 30 дней по три запроса
+    await engine.query_many([f"q{i}" for i in range(90)])
+
+    assert peak == base.QUERY_CONCURRENCY
+
+
+def test_metrics_without_labels():
+    engine = PrometheusMetricsEngine()
+    engine.inc("test_unlabeled_events_total", {}, 2)
+    engine.set("test_unlabeled_size", {}, 5)
+    engine.observe("test_unlabeled_seconds", {}, 0.1)
+
+    assert prometheus.REGISTRY.get_sample_value("test_unlabeled_events_total") == 2
+    assert prometheus.REGISTRY.get_sample_value("test_unlabeled_size") == 5
@@ -0,0 +1,225 @@
+"""Очередь исходящих: FIFO в чате, приоритеты, лимиты и RetryAfter на подставном Bot API."""
+import asyncio
+import random
+import time
+from datetime import timedelta
+
+import pytest
+from telegram.error import BadRequest, RetryAfter
+
+from steward.bot import message_splitter, outbound
+from steward.bot.outbound import OutboundQueue, Priority
+
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+
+class FakeBotApi:
+    """Records deliveries; every `flood_every`-th request fails with 429 instead."""
+
+    def __init__(self, *, flood_every: int = 0, retry_after: float = 0.03, latency: float = 0.0):
+        self.delivered: list[tuple[int, int]] = []
+        self.times: list[float] = []
+        self.floods = 0
+        self._requests = 0
+        self._flood_every = flood_every
+        self._retry_after = retry_after
+        self._latency = latency
+
+    async def send_message(self, chat_id: int, n: int):
+        self._requests += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        if self._flood_every and self._requests % self._flood_every == 0:
+            self.floods += 1
+            raise RetryAfter(timedelta(seconds=self._retry_after))
+        self.delivered.append((chat_id, n))
+        self.times.append(time.monotonic())
+        return n
+
+
+def _fast_queue(**kwargs) -> OutboundQueue:
+    limits = dict(
+        global_rate=2000, global_burst=50,
+        private_rate=2000, private_burst=50,
+        group_rate=2000, group_burst=50,
+    )
+    return OutboundQueue(**{**limits, **kwargs})
+
+
+async def test_per_chat_order_survives_flood_errors():
+    api = FakeBotApi(flood_every=7, latency=0.001)
+    queue = _fast_queue()
+    rng = random.Random(3)
+    chats = [1, 2, 3, -100, -200]
+    plan = [(rng.choice(chats), n) for n in range(120)]
+
+    async def submit(chat_id, n):
+        return await queue.send(
+            chat_id, lambda: api.send_message(chat_id, n), rng.choice(list(Priority))
+        )
+
+    results = await asyncio.gather(*(submit(chat_id, n) for chat_id, n in plan))
+
+    assert results == [n for _, n in plan]
+    assert api.floods > 0
+    for chat_id in chats:
+        sent = [n for c, n in api.delivered if c == chat_id]
+        assert sent == [n for c, n in plan if c == chat_id]
+    assert queue.depth() == 0
+    queue.close()
+
+
+async def test_interactive_overtakes_queued_bulk():
+    api = FakeBotApi()
+    queue = _fast_queue(global_rate=200, global_burst=1)
+    bulk = [
+        asyncio.ensure_future(
+            queue.send(-i, lambda i=i: api.send_message(-i, i), Priority.BULK)
+        )
+        for i in range(1, 21)
+    ]
+    await asyncio.sleep(0.02)
+    reply = await queue.send(42, lambda: api.send_message(42, 0), Priority.INTERACTIVE)
+    await asyncio.gather(*bulk)
+
+    assert reply == 0
+    position = api.delivered.index((42, 0))
+    assert 0 < position < 10
+    queue.close()
+
+
+async def test_global_and_per_chat_rates_are_respected():
+    api = FakeBotApi()
+    queue = OutboundQueue(
+        global_rate=200, global_burst=5, private_rate=40, private_burst=1,
+        group_rate=40, group_burst=1,
+    )
+    started = time.monotonic()
+    await asyncio.gather(*(
+        queue.send(chat_id, lambda c=chat_id, n=n: api.send_message(c, n))
+        for n in range(10)
+        for chat_id in (1, 2, 3, 4, 5, 6)
+    ))
+    elapsed = time.monotonic() - started
+
+    # 60 отправок при 200/с и запасе 5 — не быстрее ~0.27с
+    assert elapsed >= (60 - 5) / 200 * 0.9
+    # В один чат не чаще 40/с
+    for chat_id in (1, 2, 3, 4, 5, 6):
+        times = [t for (c, _), t in zip(api.delivered, api.times) if c == chat_id]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert min(gaps) >= 1 / 40 * 0.8
+    queue.close()
+
+
+async def test_retry_after_pauses_the_chat_and_gives_up_eventually():
+    queue = _fast_queue(max_retries=2)
+    calls = []
+
+    async def always_flooded():
+        calls.append(time.monotonic())
+        raise RetryAfter(timedelta(seconds=0.05))
+
+    with pytest.raises(RetryAfter):
+        await queue.send(7, always_flooded)
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.045
+
+    async def broken():
+        raise BadRequest("chat not found")
+
+    with pytest.raises(BadRequest):
+        await queue.send(7, broken)
+    queue.close()
+
+
+async def test_nested_send_to_same_chat_does_not_deadlock():
+    api = FakeBotApi()
+    queue = _fast_queue()
+
+    async def split_reply():
+        # Как message_splitter внутри напоминания: куски уходят в ту же полосу
+        for n in range(3):
+            await queue.send(5, lambda n=n: api.send_message(5, n), Priority.INTERACTIVE)
+        return "done"
+
+    assert await asyncio.wait_for(queue.send(5, split_reply), 2) == "done"
+    assert api.delivered == [(5, 0), (5, 1), (5, 2)]
+    queue.close()
+
+
+async def test_nested_send_uses_the_outer_jobs_token():
+    api = FakeBotApi()
+    queue = _fast_queue(private_rate=4, private_burst=1)
+
+    async def reminder():
+        # Внешнее задание само ничего не шлёт: его токен уходит первому куску
+        return await queue.send(5, lambda: api.send_message(5, 0))
+
+    started = time.monotonic()
+    assert await queue.send(5, reminder) == 0
+    assert time.monotonic() - started < 0.2
+    queue.close()
+
+
+async def test_send_all_holds_the_lane_between_parts():
+    api = FakeBotApi(latency=0.01)
+    queue = _fast_queue()
+    parts = asyncio.ensure_future(queue.send_all(
+        5, [lambda n=n: api.send_message(5, n) for n in range(3)], Priority.INTERACTIVE
+    ))
+    await asyncio.sleep(0.005)
+    other = await queue.send(5, lambda: api.send_message(5, 99), Priority.INTERACTIVE)
+
+    assert await parts == [0, 1, 2] and other == 99
+    assert api.delivered == [(5, 0), (5, 1), (5, 2), (5, 99)]
+    queue.close()
+
+
+async def test_every_send_message_goes_through_the_chat_lane(monkeypatch):
+    queue = _fast_queue()
+    monkeypatch.setattr(outbound, "_queue", queue)
+    sent = []
+
+    async def original(bot, chat_id, text, **kwargs):
+        slot = outbound._current_slot.get()
+        sent.append((slot.chat_id if slot else None, len(text)))
+        return len(text)
+
+    monkeypatch.setattr(message_splitter, "_original_send_message", original)
+    await message_splitter._splitting_send_message(object(), 5, "короткий ответ")
+    await message_splitter._splitting_send_message(
+        object(), chat_id=5, text="слово " * message_splitter.MAX_LEN
+    )
+
+    assert sent[0] == (5, len("короткий ответ"))
+    assert len(sent) > 2 and all(chat_id == 5 for chat_id, _ in sent)
+    queue.close()
+
+
+async def test_depth_and_wait_metrics():
+    recorded = []
+
+    class Metrics:
+        def set(self, name, labels, value):
+            recorded.append(("set", name, labels["priority"], value))
+
+        def observe(self, name, labels, value):
+            recorded.append(("observe", name, labels["priority"], value))
+
+        def inc(self, name, labels, value=1):
+            recorded.append(("inc", name, labels["priority"], value))
+
+    api = FakeBotApi(flood_every=2)
+    queue = _fast_queue()
+    queue.metrics = Metrics()
+    await asyncio.gather(*(
+        queue.send(1, lambda n=n: api.send_message(1, n), Priority.BULK) for n in range(3)
+    ))
+
+    depths = [value for kind, name, _, value in recorded if name == "outbound_queue_depth"]
+    assert max(depths) >= 2 and depths[-1] == 0
+    waits = [r for r in recorded if r[1] == "outbound_wait_seconds"]
+    assert len(waits) == 3 and all(r[2] == "bulk" and r[3] >= 0 for r in waits)
+    assert ("inc", "outbound_retry_after_total", "bulk", 1) in recorded
+    queue.close()
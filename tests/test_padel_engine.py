@@ -1,10 +1,14 @@
 """Тесты паделльного движка счёта (очки→гейм→сет→тай-брейк→матч)."""
+import random
+
 from steward.tennis.engine import (
     SIDE_A,
     SIDE_B,
+    PadelScorer,
     is_padel,
     is_team_sport,
     normalize_sport,
+    padel_server_for,
     padel_server_side,
     padel_state,
 )
@@ -167,3 +171,40 @@ def test_server_alternates_each_game():
     assert padel_server_side([], SIDE_A) == SIDE_A
     assert padel_server_side(game(SIDE_A), SIDE_A) == SIDE_B      # после 1 гейма
     assert padel_server_side(game(SIDE_A) + game(SIDE_B), SIDE_A) == SIDE_A  # после 2
+
+
+# ── инкрементальный счёт ──────────────────────────────────────────────────────
+
+def test_scorer_matches_replay_through_taps_and_undos():
+    rng = random.Random(7)
+    for golden in (True, False):
+        for sets_to_win in (1, 2):
+            scorer = PadelScorer(golden_point=golden, sets_to_win=sets_to_win)
+            log: list[str] = []
+            for _ in range(600):
+                if log and rng.random() < 0.2:
+                    log.pop()
+                    st = scorer.undo()
+                else:
+                    # Перекос в пользу одной стороны — чаще доходим до тай-брейков и конца матча
+                    side = SIDE_A if rng.random() < 0.55 else SIDE_B
+                    log.append(side)
+                    st = scorer.apply(side)
+                expected = padel_state(log, golden_point=golden, sets_to_win=sets_to_win)
+                assert st == expected
+                assert len(scorer) == len(log)
+                assert padel_server_for(st, SIDE_B) == padel_server_side(
+                    log, SIDE_B, golden_point=golden, sets_to_win=sets_to_win
+                )
+
+
+def test_scorer_from_log_and_undo_to_start():
+    # 6:0, затем 6:6 и тай-брейк 0:7
+    log = game(SIDE_A, 6) + game(SIDE_A, 5) + game(SIDE_B, 5) + game(SIDE_A) + game(SIDE_B) + b(7)
+    scorer = PadelScorer.from_log(log)
+    assert scorer.state == padel_state(log)
+    assert scorer.state.completed_sets == [(6, 0), (6, 7)]
+    for _ in log:
+        scorer.undo()
+    assert scorer.state == padel_state([])
+    assert len(scorer) == 0
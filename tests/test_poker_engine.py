@@ -1,11 +1,26 @@
 """Тесты покерного движка: сохранение фишек (фишки не создаются и не теряются)."""
 import random
 
-from steward.poker.engine import PokerGame, PHASE_SHOWDOWN, PHASE_WAITING
+import numpy as np
+
+from steward.poker.engine import (
+    SUITS,
+    Card,
+    PokerGame,
+    PHASE_SHOWDOWN,
+    PHASE_WAITING,
+    _eval5,
+    best_hand,
+    best_hand_bruteforce,
+    hand_label,
+)
+from steward.poker import bot_ai
 from steward.poker.bot_ai import decide
+from steward.poker.equity import card_id, estimate_equity, hand_values
+from steward.poker.evaluator import hand_value
 
 
-def _play_hand(game: PokerGame):
+def _play_hand(game: PokerGame, difficulty: str = "medium"):
     """Доигрывает текущую раздачу ботами до шоудауна/ожидания."""
     guard = 0
     while game.phase not in (PHASE_SHOWDOWN, PHASE_WAITING):
@@ -15,7 +30,7 @@ def _play_hand(game: PokerGame):
         if idx < 0:
             break
         p = game.players[idx]
-        act, amount = decide(game, idx, "medium")
+        act, amount = decide(game, idx, difficulty)
         ok, _ = game.action(p.user_id, act, amount)
         if not ok:
             ok, _ = game.action(p.user_id, "fold")
@@ -76,3 +91,67 @@ def test_busted_player_does_not_inject_phantom_chips():
     assert _chip_total(game) == expected
     assert busted.total_bet == 0
     assert busted.all_in is False
+
+
+DECK = [Card(r, s) for r in range(2, 15) for s in SUITS]
+
+
+def _cards(text: str) -> list[Card]:
+    ranks = {"T": 10, "J": 11, "Q": 12, "K": 13, "A": 14}
+    return [Card(ranks.get(c[0]) or int(c[0]), c[1]) for c in text.split()]
+
+
+def test_table_evaluator_matches_bruteforce():
+    rng = random.Random(7)
+    for n in (5, 6, 7):
+        for _ in range(5000):
+            cards = rng.sample(DECK, n)
+            score, combo = best_hand(cards[:2], cards[2:])
+            assert score == best_hand_bruteforce(cards[:2], cards[2:])[0], cards
+            assert len(combo) == 5 and _eval5(combo) == score
+
+
+def test_table_evaluator_edge_hands():
+    cases = {
+        "Ah 2h 3h 4h 5h Kd Kc": (8, 5),  # стрит-флеш от туза
+        "9s 9h 9d 9c Kd Kc Ks": (7, 9, 13),
+        "Qs Qh Qd 7c 7d 7h 2s": (6, 12, 7),  # два сета
+        "Ah 2d 3c 4s 5h 9d Jc": (4, 5),
+        "Ks Kh 7d 7c 4s 4h Ad": (2, 13, 7, 14),  # третья пара уходит в кикер
+    }
+    for text, expected in cases.items():
+        cards = _cards(text)
+        assert best_hand(cards[:2], cards[2:])[0] == expected, text
+    assert hand_label(_cards("Ah 2h"), _cards("3h 4h 5h"))[0] == "Straight Flush"
+
+
+def test_vectorized_values_match_scalar():
+    rng = random.Random(3)
+    hands = [rng.sample(DECK, 7) for _ in range(3000)]
+    values = hand_values(np.array([[card_id(c) for c in h] for h in hands]))
+    assert values.tolist() == [hand_value(h) for h in hands]
+
+
+def test_equity_estimates():
+    rng = np.random.default_rng(0)
+    aces = estimate_equity(_cards("Ah As"), [], 1, budget=10, max_trials=8000, rng=rng)
+    assert 0.82 < aces < 0.88
+    # Натсовый стрит-флеш на ривере не проигрывает никогда
+    nuts = estimate_equity(_cards("Ah Kh"), _cards("Qh Jh Th 2c 3d"), 3, budget=10, max_trials=512, rng=rng)
+    assert nuts == 1.0
+
+
+def test_chip_conservation_hard_bots(monkeypatch):
+    # Одна пачка симуляций на решение — здесь важна корректность, а не сила игры
+    monkeypatch.setattr(bot_ai, "HARD_EQUITY_BUDGET", 0)
+    for seed in range(20):
+        random.seed(seed)
+        game = PokerGame(10, 20, 1000)
+        for i in range(4):
+            game.add_player(i, f"P{i}")
+        expected = _chip_total(game)
+        for _ in range(10):
+            if not game.start_hand():
+                break
+            _play_hand(game, "hard")
+            assert _chip_total(game) == expected
@@ -0,0 +1,128 @@
+"""Repository group commit: debounced save() + flush() barrier."""
+import asyncio
+from unittest.mock import MagicMock
+
+from steward.data.models.user import User
+from steward.data.repository import Repository, Storage
+
+
+class CountingStorage(Storage):
+    incremental = True
+
+    def __init__(self):
+        self.full_writes = 0
+        self.changes: list[set[str]] = []
+
+    async def read_dict(self) -> dict:
+        return {}
+
+    async def write_dict(self, data: dict):
+        self.full_writes += 1
+
+    async def write_changes(self, changes: dict):
+        self.changes.append(set(changes))
+
+
+def _repo(window: float) -> tuple[Repository, CountingStorage]:
+    storage = CountingStorage()
+    return Repository(storage, save_window=window), storage
+
+
+async def test_without_window_every_save_writes():
+    repo, storage = _repo(0)
+    await repo.save()
+    await repo.save("users")
+    assert storage.full_writes == 1
+    assert storage.changes == [{"users"}]
+
+
+async def test_saves_within_window_are_coalesced():
+    repo, storage = _repo(0.05)
+    calls = 0
+
+    def on_save():
+        nonlocal calls
+        calls += 1
+
+    repo.subscribe_on_save(on_save)
+    await asyncio.gather(*(repo.save("users") for _ in range(10)), repo.save("chats"))
+    assert storage.changes == []
+
+    await asyncio.sleep(0.1)
+    assert storage.changes == [{"users", "chats"}]
+    assert storage.full_writes == 0
+    assert calls == 1
+
+
+async def test_unhinted_save_forces_full_write():
+    repo, storage = _repo(0.05)
+    await repo.save("users")
+    await repo.save()
+    await asyncio.sleep(0.1)
+    assert storage.full_writes == 1
+    assert storage.changes == []
+
+
+async def test_flush_is_a_durability_barrier():
+    repo, storage = _repo(10)
+    repo.db.users.append(User(1, "alice"))
+    await repo.save("chats")
+    await repo.flush("users")
+    assert storage.changes == [{"users", "chats"}]
+
+    # Отложенный флашер больше ничего не пишет
+    await repo.flush()
+    assert storage.full_writes == 1
+
+
+async def test_flush_reports_metrics():
+    repo, storage = _repo(0.05)
+    metrics = MagicMock()
+    repo.set_metrics(metrics)
+    for _ in range(3):
+        await repo.save("users")
+    await repo.flush()
+
+    metrics.inc.assert_any_call("db_flushes_total", {})
+    metrics.inc.assert_any_call("db_coalesced_saves_total", {}, 3)
+    assert metrics.observe.call_args.args[0] == "db_flush_seconds"
+
+
+async def test_save_during_write_is_flushed_by_the_same_task():
+    repo, storage = _repo(0.02)
+    write_started = asyncio.Event()
+    release = asyncio.Event()
+    write_changes = storage.write_changes
+
+    async def slow_write(changes):
+        write_started.set()
+        await release.wait()
+        await write_changes(changes)
+
+    storage.write_changes = slow_write
+    await repo.save("users")
+    await write_started.wait()
+    await repo.save("chats")
+    release.set()
+
+    await asyncio.sleep(0.1)
+    assert storage.changes == [{"users"}, {"chats"}]
+
+
+async def test_failed_write_keeps_fields_dirty():
+    repo, storage = _repo(0.02)
+    write_changes = storage.write_changes
+    failures = [OSError("disk full")]
+
+    async def flaky_write(changes):
+        if failures:
+            raise failures.pop()
+        await write_changes(changes)
+
+    storage.write_changes = flaky_write
+    await repo.save("users")
+    await asyncio.sleep(0.03)
+    await repo.save("chats")
+
+    await asyncio.sleep(0.1)
+    assert storage.changes == [{"users", "chats"}]
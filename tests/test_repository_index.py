@@ -0,0 +1,113 @@
+"""Secondary indexes on Repository collections."""
+from steward.data.models.bill_v2 import BillPerson, BillV2
+from steward.data.models.user import User
+from steward.data.repository import Repository, Storage
+from steward.framework.collection import ListCollection
+from tests.conftest import make_repository
+
+
+class DictStorage(Storage):
+    def __init__(self):
+        self.data: dict = {}
+
+    async def read_dict(self) -> dict:
+        return self.data
+
+    async def write_dict(self, data: dict):
+        self.data = data
+
+
+def _bill(bill_id: int, author: str, participants: list[str]) -> BillV2:
+    return BillV2(id=bill_id, name=f"bill {bill_id}", author_person_id=author,
+                  participants=participants, transactions=[])
+
+
+def test_chat_settings_lookup_reuses_created_entry():
+    repo = make_repository()
+    s = repo.chat_settings_for(-1)
+    assert repo.chat_settings_for(-1) is s
+    assert len(repo.db.chat_settings) == 1
+
+
+def test_direct_list_mutations_are_picked_up():
+    repo = make_repository()
+    repo.db.users.append(User(1, "alice"))
+    assert repo.get_user(1).username == "alice"
+
+    repo.db.users.append(User(2, "bob"))
+    assert repo.get_user(2).username == "bob"
+
+    repo.db.users = [u for u in repo.db.users if u.id != 1]
+    assert repo.get_user(1) is None
+    assert repo.get_user(2).username == "bob"
+
+
+async def test_mutable_key_is_reindexed_on_save():
+    repo = make_repository()
+    person, _ = repo.get_or_create_anonymous_person("Вася")
+    assert repo.get_bill_person_by_telegram_id(42) is None
+
+    person.telegram_id = 42
+    await repo.save("bill_persons")
+    assert repo.get_bill_person_by_telegram_id(42) is person
+
+
+def test_mutable_key_edited_in_place_is_found_before_save():
+    repo = make_repository()
+    person, _ = repo.get_or_create_anonymous_person("Вася")
+    assert repo.get_bill_person_by_telegram_id(42) is None
+
+    person.telegram_id = 42
+    assert repo.get_bill_person_by_telegram_id(42) is person
+
+    # Замена элемента той же длины списка тоже не прячет новую запись
+    replacement = BillPerson(id="p2", display_name="Петя", telegram_id=43)
+    repo.db.bill_persons[0] = replacement
+    assert repo.get_bill_person_by_telegram_id(43) is replacement
+    assert repo.get_bill_person_by_telegram_id(42) is None
+
+
+async def test_bills_for_person_uses_participants_index():
+    repo = make_repository()
+    repo.db.bill_persons.extend(BillPerson(id=pid, display_name=pid) for pid in "abc")
+    repo.db.bills_v2.extend([
+        _bill(1, "a", ["a", "b"]),
+        _bill(2, "b", ["b"]),
+        _bill(3, "c", ["c"]),
+    ])
+    assert [b.id for b in repo.get_bills_v2_for_person("b")] == [1, 2]
+
+    repo.db.bills_v2[2].participants.append("b")
+    await repo.save()
+    assert [b.id for b in repo.get_bills_v2_for_person("b")] == [1, 2, 3]
+
+    repo.merge_person("b", "a")
+    assert [b.id for b in repo.get_bills_v2_for_person("a")] == [1, 2, 3]
+    assert repo.get_bills_v2_for_person("b") == []
+
+
+def test_collection_maintains_index_on_add_remove_replace():
+    repo = make_repository()
+    users: ListCollection[User] = ListCollection(repo, "users")
+    alice = users.add(User(1, "alice"))
+    users.add(User(2, "bob"))
+    assert users.find_by(id=1) is alice
+
+    users.remove(alice)
+    assert users.find_by(id=1) is None
+    assert len(repo.indexes.lookup("users", "id", 2)) == 1
+
+    users.replace_all([User(3, "carol")])
+    assert users.find_by(id=2) is None
+    assert users.filter(id=3, username="carol")[0].username == "carol"
+
+
+async def test_indexes_are_rebuilt_after_migrate():
+    repo = Repository(DictStorage())
+    repo.db.users.append(User(7, "dave"))
+    repo.db.bill_persons.append(BillPerson(id="p", display_name="Dave", telegram_id=7))
+    await repo.save()
+
+    await repo.migrate()
+    assert repo.get_user(7).username == "dave"
+    assert repo.get_bill_person_by_telegram_id(7).id == "p"
@@ -0,0 +1,99 @@
+"""Off-loop serialization: the snapshot taken on the loop is isolated from later edits."""
+import asyncio
+import datetime
+import json
+
+from steward.data.models.db import (
+    Database,
+    serialize_snapshot,
+    serialize_to_dict,
+    snapshot_fields,
+)
+from steward.data.models.rule import Response, Rule, RulePattern
+from steward.data.models.user import User
+from steward.data.repository import JsonEncoder, Storage
+from steward.delayed_action.reminder import ReminderDelayedAction, ReminderGenerator
+from tests.conftest import make_repository
+
+
+def _populated_db() -> Database:
+    db = Database()
+    db.admin_ids = {1, 2}
+    db.users.append(User(1, "alice", [10], monkeys=5))
+    db.rules.append(
+        Rule(
+            from_users={0},
+            pattern=RulePattern("hi"),
+            responses=[Response(1, 2, 1000)],
+            tags=[],
+            id=1,
+            chats={-1},
+        )
+    )
+    now = datetime.datetime.now(datetime.timezone.utc)
+    db.delayed_actions.append(
+        ReminderDelayedAction(
+            generator=ReminderGenerator(next_fire=now),
+            id=1,
+            chat_id=-1,
+            user_id=1,
+            text="ping",
+            created_at=now,
+        )
+    )
+    db.last_message_at[-1] = now
+    return db
+
+
+def _dump(data) -> str:
+    return json.dumps(data, sort_keys=True, cls=JsonEncoder)
+
+
+def test_snapshot_serializes_like_asdict():
+    db = _populated_db()
+    assert _dump(serialize_snapshot(snapshot_fields(db))) == _dump(serialize_to_dict(db))
+
+
+def test_snapshot_of_selected_fields():
+    db = _populated_db()
+    data = serialize_snapshot(snapshot_fields(db, ["users"]))
+    assert list(data) == ["users"]
+    assert data["users"][0]["username"] == "alice"
+
+
+def test_snapshot_keeps_class_marks():
+    db = _populated_db()
+    data = serialize_snapshot(snapshot_fields(db, ["delayed_actions"]))
+    assert data["delayed_actions"][0]["__class_mark__"] == "delayed_action/reminder"
+
+
+def test_snapshot_is_isolated_from_later_mutations():
+    db = _populated_db()
+    snapshot = snapshot_fields(db, ["users"])
+    db.users[0].monkeys = 999
+    db.users.append(User(2, "bob"))
+
+    data = serialize_snapshot(snapshot)
+    assert [u["monkeys"] for u in data["users"]] == [5]
+
+
+async def test_save_writes_state_as_of_save_call():
+    written: list[dict] = []
+
+    class RecordingStorage(Storage):
+        async def read_dict(self):
+            return {}
+
+        async def write_dict(self, data):
+            written.append(data)
+
+    repo = make_repository()
+    repo._storage = RecordingStorage()
+    repo.db.users.append(User(1, "alice", monkeys=5))
+
+    task = asyncio.create_task(repo.save())
+    await asyncio.sleep(0)  # снимок снят, сериализация ушла в поток
+    repo.db.users[0].monkeys = 0
+    await task
+
+    assert written[0]["users"][0]["monkeys"] == 5
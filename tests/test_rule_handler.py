@@ -167,6 +167,44 @@ class TestRuleAnswerFromUsers:
         assert not handled
 
 
+class TestRuleAnswerIndex:
+    def _rule(self, rule_id, regex, ignore_case=1, chats=(CHAT_ID,)):
+        return Rule(
+            id=rule_id,
+            from_users={0},
+            pattern=RulePattern(regex=regex, ignore_case_flag=ignore_case),
+            responses=[Response(0, 0, 1000, text=f"r{rule_id}")],
+            tags=[],
+            chats=set(chats),
+        )
+
+    async def test_mixed_case_flags_in_one_chat(self):
+        repo = make_repository()
+        repo.db.rules = [self._rule(1, "Привет", ignore_case=0), self._rule(2, "пока")]
+        assert not (await _run_answer(repo, "привет"))[0]
+        assert (await _run_answer(repo, "ПОКА"))[0]
+
+    async def test_backreference_rule_still_matches(self):
+        repo = make_repository()
+        repo.db.rules = [self._rule(1, r"(\w)\1"), self._rule(2, "пока")]
+        assert (await _run_answer(repo, "ааа"))[0]
+        assert not (await _run_answer(repo, "абв"))[0]
+
+    async def test_edit_is_picked_up_after_save(self):
+        repo = make_repository()
+        repo.db.rules = [self._rule(1, "привет")]
+        feature = RuleAnswerFeature()
+        feature.repository = repo
+        feature.bot = MagicMock()
+        assert await feature.chat(make_text_context("привет", repo=repo))
+
+        repo.db.rules[0].pattern.regex = "пока"
+        repo.db.rules[0].chats.add(-777)
+        await repo.save("rules")
+        assert not await feature.chat(make_text_context("привет", repo=repo))
+        assert await feature.chat(make_text_context("пока", repo=repo, chat_id=-777))
+
+
 class TestRuleMigration:
     def test_global_rules_scoped_to_service_chat(self):
         repo = make_repository()
@@ -0,0 +1,213 @@
+"""SessionRegistry: индексы по чату и пользователю, истечение по куче сроков, визард после перезапуска."""
+import asyncio
+import threading
+import time
+from contextlib import suppress
+from unittest.mock import MagicMock
+
+import pytest
+
+from steward.framework import Feature, FeatureContext, ask, subcommand, wizard
+from steward.session import session_registry
+from steward.session.session_registry import (
+    SessionRegistry,
+    registry,
+    try_get_session_handler,
+)
+from tests.conftest import get_reply_text, make_context, make_repository, make_text_context
+
+done: list[dict] = []
+
+
+class _PollFeature(Feature):
+    command = "poll"
+    description = "Опрос"
+
+    @subcommand("", description="Новый опрос")
+    async def start(self, ctx: FeatureContext):
+        await self.start_wizard("poll:add", ctx, audience="team")
+
+    @subcommand("raw", description="Опрос с несериализуемым состоянием")
+    async def start_raw(self, ctx: FeatureContext):
+        await self.start_wizard("poll:add", ctx, audience=object())
+
+    @wizard("poll:add", ask("title", "Название?"), ask("votes", "Сколько голосов?"))
+    async def on_done(self, ctx: FeatureContext, title, votes, audience):
+        done.append({"title": title, "votes": votes, "audience": audience})
+
+
+class _Handler:
+    def __init__(self):
+        self.expired = []
+
+    def expire_session_by_key(self, key):
+        self.expired.append(key)
+
+
+@pytest.fixture(autouse=True)
+def _clear_sessions():
+    registry.clear()
+    done.clear()
+    yield
+    registry.clear()
+
+
+def _feature(repo):
+    feature = _PollFeature()
+    feature.repository = repo
+    feature.bot = MagicMock()
+    return feature
+
+
+async def _answer(text: str, repo):
+    ctx = make_text_context(text, repo=repo)
+    ctx.update.message_reaction = None
+    session = try_get_session_handler(ctx.update)
+    assert session is not None
+    await session.chat(ctx)
+    return ctx
+
+
+def test_indexes_follow_activate_and_deactivate():
+    sessions = SessionRegistry()
+    sessions.activate((-1, 10), "a")
+    sessions.activate((-1, 11), "b")
+    sessions.activate((-2, 10), "c")
+
+    assert sessions.users_in_chat(-1) == {10, 11}
+    assert sessions.chats_of_user(10) == {-1, -2}
+
+    sessions.deactivate((-1, 10))
+    sessions.deactivate((-1, 11))
+
+    assert not sessions.has_session_in_chat(-1)
+    assert sessions.has_session_in_chat(-2)
+    assert sessions.chats_of_user(10) == {-2}
+    assert len(sessions) == 1
+
+
+def test_expiry_skips_touched_sessions():
+    sessions = SessionRegistry()
+    handler = _Handler()
+    sessions.activate((-1, 1), handler, at=100.0)
+    sessions.activate((-1, 2), handler, at=100.0)
+    sessions.last_activity[(-1, 2)] = 150.0
+
+    assert sessions.expire_due(60, now=170.0) == 1
+    assert handler.expired == [(-1, 1)]
+    assert (-1, 2) in sessions
+    assert sessions.next_deadline(60) == 210.0
+
+    # Повторная активация после выхода не оставляет в куче живых дублей
+    sessions.deactivate((-1, 2))
+    sessions.activate((-1, 2), handler, at=200.0)
+    assert sessions.expire_due(60, now=255.0) == 0
+    assert sessions.expire_due(60, now=261.0) == 1
+    assert len(sessions) == 0
+
+
+async def test_run_expires_without_updates():
+    sessions = SessionRegistry()
+    handler = _Handler()
+    sessions.activate((-1, 1), handler)
+    task = asyncio.create_task(sessions.run(0.05))
+    await asyncio.sleep(0.2)
+    task.cancel()
+
+    assert handler.expired == [(-1, 1)]
+    assert not sessions.has_session_in_chat(-1)
+
+
+async def test_run_survives_a_failing_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_registry, "SNAPSHOT_INTERVAL_SEC", 0.01)
+
+    class Broken(_Handler):
+        def snapshot_session(self, key):
+            raise RuntimeError("boom")
+
+    sessions = SessionRegistry()
+    handler = Broken()
+    sessions.activate((-1, 1), handler)
+    task = asyncio.create_task(sessions.run(0.1, str(tmp_path / "sessions.json")))
+    await asyncio.sleep(0.3)
+
+    assert not task.done()
+    task.cancel()
+    assert handler.expired == [(-1, 1)]
+
+
+async def test_cancel_waits_for_the_snapshot_being_written(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_registry, "SNAPSHOT_INTERVAL_SEC", 0.01)
+    started, finished = threading.Event(), []
+
+    def slow_write(path, text):
+        started.set()
+        time.sleep(0.2)
+        finished.append(path)
+
+    monkeypatch.setattr(session_registry, "_write", slow_write)
+    sessions = SessionRegistry()
+    sessions.activate((-1, 1), _Handler())
+    task = asyncio.create_task(sessions.run(0, str(tmp_path / "sessions.json")))
+    await asyncio.to_thread(started.wait, 1)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    assert finished
+
+
+async def test_failed_snapshot_keeps_sessions_dirty(tmp_path, monkeypatch):
+    def broken_write(path, text):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(session_registry, "_write", broken_write)
+    sessions = SessionRegistry()
+    sessions.activate((-1, 1), _Handler())
+    await sessions._write_snapshot(str(tmp_path / "sessions.json"))
+
+    assert sessions.dirty
+
+
+def test_sessions_without_ttl_stay_off_the_heap():
+    sessions = SessionRegistry()
+    sessions.activate((-1, 1), _Handler())
+    sessions.set_ttl(0)
+    sessions.activate((-1, 2), _Handler())
+
+    assert sessions.next_deadline(60) is None
+    assert len(sessions) == 2
+
+
+async def test_wizard_resumes_after_restart(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSION_SNAPSHOT_PATH", str(tmp_path / "sessions.json"))
+    repo = make_repository()
+    ctx = make_context("poll", repo=repo)
+    ctx.update.message_reaction = None
+    await _feature(repo).chat(ctx)
+    answer = await _answer("Обед", repo)
+    assert get_reply_text(answer.message.reply_text) == "Сколько голосов?"
+
+    session_registry.save()
+    registry.clear()
+    # Новый процесс: свежие экземпляры фич, сессии только с диска
+    assert session_registry.load([_feature(repo)], ttl_seconds=3600) == 1
+
+    answer = await _answer("3", repo)
+
+    answer.message.reply_text.assert_not_called()
+    assert done == [{"title": "Обед", "votes": "3", "audience": "team"}]
+    assert len(registry) == 0
+
+
+async def test_unserializable_wizard_is_not_saved(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSION_SNAPSHOT_PATH", str(tmp_path / "sessions.json"))
+    repo = make_repository()
+    ctx = make_context("poll", args="raw", repo=repo)
+    ctx.update.message_reaction = None
+    await _feature(repo).chat(ctx)
+
+    session_registry.save()
+    registry.clear()
+
+    assert session_registry.load([_feature(repo)], ttl_seconds=3600) == 0
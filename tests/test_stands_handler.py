@@ -6,11 +6,7 @@ from telegram import ForceReply
 
 from steward.data.models.user import User
 from steward.features.stands import StandsFeature
-from steward.session.session_registry import (
-    session_last_activity,
-    sessions,
-    try_get_session_handler,
-)
+from steward.session.session_registry import registry, try_get_session_handler
 from tests.conftest import (
     DEFAULT_USER_ID,
     get_reply_text,
@@ -42,11 +38,9 @@ def _make_feature(repo):
 
 @pytest.fixture(autouse=True)
 def _clear_sessions():
-    sessions.clear()
-    session_last_activity.clear()
+    registry.clear()
     yield
-    sessions.clear()
-    session_last_activity.clear()
+    registry.clear()
 
 
 async def _start_add(feature, repo, *, chat_id=None):
@@ -0,0 +1,150 @@
+"""Дельта-протокол состояний: diff/apply и DeltaStream поверх покерной комнаты."""
+import json
+from types import SimpleNamespace
+
+from steward.api import state_delta
+from steward.api.state_delta import DeltaStream, apply, diff
+from steward.poker import room_manager as poker_rooms
+from steward.poker.bot_ai import decide
+from steward.poker.engine import PHASE_SHOWDOWN, PHASE_WAITING
+
+
+class FakeWs:
+    closed = False
+
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def send_str(self, data: str):
+        self.sent.append(json.loads(data))
+
+
+def _delta_ws() -> FakeWs:
+    ws = FakeWs()
+    assert state_delta.negotiate(SimpleNamespace(query={"protocol": "2"}), ws)
+    return ws
+
+
+class Client:
+    """Клиент протокола: снимок + дельты, как web/src/api/stateStream.js."""
+
+    def __init__(self):
+        self.seq = None
+        self.state = None
+        self.resyncs = 0
+
+    def feed(self, msg: dict):
+        if "base" not in msg:
+            self.seq, self.state = msg["seq"], msg["state"]
+        elif msg["base"] == self.seq:
+            self.state = apply(self.state, msg["ops"])
+            self.seq = msg["seq"]
+        else:
+            self.resyncs += 1
+
+
+def test_diff_roundtrip():
+    old = {
+        "players": [{"id": 1, "chips": 100}, {"id": 2, "chips": 50}, {"id": 3, "chips": 0}],
+        "pot": 30,
+        "a/b~c": 1,
+        "gone": True,
+        "board": ["Ah"],
+        "ready": [1, 2, 3],
+    }
+    new = {
+        "players": [{"id": 1, "chips": 80}, {"id": 2, "chips": 50}, {"id": 3, "chips": 0}],
+        "pot": 50,
+        "a/b~c": 2,
+        "board": ["Ah", "Kd", "2c"],
+        "phase": "flop",
+        "ready": [1, 2],
+    }
+    ops = diff(old, new)
+    assert apply(json.loads(json.dumps(old)), ops) == new
+    assert {"op": "replace", "path": "/players/0/chips", "value": 80} in ops
+    assert {"op": "replace", "path": "/a~1b~0c", "value": 2} in ops
+    assert {"op": "remove", "path": "/ready/2"} in ops
+    # Список переписан целиком — одна замена вместо поэлементных правок
+    assert diff({"x": [1, 2]}, {"x": [3, 4]}) == [{"op": "replace", "path": "/x", "value": [3, 4]}]
+    assert diff(new, new) == []
+
+
+def test_stream_snapshot_then_deltas():
+    stream = DeltaStream("game_state", "game_delta", history=2)
+    ws = _delta_ws()
+    stream.publish({"pot": 0, "players": [1, 2]})
+    client = Client()
+    client.feed(json.loads(stream.snapshot(ws, {"myHand": []})))
+    assert client.state == {"pot": 0, "players": [1, 2], "myHand": []}
+
+    # Версия не поменялась — публикация ничего не рождает
+    assert stream.publish({"pot": 0, "players": [1, 2]}) == client.seq
+    assert stream.render(ws, {"myHand": []}) is None
+
+    # Две версии подряд догоняются одной дельтой, вместе с личными полями
+    stream.publish({"pot": 10, "players": [1, 2]})
+    stream.publish({"pot": 20, "players": [1, 2, 3]})
+    client.feed(json.loads(stream.render(ws, {"myHand": ["Ah"]})))
+    assert client.state == {"pot": 20, "players": [1, 2, 3], "myHand": ["Ah"]}
+
+    # Отстал дальше истории — получает снимок
+    for pot in (30, 40, 50):
+        stream.publish({"pot": pot, "players": [1, 2, 3]})
+    msg = json.loads(stream.render(ws, {"myHand": ["Ah"]}))
+    assert msg["type"] == "game_state" and msg["seq"] == stream.seq
+    assert msg["state"]["pot"] == 50
+
+
+async def test_poker_room_deltas_reconstruct_full_state(monkeypatch):
+    monkeypatch.setattr(poker_rooms.time, "time", lambda: 1_000.0)
+    room = poker_rooms.Room("r1", "Стол", creator_id=1)
+    for uid in range(1, 10):
+        room.game.add_player(uid, f"p{uid}")
+    delta_ws, legacy_ws = _delta_ws(), FakeWs()
+    # uid 1 в двух вкладках: с дельтами и по-старому
+    room.connections = {1: delta_ws}
+    legacy = {1: legacy_ws}
+    client = Client()
+    delta_bytes = full_bytes = 0
+
+    async def push():
+        nonlocal delta_bytes, full_bytes
+        await room.send_states()
+        room.fanout.send_each(legacy, lambda uid: room.state_message(uid, legacy_ws))
+        await room.fanout.drain()
+        delta_msg, full_msg = delta_ws.sent.pop(), legacy_ws.sent.pop()
+        delta_bytes += len(json.dumps(delta_msg, ensure_ascii=False))
+        full_bytes += len(json.dumps(full_msg, ensure_ascii=False))
+        client.feed(delta_msg)
+        assert client.state == full_msg["state"]
+
+    try:
+        for _ in range(3):
+            room.game.start_hand()
+            await push()
+            guard = 0
+            while room.game.phase not in (PHASE_SHOWDOWN, PHASE_WAITING) and guard < 500:
+                guard += 1
+                idx = room.game.current_idx
+                player = room.game.players[idx]
+                act, amount = decide(room.game, idx, "easy")
+                if not room.game.action(player.user_id, act, amount)[0]:
+                    room.game.action(player.user_id, "fold")
+                await push()
+    finally:
+        room._cancel_turn_timer()
+    assert client.resyncs == 0
+    assert delta_bytes * 3 < full_bytes
+
+
+async def test_resync_snapshot_restarts_stream():
+    stream = DeltaStream("room_state", "room_delta")
+    ws = _delta_ws()
+    stream.publish({"turn": "white"})
+    first = json.loads(stream.snapshot(ws, {"role": "white"}))
+    stream.publish({"turn": "black"})
+    again = json.loads(stream.snapshot(ws, {"role": "white"}))
+    assert again["seq"] == first["seq"] + 1
+    assert again["state"] == {"turn": "black", "role": "white"}
+    assert stream.render(ws, {"role": "white"}) is None
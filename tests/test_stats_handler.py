@@ -8,13 +8,14 @@ from steward.features.stats import (
     _Period,
     _Scope,
 )
-from steward.metrics.base import MetricSample
+from steward.metrics.base import MetricSample, gather_queries
 from tests.conftest import CHAT_ID, invoke, make_repository
 
 
-def _metrics_mock():
+def _metrics_mock(samples=()):
     m = MagicMock()
-    m.query = AsyncMock(return_value=[])
+    m.query = AsyncMock(return_value=list(samples))
+    m.query_many = lambda promqls, **kw: gather_queries(m, promqls, **kw)
     return m
 
 
@@ -42,12 +43,9 @@ class TestStatsFeature:
         assert "Нет данных" in reply or "📊" in reply
 
     async def test_curse_metric_detail_is_available(self):
-        metrics = MagicMock()
-        metrics.query = AsyncMock(
-            return_value=[
-                MetricSample(labels={"user_id": "1", "user_name": "alice"}, value=4),
-            ]
-        )
+        metrics = _metrics_mock([
+            MetricSample(labels={"user_id": "1", "user_name": "alice"}, value=4),
+        ])
         repo = make_repository()
         feature = StatsFeature()
         feature.repository = repo
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 import pytest
 
+from steward.data.models.db import Database
 from steward.data.models.tennis import TennisMatch, TennisSession
 from steward.tennis.engine import (
     SIDE_A,
@@ -341,7 +342,10 @@ from steward.tennis.room_manager import TennisRoom
 
 
 class _FakeRepository:
-    async def save(self):
+    def __init__(self):
+        self.db = Database()
+
+    async def save(self, *fields):
         pass
 
 
@@ -3,6 +3,7 @@ import asyncio
 from datetime import datetime
 
 from steward.data.models.tennis import TennisSession
+from steward.data.repository import JournalFileStorage, Repository
 from steward.tennis.room_manager import TennisRoomManager
 from tests.conftest import make_repository
 
@@ -104,3 +105,40 @@ async def test_padel_rejects_match_edit():
         await room.add_point("a")
     ok, err = await room.update_match(0, 2, 1)
     assert not ok
+
+
+async def test_taps_are_saved_apart_from_sessions_and_folded_back(tmp_path):
+    def storage():
+        return JournalFileStorage(
+            str(tmp_path / "db.json"), journal_path=str(tmp_path / "db.json.journal")
+        )
+
+    repo = Repository(storage())
+    await repo.migrate()
+    s = _padel_session(repo, sets_to_win=2)
+    await repo.save("tennis_sessions")
+    room = _room(repo, s)
+    sessions_version = repo.field_version("tennis_sessions")
+    for side in "aaba":
+        await room.add_point(side)
+    await room.undo_point()
+    # Тапы не переписывают tennis_sessions целиком
+    assert repo.field_version("tennis_sessions") == sessions_version
+    assert [lp.points_log for lp in repo.db.tennis_live_points] == [["a", "a", "b"]]
+
+    reopened = Repository(storage())
+    await reopened.migrate()
+    restored = reopened.db.tennis_sessions[0]
+    assert restored.points_log == ["a", "a", "b"]
+    assert reopened.db.tennis_live_points == []
+    room = _room(reopened, restored)
+    assert room.to_state(1)["padel"]["points"] == ["30", "15"]
+
+    # Завершённый матч пишется в сессию, лайв-запись очков убирается
+    for _ in range(2 + 11 * 4):   # добить гейм и ещё 11 геймов — 6:0 6:0
+        await room.add_point("a")
+    assert len(restored.matches) == 1 and restored.points_log == []
+    assert reopened.db.tennis_live_points == []
+    again = Repository(storage())
+    await again.migrate()
+    assert again.db.tennis_sessions[0].points_log == []
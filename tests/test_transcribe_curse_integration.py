@@ -148,27 +148,23 @@ async def test_transcribe_command_respects_disabled_curse_capability(monkeypatch
     assert repo.db.curse_punishment_debts == []
 
 
-async def test_transcribe_downloads_remote_file_to_temporary_path(monkeypatch):
+async def test_transcribe_downloads_remote_file_to_temporary_path():
     repo = make_repository()
     feature = _make_feature(repo)
     ctx = from_chat_context(make_text_context("ignored", repo=repo))
-    downloaded_paths: list[Path] = []
+    tg_file = MagicMock()
+    tg_file.file_path = "videos/remote.mp4"
 
-    async def fake_fetch(bot, file_id, destination):
-        assert bot is ctx.bot
-        assert file_id == "remote-file-id"
-        destination.write_bytes(b"audio")
-        downloaded_paths.append(destination)
-        return destination
+    async def download_to_drive(custom_path):
+        custom_path.write_bytes(b"audio")
 
-    monkeypatch.setattr(
-        "steward.features.transcribe.fetch_tg_file_to",
-        fake_fetch,
-    )
+    tg_file.download_to_drive = download_to_drive
+    ctx.bot.get_file = AsyncMock(return_value=tg_file)
 
     audio_path = await feature._resolve_audio_path(ctx, "remote-file-id")
 
-    assert audio_path == downloaded_paths[0]
+    ctx.bot.get_file.assert_awaited_once_with("remote-file-id")
+    assert audio_path.suffix == ".media"
     assert audio_path.read_bytes() == b"audio"
     feature._remove_audio_path(audio_path)
     assert not audio_path.exists()
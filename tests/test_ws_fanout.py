@@ -0,0 +1,128 @@
+"""WsFanout: общая сериализация состояния и очереди на сокет."""
+import asyncio
+import json
+
+from steward.api import ws_fanout
+from steward.api.ws_fanout import StateMessage, WsFanout
+from steward.poker.engine import PokerGame
+
+
+class FakeWs:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.closed = False
+        self.sent: list[str] = []
+        self.gate: asyncio.Event | None = None
+
+    async def send_str(self, data: str):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.counters: list[tuple[str, dict]] = []
+        self.observed: list[tuple[str, dict]] = []
+
+    def inc(self, name, labels=None, value=1):
+        self.counters.append((name, labels))
+
+    def observe(self, name, labels, value):
+        self.observed.append((name, labels))
+
+
+def test_state_message_render_matches_full_encode():
+    public = {"phase": "flop", "pot": 120, "name": "Стол"}
+    private = {"myHand": ["Ah", "Kd"], "myIndex": 2}
+    msg = StateMessage("game_state", public, ready=True)
+    assert json.loads(msg.render(private)) == {
+        "type": "game_state", "ready": True, "state": {**public, **private},
+    }
+    assert json.loads(msg.render()) == {"type": "game_state", "ready": True, "state": public}
+    assert json.loads(StateMessage("s", {}).render({"a": 1})) == {"type": "s", "state": {"a": 1}}
+
+
+def test_poker_state_for_is_public_plus_private():
+    game = PokerGame()
+    for uid in (1, 2, 3):
+        game.add_player(uid, f"p{uid}")
+    game.start_hand()
+    for uid in (1, 2, 3, 99):
+        assert game.state_for(uid) == {**game.public_state(), **game.private_state(uid)}
+        assert json.loads(StateMessage("game_state", game.public_state()).render(game.private_state(uid))) == {
+            "type": "game_state", "state": game.state_for(uid),
+        }
+
+
+async def test_slow_socket_does_not_delay_others():
+    fanout = WsFanout("poker", "r1")
+    slow, fast = FakeWs(), FakeWs()
+    slow.gate = asyncio.Event()
+    assert fanout.send_all({1: slow, 2: fast}, "hello") == set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert fast.sent == ["hello"]
+    assert slow.sent == []
+    slow.gate.set()
+    await fanout.drain()
+    assert slow.sent == ["hello"]
+    assert fanout.pending() == 0
+
+
+async def test_queue_coalesces_states_and_drops_oldest(monkeypatch):
+    metrics = RecordingMetrics()
+    monkeypatch.setattr(ws_fanout, "_metrics", metrics)
+    fanout = WsFanout("poker", "r1", queue_limit=3)
+    ws = FakeWs()
+    ws.gate = asyncio.Event()
+    fanout.send(ws, "first")
+    await asyncio.sleep(0)  # "first" уже в отправке
+    fanout.send(ws, "state-1", key="game_state")
+    fanout.send(ws, "chat-1")
+    fanout.send(ws, "state-2", key="game_state")
+    fanout.send(ws, "chat-2")
+    fanout.send(ws, "chat-3")
+    ws.gate.set()
+    await fanout.drain()
+    # state-1 заменён на state-2, chat-1 вытеснен переполнением
+    assert ws.sent == ["first", "state-2", "chat-2", "chat-3"]
+    reasons = [labels["reason"] for name, labels in metrics.counters if name == "ws_messages_dropped_total"]
+    assert reasons == ["coalesced", "overflow"]
+    assert {name for name, _ in metrics.observed} == {"ws_send_lag_seconds"}
+
+
+async def test_closed_and_failing_sockets_are_reported_and_forgotten():
+    fanout = WsFanout("blackjack", "r1")
+    closed = FakeWs()
+    closed.closed = True
+
+    class Broken(FakeWs):
+        async def send_str(self, data):
+            raise ConnectionResetError
+
+    ok, broken = FakeWs(), Broken()
+    assert fanout.send_each({1: closed, 2: ok, 3: broken}, lambda uid: f"s{uid}") == {1}
+    await fanout.drain()
+    assert ok.sent == ["s2"]
+    assert fanout.pending() == 0
+
+
+async def test_fanouts_share_one_queue_per_socket():
+    lobby, room = WsFanout("poker", "lobby"), WsFanout("poker", "r1")
+    ws = FakeWs()
+    ws.gate = asyncio.Event()
+    lobby.send(ws, "first")
+    await asyncio.sleep(0)  # "first" уже в отправке
+    lobby.send(ws, "rooms-old", key="rooms_list")
+    room.send(ws, "state")
+    # Прямой ответ на list_rooms заменяет устаревший список, ещё не ушедший из очереди
+    lobby.send(ws, "rooms-new", key="rooms_list")
+
+    assert (lobby.pending(), room.pending()) == (1, 1)
+    ws.gate.set()
+    await room.drain()
+    assert ws.sent == ["first", "state", "rooms-new"]
+    assert lobby.pending() == 0
@@ -0,0 +1,77 @@
+// Клиент дельта-протокола состояний комнат (steward/api/state_delta.py).
+// Сокет открывается с ?protocol=2: сервер шлёт снимок с seq, дальше — дельты
+// {base, seq, ops}. Пропустили версию — просим снимок через {type: 'resync'}.
+
+export const STATE_PROTOCOL = 2
+
+function unescape(part) {
+  return part.replace(/~1/g, '/').replace(/~0/g, '~')
+}
+
+function setIn(node, parts, op) {
+  const [head, ...rest] = parts
+  const copy = Array.isArray(node) ? node.slice() : { ...node }
+  if (rest.length) {
+    const key = Array.isArray(copy) ? Number(head) : head
+    copy[key] = setIn(copy[key], rest, op)
+    return copy
+  }
+  if (Array.isArray(copy)) {
+    const index = head === '-' ? copy.length : Number(head)
+    if (op.op === 'add') copy.splice(index, 0, op.value)
+    else if (op.op === 'remove') copy.splice(index, 1)
+    else copy[index] = op.value
+  } else if (op.op === 'remove') {
+    delete copy[head]
+  } else {
+    copy[head] = op.value
+  }
+  return copy
+}
+
+// JSON Patch (add/remove/replace) без мутаций: меняются только объекты на пути,
+// так что React видит новые ссылки ровно там, где что-то поменялось.
+export function applyPatch(state, ops) {
+  let result = state
+  for (const op of ops) {
+    if (!op.path) {
+      result = op.value
+      continue
+    }
+    result = setIn(result, op.path.slice(1).split('/').map(unescape), op)
+  }
+  return result
+}
+
+export function createStateStream(onState, requestResync) {
+  let seq = null
+  let state = null
+  let resyncing = false
+  return {
+    // Новый сокет — версия неизвестна до первого снимка
+    reset() {
+      seq = null
+      state = null
+      resyncing = false
+    },
+    snapshot(data) {
+      state = data.state
+      seq = data.seq ?? null
+      resyncing = false
+      onState(state)
+    },
+    delta(data) {
+      if (seq === null || data.base !== seq) {
+        // Устаревшая дельта (пришла после снимка) просто отбрасывается
+        if (!resyncing && (seq === null || data.seq > seq)) {
+          resyncing = true
+          requestResync()
+        }
+        return
+      }
+      state = applyPatch(state, data.ops)
+      seq = data.seq
+      onState(state)
+    },
+  }
+}
@@ -5,6 +5,7 @@ import {
 } from 'lucide-react'
 import { useAuth } from '../context/useAuth'
 import useCasinoSounds from '../hooks/useCasinoSounds'
+import { createStateStream, STATE_PROTOCOL } from '../api/stateStream'
 
 const SUIT_SYMBOL = { h: '♥', d: '♦', c: '♣', s: '♠', '?': '•' }
 
@@ -583,8 +584,15 @@ export default function BlackjackPage() {
 
   const connect = useCallback(() => {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
-    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/blackjack`)
+    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/blackjack?protocol=${STATE_PROTOCOL}`)
     wsRef.current = ws
+    const stateStream = createStateStream(
+      (next) => {
+        setState(next)
+        setView('game')
+      },
+      () => ws.send(JSON.stringify({ type: 'resync' })),
+    )
     ws.onopen = () => {
       setConnected(true)
       ws.send(JSON.stringify({ type: 'auth', initData }))
@@ -597,6 +605,7 @@ export default function BlackjackPage() {
           setRooms(data.rooms || [])
           break
         case 'room_joined':
+          stateStream.reset()
           setRoom(data.room)
           setView('waiting')
           if (data.monkeysBalance !== undefined && data.monkeysBalance !== null) setMonkeyBalance(data.monkeysBalance)
@@ -605,13 +614,16 @@ export default function BlackjackPage() {
           setRoom(data.room)
           break
         case 'game_state':
-          setState(data.state)
-          setView('game')
+          stateStream.snapshot(data)
+          break
+        case 'game_delta':
+          stateStream.delta(data)
           break
         case 'player_ready':
           setState(prev => prev ? { ...prev, readyPlayers: data.readyPlayers } : prev)
           break
         case 'left_room':
+          stateStream.reset()
           setRoom(null)
           setState(null)
           setView('lobby')
@@ -623,6 +635,7 @@ export default function BlackjackPage() {
           setView('waiting')
           break
         case 'reconnected':
+          stateStream.reset()
           setRoom(data.room)
           setView(data.room?.started ? 'game' : 'waiting')
           break
@@ -11,6 +11,7 @@ import Loader from '../components/Loader'
 import { useAuth } from '../context/useAuth'
 import { useToast } from '../context/useToast'
 import useCasinoSounds from '../hooks/useCasinoSounds'
+import { createStateStream, STATE_PROTOCOL } from '../api/stateStream'
 import { api } from '../api/client'
 
 const DIFFICULTIES = [
@@ -332,8 +333,24 @@ export default function BoardGamesPage() {
 
   const connect = useCallback(() => {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
-    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/boardgames`)
+    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/boardgames?protocol=${STATE_PROTOCOL}`)
     wsRef.current = ws
+    const stateStream = createStateStream(
+      (next) => {
+        setState(next)
+        if (!next?.finished) celebratedResultRef.current = ''
+        const winner = next?.winner
+        const roomId = next?.room?.id
+        const resultKey = roomId && winner ? `${roomId}:${winner}` : ''
+        if (next.finished && winner && winner !== 'draw' && celebratedResultRef.current !== resultKey) {
+          celebratedResultRef.current = resultKey
+          confetti({ particleCount: 80, spread: 55, origin: { y: 0.6 } })
+          soundRef.current('bigWin')
+          fetchBalance()
+        }
+      },
+      () => ws.send(JSON.stringify({ type: 'resync' })),
+    )
     ws.onopen = () => {
       setConnected(true)
       ws.send(JSON.stringify({ type: 'auth', initData }))
@@ -344,23 +361,12 @@ export default function BoardGamesPage() {
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data)
       if (data.type === 'rooms_list') setRooms(data.rooms || [])
-      if (data.type === 'room_joined') { setRoom(data.room); setState(null) }
+      if (data.type === 'room_joined') { stateStream.reset(); setRoom(data.room); setState(null) }
       if (data.type === 'room_updated') setRoom(data.room)
-      if (data.type === 'room_state') {
-        setState(data.state)
-        if (!data.state?.finished) celebratedResultRef.current = ''
-        const winner = data.state?.winner
-        const roomId = data.state?.room?.id
-        const resultKey = roomId && winner ? `${roomId}:${winner}` : ''
-        if (data.state.finished && winner && winner !== 'draw' && celebratedResultRef.current !== resultKey) {
-          celebratedResultRef.current = resultKey
-          confetti({ particleCount: 80, spread: 55, origin: { y: 0.6 } })
-          soundRef.current('bigWin')
-          fetchBalance()
-        }
-      }
+      if (data.type === 'room_state') stateStream.snapshot(data)
+      if (data.type === 'room_delta') stateStream.delta(data)
       if (data.type === 'bet_ok') { if (data.monkeys != null) setBalance(data.monkeys); soundRef.current('tick') }
-      if (data.type === 'left_room') { setRoom(null); setState(null); fetchBalance(); fetchStats() }
+      if (data.type === 'left_room') { stateStream.reset(); setRoom(null); setState(null); fetchBalance(); fetchStats() }
       if (data.type === 'error') toastRef.current?.error(data.message || 'Ошибка')
     }
     ws.onclose = () => {
@@ -6,6 +6,7 @@ import {
 } from 'lucide-react'
 import { useAuth } from '../context/useAuth'
 import { api } from '../api/client'
+import { createStateStream, STATE_PROTOCOL } from '../api/stateStream'
 
 function SegButton({ active, onClick, tone = 'gold', className = '', children }) {
   const activeCls = tone === 'indigo'
@@ -1475,8 +1476,15 @@ export default function PokerPage() {
 
   const connect = useCallback(() => {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
-    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/poker`)
+    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/poker?protocol=${STATE_PROTOCOL}`)
     wsRef.current = ws
+    const stateStream = createStateStream(
+      (state) => {
+        setGameState(state)
+        setView('game')
+      },
+      () => ws.send(JSON.stringify({ type: 'resync' })),
+    )
 
     ws.onopen = () => {
       setConnected(true)
@@ -1493,6 +1501,7 @@ export default function PokerPage() {
           setRooms(data.rooms)
           break
         case 'room_joined':
+          stateStream.reset()
           setRoom(data.room)
           if (data.monkeysBalance !== undefined && data.monkeysBalance !== null) {
             setMonkeyBalance(data.monkeysBalance)
@@ -1504,8 +1513,10 @@ export default function PokerPage() {
           setRoom(data.room)
           break
         case 'game_state':
-          setGameState(data.state)
-          setView('game')
+          stateStream.snapshot(data)
+          break
+        case 'game_delta':
+          stateStream.delta(data)
           break
         case 'player_ready':
           setGameState(prev => prev ? { ...prev, readyPlayers: data.readyPlayers } : prev)
@@ -1521,11 +1532,13 @@ export default function PokerPage() {
           setTimeout(() => setError(null), 3000)
           break
         case 'reconnected':
+          stateStream.reset()
           setRoom(data.room)
           if (data.room.started) setView('game')
           else setView('waiting')
           break
         case 'left_room':
+          stateStream.reset()
           setRoom(null)
           if (data.monkeysBalance !== undefined && data.monkeysBalance !== null) {
             setMonkeyBalance(data.monkeysBalance)